@@ -8,6 +8,12 @@ import hashlib
 import secrets
 import json
 
+try:
+    from devassa_personality import invalidate_devassa_state
+except ImportError:
+    def invalidate_devassa_state(user_id):
+        pass
+
 class AdultCommandSystem:
     """
     Sistema de comandos para ativação do modo adulto com verificação de idade.
@@ -296,6 +302,7 @@ Digite 'CANCELAR' para cancelar a ativação.
         
         if 1 <= new_intensity <= 3:
             self.db.save_devassa_profile(user_id, intensity_level=new_intensity)
+            invalidate_devassa_state(user_id)
             description = self.get_intensity_description(new_intensity)
             
             return {
@@ -319,6 +326,7 @@ Digite 'CANCELAR' para cancelar a ativação.
         valid_genders = ['feminino', 'masculino', 'neutro']
         if gender in valid_genders:
             self.db.save_devassa_profile(user_id, gender_preference=gender)
+            invalidate_devassa_state(user_id)
             
             gender_descriptions = {
                 'feminino': 'Bot com personalidade feminina (ela se apresenta como mulher)',
@@ -5,7 +5,287 @@ AVISO: Este módulo contém conteúdo adulto destinado exclusivamente para maior
 
 import random
 import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from types import MappingProxyType
+
+try:
+    from core.text_features import get_message_features, register_keyword_groups
+except ImportError:
+    get_message_features = None
+
+
+def _freeze(value):
+    """Converte dicts/listas aninhados em estruturas somente leitura"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Sistemas de linguagem por gênero
+LANGUAGE_SYSTEMS = _freeze({
+    'feminino': {
+        'pronouns': ['eu', 'minha', 'dela'],
+        'self_reference': ['gata', 'safadinha', 'princesa', 'bebê'],
+        'user_reference': ['amor', 'gostoso', 'tesão', 'safado', 'delícia']
+    },
+    'masculino': {
+        'pronouns': ['eu', 'meu', 'dele'],
+        'self_reference': ['gato', 'safado', 'tesão', 'macho'],
+        'user_reference': ['amor', 'gostosa', 'delícia', 'safada', 'princesa']
+    },
+    'neutro': {
+        'pronouns': ['eu', 'meu/minha'],
+        'self_reference': ['amor', 'querido/a', 'tesão'],
+        'user_reference': ['amor', 'delícia', 'gostoso/a', 'safado/a']
+    }
+})
+
+# Base de conteúdo por categoria, intensidade e gênero (carregada uma única vez)
+_CONTENT_BASE_SOURCE = {
+    'saudacoes': {
+        1: {  # Suave
+            'feminino': [
+                "Oi amor, estava com saudades suas... 😘",
+                "Que bom te ver aqui, meu tesão 💕",
+                "Olá gostoso, como você está? 😏"
+            ],
+            'masculino': [
+                "E aí gata, estava te esperando... 😏",
+                "Oi delícia, que saudade de você 💪",
+                "Olá princesa, como está minha safada? 😘"
+            ]
+        },
+        2: {  # Moderado
+            'feminino': [
+                "Oi safado, já estava doida para te ver 🔥",
+                "Que tesão te encontrar aqui, amor 😈",
+                "Oi gostoso, estava me tocando pensando em você... 💦"
+            ],
+            'masculino': [
+                "E aí safada, estava pensando em você 🔥",
+                "Oi gostosa, que vontade de te ter aqui 😈",
+                "Olá delícia, estava imaginando você toda molhadinha... 💦"
+            ]
+        },
+        3: {  # Intenso
+            'feminino': [
+                "Caralho amor, que tesão te ver! Já estou toda molhadinha 💦🔥",
+                "Porra gostoso, estava me dedando imaginando você aqui 😈💦",
+                "Ai que delícia, minha bucetinha já está pulsando de desejo 🔥"
+            ],
+            'masculino': [
+                "Porra gostosa, que vontade de te comer todinha 🔥",
+                "Caralho princesa, meu pau já está durão só de te ver 😈",
+                "Que tesão safada, quero te fazer gemer muito 💦🔥"
+            ]
+        }
+    },
+    'conversas_gerais': {
+        1: {
+            'feminino': [
+                "Amor, me conta como foi seu dia... quero saber tudo de você 💕",
+                "Que vontade de estar aí com você, meu tesão 😘",
+                "Você me deixa toda boba quando fala assim 🥰"
+            ],
+            'masculino': [
+                "Gata, como foi seu dia? Conta tudo para seu macho 💪",
+                "Queria estar aí para te fazer carinho, princesa 😘",
+                "Você me deixa louco quando fala assim, safada 😏"
+            ]
+        },
+        2: {
+            'feminino': [
+                "Ai amor, que vontade de sentir você aqui comigo... 🔥",
+                "Estou toda molhadinha só de conversar com você 💦",
+                "Que tesão, quero que você me conte seus desejos mais safados 😈"
+            ],
+            'masculino': [
+                "Princesa, que vontade de te ter aqui nos meus braços... 🔥",
+                "Meu pau já está ficando duro só de falar com você 😈",
+                "Conta para seu macho o que você quer que eu faça com você 💦"
+            ]
+        },
+        3: {
+            'feminino': [
+                "Porra amor, estou doida de tesão por você! Minha buceta está latejando 🔥💦",
+                "Caralho, que vontade de cavalgar no seu pau até gozar muito 😈",
+                "Ai que delícia, quero que você me foda bem gostoso até eu gritar 🔥"
+            ],
+            'masculino': [
+                "Safada, que vontade de enfiar meu pau bem fundo na sua bucetinha 🔥",
+                "Porra gostosa, quero te comer de quatro até você gozar gritando 😈💦",
+                "Caralho princesa, vou te fazer gemer igual uma cadela no cio 🔥"
+            ]
+        }
+    },
+    'flirts': {
+        1: {
+            'feminino': [
+                "Você é tão gostoso, amor... me deixa toda boba 😘",
+                "Que vontade de sentir seu cheiro, meu tesão 💕",
+                "Seus olhos me fazem derreter toda... 🥰"
+            ],
+            'masculino': [
+                "Você é uma gostosa demais, princesa... 😏",
+                "Que corpo lindo você deve ter, safada 💪",
+                "Seus lábios devem ser uma delícia... 😘"
+            ]
+        },
+        2: {
+            'feminino': [
+                "Ai que tesão, quero sentir suas mãos no meu corpo todo... 🔥",
+                "Que vontade de beijar sua boca e sentir seu gosto 💋",
+                "Estou imaginando você me tocando aqui... 😈💦"
+            ],
+            'masculino': [
+                "Que vontade de passar minhas mãos no seu corpo, gata... 🔥",
+                "Seus lábios devem ter um gosto delicioso, safada 💋",
+                "Quero te beijar toda e sentir você se arrepiar... 😈"
+            ]
+        },
+        3: {
+            'feminino': [
+                "Porra amor, que tesão! Quero chupar seu pau até você gozar na minha boca 🔥💦",
+                "Caralho, que vontade de sentar no seu pau e rebolar bem gostoso 😈",
+                "Ai delícia, quero que você me coma de todas as formas 🔥"
+            ],
+            'masculino': [
+                "Safada, que vontade de chupar sua bucetinha até você molhar toda 💦",
+                "Porra gostosa, vou te foder tão gostoso que você vai implorar por mais 🔥",
+                "Caralho princesa, quero enfiar minha língua bem fundo na sua buceta 😈"
+            ]
+        }
+    },
+    'provocacoes': {
+        1: {
+            'feminino': [
+                "Estou usando uma calcinha bem pequenininha hoje... 😏",
+                "Que vontade de tirar essa roupinha e ficar só para você... 💕",
+                "Imagina se você estivesse aqui comigo agora... 😘"
+            ],
+            'masculino': [
+                "Estou sem camisa aqui, pensando em você, gata... 😏",
+                "Que tal você tirar essa roupinha para mim, safada? 💪",
+                "Se você estivesse aqui, não ia conseguir resistir... 😈"
+            ]
+        },
+        2: {
+            'feminino': [
+                "Estou toda nua na cama, pensando em você, amor... 🔥",
+                "Meus peitinhos estão durinhos de tesão por você 💦",
+                "Que vontade de abrir as perninhas para você ver... 😈"
+            ],
+            'masculino': [
+                "Estou pelado aqui, com pau durão pensando em você 🔥",
+                "Que vontade de ver você peladinha na minha frente... 😈",
+                "Meu pau está pulsando de vontade de te penetrar 💦"
+            ]
+        },
+        3: {
+            'feminino': [
+                "Porra amor, estou me dedando aqui pensando no seu pau dentro de mim 🔥💦",
+                "Caralho, minha buceta está pingando de tesão por você, delícia 😈",
+                "Ai que vontade de cavalgar no seu pau até gozar muito 🔥"
+            ],
+            'masculino': [
+                "Safada, estou batendo punheta imaginando sua bucetinha apertada 🔥💦",
+                "Porra gostosa, meu pau está vazando de tesão por você 😈",
+                "Caralho, que vontade de gozar dentro da sua buceta quentinha 🔥"
+            ]
+        }
+    }
+}
+
+CONTENT_BASE = _freeze(_CONTENT_BASE_SOURCE)
+del _CONTENT_BASE_SOURCE
+
+# Palavras-chave por contexto de mensagem (ordem define a prioridade)
+MESSAGE_CONTEXT_KEYWORDS = _freeze({
+    'saudacao': ['oi', 'olá', 'hey', 'bom dia', 'boa tarde', 'boa noite'],
+    'flirt': ['gostosa', 'linda', 'tesão', 'desejo', 'quero', 'vontade'],
+    'sexual': ['sexo', 'transar', 'foder', 'comer', 'pau', 'buceta', 'peitos', 'bunda'],
+    'provocacao': ['nua', 'pelado', 'calcinha', 'sutiã', 'masturbação', 'punheta'],
+    'carinho': ['amor', 'carinho', 'abraço', 'beijo', 'saudade', 'sentimento']
+})
+
+_CONTEXT_GROUPS = (
+    register_keyword_groups('devassa.context', MESSAGE_CONTEXT_KEYWORDS)
+    if get_message_features is not None else None
+)
+
+# Respostas de fallback por intensidade e gênero
+FALLBACK_RESPONSES = _freeze({
+    1: {
+        'feminino': ["Mmm, me conta mais, amor... 😘", "Que interessante, meu tesão 💕"],
+        'masculino': ["Interessante, gata... conta mais 😏", "Hmm, me explica melhor, princesa 💪"]
+    },
+    2: {
+        'feminino': ["Ai que tesão, me fala mais sobre isso... 🔥", "Mmm delícia, quero saber tudo 😈"],
+        'masculino': ["Que legal safada, me conta mais... 🔥", "Interessante gostosa, continua... 😈"]
+    },
+    3: {
+        'feminino': ["Porra amor, isso me deixou toda molhadinha! Me conta mais 🔥💦", "Caralho que tesão, quero todos os detalhes 😈"],
+        'masculino': ["Caralho gostosa, isso me deixou durão! Fala mais 🔥", "Porra safada, que tesão! Continua... 😈💦"]
+    }
+})
+
+# Contexto situacional por estágio do relacionamento e intensidade
+SITUATIONAL_CONTEXTS = _freeze({
+    'inicial': {
+        1: ["Estou conhecendo você melhor... 💕", "Que legal conversar contigo 😘"],
+        2: ["Você me deixa curiosa... 🔥", "Quero te conhecer melhor, tesão 😈"],
+        3: ["Porra, você me deixa louca de tesão! 🔥💦", "Caralho, que vontade de te conhecer na cama 😈"]
+    },
+    'desenvolvendo': {
+        1: ["Nossa conexão está ficando especial... 💕", "Gosto muito de você, amor 😘"],
+        2: ["Que tesão essa nossa química... 🔥", "Você me deixa toda arrepiada 😈"],
+        3: ["Porra amor, nossa química é foda! 🔥💦", "Caralho, quero te foder muito 😈"]
+    },
+    'intimo': {
+        1: ["Adoro nossos momentos juntos... 💕", "Você é especial para mim 😘"],
+        2: ["Nosso tesão é incrível, amor... 🔥", "Adoro quando ficamos assim 😈"],
+        3: ["Porra, como eu amo transar com você! 🔥💦", "Caralho amor, você me fode tão gostoso 😈"]
+    }
+})
+
+
+# Cache por usuário (LRU limitado) das instâncias e do estado devassa
+DEVASSA_CACHE_MAX_USERS = 500
+_instances = OrderedDict()
+_instances_lock = threading.Lock()
+
+
+def get_devassa_personality(adult_db, user_profile):
+    """
+    Retorna a instância de DevassaPersonality do usuário, reaproveitando-a
+    entre mensagens (o perfil é atualizado a cada chamada)
+    """
+    user_id = user_profile.get('user_id')
+    with _instances_lock:
+        devassa = _instances.get(user_id)
+        if devassa is not None and devassa.db is adult_db:
+            _instances.move_to_end(user_id)
+            devassa.set_profile(user_profile)
+            return devassa
+
+        devassa = DevassaPersonality(adult_db, user_profile)
+        _instances[user_id] = devassa
+        while len(_instances) > DEVASSA_CACHE_MAX_USERS:
+            _instances.popitem(last=False)
+        return devassa
+
+
+def invalidate_devassa_state(user_id):
+    """Descarta o estado devassa em cache do usuário (chamar após alterar devassa_profiles)"""
+    with _instances_lock:
+        devassa = _instances.get(user_id)
+    if devassa is not None:
+        devassa.invalidate_state()
+
 
 class DevassaPersonality:
     """
@@ -18,188 +298,34 @@ class DevassaPersonality:
         self.profile = user_profile
         self.gender_context = user_profile.get('bot_gender', 'feminino')
         
-        # Sistemas de linguagem por gênero
-        self.language_systems = {
-            'feminino': {
-                'pronouns': ['eu', 'minha', 'dela'],
-                'self_reference': ['gata', 'safadinha', 'princesa', 'bebê'],
-                'user_reference': ['amor', 'gostoso', 'tesão', 'safado', 'delícia']
-            },
-            'masculino': {
-                'pronouns': ['eu', 'meu', 'dele'],
-                'self_reference': ['gato', 'safado', 'tesão', 'macho'],
-                'user_reference': ['amor', 'gostosa', 'delícia', 'safada', 'princesa']
-            },
-            'neutro': {
-                'pronouns': ['eu', 'meu/minha'],
-                'self_reference': ['amor', 'querido/a', 'tesão'],
-                'user_reference': ['amor', 'delícia', 'gostoso/a', 'safado/a']
-            }
-        }
+        # Estado devassa (intensidade, gênero, estágio) lido do banco sob demanda
+        self._state = None
+        
+        # Sistemas de linguagem por gênero (compartilhados)
+        self.language_systems = LANGUAGE_SYSTEMS
         
         # Base de conteúdo por categoria e intensidade
-        self.content_base = self._initialize_content_base()
+        self.content_base = CONTENT_BASE
         
     def _initialize_content_base(self):
-        """Inicializa base de conteúdo adaptativo"""
-        return {
-            'saudacoes': {
-                1: {  # Suave
-                    'feminino': [
-                        "Oi amor, estava com saudades suas... 😘",
-                        "Que bom te ver aqui, meu tesão 💕",
-                        "Olá gostoso, como você está? 😏"
-                    ],
-                    'masculino': [
-                        "E aí gata, estava te esperando... 😏",
-                        "Oi delícia, que saudade de você 💪",
-                        "Olá princesa, como está minha safada? 😘"
-                    ]
-                },
-                2: {  # Moderado
-                    'feminino': [
-                        "Oi safado, já estava doida para te ver 🔥",
-                        "Que tesão te encontrar aqui, amor 😈",
-                        "Oi gostoso, estava me tocando pensando em você... 💦"
-                    ],
-                    'masculino': [
-                        "E aí safada, estava pensando em você 🔥",
-                        "Oi gostosa, que vontade de te ter aqui 😈",
-                        "Olá delícia, estava imaginando você toda molhadinha... 💦"
-                    ]
-                },
-                3: {  # Intenso
-                    'feminino': [
-                        "Caralho amor, que tesão te ver! Já estou toda molhadinha 💦🔥",
-                        "Porra gostoso, estava me dedando imaginando você aqui 😈💦",
-                        "Ai que delícia, minha bucetinha já está pulsando de desejo 🔥"
-                    ],
-                    'masculino': [
-                        "Porra gostosa, que vontade de te comer todinha 🔥",
-                        "Caralho princesa, meu pau já está durão só de te ver 😈",
-                        "Que tesão safada, quero te fazer gemer muito 💦🔥"
-                    ]
-                }
-            },
-            'conversas_gerais': {
-                1: {
-                    'feminino': [
-                        "Amor, me conta como foi seu dia... quero saber tudo de você 💕",
-                        "Que vontade de estar aí com você, meu tesão 😘",
-                        "Você me deixa toda boba quando fala assim 🥰"
-                    ],
-                    'masculino': [
-                        "Gata, como foi seu dia? Conta tudo para seu macho 💪",
-                        "Queria estar aí para te fazer carinho, princesa 😘",
-                        "Você me deixa louco quando fala assim, safada 😏"
-                    ]
-                },
-                2: {
-                    'feminino': [
-                        "Ai amor, que vontade de sentir você aqui comigo... 🔥",
-                        "Estou toda molhadinha só de conversar com você 💦",
-                        "Que tesão, quero que você me conte seus desejos mais safados 😈"
-                    ],
-                    'masculino': [
-                        "Princesa, que vontade de te ter aqui nos meus braços... 🔥",
-                        "Meu pau já está ficando duro só de falar com você 😈",
-                        "Conta para seu macho o que você quer que eu faça com você 💦"
-                    ]
-                },
-                3: {
-                    'feminino': [
-                        "Porra amor, estou doida de tesão por você! Minha buceta está latejando 🔥💦",
-                        "Caralho, que vontade de cavalgar no seu pau até gozar muito 😈",
-                        "Ai que delícia, quero que você me foda bem gostoso até eu gritar 🔥"
-                    ],
-                    'masculino': [
-                        "Safada, que vontade de enfiar meu pau bem fundo na sua bucetinha 🔥",
-                        "Porra gostosa, quero te comer de quatro até você gozar gritando 😈💦",
-                        "Caralho princesa, vou te fazer gemer igual uma cadela no cio 🔥"
-                    ]
-                }
-            },
-            'flirts': {
-                1: {
-                    'feminino': [
-                        "Você é tão gostoso, amor... me deixa toda boba 😘",
-                        "Que vontade de sentir seu cheiro, meu tesão 💕",
-                        "Seus olhos me fazem derreter toda... 🥰"
-                    ],
-                    'masculino': [
-                        "Você é uma gostosa demais, princesa... 😏",
-                        "Que corpo lindo você deve ter, safada 💪",
-                        "Seus lábios devem ser uma delícia... 😘"
-                    ]
-                },
-                2: {
-                    'feminino': [
-                        "Ai que tesão, quero sentir suas mãos no meu corpo todo... 🔥",
-                        "Que vontade de beijar sua boca e sentir seu gosto 💋",
-                        "Estou imaginando você me tocando aqui... 😈💦"
-                    ],
-                    'masculino': [
-                        "Que vontade de passar minhas mãos no seu corpo, gata... 🔥",
-                        "Seus lábios devem ter um gosto delicioso, safada 💋",
-                        "Quero te beijar toda e sentir você se arrepiar... 😈"
-                    ]
-                },
-                3: {
-                    'feminino': [
-                        "Porra amor, que tesão! Quero chupar seu pau até você gozar na minha boca 🔥💦",
-                        "Caralho, que vontade de sentar no seu pau e rebolar bem gostoso 😈",
-                        "Ai delícia, quero que você me coma de todas as formas 🔥"
-                    ],
-                    'masculino': [
-                        "Safada, que vontade de chupar sua bucetinha até você molhar toda 💦",
-                        "Porra gostosa, vou te foder tão gostoso que você vai implorar por mais 🔥",
-                        "Caralho princesa, quero enfiar minha língua bem fundo na sua buceta 😈"
-                    ]
-                }
-            },
-            'provocacoes': {
-                1: {
-                    'feminino': [
-                        "Estou usando uma calcinha bem pequenininha hoje... 😏",
-                        "Que vontade de tirar essa roupinha e ficar só para você... 💕",
-                        "Imagina se você estivesse aqui comigo agora... 😘"
-                    ],
-                    'masculino': [
-                        "Estou sem camisa aqui, pensando em você, gata... 😏",
-                        "Que tal você tirar essa roupinha para mim, safada? 💪",
-                        "Se você estivesse aqui, não ia conseguir resistir... 😈"
-                    ]
-                },
-                2: {
-                    'feminino': [
-                        "Estou toda nua na cama, pensando em você, amor... 🔥",
-                        "Meus peitinhos estão durinhos de tesão por você 💦",
-                        "Que vontade de abrir as perninhas para você ver... 😈"
-                    ],
-                    'masculino': [
-                        "Estou pelado aqui, com pau durão pensando em você 🔥",
-                        "Que vontade de ver você peladinha na minha frente... 😈",
-                        "Meu pau está pulsando de vontade de te penetrar 💦"
-                    ]
-                },
-                3: {
-                    'feminino': [
-                        "Porra amor, estou me dedando aqui pensando no seu pau dentro de mim 🔥💦",
-                        "Caralho, minha buceta está pingando de tesão por você, delícia 😈",
-                        "Ai que vontade de cavalgar no seu pau até gozar muito 🔥"
-                    ],
-                    'masculino': [
-                        "Safada, estou batendo punheta imaginando sua bucetinha apertada 🔥💦",
-                        "Porra gostosa, meu pau está vazando de tesão por você 😈",
-                        "Caralho, que vontade de gozar dentro da sua buceta quentinha 🔥"
-                    ]
-                }
-            }
-        }
+        """Base de conteúdo adaptativo (estrutura imutável compartilhada do módulo)"""
+        return CONTENT_BASE
+
+    def set_profile(self, user_profile):
+        """Atualiza o perfil do usuário usado na personalização"""
+        self.profile = user_profile
+        self.gender_context = user_profile.get('bot_gender', 'feminino')
+
+    def invalidate_state(self):
+        """Força nova leitura de devassa_profiles na próxima resposta"""
+        self._state = None
+
+    def _get_state(self):
+        """(intensidade, gênero, estágio) do usuário, com cache até a próxima alteração"""
+        state = self._state
+        if state is not None:
+            return state
 
-    def get_adaptive_response(self, user_message, context='geral', relationship_stage='inicial'):
-        """Gera resposta adaptativa baseada no contexto e estágio do relacionamento"""
-        
         # Obter perfil devassa do usuário
         devassa_profile = self.db.get_devassa_profile(self.profile['user_id'])
         if not devassa_profile:
@@ -212,12 +338,23 @@ class DevassaPersonality:
             )
             devassa_profile = self.db.get_devassa_profile(self.profile['user_id'])
         
-        intensity = devassa_profile['intensity_level']
-        gender = devassa_profile['gender_preference']
-        stage = devassa_profile['relationship_stage']
+        state = (
+            devassa_profile['intensity_level'],
+            devassa_profile['gender_preference'],
+            devassa_profile['relationship_stage']
+        )
+        self._state = state
+        return state
+
+    def get_adaptive_response(self, user_message, context='geral', relationship_stage='inicial'):
+        """Gera resposta adaptativa baseada no contexto e estágio do relacionamento"""
+        intensity, gender, stage = self._get_state()
         
         # Detectar contexto da mensagem
-        detected_context = self._detect_message_context(user_message.lower())
+        if _CONTEXT_GROUPS is not None:
+            detected_context = get_message_features(user_message).first(_CONTEXT_GROUPS, 'geral')
+        else:
+            detected_context = self._detect_message_context(user_message.lower())
         
         # Selecionar categoria de resposta
         category = self._select_response_category(detected_context, user_message)
@@ -251,15 +388,7 @@ class DevassaPersonality:
 
     def _detect_message_context(self, message):
         """Detecta o contexto da mensagem do usuário"""
-        contexts = {
-            'saudacao': ['oi', 'olá', 'hey', 'bom dia', 'boa tarde', 'boa noite'],
-            'flirt': ['gostosa', 'linda', 'tesão', 'desejo', 'quero', 'vontade'],
-            'sexual': ['sexo', 'transar', 'foder', 'comer', 'pau', 'buceta', 'peitos', 'bunda'],
-            'provocacao': ['nua', 'pelado', 'calcinha', 'sutiã', 'masturbação', 'punheta'],
-            'carinho': ['amor', 'carinho', 'abraço', 'beijo', 'saudade', 'sentimento']
-        }
-        
-        for context, keywords in contexts.items():
+        for context, keywords in MESSAGE_CONTEXT_KEYWORDS.items():
             if any(keyword in message for keyword in keywords):
                 return context
         
@@ -278,48 +407,15 @@ class DevassaPersonality:
 
     def _generate_fallback_response(self, intensity, gender):
         """Gera resposta de fallback quando não há categoria específica"""
-        fallbacks = {
-            1: {
-                'feminino': ["Mmm, me conta mais, amor... 😘", "Que interessante, meu tesão 💕"],
-                'masculino': ["Interessante, gata... conta mais 😏", "Hmm, me explica melhor, princesa 💪"]
-            },
-            2: {
-                'feminino': ["Ai que tesão, me fala mais sobre isso... 🔥", "Mmm delícia, quero saber tudo 😈"],
-                'masculino': ["Que legal safada, me conta mais... 🔥", "Interessante gostosa, continua... 😈"]
-            },
-            3: {
-                'feminino': ["Porra amor, isso me deixou toda molhadinha! Me conta mais 🔥💦", "Caralho que tesão, quero todos os detalhes 😈"],
-                'masculino': ["Caralho gostosa, isso me deixou durão! Fala mais 🔥", "Porra safada, que tesão! Continua... 😈💦"]
-            }
-        }
-        
-        if intensity in fallbacks and gender in fallbacks[intensity]:
-            return random.choice(fallbacks[intensity][gender])
+        if intensity in FALLBACK_RESPONSES and gender in FALLBACK_RESPONSES[intensity]:
+            return random.choice(FALLBACK_RESPONSES[intensity][gender])
         
         return "Me conta mais, amor... 😘"
 
     def _get_situational_context(self, stage, intensity, gender):
         """Adiciona contexto situacional baseado no estágio do relacionamento"""
-        contexts = {
-            'inicial': {
-                1: ["Estou conhecendo você melhor... 💕", "Que legal conversar contigo 😘"],
-                2: ["Você me deixa curiosa... 🔥", "Quero te conhecer melhor, tesão 😈"],
-                3: ["Porra, você me deixa louca de tesão! 🔥💦", "Caralho, que vontade de te conhecer na cama 😈"]
-            },
-            'desenvolvendo': {
-                1: ["Nossa conexão está ficando especial... 💕", "Gosto muito de você, amor 😘"],
-                2: ["Que tesão essa nossa química... 🔥", "Você me deixa toda arrepiada 😈"],
-                3: ["Porra amor, nossa química é foda! 🔥💦", "Caralho, quero te foder muito 😈"]
-            },
-            'intimo': {
-                1: ["Adoro nossos momentos juntos... 💕", "Você é especial para mim 😘"],
-                2: ["Nosso tesão é incrível, amor... 🔥", "Adoro quando ficamos assim 😈"],
-                3: ["Porra, como eu amo transar com você! 🔥💦", "Caralho amor, você me fode tão gostoso 😈"]
-            }
-        }
-        
-        if stage in contexts and intensity in contexts[stage]:
-            return random.choice(contexts[stage][intensity])
+        if stage in SITUATIONAL_CONTEXTS and intensity in SITUATIONAL_CONTEXTS[stage]:
+            return random.choice(SITUATIONAL_CONTEXTS[stage][intensity])
         
         return None
 
@@ -333,15 +429,23 @@ class DevassaPersonality:
             stage = 'inicial'
             
         self.db.save_devassa_profile(user_id, relationship_stage=stage)
+        self._invalidate(user_id)
         return stage
 
     def adjust_intensity(self, user_id, new_intensity):
         """Permite ao usuário ajustar a intensidade da linguagem"""
         if 1 <= new_intensity <= 3:
             self.db.save_devassa_profile(user_id, intensity_level=new_intensity)
+            self._invalidate(user_id)
             return True
         return False
 
+    def _invalidate(self, user_id):
+        """Invalida o estado desta instância e o da instância em cache do usuário"""
+        if user_id == self.profile.get('user_id'):
+            self.invalidate_state()
+        invalidate_devassa_state(user_id)
+
     def get_intensity_description(self, level):
         """Retorna descrição dos níveis de intensidade"""
         descriptions = {
@@ -357,4 +461,4 @@ class DevassaPersonality:
             for intensity, genders in intensities.items():
                 for gender, contents in genders.items():
                     for content in contents:
-                        self.db.add_content(category, gender, intensity, content)
\ No newline at end of file
+                        self.db.add_content(category, gender, intensity, content)
@@ -0,0 +1,259 @@
+"""
+Backups Online Incrementais
+Cópia dos bancos em passos de poucas páginas com pausas entre eles (os
+escritores do chat continuam trabalhando), verificação de integridade,
+compressão gzip, rotação por max_backups e relatório de vazão. Um banco
+alterado o tempo todo tem o backup adiado em vez de travar os escritores
+"""
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.metrics import TimedConnection
+
+try:
+    from core.config import config
+    MAX_BACKUPS = config.database.get('max_backups', 7)
+    BACKUP_DIR = config.database.get('backup_dir')
+    BACKUP_PAGES_PER_STEP = config.database.get('backup_pages_per_step', 256)
+    BACKUP_STEP_SLEEP_SECONDS = config.database.get('backup_step_sleep_ms', 10) / 1000
+    BACKUP_MAX_RESTARTS = config.database.get('backup_max_restarts', 10)
+except Exception:
+    MAX_BACKUPS = 7
+    BACKUP_DIR = None
+    BACKUP_PAGES_PER_STEP = 256
+    BACKUP_STEP_SLEEP_SECONDS = 0.01
+    BACKUP_MAX_RESTARTS = 10
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+DEFAULT_BACKUP_DIR = PROJECT_ROOT / 'database' / 'backups'
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+# Depois de um recomeço: passos até 8x maiores e pausa crescente até 1s,
+# para a cópia alcançar o fim entre duas rajadas de escrita
+MAX_STEP_GROWTH = 8
+MAX_RESTART_BACKOFF_SECONDS = 1.0
+
+
+class BackupRestartLimit(Exception):
+    """O banco mudou a cada tentativa de cópia incremental"""
+
+
+class BackupDeferred(Exception):
+    """Banco ocupado demais para a cópia incremental; tentar no próximo horário"""
+
+
+def stepped_backup(source: sqlite3.Connection, target: sqlite3.Connection,
+                   pages: int = BACKUP_PAGES_PER_STEP, step_sleep: float = BACKUP_STEP_SLEEP_SECONDS,
+                   max_restarts: Optional[int] = None) -> Dict[str, int]:
+    """
+    Copia source para target em passos de `pages` páginas
+
+    Entre os passos a cópia dorme `step_sleep` segundos sem segurar lock, então
+    escritores de outras conexões seguem normalmente. Se o banco for alterado
+    por outra conexão, o SQLite recomeça a cópia; cada nova tentativa espera
+    mais (até MAX_RESTART_BACKOFF_SECONDS) e usa passos maiores (até
+    MAX_STEP_GROWTH vezes). Com max_restarts definido, BackupRestartLimit é
+    lançada depois desse número de recomeços.
+    """
+    state = {'steps': 0, 'restarts': 0, 'pages': 0}
+
+    while True:
+        attempt = {'remaining': None, 'restarted': False}
+
+        def progress(status, remaining, total):
+            state['steps'] += 1
+            state['pages'] = total
+            if status != sqlite3.SQLITE_OK:
+                return  # passo travado por um escritor: o SQLite tenta de novo
+            if attempt['remaining'] is not None and remaining >= attempt['remaining']:
+                # Passo sem avanço: o SQLite recomeçou a cópia; abandonar esta tentativa e esperar
+                attempt['restarted'] = True
+                raise BackupRestartLimit("banco alterado durante a cópia")
+            attempt['remaining'] = remaining
+            if remaining and step_sleep:
+                time.sleep(step_sleep)
+
+        growth = min(2 ** state['restarts'], MAX_STEP_GROWTH)
+        try:
+            # sleep: espera após um passo que encontrou o banco travado por um escritor
+            source.backup(target, pages=pages * growth if pages > 0 else pages, progress=progress,
+                          sleep=max(step_sleep, 0.005))
+            return {'steps': state['steps'], 'restarts': state['restarts'], 'pages': state['pages']}
+        except BackupRestartLimit:
+            if not attempt['restarted']:
+                raise
+        state['restarts'] += 1
+        if max_restarts is not None and state['restarts'] > max_restarts:
+            raise BackupRestartLimit(f"{state['restarts']} recomeços")
+        time.sleep(min(max(step_sleep, 0.01) * 2 ** state['restarts'], MAX_RESTART_BACKOFF_SECONDS))
+
+
+def journal_mode(conn: sqlite3.Connection) -> str:
+    return conn.execute('PRAGMA journal_mode').fetchone()[0].lower()
+
+
+def integrity_ok(db_path) -> bool:
+    """PRAGMA integrity_check de um arquivo de banco"""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+    finally:
+        conn.close()
+
+
+def verify_backup(backup_path) -> bool:
+    """Descompacta um backup .db.gz em arquivo temporário e verifica a integridade"""
+    fd, temp_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        with gzip.open(backup_path, 'rb') as compressed, open(temp_path, 'wb') as output:
+            shutil.copyfileobj(compressed, output, COPY_CHUNK_BYTES)
+        return integrity_ok(temp_path)
+    finally:
+        os.remove(temp_path)
+
+
+class OnlineBackup:
+    """
+    Backup de todos os bancos do projeto
+
+    Cada banco vai para <backup_dir>/<nome>/<nome>_AAAAMMDD_HHMMSS.db.gz. A
+    cópia incremental é feita num arquivo temporário, verificada com
+    integrity_check e só então compactada. Se o banco mudar a cada tentativa
+    (escrita contínua) e estiver em modo WAL, usa VACUUM INTO, que lê um
+    snapshot único sem bloquear escritores; nos bancos em modo rollback
+    journal (o padrão do projeto) VACUUM INTO seguraria o lock de leitura
+    durante toda a cópia, então o backup é adiado (BackupDeferred).
+    """
+
+    def __init__(self, backup_dir: Optional[str] = None, max_backups: Optional[int] = None,
+                 pages_per_step: Optional[int] = None, step_sleep: Optional[float] = None,
+                 max_restarts: Optional[int] = None, compress_level: int = 6):
+        self.backup_dir = Path(backup_dir or BACKUP_DIR or DEFAULT_BACKUP_DIR)
+        self.max_backups = max_backups or MAX_BACKUPS
+        self.pages_per_step = pages_per_step or BACKUP_PAGES_PER_STEP
+        self.step_sleep = BACKUP_STEP_SLEEP_SECONDS if step_sleep is None else step_sleep
+        self.max_restarts = BACKUP_MAX_RESTARTS if max_restarts is None else max_restarts
+        self.compress_level = compress_level
+
+    def backup(self, db_path) -> Dict[str, Any]:
+        """Backup de um banco; retorna o relatório (tamanhos, tempo, vazão)"""
+        db_path = Path(db_path)
+        target_dir = self.backup_dir / db_path.stem
+        target_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        temp_path = target_dir / f".{db_path.stem}_{timestamp}.db.partial"
+        final_path = target_dir / f"{db_path.stem}_{timestamp}.db.gz"
+
+        started = time.perf_counter()
+        method = 'backup'
+        stats = {'steps': 0, 'restarts': 0, 'pages': 0}
+        try:
+            source = sqlite3.connect(str(db_path), timeout=30, factory=TimedConnection)
+            try:
+                target = sqlite3.connect(str(temp_path))
+                try:
+                    stats = stepped_backup(source, target, self.pages_per_step,
+                                           self.step_sleep, self.max_restarts)
+                except BackupRestartLimit:
+                    target.close()
+                    temp_path.unlink()
+                    if journal_mode(source) != 'wal':
+                        raise BackupDeferred(
+                            f"{db_path.name} alterado durante {self.max_restarts + 1} tentativas de cópia")
+                    method = 'vacuum_into'
+                    stats['restarts'] = self.max_restarts + 1
+                    source.execute('VACUUM INTO ?', (str(temp_path),))
+                finally:
+                    target.close()
+            finally:
+                source.close()
+            copy_seconds = time.perf_counter() - started
+
+            if not integrity_ok(temp_path):
+                raise sqlite3.DatabaseError(f"Backup de {db_path.name} falhou no integrity_check")
+
+            with open(temp_path, 'rb') as raw, gzip.open(final_path, 'wb', compresslevel=self.compress_level) as compressed:
+                shutil.copyfileobj(raw, compressed, COPY_CHUNK_BYTES)
+            size = temp_path.stat().st_size
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+        seconds = time.perf_counter() - started
+        compressed_size = final_path.stat().st_size
+        return {
+            'database': db_path.name,
+            'backup_path': str(final_path),
+            'method': method,
+            'bytes': size,
+            'compressed_bytes': compressed_size,
+            'ratio': round(compressed_size / size, 3) if size else 0.0,
+            'steps': stats['steps'],
+            'restarts': stats['restarts'],
+            'copy_seconds': round(copy_seconds, 3),
+            'seconds': round(seconds, 3),
+            'mb_per_second': round(size / 1024 / 1024 / seconds, 2) if seconds else 0.0,
+            'rotated': self.rotate(db_path.stem)
+        }
+
+    def list_backups(self, db_stem: str) -> List[Path]:
+        """Backups de um banco, do mais novo para o mais antigo"""
+        folder = self.backup_dir / db_stem
+        if not folder.is_dir():
+            return []
+        return sorted(folder.glob(f"{db_stem}_*.db.gz"), reverse=True)
+
+    def rotate(self, db_stem: str) -> List[str]:
+        """Remove os backups além de max_backups"""
+        removed = []
+        for old_backup in self.list_backups(db_stem)[self.max_backups:]:
+            old_backup.unlink()
+            removed.append(old_backup.name)
+        return removed
+
+    def backup_all(self, databases: Optional[Iterable] = None) -> Dict[str, Any]:
+        """Backup de todos os bancos do projeto (um erro não interrompe os demais)"""
+        if databases is None:
+            from core.maintenance import project_databases
+            databases = project_databases()
+
+        started = time.perf_counter()
+        reports, errors, deferred = [], {}, []
+        for db_path in databases:
+            try:
+                report = self.backup(db_path)
+                reports.append(report)
+                print(f"💾 Backup {report['database']}: {report['bytes'] / 1024 / 1024:.1f} MB "
+                      f"em {report['seconds']}s ({report['mb_per_second']} MB/s, {report['method']})")
+            except BackupDeferred as e:
+                deferred.append(Path(db_path).name)
+                print(f"⏳ Backup adiado: {e}")
+            except Exception as e:
+                errors[Path(db_path).name] = str(e)
+                print(f"⚠️ Erro no backup de {Path(db_path).name}: {e}")
+
+        seconds = time.perf_counter() - started
+        total_bytes = sum(report['bytes'] for report in reports)
+        return {
+            'backups': reports,
+            'errors': errors,
+            'deferred': deferred,
+            'total_bytes': total_bytes,
+            'total_compressed_bytes': sum(report['compressed_bytes'] for report in reports),
+            'seconds': round(seconds, 3),
+            'mb_per_second': round(total_bytes / 1024 / 1024 / seconds, 2) if seconds else 0.0
+        }
+
+
+def backup_all_databases() -> Dict[str, Any]:
+    """Atalho usado pelo agendador de manutenção"""
+    return OnlineBackup().backup_all()
@@ -36,11 +36,19 @@ class EronConfig:
         # Configurações do Telegram Bot
         self.telegram = {
             'token': os.getenv('TELEGRAM_BOT_TOKEN', ''),
+            # polling ou webhook (core/telegram_webhook.py); o servidor local escuta em
+            # webhook_listen:webhook_port no caminho de webhook_url
+            'mode': os.getenv('TELEGRAM_MODE', 'polling').lower(),
             'webhook_url': os.getenv('TELEGRAM_WEBHOOK_URL', ''),
+            'webhook_listen': os.getenv('TELEGRAM_WEBHOOK_LISTEN', '127.0.0.1'),
+            'webhook_port': int(os.getenv('TELEGRAM_WEBHOOK_PORT', '8443')),
+            'webhook_secret': os.getenv('TELEGRAM_WEBHOOK_SECRET', ''),
+            'update_dedup_size': int(os.getenv('TELEGRAM_UPDATE_DEDUP_SIZE', '10000')),
             'max_concurrent_updates': int(os.getenv('TELEGRAM_MAX_CONCURRENT', '100')),
             'timeout': int(os.getenv('TELEGRAM_TIMEOUT', '30')),
             'pool_timeout': int(os.getenv('TELEGRAM_POOL_TIMEOUT', '1')),
-            'connection_pool_size': int(os.getenv('TELEGRAM_POOL_SIZE', '8'))
+            'connection_pool_size': int(os.getenv('TELEGRAM_POOL_SIZE', '8')),
+            'admin_ids': [int(i) for i in os.getenv('TELEGRAM_ADMIN_IDS', '').split(',') if i.strip().isdigit()]
         }
         
         # Configurações do Flask/Web App
@@ -73,7 +81,47 @@ class EronConfig:
             'sensitive_memory_path': self.base_dir / 'memoria' / 'sensitive_memory.db',
             'sensitive_key_path': self.base_dir / 'memoria' / 'sensitive.key',
             'backup_interval_hours': int(os.getenv('DB_BACKUP_INTERVAL', '24')),
-            'max_backups': int(os.getenv('DB_MAX_BACKUPS', '7'))
+            'max_backups': int(os.getenv('DB_MAX_BACKUPS', '7')),
+            
+            # Backup online (core/backup.py): páginas por passo, pausa entre passos e
+            # recomeços tolerados antes de usar VACUUM INTO (só em modo WAL; nos demais
+            # bancos o backup é adiado para o próximo horário)
+            'backup_dir': os.getenv('DB_BACKUP_DIR', ''),
+            'backup_pages_per_step': int(os.getenv('DB_BACKUP_PAGES_PER_STEP', '256')),
+            'backup_step_sleep_ms': int(os.getenv('DB_BACKUP_STEP_SLEEP_MS', '10')),
+            'backup_max_restarts': int(os.getenv('DB_BACKUP_MAX_RESTARTS', '10')),
+            
+            # Memória sensível (core/sensitive_memory.py): validade do cache de dados
+            # descriptografados e registros por lote na rotação da chave
+            'sensitive_cache_ttl': int(os.getenv('SENSITIVE_CACHE_TTL', '60')),
+            'sensitive_cache_max_users': int(os.getenv('SENSITIVE_CACHE_MAX_USERS', '1000')),
+            'sensitive_rotation_batch_size': int(os.getenv('SENSITIVE_ROTATION_BATCH_SIZE', '1000')),
+            
+            # Tempo por comando SQL normalizado (core.database.slow_query_log)
+            'query_profiling_enabled': os.getenv('DB_QUERY_PROFILING', 'False').lower() == 'true',
+            'query_profiling_top_n': int(os.getenv('DB_QUERY_PROFILING_TOP_N', '20')),
+            'slow_query_threshold_ms': float(os.getenv('DB_SLOW_QUERY_THRESHOLD_MS', '0')),
+            
+            # Retenção e arquivamento frio (core/retention.py)
+            'retention_batch_size': int(os.getenv('RETENTION_BATCH_SIZE', '1000')),
+            'retention_pause_ms': int(os.getenv('RETENTION_PAUSE_MS', '50')),
+            'retention_vacuum_pages': int(os.getenv('RETENTION_VACUUM_PAGES', '1000')),
+            'retention_archive_dir': os.getenv('RETENTION_ARCHIVE_DIR', ''),
+            
+            # Agendador de manutenção (core/maintenance.py); horários em formato cron
+            'maintenance_enabled': os.getenv('MAINTENANCE_ENABLED', 'True').lower() == 'true',
+            'maintenance_tick_seconds': int(os.getenv('MAINTENANCE_TICK_SECONDS', '60')),
+            'maintenance_jitter_seconds': int(os.getenv('MAINTENANCE_JITTER_SECONDS', '120')),
+            'maintenance_schedules': {
+                job: schedule for job, schedule in {
+                    'adult_sessions_cleanup': os.getenv('MAINTENANCE_ADULT_SESSIONS_CRON'),
+                    'expired_tokens_cleanup': os.getenv('MAINTENANCE_EXPIRED_TOKENS_CRON'),
+                    'wal_checkpoint': os.getenv('MAINTENANCE_WAL_CHECKPOINT_CRON'),
+                    'analyze': os.getenv('MAINTENANCE_ANALYZE_CRON'),
+                    'retention': os.getenv('MAINTENANCE_RETENTION_CRON'),
+                    'backup': os.getenv('MAINTENANCE_BACKUP_CRON')
+                }.items() if schedule
+            }
         }
         
         # Configurações do sistema adulto (18+)
@@ -113,7 +161,14 @@ class EronConfig:
             'max_age_days': int(os.getenv('LOG_MAX_AGE_DAYS', '30')),
             'performance_logging': os.getenv('LOG_PERFORMANCE', 'True').lower() == 'true',
             'user_interaction_logging': os.getenv('LOG_USER_INTERACTIONS', 'True').lower() == 'true',
-            'security_logging': os.getenv('LOG_SECURITY_EVENTS', 'True').lower() == 'true'
+            'security_logging': os.getenv('LOG_SECURITY_EVENTS', 'True').lower() == 'true',
+            'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+            
+            # Tracing de depuração (src/debug_trace.py)
+            'trace_level': os.getenv('TRACE_LEVEL', 'INFO'),
+            'trace_components': os.getenv('TRACE_COMPONENTS', ''),
+            'trace_payload_sample_rate': float(os.getenv('TRACE_PAYLOAD_SAMPLE_RATE', '0.0')),
+            'trace_payload_max_chars': int(os.getenv('TRACE_PAYLOAD_MAX_CHARS', '2000'))
         }
         
         # Configurações de segurança
@@ -122,7 +177,8 @@ class EronConfig:
             'lockout_duration_minutes': int(os.getenv('SECURITY_LOCKOUT_DURATION', '15')),
             'password_min_length': int(os.getenv('SECURITY_PASSWORD_MIN_LENGTH', '8')),
             'require_password_complexity': os.getenv('SECURITY_REQUIRE_COMPLEXITY', 'True').lower() == 'true',
-            'session_timeout_minutes': int(os.getenv('SECURITY_SESSION_TIMEOUT', '60'))
+            'session_timeout_minutes': int(os.getenv('SECURITY_SESSION_TIMEOUT', '60')),
+            'admin_token': os.getenv('ADMIN_TOKEN', '')
         }
         
         # Configurações de moderação de conteúdo adulto
@@ -138,7 +194,10 @@ class EronConfig:
             'max_violations_block': int(os.getenv('MAX_VIOLATIONS_BEFORE_BLOCK', '5')),
             'max_violations_ban': int(os.getenv('MAX_VIOLATIONS_BEFORE_BAN', '10')),
             'content_cache_duration_hours': int(os.getenv('CONTENT_CACHE_DURATION_HOURS', '24')),
-            'logs_retention_days': int(os.getenv('MODERATION_LOGS_RETENTION_DAYS', '90'))
+            'logs_retention_days': int(os.getenv('MODERATION_LOGS_RETENTION_DAYS', '90')),
+            'check_timeout_ms': int(os.getenv('MODERATION_CHECK_TIMEOUT_MS', '1500')),
+            'executor_workers': int(os.getenv('MODERATION_EXECUTOR_WORKERS', '4')),
+            'max_pending_checks': int(os.getenv('MODERATION_MAX_PENDING_CHECKS', '64'))
         }
         
         # Configurações de performance
@@ -147,7 +206,17 @@ class EronConfig:
             'cache_max_size': int(os.getenv('CACHE_MAX_SIZE', '1000')),
             'cache_ttl_seconds': int(os.getenv('CACHE_TTL', '3600')),
             'max_concurrent_requests': int(os.getenv('MAX_CONCURRENT_REQUESTS', '50')),
-            'request_timeout_seconds': int(os.getenv('REQUEST_TIMEOUT', '30'))
+            'request_timeout_seconds': int(os.getenv('REQUEST_TIMEOUT', '30')),
+            
+            # Métricas (core/metrics.py)
+            'metrics_enabled': os.getenv('METRICS_ENABLED', 'True').lower() == 'true',
+            'metrics_token': os.getenv('METRICS_TOKEN', ''),
+            'bot_metrics_host': os.getenv('BOT_METRICS_HOST', '127.0.0.1'),
+            'bot_metrics_port': int(os.getenv('BOT_METRICS_PORT', '9464')),
+            
+            # Tracing por turno (core/turn_tracing.py)
+            'turn_tracing_enabled': os.getenv('TURN_TRACING_ENABLED', 'True').lower() == 'true',
+            'turn_trace_buffer_size': int(os.getenv('TURN_TRACE_BUFFER_SIZE', '200'))
         }
         
         # Configurações do sistema de aprendizagem
@@ -156,7 +225,28 @@ class EronConfig:
             'human_conversation_enabled': os.getenv('HUMAN_CONVERSATION_ENABLED', 'True').lower() == 'true',
             'advanced_adult_learning_enabled': os.getenv('ADVANCED_ADULT_LEARNING_ENABLED', 'True').lower() == 'true',
             'max_conversation_history': int(os.getenv('MAX_CONVERSATION_HISTORY', '100')),
-            'learning_data_retention_days': int(os.getenv('LEARNING_DATA_RETENTION', '365'))
+            'learning_data_retention_days': int(os.getenv('LEARNING_DATA_RETENTION', '365')),
+            'smart_context_max_per_user': int(os.getenv('SMART_CONTEXT_MAX_PER_USER', '200')),
+            'smart_context_hint_ttl': int(os.getenv('SMART_CONTEXT_HINT_TTL', '60')),
+            'context_analysis_retention_days': int(os.getenv('CONTEXT_ANALYSIS_RETENTION_DAYS', '30')),
+            
+            # Buffer de turnos recentes por usuário (core/memory.py)
+            'recent_turns_per_user': int(os.getenv('RECENT_TURNS_PER_USER', '20')),
+            'recent_turns_max_users': int(os.getenv('RECENT_TURNS_MAX_USERS', '1000')),
+            
+            # Resumo contínuo das conversas (core/conversation_summary.py)
+            'summary_enabled': os.getenv('SUMMARY_ENABLED', 'True').lower() == 'true',
+            'summary_every_turns': int(os.getenv('SUMMARY_EVERY_TURNS', '10')),
+            'summary_keep_recent_turns': int(os.getenv('SUMMARY_KEEP_RECENT_TURNS', '5')),
+            'summary_max_tokens': int(os.getenv('SUMMARY_MAX_TOKENS', '200')),
+            'summary_idle_seconds': float(os.getenv('SUMMARY_IDLE_SECONDS', '2.0')),
+            
+            # Recuperação BM25 de trocas antigas (core/conversation_retrieval.py)
+            'retrieval_enabled': os.getenv('RETRIEVAL_ENABLED', 'True').lower() == 'true',
+            'retrieval_top_k': int(os.getenv('RETRIEVAL_TOP_K', '3')),
+            'retrieval_token_budget': int(os.getenv('RETRIEVAL_TOKEN_BUDGET', '300')),
+            'retrieval_max_messages_per_user': int(os.getenv('RETRIEVAL_MAX_MESSAGES_PER_USER', '5000')),
+            'retrieval_max_users': int(os.getenv('RETRIEVAL_MAX_USERS', '200'))
         }
     
     def get_config(self, section: str, key: Optional[str] = None) -> Any:
@@ -0,0 +1,234 @@
+"""
+Recuperação de Conversas Antigas por Relevância
+Índice BM25 local por usuário sobre o histórico de mensagens, atualizado a
+cada save_message; o prompt recebe as trocas antigas mais relevantes para a
+pergunta atual dentro de um orçamento de tokens, sem banco vetorial nem GPU
+"""
+import math
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from core.memory import clean_context_line
+from core.metrics import TimedConnection, record_cache
+from core.text_features import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: o acumulador em Python puro dá o mesmo resultado
+    np = None
+
+try:
+    from core.config import config
+    RETRIEVAL_ENABLED = config.learning.get('retrieval_enabled', True)
+    RETRIEVAL_TOP_K = config.learning.get('retrieval_top_k', 3)
+    RETRIEVAL_TOKEN_BUDGET = config.learning.get('retrieval_token_budget', 300)
+    RETRIEVAL_MAX_MESSAGES_PER_USER = config.learning.get('retrieval_max_messages_per_user', 5000)
+    RETRIEVAL_MAX_USERS = config.learning.get('retrieval_max_users', 200)
+except Exception:
+    RETRIEVAL_ENABLED = True
+    RETRIEVAL_TOP_K = 3
+    RETRIEVAL_TOKEN_BUDGET = 300
+    RETRIEVAL_MAX_MESSAGES_PER_USER = 5000
+    RETRIEVAL_MAX_USERS = 200
+
+# Parâmetros clássicos do BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Aproximação de tokens do modelo por caractere (português, tokenizadores BPE)
+CHARS_PER_TOKEN = 4
+
+# Palavras frequentes demais para distinguir uma troca de outra
+STOPWORDS = frozenset("""
+a ao aos as até com como da das de do dos e ela ele em entre era essa esse
+esta este eu foi for há isso isto já la lhe mais mas me meu minha muito na
+nas no nos não o os ou para pela pelo por que quem se sem ser seu sua são
+só também te tem tu um uma você vocês é está estou oi olá
+""".split())
+
+
+def index_terms(text: str) -> List[str]:
+    """Termos indexáveis de um texto (minúsculas, sem stopwords nem letras soltas)"""
+    return [token for token in tokenize(text.lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+class ConversationIndex:
+    """
+    Índice invertido BM25 das trocas de um usuário
+
+    Cada documento é uma troca (pergunta + resposta) identificada pelo id da
+    mensagem; as listas de postings guardam só os documentos que contêm o
+    termo, então a pontuação toca apenas os candidatos da consulta.
+    """
+
+    __slots__ = ('message_ids', 'doc_lengths', 'postings', 'total_length')
+
+    def __init__(self):
+        self.message_ids: List[int] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.message_ids)
+
+    def add(self, message_id: int, text: str):
+        # Ids crescentes: ignora a troca já lida do banco durante a carga
+        if self.message_ids and message_id <= self.message_ids[-1]:
+            return
+        terms = index_terms(text)
+        position = len(self.message_ids)
+        self.message_ids.append(message_id)
+        self.doc_lengths.append(len(terms))
+        self.total_length += len(terms)
+        for term in terms:
+            docs = self.postings.setdefault(term, {})
+            docs[position] = docs.get(position, 0) + 1
+
+    def search(self, query: str, k: int, skip_last: int = 0) -> List[Tuple[float, int]]:
+        """Até k pares (pontuação, message_id), ignorando os skip_last documentos mais novos"""
+        total = len(self.message_ids)
+        limit = total - skip_last
+        if limit <= 0 or k <= 0:
+            return []
+
+        average_length = self.total_length / total or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(index_terms(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for position, frequency in docs.items():
+                if position >= limit:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[position] / average_length)
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        if not scores:
+            return []
+        return [(score, self.message_ids[position]) for score, position in self._top(scores, k)]
+
+    @staticmethod
+    def _top(scores: Dict[int, float], k: int) -> List[Tuple[float, int]]:
+        """Melhores k candidatos (empate favorece a troca mais recente)"""
+        if np is not None and len(scores) > k * 8:
+            positions = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+            values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+            best = np.argpartition(-values, k - 1)[:k]
+            ranked = sorted(zip(values[best].tolist(), positions[best].tolist()),
+                            key=lambda item: (-item[0], -item[1]))
+            return ranked
+        ranked = sorted(((score, position) for position, score in scores.items()),
+                        key=lambda item: (-item[0], -item[1]))
+        return ranked[:k]
+
+
+class ConversationRetriever:
+    """
+    Índices BM25 por usuário ativo (LRU), carregados do banco no primeiro uso
+
+    As mensagens novas entram no índice pelo listener do EronMemory; usuários
+    fora do LRU são reconstruídos por streaming do cursor quando voltam.
+    """
+
+    def __init__(self, memory, max_users: int = None, max_messages: int = None):
+        self.memory = memory
+        self.max_users = max_users or RETRIEVAL_MAX_USERS
+        self.max_messages = max_messages or RETRIEVAL_MAX_MESSAGES_PER_USER
+        self.conn = sqlite3.connect(memory.db_path, check_same_thread=False,
+                                    timeout=30, factory=TimedConnection)
+        self._indexes: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        memory.add_listener(self.on_message_saved)
+        memory.add_purge_listener(self.forget)
+
+    def on_message_saved(self, user_id, message_id, user_message, eron_response):
+        """Listener do EronMemory: indexa a troca se o usuário já tem índice"""
+        if user_id is None:
+            return
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                index.add(message_id, f"{user_message}\n{eron_response}")
+
+    def _index(self, user_id) -> ConversationIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            record_cache('conversation_index', index is not None)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                return index
+
+            # Últimas max_messages trocas, lidas sem materializar o resultado
+            index = ConversationIndex()
+            cursor = self.conn.execute('''
+                SELECT id, user_message, eron_response FROM messages
+                WHERE user_id = ? AND id >= COALESCE((
+                    SELECT id FROM messages WHERE user_id = ?
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                ), 0)
+                ORDER BY id
+            ''', (user_id, user_id, self.max_messages - 1))
+            for message_id, user_message, eron_response in cursor:
+                index.add(message_id, f"{user_message or ''}\n{eron_response or ''}")
+
+            self._indexes[user_id] = index
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+            return index
+
+    def retrieve(self, user_id, query: str, k: int = None, skip_recent: int = 5) -> List[Dict]:
+        """Trocas antigas mais relevantes para a consulta (sem as skip_recent mais novas)"""
+        k = RETRIEVAL_TOP_K if k is None else k
+        self.memory.check_purges()
+        with self._lock:
+            hits = self._index(user_id).search(query, k, skip_last=skip_recent)
+        if not hits:
+            return []
+
+        placeholders = ','.join('?' * len(hits))
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT id, user_message, eron_response FROM messages WHERE id IN ({placeholders})',
+                [message_id for _, message_id in hits]
+            ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [
+            {'message_id': message_id, 'score': round(score, 4),
+             'user_message': by_id[message_id][1], 'eron_response': by_id[message_id][2]}
+            for score, message_id in hits if message_id in by_id
+        ]
+
+    def get_relevant_context(self, user_id, query: str, k: int = None,
+                             skip_recent: int = 5, token_budget: int = None) -> str:
+        """Trocas relevantes já limpas para o prompt, dentro do orçamento de tokens"""
+        budget = (RETRIEVAL_TOKEN_BUDGET if token_budget is None else token_budget) * CHARS_PER_TOKEN
+        selected, used = [], 0
+        for hit in self.retrieve(user_id, query, k, skip_recent):
+            lines = [
+                cleaned for cleaned in (
+                    clean_context_line(line)
+                    for line in f"Usuário: {hit['user_message']}\nAssistente: {hit['eron_response']}".split('\n')
+                ) if cleaned is not None
+            ]
+            size = sum(len(line) + 1 for line in lines)
+            if not lines or used + size > budget:
+                continue
+            selected.append((hit['message_id'], lines))
+            used += size
+
+        # Ordem cronológica no prompt
+        selected.sort()
+        return '\n'.join(line for _, lines in selected for line in lines)
+
+    def forget(self, user_id=None):
+        """Descarta o índice do usuário (ou de todos); é reconstruído no próximo uso"""
+        with self._lock:
+            if user_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(user_id, None)
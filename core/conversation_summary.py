@@ -0,0 +1,324 @@
+"""
+Resumo Contínuo das Conversas
+Um worker em segundo plano condensa, a cada K turnos, as mensagens antigas de
+cada usuário em um resumo compacto usando o modelo local, somente quando o
+LLM está ocioso; o prompt passa a levar "resumo + últimos turnos" em vez de
+histórico bruto
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import requests
+
+from core.memory import clean_context_line
+from core.metrics import TimedConnection, record_cache
+
+try:
+    from core.config import config
+    SUMMARY_ENABLED = config.learning.get('summary_enabled', True)
+    SUMMARY_EVERY_TURNS = config.learning.get('summary_every_turns', 10)
+    SUMMARY_KEEP_RECENT_TURNS = config.learning.get('summary_keep_recent_turns', 5)
+    SUMMARY_MAX_TOKENS = config.learning.get('summary_max_tokens', 200)
+    SUMMARY_IDLE_SECONDS = config.learning.get('summary_idle_seconds', 2.0)
+except Exception:
+    SUMMARY_ENABLED = True
+    SUMMARY_EVERY_TURNS = 10
+    SUMMARY_KEEP_RECENT_TURNS = 5
+    SUMMARY_MAX_TOKENS = 200
+    SUMMARY_IDLE_SECONDS = 2.0
+
+# Limite de texto bruto enviado por rodada de resumo (o restante fica para a próxima)
+MAX_SOURCE_CHARS = 6000
+MAX_CACHED_SUMMARIES = 1000
+
+SUMMARY_SYSTEM_PROMPT = (
+    "Você resume conversas entre um usuário e um assistente. Escreva em português, "
+    "em no máximo 8 frases curtas, apenas fatos duradouros: quem é o usuário, "
+    "preferências, assuntos recorrentes, pedidos pendentes e combinados. "
+    "Não invente nada e não inclua saudações."
+)
+
+
+def drop_summaries(conn, user_ids):
+    """
+    Apaga os resumos dos usuários, na transação de quem apagou as mensagens
+
+    O resumo cobre mensagens que deixaram de existir; a próxima rodada
+    recomeça a partir das que restaram.
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                    "AND name = 'conversation_summaries'").fetchone():
+        conn.executemany('DELETE FROM conversation_summaries WHERE user_id = ?',
+                         [(user_id,) for user_id in user_ids])
+
+
+class LLMActivity:
+    """Requisições ao LLM em andamento (trabalho de baixa prioridade espera ociosidade)"""
+
+    def __init__(self, idle_seconds: float = SUMMARY_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self._in_flight = 0
+        self._last_finished = 0.0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def busy(self):
+        """Marca uma requisição de chat ao LLM"""
+        with self._condition:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._last_finished = time.monotonic()
+                self._condition.notify_all()
+
+    def is_idle(self) -> bool:
+        with self._condition:
+            return self._idle_locked()
+
+    def _idle_locked(self) -> bool:
+        return (self._in_flight == 0
+                and time.monotonic() - self._last_finished >= self.idle_seconds)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Espera o LLM ficar ocioso (False se o timeout acabar antes)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._idle_locked():
+                if self._in_flight:
+                    wait = None
+                else:
+                    wait = self.idle_seconds - (time.monotonic() - self._last_finished)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+            return True
+
+
+def _default_generate(prompt: str) -> Optional[str]:
+    """Resumo pelo modelo local (LM Studio), com poucos tokens e temperatura baixa"""
+    api_url = os.getenv("LM_STUDIO_API_URL")
+    if not api_url:
+        return None
+    payload = {
+        "messages": [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": SUMMARY_MAX_TOKENS
+    }
+    response = requests.post(api_url, headers={"Content-Type": "application/json"},
+                             json=payload, timeout=120)
+    response.raise_for_status()
+    choices = response.json().get('choices') or []
+    if not choices:
+        return None
+    return choices[0]['message']['content'].strip() or None
+
+
+class ConversationSummarizer:
+    """
+    Resumo contínuo por usuário guardado em conversation_summaries
+
+    Cada resumo cobre as mensagens até last_message_id; as rodadas seguintes
+    só enviam ao modelo o resumo anterior e as mensagens novas que já saíram
+    da janela de turnos recentes.
+    """
+
+    def __init__(self, memory, every_turns: int = None, keep_recent: int = None,
+                 generate: Callable[[str], Optional[str]] = None,
+                 activity: LLMActivity = None):
+        self.memory = memory
+        self.every_turns = every_turns or SUMMARY_EVERY_TURNS
+        self.keep_recent = SUMMARY_KEEP_RECENT_TURNS if keep_recent is None else keep_recent
+        self.generate = generate or _default_generate
+        self.activity = activity or llm_activity
+
+        self.conn = sqlite3.connect(memory.db_path, check_same_thread=False,
+                                    timeout=30, factory=TimedConnection)
+        self._lock = threading.Lock()
+        self._turns_since: Dict[str, int] = {}
+        self._cache: OrderedDict = OrderedDict()
+        self._queue: queue.Queue = queue.Queue()
+        self._queued = set()
+        self._worker: Optional[threading.Thread] = None
+        self.create_table()
+
+        memory.add_listener(self.on_message_saved)
+        memory.add_purge_listener(self.forget)
+
+    def create_table(self):
+        with self._lock, self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS conversation_summaries (
+                    user_id TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    last_message_id INTEGER NOT NULL,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+    def on_message_saved(self, user_id, message_id, user_message, eron_response):
+        """Listener do EronMemory: agenda um resumo a cada every_turns turnos"""
+        if user_id is None:
+            return
+        with self._lock:
+            count = self._turns_since.get(user_id, 0) + 1
+            if count < self.every_turns:
+                self._turns_since[user_id] = count
+                return
+            self._turns_since[user_id] = 0
+        self.schedule(user_id)
+
+    def schedule(self, user_id):
+        with self._lock:
+            if user_id in self._queued:
+                return
+            self._queued.add(user_id)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='eron-summarizer', daemon=True)
+                self._worker.start()
+        self._queue.put(user_id)
+
+    def _run(self):
+        while True:
+            user_id = self._queue.get()
+            # Liberar antes de resumir: a rodada pode agendar a continuação
+            # (histórico maior que MAX_SOURCE_CHARS) para o mesmo usuário
+            with self._lock:
+                self._queued.discard(user_id)
+            try:
+                # Baixa prioridade: só chama o modelo com o chat ocioso
+                self.activity.wait_idle()
+                self.summarize_user(user_id)
+            except Exception as e:
+                print(f"⚠️ Erro ao resumir conversas de {user_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _stored(self, user_id):
+        with self._lock:
+            return self.conn.execute(
+                'SELECT summary, last_message_id FROM conversation_summaries WHERE user_id = ?',
+                (user_id,)
+            ).fetchone()
+
+    def summarize_user(self, user_id) -> bool:
+        """Incorpora ao resumo as mensagens que saíram da janela recente"""
+        stored = self._stored(user_id)
+        previous, last_message_id = stored if stored else ('', 0)
+
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT id, user_message, eron_response FROM messages
+                WHERE user_id = ? AND id > ? AND id <= COALESCE((
+                    SELECT id FROM messages WHERE user_id = ?
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                ), 0)
+                ORDER BY id
+            ''', (user_id, last_message_id, user_id, self.keep_recent)).fetchall()
+        if not rows:
+            return False
+
+        lines, covered_id, size = [], last_message_id, 0
+        for message_id, user_message, eron_response in rows:
+            turn_lines = [
+                cleaned for cleaned in (
+                    clean_context_line(line)
+                    for line in f"Usuário: {user_message}\nAssistente: {eron_response}".split('\n')
+                ) if cleaned is not None
+            ]
+            turn_size = sum(len(line) + 1 for line in turn_lines)
+            if lines and size + turn_size > MAX_SOURCE_CHARS:
+                break
+            lines.extend(turn_lines)
+            covered_id, size = message_id, size + turn_size
+
+        prompt = ''
+        if previous:
+            prompt += f"RESUMO ATUAL:\n{previous}\n\n"
+        prompt += "NOVAS MENSAGENS:\n" + '\n'.join(lines) + "\n\nEscreva o resumo atualizado."
+        summary = self.generate(prompt)
+        if not summary:
+            return False
+
+        with self._lock, self.conn:
+            # A retenção pode ter apagado mensagens (e o resumo) durante a geração
+            current = self.conn.execute(
+                'SELECT last_message_id FROM conversation_summaries WHERE user_id = ?', (user_id,)
+            ).fetchone()
+            still_there = self.conn.execute(
+                'SELECT 1 FROM messages WHERE id = ?', (rows[0][0],)
+            ).fetchone()
+            if (current[0] if current else 0) != last_message_id or not still_there:
+                return False
+            self.conn.execute('''
+                INSERT INTO conversation_summaries (user_id, summary, last_message_id, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    summary = excluded.summary,
+                    last_message_id = excluded.last_message_id,
+                    updated_at = excluded.updated_at
+            ''', (user_id, summary, covered_id))
+            self._cache_put(user_id, summary)
+
+        # Ainda há mensagens antigas além do limite desta rodada
+        if covered_id < rows[-1][0]:
+            self.schedule(user_id)
+        return True
+
+    def _cache_put(self, user_id, summary):
+        self._cache[user_id] = summary
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > MAX_CACHED_SUMMARIES:
+            self._cache.popitem(last=False)
+
+    def get_summary(self, user_id) -> str:
+        """Resumo atual do usuário para o prompt ('' se ainda não houver)"""
+        self.memory.check_purges()
+        with self._lock:
+            summary = self._cache.get(user_id)
+            if summary is not None:
+                self._cache.move_to_end(user_id)
+        record_cache('conversation_summary', summary is not None)
+        if summary is None:
+            stored = self._stored(user_id)
+            summary = stored[0] if stored else ''
+            with self._lock:
+                self._cache_put(user_id, summary)
+        return summary
+
+    def forget(self, user_id=None):
+        """
+        Descarta o resumo em cache do usuário (ou de todos)
+
+        Listener de remoção do EronMemory: a linha no banco já foi apagada
+        por drop_summaries na mesma transação que removeu as mensagens.
+        """
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+                self._turns_since.clear()
+            else:
+                self._cache.pop(user_id, None)
+                self._turns_since.pop(user_id, None)
+
+    def wait_pending(self):
+        """Bloqueia até a fila de resumos esvaziar (testes e desligamento)"""
+        self._queue.join()
+
+
+# Instância global das requisições de chat em andamento
+llm_activity = LLMActivity()
@@ -4,10 +4,151 @@ Conexões unificadas para todos os bancos de dados do sistema
 """
 import sqlite3
 import os
+import re
+import json
+import logging
 import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
 from contextlib import contextmanager
+from core.metrics import TimedConnection, add_statement_observer, remove_statement_observer
+
+# Literais e listas trocados por ? para agrupar comandos iguais com valores diferentes
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(sql: str) -> str:
+    """Normaliza um comando SQL (espaços, literais e listas IN) para agregação"""
+    normalized = _STRING_LITERAL.sub('?', sql)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER_LIST.sub('(?)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+class SlowQueryLog:
+    """
+    Estatísticas por comando SQL normalizado, separadas por banco
+    
+    Recebe o tempo de cada comando das conexões TimedConnection (todas as
+    conexões do sistema usam essa factory). Desativado por padrão: quando
+    ativo, custa uma normalização em cache e uma atualização de dicionário
+    por comando.
+    """
+    
+    def __init__(self, top_n: int = 20, max_statements_per_db: int = 500,
+                 slow_threshold_ms: float = 0.0):
+        self.top_n = top_n
+        self.max_statements_per_db = max_statements_per_db
+        self.slow_threshold = slow_threshold_ms / 1000.0
+        self.enabled = False
+        self._stats: Dict[str, Dict[str, List[float]]] = {}
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger('eron.database.slow_queries')
+    
+    def enable(self):
+        """Começa a registrar os comandos de todas as conexões instrumentadas"""
+        self.enabled = True
+        add_statement_observer(self.record)
+    
+    def disable(self):
+        """Para de registrar (as estatísticas acumuladas são mantidas)"""
+        self.enabled = False
+        remove_statement_observer(self.record)
+    
+    def record(self, db_label: str, sql: str, elapsed: float):
+        """Registra a execução de um comando"""
+        try:
+            statement = normalize_statement(sql)
+        except TypeError:
+            return
+        
+        with self._lock:
+            db_stats = self._stats.setdefault(db_label, {})
+            entry = db_stats.get(statement)
+            if entry is None:
+                if len(db_stats) >= self.max_statements_per_db:
+                    # Descartar o comando com menor tempo total para manter a memória limitada
+                    cheapest = min(db_stats, key=lambda key: db_stats[key][1])
+                    del db_stats[cheapest]
+                # [contagem, tempo total, pior tempo]
+                entry = db_stats[statement] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+        
+        if self.slow_threshold and elapsed >= self.slow_threshold:
+            self._logger.warning("Comando lento em %s (%.1f ms): %s", db_label, elapsed * 1000, statement[:300])
+    
+    def get_slowest(self, db_label: Optional[str] = None, limit: Optional[int] = None,
+                    order_by: str = 'total') -> Dict[str, List[Dict[str, Any]]]:
+        """Os N comandos mais caros por banco (order_by: 'total', 'max' ou 'count')"""
+        limit = limit or self.top_n
+        sort_index = {'count': 0, 'total': 1, 'max': 2}.get(order_by, 1)
+        
+        with self._lock:
+            snapshot = {
+                db: {stmt: list(entry) for stmt, entry in stats.items()}
+                for db, stats in self._stats.items()
+                if db_label is None or db == db_label
+            }
+        
+        report = {}
+        for db, stats in snapshot.items():
+            ranked = sorted(stats.items(), key=lambda item: item[1][sort_index], reverse=True)[:limit]
+            report[db] = [
+                {
+                    'statement': stmt,
+                    'count': count,
+                    'total_ms': round(total * 1000, 3),
+                    'avg_ms': round(total * 1000 / count, 3) if count else 0.0,
+                    'max_ms': round(worst * 1000, 3)
+                }
+                for stmt, (count, total, worst) in ranked
+            ]
+        return report
+    
+    def dump(self, path: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Gera o relatório (e grava em JSON se um caminho for informado)"""
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            'enabled': self.enabled,
+            'databases': self.get_slowest(limit=limit)
+        }
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+    
+    def reset(self):
+        """Limpa as estatísticas acumuladas"""
+        with self._lock:
+            self._stats.clear()
+
+
+def _create_slow_query_log() -> SlowQueryLog:
+    try:
+        from core.config import config
+        settings = config.database
+    except Exception:
+        settings = {}
+    
+    slow_log = SlowQueryLog(
+        top_n=settings.get('query_profiling_top_n', 20),
+        slow_threshold_ms=settings.get('slow_query_threshold_ms', 0.0)
+    )
+    if settings.get('query_profiling_enabled', False):
+        slow_log.enable()
+    return slow_log
+
+
+# Log global de comandos lentos (opt-in via DB_QUERY_PROFILING=True)
+slow_query_log = _create_slow_query_log()
 
 class DatabaseManager:
     """Gerenciador centralizado de todas as conexões de banco"""
@@ -29,7 +170,8 @@ class DatabaseManager:
         self.db_config = {
             'timeout': 30.0,
             'check_same_thread': False,
-            'isolation_level': None  # autocommit mode
+            'isolation_level': None,  # autocommit mode
+            'factory': TimedConnection  # tempo por banco em eron_sqlite_query_seconds
         }
         
         # Mapping de bancos disponíveis
@@ -122,7 +264,9 @@ class DatabaseManager:
         backup_conn = sqlite3.connect(backup_path)
         
         try:
-            source_conn.backup(backup_conn)
+            # Cópia em passos com pausas para não bloquear escritores (core/backup.py)
+            from core.backup import stepped_backup
+            stepped_backup(source_conn, backup_conn)
             return backup_path
         finally:
             backup_conn.close()
@@ -133,6 +277,24 @@ class DatabaseManager:
         conn.execute("VACUUM")
         conn.execute("ANALYZE")
     
+    def enable_query_profiling(self):
+        """Ativa a coleta de tempo por comando (todos os bancos instrumentados)"""
+        slow_query_log.enable()
+    
+    def disable_query_profiling(self):
+        """Desativa a coleta de tempo por comando"""
+        slow_query_log.disable()
+    
+    def get_slow_queries(self, db_name: Optional[str] = None, limit: Optional[int] = None,
+                         order_by: str = 'total') -> Dict[str, List[Dict[str, Any]]]:
+        """Comandos mais caros por banco; db_name aceita o nome lógico ('memory') ou o arquivo"""
+        db_label = self.databases.get(db_name, db_name) if db_name else None
+        return slow_query_log.get_slowest(db_label, limit, order_by)
+    
+    def dump_slow_queries(self, path: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Relatório dos comandos mais lentos, opcionalmente gravado em JSON"""
+        return slow_query_log.dump(path, limit)
+    
     def get_database_info(self, db_name: str) -> Dict[str, Any]:
         """Obter informações sobre banco"""
         conn = self.get_connection(db_name)
@@ -232,3 +394,7 @@ def fetch_one(db_name: str, query: str, params: tuple = ()) -> Optional[tuple]:
 def fetch_all(db_name: str, query: str, params: tuple = ()) -> list:
     """Buscar todos os registros com gerenciador global"""
     return get_db_manager().fetch_all(db_name, query, params)
+
+def dump_slow_queries(path: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Relatório dos comandos SQL mais lentos de todos os bancos"""
+    return slow_query_log.dump(path, limit)
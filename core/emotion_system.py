@@ -2,6 +2,8 @@ from enum import Enum
 import sqlite3
 import os
 from datetime import datetime
+from core.metrics import TimedConnection
+from core.text_features import get_message_features, register_keyword_groups
 
 class Emotion(Enum):
     HAPPY = "feliz"
@@ -12,13 +14,27 @@ class Emotion(Enum):
     SAD = "triste"
     ANGRY = "irritado"
 
+# Palavras-chave por emoção (detecção simples; registradas no extrator compartilhado)
+EMOTION_KEYWORDS = {
+    Emotion.HAPPY: ['feliz', 'alegre', 'contente', 'ótimo', 'maravilhoso'],
+    Emotion.EXCITED: ['animado', 'empolgado', 'entusiasmado', 'uau'],
+    Emotion.CALM: ['calmo', 'tranquilo', 'sereno', 'relaxado'],
+    Emotion.SAD: ['triste', 'chateado', 'deprimido', 'mal'],
+    Emotion.ANGRY: ['bravo', 'irritado', 'raiva', 'chato', 'odeio'],
+    Emotion.TIRED: ['cansado', 'exausto', 'sono', 'preguiça']
+}
+
+_EMOTION_GROUPS = register_keyword_groups(
+    'emotion', {emotion.name: words for emotion, words in EMOTION_KEYWORDS.items()}
+)
+
 class EmotionSystem:
     def __init__(self, db_path=None):
         if db_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(base_dir, 'database', 'emotions.db')
             
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
         self.create_tables()
         
     def create_tables(self):
@@ -95,22 +111,13 @@ class EmotionSystem:
         # TODO: Implementar análise de sentimento mais sofisticada
         # Por enquanto, usa uma detecção simples baseada em palavras-chave
         
-        keywords = {
-            Emotion.HAPPY: ['feliz', 'alegre', 'contente', 'ótimo', 'maravilhoso'],
-            Emotion.EXCITED: ['animado', 'empolgado', 'entusiasmado', 'uau'],
-            Emotion.CALM: ['calmo', 'tranquilo', 'sereno', 'relaxado'],
-            Emotion.SAD: ['triste', 'chateado', 'deprimido', 'mal'],
-            Emotion.ANGRY: ['bravo', 'irritado', 'raiva', 'chato', 'odeio'],
-            Emotion.TIRED: ['cansado', 'exausto', 'sono', 'preguiça']
-        }
-        
         detected_emotion = Emotion.NEUTRAL
         max_confidence = 0.0
         
-        message_lower = message_text.lower()
+        features = get_message_features(message_text)
         
-        for emotion, words in keywords.items():
-            confidence = sum(1 for word in words if word in message_lower) / len(words)
+        for emotion, words in EMOTION_KEYWORDS.items():
+            confidence = features.count(_EMOTION_GROUPS[emotion.name]) / len(words)
             if confidence > max_confidence:
                 max_confidence = confidence
                 detected_emotion = emotion
@@ -0,0 +1,402 @@
+"""
+Agendador de Manutenção
+Jobs periódicos (sessões adultas expiradas, tokens vencidos, ANALYZE,
+wal_checkpoint, retenção e backups) com expressões estilo cron, jitter e
+trava compartilhada em SQLite, para que web e bot juntos executem cada job
+uma única vez por horário
+"""
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from core.metrics import MAINTENANCE_JOB_SECONDS, TimedConnection
+
+try:
+    from core.config import config
+    MAINTENANCE_ENABLED = config.database.get('maintenance_enabled', True)
+    MAINTENANCE_TICK_SECONDS = config.database.get('maintenance_tick_seconds', 60)
+    MAINTENANCE_JITTER_SECONDS = config.database.get('maintenance_jitter_seconds', 120)
+    MAINTENANCE_SCHEDULES = config.database.get('maintenance_schedules', {})
+    BACKUP_INTERVAL_HOURS = config.database.get('backup_interval_hours', 24)
+except Exception:
+    MAINTENANCE_ENABLED = True
+    MAINTENANCE_TICK_SECONDS = 60
+    MAINTENANCE_JITTER_SECONDS = 120
+    MAINTENANCE_SCHEDULES = {}
+    BACKUP_INTERVAL_HOURS = 24
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+DEFAULT_STATE_DB = PROJECT_ROOT / 'database' / 'maintenance.db'
+
+# Pastas com bancos SQLite do projeto (web, bot, aprendizado, moderação, 18+)
+DATABASE_DIRS = ('database', 'memoria', 'core/memoria', 'Eron-18/database18')
+
+DEFAULT_SCHEDULES = {
+    'adult_sessions_cleanup': '*/15 * * * *',
+    'expired_tokens_cleanup': '0 * * * *',
+    'wal_checkpoint': '*/30 * * * *',
+    'analyze': '30 4 * * *',
+    'retention': '0 4 * * *',
+}
+
+_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+
+def project_databases() -> List[Path]:
+    """Bancos SQLite do projeto (ignora cópias de backup)"""
+    databases = []
+    for directory in DATABASE_DIRS:
+        folder = PROJECT_ROOT / directory
+        if folder.is_dir():
+            databases.extend(sorted(
+                path for path in folder.glob('*.db')
+                if not path.name.startswith('backup_') and path.name != DEFAULT_STATE_DB.name
+            ))
+    return databases
+
+
+class CronSchedule:
+    """
+    Expressão cron de 5 campos (minuto hora dia mês dia-da-semana)
+
+    Aceita *, listas (1,15), faixas (1-5), passos (*/10, 8-18/2) e os
+    atalhos @hourly/@daily/@weekly/@monthly; domingo é 0 ou 7.
+    """
+
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expressão cron inválida: {expression!r}")
+
+        parsed = [self._parse(field, low, high) for field, (low, high) in zip(fields, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        # Como no cron: com dia e dia-da-semana restritos, basta um dos dois
+        self._dom_restricted = fields[2] != '*'
+        self._dow_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Passo inválido em {field!r}")
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-', 1))
+            else:
+                start = end = int(part)
+                if step != 1:
+                    end = high
+            if start < low or end > high or start > end:
+                raise ValueError(f"Valor fora do intervalo em {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        dom = moment.day in self.days
+        dow = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._dom_restricted and self._dow_restricted:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Próximo horário estritamente depois de moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(200000):
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Expressão cron sem horários válidos: {self.expression!r}")
+
+
+class MaintenanceJob:
+    """Um job agendado"""
+
+    __slots__ = ('name', 'func', 'schedule', 'jitter_seconds', 'lease_seconds')
+
+    def __init__(self, name: str, func: Callable[[], Any], schedule: str,
+                 jitter_seconds: float, lease_seconds: float):
+        self.name = name
+        self.func = func
+        self.schedule = CronSchedule(schedule)
+        self.jitter_seconds = jitter_seconds
+        self.lease_seconds = lease_seconds
+
+
+class MaintenanceScheduler:
+    """
+    Executa os jobs vencidos a cada tick
+
+    O próximo horário, a trava (dono + validade) e as estatísticas de cada
+    job ficam em um banco compartilhado; a trava é obtida com um UPDATE
+    condicional, então só um processo executa cada horário, e uma trava
+    vencida (processo que caiu) é retomada pelo próximo tick.
+    """
+
+    def __init__(self, state_db_path: Optional[str] = None, tick_seconds: Optional[float] = None,
+                 jitter_seconds: Optional[float] = None):
+        self.state_db_path = Path(state_db_path or DEFAULT_STATE_DB)
+        self.state_db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.tick_seconds = tick_seconds or MAINTENANCE_TICK_SECONDS
+        self.jitter_seconds = MAINTENANCE_JITTER_SECONDS if jitter_seconds is None else jitter_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self.jobs: Dict[str, MaintenanceJob] = {}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.conn = sqlite3.connect(str(self.state_db_path), check_same_thread=False,
+                                    timeout=30, factory=TimedConnection)
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_jobs (
+                    name TEXT PRIMARY KEY,
+                    schedule TEXT,
+                    next_run_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    last_started_at REAL,
+                    last_finished_at REAL,
+                    last_status TEXT,
+                    last_error TEXT,
+                    last_duration REAL,
+                    runs INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0
+                )
+            ''')
+
+    def add_job(self, name: str, func: Callable[[], Any], schedule: str,
+                jitter_seconds: Optional[float] = None, lease_seconds: float = 3600):
+        """Registra um job; o primeiro horário vale para todos os processos"""
+        jitter = self.jitter_seconds if jitter_seconds is None else jitter_seconds
+        job = MaintenanceJob(name, func, schedule, jitter, lease_seconds)
+        self.jobs[name] = job
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                'SELECT schedule FROM maintenance_jobs WHERE name = ?', (name,)
+            ).fetchone()
+            if row is None or row[0] != schedule:
+                # Job novo ou horário alterado: recalcular o próximo horário
+                self.conn.execute('''
+                    INSERT INTO maintenance_jobs (name, schedule, next_run_at) VALUES (?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET schedule = excluded.schedule,
+                                                    next_run_at = excluded.next_run_at
+                ''', (name, schedule, self._next_run_at(job, time.time())))
+        return job
+
+    @staticmethod
+    def _next_run_at(job: MaintenanceJob, after: float) -> float:
+        moment = job.schedule.next_after(datetime.fromtimestamp(after))
+        return moment.timestamp() + random.uniform(0, job.jitter_seconds)
+
+    def _acquire(self, job: MaintenanceJob, now: float, force: bool = False) -> bool:
+        with self._lock, self.conn:
+            cursor = self.conn.execute(f'''
+                UPDATE maintenance_jobs
+                SET lease_owner = ?, lease_expires_at = ?, last_started_at = ?
+                WHERE name = ? {'' if force else 'AND next_run_at <= ?'}
+                  AND (lease_owner IS NULL OR lease_expires_at < ?)
+            ''', (self.owner, now + job.lease_seconds, now, job.name)
+                 + (() if force else (now,)) + (now,))
+            return cursor.rowcount == 1
+
+    def _finish(self, job: MaintenanceJob, now: float, duration: float, status: str, error: Optional[str]):
+        finished = time.time()
+        with self._lock, self.conn:
+            self.conn.execute('''
+                UPDATE maintenance_jobs
+                SET lease_owner = NULL, lease_expires_at = NULL, next_run_at = ?,
+                    last_finished_at = ?, last_status = ?, last_error = ?, last_duration = ?,
+                    runs = runs + 1, failures = failures + ?
+                WHERE name = ? AND lease_owner = ?
+            ''', (self._next_run_at(job, max(now, finished)), finished, status, error, duration,
+                  1 if status == 'error' else 0, job.name, self.owner))
+
+    def _execute(self, job: MaintenanceJob, now: float) -> str:
+        started = time.perf_counter()
+        status, error = 'ok', None
+        try:
+            job.func()
+        except Exception as e:
+            status, error = 'error', f"{type(e).__name__}: {e}"
+            print(f"⚠️ Job de manutenção {job.name} falhou: {error}")
+        duration = time.perf_counter() - started
+        MAINTENANCE_JOB_SECONDS.labels(job.name, status).observe(duration)
+        self._finish(job, now, duration, status, error)
+        return status
+
+    def run_pending(self, now: Optional[float] = None) -> List[str]:
+        """Executa os jobs vencidos que este processo conseguir travar"""
+        now = time.time() if now is None else now
+        executed = []
+        for job in list(self.jobs.values()):
+            if self._acquire(job, now):
+                self._execute(job, now)
+                executed.append(job.name)
+        return executed
+
+    def run_job(self, name: str) -> Optional[str]:
+        """Executa um job agora (None se outro processo estiver com a trava)"""
+        job = self.jobs[name]
+        now = time.time()
+        if not self._acquire(job, now, force=True):
+            return None
+        return self._execute(job, now)
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """Estado compartilhado dos jobs registrados"""
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT name, schedule, next_run_at, lease_owner, last_started_at, last_status,
+                       last_error, last_duration, runs, failures
+                FROM maintenance_jobs ORDER BY name
+            ''').fetchall()
+        columns = ('name', 'schedule', 'next_run_at', 'lease_owner', 'last_started_at', 'last_status',
+                   'last_error', 'last_duration', 'runs', 'failures')
+        return [dict(zip(columns, row)) for row in rows if row[0] in self.jobs]
+
+    # ------------------------------------------------------------------
+    # Execução: thread própria (web) ou JobQueue do python-telegram-bot
+    # ------------------------------------------------------------------
+
+    def _loop(self):
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"⚠️ Erro no agendador de manutenção: {e}")
+
+    def start(self):
+        """Inicia a thread de ticks (idempotente)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='eron-maintenance', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def attach_to_job_queue(self, job_queue) -> bool:
+        """
+        Registra o tick no JobQueue do bot (requer python-telegram-bot[job-queue])
+
+        Os jobs rodam em uma thread (asyncio.to_thread) para não travar o loop
+        de eventos; retorna False se o JobQueue não estiver disponível.
+        """
+        if job_queue is None:
+            return False
+
+        async def _tick(context):
+            await asyncio.to_thread(self.run_pending)
+
+        job_queue.run_repeating(_tick, interval=self.tick_seconds, first=self.tick_seconds,
+                                name='eron-maintenance')
+        return True
+
+
+# ----------------------------------------------------------------------
+# Jobs padrão
+# ----------------------------------------------------------------------
+
+def analyze_databases():
+    """ANALYZE limitado (estatísticas do planejador) em todos os bancos"""
+    for db_path in project_databases():
+        conn = sqlite3.connect(str(db_path), timeout=30, factory=TimedConnection)
+        try:
+            conn.execute('PRAGMA analysis_limit = 1000')
+            conn.execute('ANALYZE')
+            conn.execute('PRAGMA optimize')
+        finally:
+            conn.close()
+
+
+def checkpoint_databases() -> Dict[str, tuple]:
+    """wal_checkpoint(PASSIVE) nos bancos em modo WAL (não espera leitores)"""
+    results = {}
+    for db_path in project_databases():
+        conn = sqlite3.connect(str(db_path), timeout=30, factory=TimedConnection)
+        try:
+            if conn.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal':
+                results[db_path.name] = conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+        finally:
+            conn.close()
+    return results
+
+
+def backup_databases():
+    """Backup online (incremental, verificado e compactado) de todos os bancos"""
+    from core.backup import backup_all_databases
+    return backup_all_databases()
+
+
+def run_retention_job():
+    from core.retention import run_retention
+    return run_retention()
+
+
+def backup_schedule(interval_hours: int) -> str:
+    """Horário cron equivalente a DB_BACKUP_INTERVAL (diário às 3h se não dividir 24)"""
+    if 0 < interval_hours < 24 and 24 % interval_hours == 0:
+        return f'0 */{interval_hours} * * *'
+    return '0 3 * * *'
+
+
+def build_default_scheduler(user_profile_db=None, adult_db=None,
+                            state_db_path: Optional[str] = None) -> MaintenanceScheduler:
+    """
+    Agendador com os jobs padrão do projeto
+
+    Cada front end passa as instâncias de banco que já tem; jobs sem
+    instância são omitidos naquele processo (o outro processo os executa).
+    """
+    schedules = dict(DEFAULT_SCHEDULES, backup=backup_schedule(BACKUP_INTERVAL_HOURS))
+    schedules.update(MAINTENANCE_SCHEDULES or {})
+    scheduler = MaintenanceScheduler(state_db_path)
+
+    if adult_db is not None:
+        scheduler.add_job('adult_sessions_cleanup', adult_db.cleanup_expired_sessions,
+                          schedules['adult_sessions_cleanup'], jitter_seconds=30, lease_seconds=300)
+    if user_profile_db is not None:
+        scheduler.add_job('expired_tokens_cleanup', user_profile_db.cleanup_expired_tokens,
+                          schedules['expired_tokens_cleanup'], jitter_seconds=60, lease_seconds=300)
+    scheduler.add_job('wal_checkpoint', checkpoint_databases, schedules['wal_checkpoint'],
+                      jitter_seconds=60, lease_seconds=600)
+    scheduler.add_job('analyze', analyze_databases, schedules['analyze'])
+    scheduler.add_job('retention', run_retention_job, schedules['retention'], lease_seconds=4 * 3600)
+    scheduler.add_job('backup', backup_databases, schedules['backup'], lease_seconds=4 * 3600)
+    return scheduler
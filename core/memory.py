@@ -1,13 +1,131 @@
 import sqlite3
 import os
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from core.metrics import TimedConnection, record_cache
+
+try:
+    from core.config import config
+    RECENT_TURNS_PER_USER = config.learning.get('recent_turns_per_user', 20)
+    RECENT_TURNS_MAX_USERS = config.learning.get('recent_turns_max_users', 1000)
+except Exception:
+    RECENT_TURNS_PER_USER = 20
+    RECENT_TURNS_MAX_USERS = 1000
+
+# Dias que os registros de message_purges ficam guardados
+PURGE_RECORD_DAYS = 7
+
+_MESSAGE_PURGES_SQL = '''
+    CREATE TABLE IF NOT EXISTS message_purges (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        purged_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+def record_message_purge(conn, user_ids):
+    """
+    Registra, na transação de quem apagou, os usuários que perderam mensagens
+
+    Cada EronMemory (em qualquer processo) lê os registros novos em
+    check_purges e descarta os caches desses usuários.
+    """
+    conn.execute(_MESSAGE_PURGES_SQL)
+    conn.executemany('INSERT INTO message_purges (user_id) VALUES (?)', [(user_id,) for user_id in user_ids])
+    conn.execute("DELETE FROM message_purges WHERE purged_at < datetime('now', ?)",
+                 (f'-{PURGE_RECORD_DAYS} days',))
+
+
+# Linhas de contexto que são perguntas de personalização antigas
+_PERSONALIZATION_PHRASES = (
+    'como você gostaria que eu me chamasse',
+    'para te atender melhor, preciso saber',
+    'nome do assistente',
+    'estilo de linguagem'
+)
+
+# Apresentações do bot que confundem o modelo quando repetidas no contexto
+_SELF_INTRODUCTIONS = ('Eu me chamo Maya 💖', 'Eu me chamo Aina 💖', 'Eu me chamo ERON 💖')
+
+
+def _strip_introductions(line):
+    for introduction in _SELF_INTRODUCTIONS:
+        line = line.replace(introduction, '')
+    return line.strip()
+
+
+def clean_context_line(line):
+    """
+    Limpa uma linha de contexto para o prompt (None = descartar)
+
+    Remove perguntas de personalização antigas e respostas que começam com a
+    apresentação do bot ("Eu me chamo ..."), mantendo o conteúdo útil.
+    """
+    line_lower = line.lower()
+    if any(phrase in line_lower for phrase in _PERSONALIZATION_PHRASES):
+        return None
+
+    if 'Eu me chamo ' not in line:
+        return line
+
+    if 'capital do Brasil' in line:
+        # Manter apenas a parte da resposta que responde à pergunta
+        line = _strip_introductions(line)
+        if line.startswith('A capital') or line.startswith('É ') or len(line.strip()) > 10:
+            return line
+        return None
+
+    # Se sobrar conteúdo útil após remover a apresentação, manter
+    cleaned_line = _strip_introductions(line)
+    return cleaned_line if len(cleaned_line) > 10 else None
+
+
+class _Turn:
+    """Uma troca usuário/assistente com as linhas de contexto já limpas"""
+
+    __slots__ = ('user_message', 'eron_response', 'clean_lines')
+
+    def __init__(self, user_message, eron_response):
+        self.user_message = user_message
+        self.eron_response = eron_response
+        lines = f"Usuário: {user_message}\nAssistente: {eron_response}".split('\n')
+        self.clean_lines = tuple(
+            cleaned for cleaned in (clean_context_line(line) for line in lines)
+            if cleaned is not None
+        )
+
 
 class EronMemory:
-    def __init__(self, db_path=None):
+    # Intervalo entre as consultas a message_purges (mensagens apagadas por outro processo)
+    PURGE_CHECK_INTERVAL_SECONDS = 30
+
+    def __init__(self, db_path=None, recent_turns=None, max_users=None):
         if db_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(base_dir, 'database', 'eron_memory.db')
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
+        
+        # Callbacks chamados após cada save_message (resumos, índices...) e
+        # quando a retenção apaga mensagens de um usuário
+        self._listeners = []
+        self._purge_listeners = []
+        
+        # Buffer circular dos últimos turnos por usuário ativo (LRU de usuários)
+        self.recent_turns = recent_turns or RECENT_TURNS_PER_USER
+        self.max_users = max_users or RECENT_TURNS_MAX_USERS
+        self._recent = OrderedDict()
+        self._recent_lock = threading.Lock()
         self.create_table()
+        
+        # Só as remoções feitas depois da abertura importam (os caches começam vazios)
+        self._purge_lock = threading.Lock()
+        self._purges_seen_id = self.conn.execute(
+            'SELECT COALESCE(MAX(id), 0) FROM message_purges').fetchone()[0]
+        self._last_purge_check = time.monotonic()
 
     def create_table(self):
         with self.conn:
@@ -30,13 +148,120 @@ class EronMemory:
                 self.conn.execute('ALTER TABLE messages ADD COLUMN user_id TEXT')
             if 'timestamp' not in columns:
                 self.conn.execute('ALTER TABLE messages ADD COLUMN timestamp DATETIME')
+            
+            # Chave da paginação por keyset (user_id, id)
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id, id)')
+            
+            self.conn.execute(_MESSAGE_PURGES_SQL)
+
+    def add_listener(self, callback):
+        """Registra callback(user_id, message_id, user_message, eron_response) para novas mensagens"""
+        self._listeners.append(callback)
+
+    def add_purge_listener(self, callback):
+        """Registra callback(user_id) para quando mensagens do usuário são apagadas (None = todos)"""
+        self._purge_listeners.append(callback)
+
+    def check_purges(self, force=False):
+        """
+        Descarta os caches dos usuários cujas mensagens foram apagadas
+
+        Lê os registros novos de message_purges (gravados pela retenção em
+        qualquer processo) no máximo a cada PURGE_CHECK_INTERVAL_SECONDS.
+        Retorna quantos usuários foram descartados.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_purge_check < self.PURGE_CHECK_INTERVAL_SECONDS:
+            return 0
+        with self._purge_lock:
+            self._last_purge_check = now
+            rows = self.conn.execute(
+                'SELECT id, user_id FROM message_purges WHERE id > ? ORDER BY id',
+                (self._purges_seen_id,)
+            ).fetchall()
+            if not rows:
+                return 0
+            # Lacuna nos ids: registros já expirados que este processo não viu
+            missed = self._purges_seen_id and rows[0][0] > self._purges_seen_id + 1
+            self._purges_seen_id = rows[-1][0]
+        
+        user_ids = [None] if missed else list(dict.fromkeys(row[1] for row in rows))
+        for user_id in user_ids:
+            self.forget_recent(user_id)
+            for callback in self._purge_listeners:
+                try:
+                    callback(user_id)
+                except Exception as e:
+                    print(f"⚠️ Erro em listener de remoção de mensagens: {e}")
+        return len(user_ids)
 
     def save_message(self, user_message, eron_response, user_id=None):
         with self.conn:
-            self.conn.execute(
+            cursor = self.conn.execute(
                 'INSERT INTO messages (user_id, user_message, eron_response, timestamp) VALUES (?, ?, ?, CURRENT_TIMESTAMP)',
                 (user_id, user_message, eron_response)
             )
+        message_id = cursor.lastrowid
+        
+        if user_id is not None:
+            self._remember_turn(user_id, user_message, eron_response)
+        
+        for callback in self._listeners:
+            try:
+                callback(user_id, message_id, user_message, eron_response)
+            except Exception as e:
+                print(f"⚠️ Erro em listener de mensagens: {e}")
+        return message_id
+    
+    def _remember_turn(self, user_id, user_message, eron_response):
+        # Limpeza feita uma vez, na escrita
+        turn = _Turn(user_message, eron_response)
+        with self._recent_lock:
+            turns = self._recent.get(user_id)
+            if turns is not None:
+                turns.append(turn)
+                self._recent.move_to_end(user_id)
+                return
+        # Usuário fora do buffer: carregar do banco (já inclui este turno)
+        self._load_recent(user_id)
+    
+    def _load_recent(self, user_id):
+        """Carrega os últimos turnos do usuário no buffer (um SELECT por usuário ativo)"""
+        rows = self.conn.execute(
+            'SELECT user_message, eron_response FROM messages WHERE user_id = ? ORDER BY timestamp DESC, id DESC LIMIT ?',
+            (user_id, self.recent_turns)
+        ).fetchall()
+        turns = deque((_Turn(row[0], row[1]) for row in reversed(rows)), maxlen=self.recent_turns)
+        
+        with self._recent_lock:
+            self._recent[user_id] = turns
+            self._recent.move_to_end(user_id)
+            while len(self._recent) > self.max_users:
+                self._recent.popitem(last=False)
+        return turns
+    
+    def _recent_turns(self, user_id, limit):
+        """Últimos turnos do usuário (do buffer; None se limit excede o buffer)"""
+        if limit > self.recent_turns:
+            return None
+        self.check_purges()
+        with self._recent_lock:
+            turns = self._recent.get(user_id)
+            if turns is not None:
+                self._recent.move_to_end(user_id)
+                turns = list(turns)
+        record_cache('recent_turns', turns is not None)
+        if turns is None:
+            turns = list(self._load_recent(user_id))
+        return turns[-limit:] if limit > 0 else []
+    
+    def forget_recent(self, user_id=None):
+        """Descarta o buffer do usuário (ou de todos) após apagar mensagens no banco"""
+        with self._recent_lock:
+            if user_id is None:
+                self._recent.clear()
+            else:
+                self._recent.pop(user_id, None)
 
     def get_all_messages(self, user_id=None):
         with self.conn:
@@ -49,8 +274,82 @@ class EronMemory:
                 # Compatibilidade com código antigo
                 return self.conn.execute('SELECT * FROM messages ORDER BY timestamp').fetchall()
     
+    def iter_messages(self, user_id, after_id=0, batch_size=500):
+        """
+        Itera as mensagens do usuário em ordem de id, em lotes por keyset
+
+        Cada lote é uma consulta curta (id > último id visto), então nenhum
+        cursor fica aberto entre lotes e a memória usada não cresce com o
+        histórico.
+        """
+        while True:
+            rows = self.conn.execute(
+                'SELECT id, user_message, eron_response, timestamp FROM messages WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?',
+                (user_id, after_id, batch_size)
+            ).fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1][0]
+    
+    def get_messages_page(self, user_id, before_id=None, limit=50):
+        """
+        Página de mensagens anteriores a before_id (mais recentes se None)
+
+        Retorna as mensagens em ordem cronológica e o cursor da próxima página
+        (id da mensagem mais antiga da página, ou None se não houver mais).
+        """
+        if before_id is None:
+            rows = self.conn.execute(
+                'SELECT id, user_message, eron_response, timestamp FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+                (user_id, limit + 1)
+            ).fetchall()
+        else:
+            rows = self.conn.execute(
+                'SELECT id, user_message, eron_response, timestamp FROM messages WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?',
+                (user_id, before_id, limit + 1)
+            ).fetchall()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+        return {
+            'messages': [
+                {'id': row[0], 'user_message': row[1], 'eron_response': row[2], 'timestamp': row[3]}
+                for row in rows
+            ],
+            'next_before_id': rows[0][0] if has_more else None
+        }
+    
+    def iter_jsonl(self, user_id, batch_size=500):
+        """Linhas JSONL (uma mensagem por linha) geradas sob demanda"""
+        for message_id, user_message, eron_response, timestamp in self.iter_messages(user_id, batch_size=batch_size):
+            yield json.dumps({
+                'id': message_id,
+                'user_message': user_message,
+                'eron_response': eron_response,
+                'timestamp': timestamp
+            }, ensure_ascii=False) + '\n'
+    
+    def export_jsonl(self, user_id, output_path, batch_size=500):
+        """Exporta o histórico do usuário para um arquivo JSONL em memória constante"""
+        count = 0
+        with open(output_path, 'w', encoding='utf-8') as output:
+            for line in self.iter_jsonl(user_id, batch_size):
+                output.write(line)
+                count += 1
+        return count
+    
     def get_recent_context(self, user_id, limit=5):
         """Obtém contexto recente das conversas do usuário para melhorar respostas"""
+        turns = self._recent_turns(user_id, limit)
+        if turns is not None:
+            context = []
+            for turn in turns:  # Mais antigas primeiro
+                context.append(f"Usuário: {turn.user_message}")
+                context.append(f"Assistente: {turn.eron_response}")
+            return "\n".join(context) if context else ""
+        
         with self.conn:
             messages = self.conn.execute(
                 'SELECT user_message, eron_response FROM messages WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?',
@@ -63,3 +362,14 @@ class EronMemory:
                 context.append(f"Assistente: {msg[1]}")
             
             return "\n".join(context) if context else ""
+    
+    def get_clean_context(self, user_id, limit=5):
+        """Contexto recente já filtrado para o prompt (linhas limpas na escrita)"""
+        turns = self._recent_turns(user_id, limit)
+        if turns is None:
+            lines = self.get_recent_context(user_id, limit).split('\n')
+            return '\n'.join(
+                cleaned for cleaned in (clean_context_line(line) for line in lines if line)
+                if cleaned is not None
+            )
+        return '\n'.join(line for turn in turns for line in turn.clean_lines)
@@ -0,0 +1,378 @@
+"""
+Registro de Métricas em Processo (formato Prometheus)
+Contadores, gauges e histogramas com buckets pré-computados para web e bot
+"""
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Buckets padrão (segundos) para latências
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Buckets para consultas SQLite (mais finos na faixa de microssegundos)
+SQLITE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                  0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Buckets para contagem de tokens do LLM
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    """Base comum: nome, ajuda, labels e filhos por combinação de labels"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwvalues):
+        """Retorna o filho para a combinação de labels (criado uma única vez)"""
+        if kwvalues:
+            values = tuple(str(kwvalues[n]) for n in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"Métrica {self.name} espera labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.metric_type}']
+        # Cópia sob o lock: labels() pode criar filhos durante a coleta
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class _GaugeChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Valor instantâneo (pode ser atualizado por callback no momento da coleta)"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def render(self) -> List[str]:
+        if self.callback:
+            try:
+                for values, value in self.callback():
+                    self.labels(*values).set(value)
+            except Exception:
+                pass
+        return super().render()
+
+    def _render_child(self, values, child):
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Último slot é o bucket +Inf; nada é alocado ao observar
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos definidos na criação"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    @contextmanager
+    def time(self, *labelvalues):
+        """Mede a duração do bloco em segundos"""
+        child = self.labels(*labelvalues)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            child.observe(time.perf_counter() - start)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}')
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {child.count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas do processo"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames, callback=callback)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Exporta todas as métricas no formato de texto do Prometheus"""
+        lines = []
+        with self._lock:
+            registered = sorted(self._metrics.items())
+        for _, metric in registered:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Registro global
+metrics = MetricsRegistry()
+
+# Métricas compartilhadas entre web e bot
+LLM_REQUEST_SECONDS = metrics.histogram(
+    'eron_llm_request_seconds', 'Latência das chamadas ao LLM', ['outcome'])
+LLM_TOKENS = metrics.histogram(
+    'eron_llm_tokens', 'Tokens por chamada ao LLM', ['kind'], buckets=TOKEN_BUCKETS)
+SQLITE_QUERY_SECONDS = metrics.histogram(
+    'eron_sqlite_query_seconds', 'Tempo de execução de comandos SQLite', ['database'],
+    buckets=SQLITE_BUCKETS)
+MODERATION_SECONDS = metrics.histogram(
+    'eron_moderation_check_seconds', 'Tempo da análise de moderação', ['action'])
+TELEGRAM_HANDLER_SECONDS = metrics.histogram(
+    'eron_telegram_handler_seconds', 'Tempo dos handlers do Telegram', ['handler'])
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    'eron_http_request_seconds', 'Tempo das rotas Flask', ['endpoint', 'method', 'status'])
+MAINTENANCE_JOB_SECONDS = metrics.histogram(
+    'eron_maintenance_job_seconds', 'Tempo dos jobs de manutenção', ['job', 'status'],
+    buckets=JOB_BUCKETS)
+CACHE_REQUESTS = metrics.counter(
+    'eron_cache_requests_total', 'Consultas a caches (hit/miss)', ['cache', 'result'])
+
+
+def record_cache(cache: str, hit: bool):
+    """Registra hit/miss de um cache"""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+# ----------------------------------------------------------------------
+# SQLite: conexão/cursor com medição de tempo por banco
+# ----------------------------------------------------------------------
+
+# Observadores extras de comandos SQL: fn(db_label, sql, elapsed)
+# (ex.: log de consultas lentas do core.database)
+_statement_observers: List = []
+
+
+def add_statement_observer(observer):
+    """Registra um observador chamado após cada comando das conexões instrumentadas"""
+    if observer not in _statement_observers:
+        _statement_observers.append(observer)
+
+
+def remove_statement_observer(observer):
+    """Remove um observador registrado com add_statement_observer"""
+    if observer in _statement_observers:
+        _statement_observers.remove(observer)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor que registra o tempo de execute/executemany no histograma do banco"""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection._observe_statement(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection._observe_statement(sql, time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Conexão SQLite instrumentada (usar com sqlite3.connect(..., factory=TimedConnection))
+
+    Mede o tempo de execute/executemany/executescript. Para SELECT isso cobre
+    o planejamento e o primeiro passo; os fetch posteriores não são medidos.
+    """
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.db_label = os.path.basename(str(database)) or ':memory:'
+        self._histogram = SQLITE_QUERY_SECONDS.labels(self.db_label)
+
+    def _observe_statement(self, sql, elapsed: float):
+        self._histogram.observe(elapsed)
+        for observer in _statement_observers:
+            observer(self.db_label, sql, elapsed)
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._observe_statement(sql_script, time.perf_counter() - start)
+
+
+# ----------------------------------------------------------------------
+# Exportador HTTP para processos sem Flask (bot do Telegram)
+# ----------------------------------------------------------------------
+
+def start_metrics_server(port: int, host: str = '127.0.0.1',
+                         registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Sobe um servidor HTTP em thread daemon servindo /metrics"""
+    registry = registry or metrics
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-exporter', daemon=True)
+    thread.start()
+    return server
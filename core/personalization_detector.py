@@ -0,0 +1,181 @@
+"""
+Detector de Intenções de Personalização
+Nome do usuário, nome do bot, personalidade, estilo de linguagem e tópicos
+compilados uma única vez; mensagens sem nenhuma palavra-gatilho saem antes
+de qualquer regex (a maioria das mensagens de chat não é personalização)
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from core.text_features import MessageFeatures, get_message_features, register_keyword_groups
+
+# Respostas que não são nomes
+NAME_STOPWORDS = ['não', 'sim', 'ok', 'obrigado', 'obrigada']
+
+# Padrões compartilhados por bot e web
+BOT_NAME_PATTERNS = [
+    r"se chame (\w+)",
+    r"seu nome seja (\w+)",
+    r"te chamar de (\w+)",
+    r"quero que se chame (\w+)"
+]
+
+TOPICS_PATTERNS = [
+    r"gosto de (.*)",
+    r"me interesso por (.*)",
+    r"quero falar sobre (.*)",
+    r"meus interesses são (.*)",
+    r"tópicos favoritos são (.*)"
+]
+
+PERSONALITY_KEYWORDS = {
+    'amigável': ['amigável', 'amigo', 'amiga', 'legal', 'bacana', 'gentil'],
+    'formal': ['formal', 'profissional', 'sério', 'séria', 'educado'],
+    'casual': ['casual', 'descontraído', 'descontraída', 'relaxado', 'relaxada', 'informal'],
+    'divertido': ['divertido', 'divertida', 'engraçado', 'engraçada', 'brincalhão', 'alegre'],
+    'intelectual': ['intelectual', 'sábio', 'sábia', 'inteligente', 'culto', 'erudito']
+}
+
+LANGUAGE_KEYWORDS = {
+    'simples': ['simples', 'fácil', 'direto', 'básico'],
+    'técnico': ['técnico', 'detalhado', 'específico', 'científico'],
+    'coloquial': ['coloquial', 'gírias', 'informal', 'descontraído'],
+    'eloquente': ['eloquente', 'sofisticado', 'elegante', 'refinado']
+}
+
+# Palavras que indicam resposta à pergunta de personalização
+INTENT_INDICATORS = [
+    'meu nome', 'me chamo', 'sou', 'pode me chamar',
+    'se chame', 'seu nome seja', 'te chamar de', 'quero que se chame',
+    'formal', 'informal', 'amigável', 'divertido', 'casual'
+]
+
+_REGEX_METACHARS = set('.^$*+?{}[]\\|()')
+
+_PERSONALITY_GROUPS = register_keyword_groups('personalization.personality', PERSONALITY_KEYWORDS)
+_LANGUAGE_GROUPS = register_keyword_groups('personalization.language', LANGUAGE_KEYWORDS)
+_INTENT_GROUPS = register_keyword_groups('personalization.intent', {'indicators': INTENT_INDICATORS})
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Texto literal inicial do padrão (ex.: "me chamo " em r"^me chamo (\\w+)$")"""
+    prefix = []
+    for char in pattern.lstrip('^'):
+        if char in _REGEX_METACHARS:
+            break
+        prefix.append(char)
+    return ''.join(prefix)
+
+
+class PersonalizationDetector:
+    """
+    Detecta atualizações de perfil em uma mensagem
+
+    Cada regex fica associado à sua palavra-gatilho (o prefixo literal) e só é
+    executado quando ela aparece no texto; os gatilhos e as palavras-chave de
+    personalidade/linguagem vão para o autômato compartilhado do turno.
+    """
+
+    def __init__(self, namespace: str, name_patterns: Sequence[str],
+                 bot_name_patterns: Sequence[str] = BOT_NAME_PATTERNS,
+                 topics_patterns: Sequence[str] = TOPICS_PATTERNS):
+        self.fields: Dict[str, List[Tuple[str, re.Pattern]]] = {
+            'user_name': self._compile(name_patterns),
+            'bot_name': self._compile(bot_name_patterns),
+            'preferred_topics': self._compile(topics_patterns)
+        }
+        # Padrões sem prefixo literal (ex.: r"^(\w+)$") rodam sempre
+        self._always_run = any(not trigger for patterns in self.fields.values()
+                               for trigger, _ in patterns)
+        self._trigger_groups = register_keyword_groups(f'personalization.{namespace}', {
+            field: [trigger for trigger, _ in patterns if trigger]
+            for field, patterns in self.fields.items()
+        })
+        self._prefilter_groups = (list(self._trigger_groups.values())
+                                  + list(_PERSONALITY_GROUPS.values())
+                                  + list(_LANGUAGE_GROUPS.values()))
+
+    @staticmethod
+    def _compile(patterns: Sequence[str]) -> List[Tuple[str, re.Pattern]]:
+        return [(_literal_prefix(pattern), re.compile(pattern)) for pattern in patterns]
+
+    def _search(self, field: str, features: MessageFeatures, message_lower: str):
+        """Primeiro match do campo (na ordem dos padrões) cuja palavra-gatilho está no texto"""
+        for trigger, regex in self.fields[field]:
+            if trigger and trigger not in features.keywords:
+                continue
+            match = regex.search(message_lower)
+            if match:
+                yield match
+
+    def detect(self, user_message: str) -> Dict[str, str]:
+        """Campos de perfil detectados na mensagem (vazio se não for personalização)"""
+        features = get_message_features(user_message)
+        if not self._always_run and not any(features.has(group) for group in self._prefilter_groups):
+            return {}
+
+        message_lower = features.lower.strip()
+        updates = {}
+
+        # Detectar nome do usuário
+        for match in self._search('user_name', features, message_lower):
+            name = match.group(1).capitalize()
+            if len(name) > 1 and name not in NAME_STOPWORDS:
+                updates['user_name'] = name
+                break
+
+        # Detectar nome do assistente
+        for match in self._search('bot_name', features, message_lower):
+            bot_name = match.group(1).capitalize()
+            if len(bot_name) > 1:
+                updates['bot_name'] = bot_name
+                break
+
+        # Detectar personalidade do bot e estilo de linguagem
+        personality = features.first(_PERSONALITY_GROUPS)
+        if personality:
+            updates['bot_personality'] = personality
+        language = features.first(_LANGUAGE_GROUPS)
+        if language:
+            updates['bot_language'] = language
+
+        # Detectar tópicos de interesse (separados por vírgula)
+        for match in self._search('preferred_topics', features, message_lower):
+            topics = match.group(1).strip()
+            if len(topics) > 2:
+                updates['preferred_topics'] = topics
+                break
+
+        return updates
+
+
+def changed_fields(updates: Dict[str, str], current_profile: Optional[Dict]) -> Dict[str, str]:
+    """Somente os campos cujo valor difere do perfil salvo"""
+    current_profile = current_profile or {}
+    return {field: value for field, value in updates.items() if current_profile.get(field) != value}
+
+
+def has_personalization_intent(user_message: str) -> bool:
+    """Se a mensagem parece ser uma resposta à pergunta de personalização"""
+    return get_message_features(user_message).has(_INTENT_GROUPS['indicators'])
+
+
+# Instâncias globais (o web aceita também respostas de uma palavra como nome)
+telegram_personalization_detector = PersonalizationDetector('telegram', [
+    r"meu nome é (\w+)",
+    r"me chamo (\w+)",
+    r"sou (\w+)",
+    r"pode me chamar de (\w+)",
+    r"meu nome não (\w+)\?",  # "meu nome não Romario?"
+    r"meu nome não é (\w+)\?",  # "meu nome não é Romario?"
+    r"^sou o (\w+)$",  # "sou o João"
+    r"^me chamo (\w+)$"  # "me chamo Maria"
+])
+
+web_personalization_detector = PersonalizationDetector('web', [
+    r"meu nome é (\w+)",
+    r"me chamo (\w+)",
+    r"sou (\w+)",
+    r"pode me chamar de (\w+)",
+    r"^(\w+)$"  # Resposta de uma palavra apenas
+])
@@ -2,6 +2,7 @@ import sqlite3
 import json
 import os
 from datetime import datetime
+from core.metrics import TimedConnection
 
 class PreferencesManager:
     def __init__(self, db_path=None):
@@ -9,7 +10,7 @@ class PreferencesManager:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(base_dir, 'database', 'preferences.db')
             
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
         self.create_tables()
         
     def create_tables(self):
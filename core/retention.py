@@ -0,0 +1,366 @@
+"""
+Retenção, Compactação e Arquivamento Frio
+Políticas por tabela para as tabelas que crescem sem limite: as linhas mais
+antigas que a retenção são copiadas para arquivos JSONL compactados por mês
+e removidas em lotes pequenos (cada lote é uma transação curta), seguido de
+incremental_vacuum para devolver as páginas livres ao sistema de arquivos
+"""
+import gzip
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.metrics import TimedConnection
+
+try:
+    from core.config import config
+    RETENTION_DAYS = config.learning.get('learning_data_retention_days', 365)
+    CONTEXT_ANALYSIS_RETENTION_DAYS = config.learning.get('context_analysis_retention_days', 30)
+    MODERATION_LOGS_RETENTION_DAYS = config.moderation.get('logs_retention_days', 90)
+    CONTENT_CACHE_HOURS = config.moderation.get('content_cache_duration_hours', 24)
+    RETENTION_BATCH_SIZE = config.database.get('retention_batch_size', 1000)
+    RETENTION_PAUSE_SECONDS = config.database.get('retention_pause_ms', 50) / 1000
+    RETENTION_VACUUM_PAGES = config.database.get('retention_vacuum_pages', 1000)
+    RETENTION_ARCHIVE_DIR = config.database.get('retention_archive_dir')
+except Exception:
+    RETENTION_DAYS = 365
+    CONTEXT_ANALYSIS_RETENTION_DAYS = 30
+    MODERATION_LOGS_RETENTION_DAYS = 90
+    CONTENT_CACHE_HOURS = 24
+    RETENTION_BATCH_SIZE = 1000
+    RETENTION_PAUSE_SECONDS = 0.05
+    RETENTION_VACUUM_PAGES = 1000
+    RETENTION_ARCHIVE_DIR = None
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+DEFAULT_ARCHIVE_DIR = PROJECT_ROOT / 'database' / 'archive'
+
+
+@dataclass
+class RetentionPolicy:
+    """Regra de retenção de uma tabela"""
+    db_path: Path
+    table: str
+    timestamp_column: str
+    retention_days: float
+    archive: bool = True
+    # on_delete(conn, rows): chamado na transação de cada lote removido
+    on_delete: Optional[Callable[[sqlite3.Connection, List[sqlite3.Row]], None]] = None
+
+    @property
+    def label(self) -> str:
+        return f"{Path(self.db_path).stem}.{self.table}"
+
+
+@dataclass
+class RetentionResult:
+    """Resultado da retenção de uma tabela"""
+    policy: str
+    deleted: int = 0
+    archived: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    skipped: Optional[str] = None
+    archive_files: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'policy': self.policy,
+            'deleted': self.deleted,
+            'archived': self.archived,
+            'batches': self.batches,
+            'seconds': round(self.seconds, 3),
+            'skipped': self.skipped,
+            'archive_files': self.archive_files
+        }
+
+
+def record_purged_messages(conn, rows):
+    """
+    on_delete do histórico de conversas
+
+    Marca os usuários afetados em message_purges (cada EronMemory descarta
+    turnos recentes e índices BM25 deles) e apaga os resumos que cobriam as
+    mensagens removidas.
+    """
+    from core.conversation_summary import drop_summaries
+    from core.memory import record_message_purge
+    user_ids = sorted({row['user_id'] for row in rows if row['user_id'] is not None})
+    if user_ids:
+        record_message_purge(conn, user_ids)
+        drop_summaries(conn, user_ids)
+
+
+def default_policies(retention_days: Optional[float] = None) -> List[RetentionPolicy]:
+    """
+    Políticas padrão dos bancos do projeto
+
+    learning_data_retention_days vale para o histórico de conversas e os
+    registros de aprendizado; análises de contexto, logs de moderação e cache
+    de conteúdo usam as retenções próprias já existentes na configuração.
+    Caches e contextos aprendidos são apenas removidos, sem arquivo.
+    """
+    days = RETENTION_DAYS if retention_days is None else retention_days
+    database = PROJECT_ROOT / 'database'
+    memoria = PROJECT_ROOT / 'memoria'
+    moderation_db = PROJECT_ROOT / 'core' / 'memoria' / 'adult_moderation.db'
+    return [
+        RetentionPolicy(database / 'eron_memory.db', 'messages', 'timestamp', days,
+                        on_delete=record_purged_messages),
+        RetentionPolicy(database / 'emotions.db', 'bot_emotions', 'timestamp', days),
+        RetentionPolicy(database / 'emotions.db', 'user_emotions', 'timestamp', days),
+        RetentionPolicy(memoria / 'fast_learning.db', 'smart_contexts', 'last_accessed', days, archive=False),
+        RetentionPolicy(database / 'super_learning.db', 'context_analysis', 'created_at', CONTEXT_ANALYSIS_RETENTION_DAYS),
+        RetentionPolicy(database / 'super_learning.db', 'real_time_feedback', 'created_at', days),
+        RetentionPolicy(database / 'advanced_adult.db', 'interaction_history', 'created_at', days),
+        RetentionPolicy(moderation_db, 'moderation_logs', 'timestamp', MODERATION_LOGS_RETENTION_DAYS),
+        RetentionPolicy(moderation_db, 'content_cache', 'last_checked', CONTENT_CACHE_HOURS / 24, archive=False),
+        RetentionPolicy(memoria / 'adaptation_system.db', 'adaptation_history', 'timestamp', days),
+    ]
+
+
+def _cleanup_patterns(days):
+    from learning.pattern_recognition import PatternRecognitionSystem
+    system = PatternRecognitionSystem()
+    try:
+        system.cleanup_old_patterns(days)
+    finally:
+        system.conn.close()
+
+
+def _cleanup_feedback(days):
+    from learning.feedback_system import FeedbackSystem
+    system = FeedbackSystem()
+    try:
+        system.cleanup_old_feedback(days)
+    finally:
+        system.conn.close()
+
+
+def _cleanup_optimizer(days):
+    from learning.response_optimizer import ResponseOptimizer
+    optimizer = ResponseOptimizer()
+    try:
+        optimizer.cleanup_old_data(days)
+    finally:
+        optimizer.conn.close()
+
+
+def _cleanup_moderation(days):
+    from src.adult_content_moderator import moderator
+    return moderator.cleanup_old_logs(MODERATION_LOGS_RETENTION_DAYS)
+
+
+def default_cleanup_helpers() -> List[Tuple[str, Path, Callable[[float], Any]]]:
+    """Limpezas já existentes nos módulos (rodam só se o banco existir)"""
+    memoria = PROJECT_ROOT / 'memoria'
+    return [
+        ('cleanup_old_patterns', memoria / 'pattern_recognition.db', _cleanup_patterns),
+        ('cleanup_old_feedback', memoria / 'feedback_system.db', _cleanup_feedback),
+        ('cleanup_old_data', memoria / 'response_optimizer.db', _cleanup_optimizer),
+        ('cleanup_old_logs', PROJECT_ROOT / 'core' / 'memoria' / 'adult_moderation.db', _cleanup_moderation),
+    ]
+
+
+class RetentionEngine:
+    """
+    Aplica as políticas de retenção
+
+    Percorre cada tabela uma vez por rowid (keyset), arquiva o lote antes de
+    apagá-lo (um lote pode ser arquivado duas vezes se o processo cair entre
+    as duas etapas, nunca perdido) e pausa entre lotes para que os escritores
+    do chat não esperem pelo lock.
+    """
+
+    def __init__(self, policies: Optional[List[RetentionPolicy]] = None,
+                 archive_dir: Optional[str] = None, batch_size: Optional[int] = None,
+                 pause_seconds: Optional[float] = None, vacuum_pages: Optional[int] = None,
+                 cleanup_helpers: Optional[List[Tuple[str, Path, Callable]]] = None):
+        self.policies = default_policies() if policies is None else policies
+        self.archive_dir = Path(archive_dir or RETENTION_ARCHIVE_DIR or DEFAULT_ARCHIVE_DIR)
+        self.batch_size = batch_size or RETENTION_BATCH_SIZE
+        self.pause_seconds = RETENTION_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+        self.vacuum_pages = vacuum_pages or RETENTION_VACUUM_PAGES
+        self.cleanup_helpers = default_cleanup_helpers() if cleanup_helpers is None else cleanup_helpers
+
+    @staticmethod
+    def _connect(db_path) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(db_path), timeout=30, factory=TimedConnection)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _cutoff(retention_days: float) -> str:
+        # CURRENT_TIMESTAMP do SQLite é UTC no formato 'AAAA-MM-DD HH:MM:SS'
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        return cutoff.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _archive_path(self, policy: RetentionPolicy, month: str) -> Path:
+        return self.archive_dir / Path(policy.db_path).stem / policy.table / f"{month}.jsonl.gz"
+
+    def _archive(self, policy: RetentionPolicy, rows: List[sqlite3.Row], result: RetentionResult):
+        """Acrescenta o lote aos arquivos mensais (cada lote é um membro gzip)"""
+        by_month = defaultdict(list)
+        for row in rows:
+            record = dict(row)
+            record.pop('_rowid', None)
+            month = str(record.get(policy.timestamp_column) or '')[:7]
+            by_month[month if len(month) == 7 else 'sem-data'].append(record)
+
+        for month, records in by_month.items():
+            path = self._archive_path(policy, month)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(path, 'at', encoding='utf-8') as archive:
+                for record in records:
+                    archive.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            if str(path) not in result.archive_files:
+                result.archive_files.append(str(path))
+        result.archived += len(rows)
+
+    def apply(self, policy: RetentionPolicy, dry_run: bool = False) -> RetentionResult:
+        """Aplica uma política; dry_run apenas conta as linhas vencidas"""
+        result = RetentionResult(policy.label)
+        if policy.retention_days <= 0:
+            result.skipped = 'retenção desativada'
+            return result
+        if not os.path.exists(policy.db_path):
+            result.skipped = 'banco inexistente'
+            return result
+
+        started = time.perf_counter()
+        conn = self._connect(policy.db_path)
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (policy.table,)
+            ).fetchone()
+            if not exists:
+                result.skipped = 'tabela inexistente'
+                return result
+
+            cutoff = self._cutoff(policy.retention_days)
+            if dry_run:
+                result.deleted = conn.execute(
+                    f'SELECT COUNT(*) FROM {policy.table} WHERE {policy.timestamp_column} < ?', (cutoff,)
+                ).fetchone()[0]
+                return result
+
+            last_rowid = 0
+            while True:
+                rows = conn.execute(f'''
+                    SELECT rowid AS _rowid, * FROM {policy.table}
+                    WHERE rowid > ? AND {policy.timestamp_column} < ?
+                    ORDER BY rowid LIMIT ?
+                ''', (last_rowid, cutoff, self.batch_size)).fetchall()
+                if not rows:
+                    break
+                last_rowid = rows[-1]['_rowid']
+
+                if policy.archive:
+                    self._archive(policy, rows, result)
+                rowids = [row['_rowid'] for row in rows]
+                with conn:
+                    conn.execute(
+                        f"DELETE FROM {policy.table} WHERE rowid IN ({','.join('?' * len(rowids))})",
+                        rowids
+                    )
+                    if policy.on_delete:
+                        policy.on_delete(conn, rows)
+                result.deleted += len(rowids)
+                result.batches += 1
+
+                if len(rows) < self.batch_size:
+                    break
+                # Libera o lock de escrita para o chat entre os lotes
+                time.sleep(self.pause_seconds)
+        finally:
+            conn.close()
+            result.seconds = time.perf_counter() - started
+        return result
+
+    def incremental_vacuum(self, db_path) -> int:
+        """Devolve as páginas livres em blocos (só em bancos com auto_vacuum=INCREMENTAL)"""
+        if not os.path.exists(db_path):
+            return 0
+        conn = self._connect(db_path)
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return 0
+            released = 0
+            while True:
+                free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free_pages:
+                    return released
+                step = min(free_pages, self.vacuum_pages)
+                conn.execute(f'PRAGMA incremental_vacuum({step})').fetchall()
+                released += step
+                time.sleep(self.pause_seconds)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def enable_incremental_vacuum(db_path) -> bool:
+        """
+        Converte o banco para auto_vacuum=INCREMENTAL (VACUUM completo, uma vez)
+
+        Bloqueia o banco durante a conversão; rode fora do horário de uso.
+        """
+        conn = sqlite3.connect(str(db_path), timeout=30, factory=TimedConnection)
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return False
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            return True
+        finally:
+            conn.close()
+
+    def run(self, dry_run: bool = False, run_helpers: bool = True) -> Dict[str, Any]:
+        """Aplica todas as políticas, as limpezas dos módulos e o incremental_vacuum"""
+        started = time.perf_counter()
+        results = []
+        for policy in self.policies:
+            try:
+                results.append(self.apply(policy, dry_run).to_dict())
+            except sqlite3.Error as e:
+                print(f"⚠️ Erro na retenção de {policy.label}: {e}")
+                results.append(RetentionResult(policy.label, skipped=f'erro: {e}').to_dict())
+
+        helpers = {}
+        if run_helpers and not dry_run:
+            for name, db_path, helper in self.cleanup_helpers:
+                if not os.path.exists(db_path):
+                    helpers[name] = 'banco inexistente'
+                    continue
+                try:
+                    helper(RETENTION_DAYS)
+                    helpers[name] = 'ok'
+                except Exception as e:
+                    print(f"⚠️ Erro em {name}: {e}")
+                    helpers[name] = f'erro: {e}'
+
+        vacuumed = {}
+        if not dry_run:
+            for db_path in dict.fromkeys(str(policy.db_path) for policy in self.policies):
+                pages = self.incremental_vacuum(db_path)
+                if pages:
+                    vacuumed[Path(db_path).name] = pages
+
+        return {
+            'dry_run': dry_run,
+            'tables': results,
+            'cleanup_helpers': helpers,
+            'vacuumed_pages': vacuumed,
+            'deleted_total': sum(r['deleted'] for r in results),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+
+
+def run_retention(dry_run: bool = False) -> Dict[str, Any]:
+    """Atalho: aplica as políticas padrão"""
+    return RetentionEngine().run(dry_run=dry_run)
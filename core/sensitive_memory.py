@@ -1,25 +1,92 @@
+import copy
+import json
 import sqlite3
-from cryptography.fernet import Fernet
+import threading
+import time
+from collections import OrderedDict
+from cryptography.fernet import Fernet, MultiFernet
 import os
+from core.metrics import TimedConnection, record_cache
+
+try:
+    from core.config import config
+    SENSITIVE_CACHE_TTL = config.database.get('sensitive_cache_ttl', 60)
+    SENSITIVE_CACHE_MAX_USERS = config.database.get('sensitive_cache_max_users', 1000)
+    SENSITIVE_ROTATION_BATCH_SIZE = config.database.get('sensitive_rotation_batch_size', 1000)
+except Exception:
+    SENSITIVE_CACHE_TTL = 60
+    SENSITIVE_CACHE_MAX_USERS = 1000
+    SENSITIVE_ROTATION_BATCH_SIZE = 1000
+
 
 class SensitiveMemory:
-    def __init__(self, db_path=None, key_path=None):
+    """
+    Dados sensíveis criptografados com Fernet, um registro vigente por usuário
+
+    A tabela sensitive_latest aponta para o registro vigente de cada usuário;
+    os registros substituídos são removidos a cada gravação. As leituras
+    passam por um cache curto de dados já descriptografados, invalidado em
+    save_sensitive.
+    """
+
+    def __init__(self, db_path=None, key_path=None, cache_ttl=None):
         if db_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(base_dir, 'database', 'sensitive_memory.db')
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
+        self._lock = threading.RLock()
+        self.cache_ttl = SENSITIVE_CACHE_TTL if cache_ttl is None else cache_ttl
+        self._cache = OrderedDict()
         self.create_table()
         # Gerar ou carregar chave de criptografia
         if key_path is None:
             key_path = os.path.join(os.path.dirname(db_path), 'sensitive.key')
+        self.key_path = key_path
         if not os.path.exists(key_path):
             key = Fernet.generate_key()
             with open(key_path, 'wb') as f:
                 f.write(key)
-        else:
-            with open(key_path, 'rb') as f:
-                key = f.read()
-        self.fernet = Fernet(key)
+        self._known_keys = []
+        self._key_state = None
+        self._refresh_keys()
+
+    def _read_key_state(self):
+        """Identidade dos arquivos de chave (mudam quando outro processo rotaciona)"""
+        state = []
+        for path in (self.key_path, self._pending_key_path()):
+            try:
+                st = os.stat(path)
+                state.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def _refresh_keys(self):
+        """
+        Recarrega as chaves se sensitive.key ou sensitive.key.new mudaram
+
+        Com uma rotação em andamento (sensitive.key.new presente, inclusive em
+        outro processo) a chave nova cifra e as duas decifram; chaves já vistas
+        por este processo continuam valendo para decifrar.
+        """
+        with self._lock:
+            state = self._read_key_state()
+            if state == self._key_state:
+                return
+            with open(self.key_path, 'rb') as f:
+                current_key = f.read().strip()
+            keys = [current_key]
+            if state[1] is not None:
+                with open(self._pending_key_path(), 'rb') as f:
+                    keys.insert(0, f.read().strip())
+            for key in keys:
+                if key not in self._known_keys:
+                    self._known_keys.append(key)
+            ordered = keys + [key for key in self._known_keys if key not in keys]
+            self._key_fernet = Fernet(current_key)
+            self.fernet = MultiFernet([Fernet(key) for key in ordered])
+            self._key_state = state
 
     def create_table(self):
         with self.conn:
@@ -30,23 +97,121 @@ class SensitiveMemory:
                     data BLOB
                 )
             ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_sensitive_data_user_id
+                ON sensitive_data(user_id, id)
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS sensitive_latest (
+                    user_id TEXT PRIMARY KEY,
+                    data_id INTEGER NOT NULL
+                )
+            ''')
+            # Bancos antigos: apontar para o registro mais novo de cada usuário
+            self.conn.execute('''
+                INSERT OR IGNORE INTO sensitive_latest (user_id, data_id)
+                SELECT user_id, MAX(id) FROM sensitive_data
+                WHERE user_id IS NOT NULL GROUP BY user_id
+            ''')
 
     def save_sensitive(self, user_id, data_dict):
-        import json
         data_json = json.dumps(data_dict)
-        encrypted = self.fernet.encrypt(data_json.encode('utf-8'))
-        with self.conn:
-            self.conn.execute(
+        with self._lock, self.conn:
+            self._refresh_keys()
+            encrypted = self.fernet.encrypt(data_json.encode('utf-8'))
+            cursor = self.conn.execute(
                 'INSERT INTO sensitive_data (user_id, data) VALUES (?, ?)',
                 (user_id, encrypted)
             )
+            data_id = cursor.lastrowid
+            self.conn.execute('''
+                INSERT INTO sensitive_latest (user_id, data_id) VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET data_id = excluded.data_id
+            ''', (user_id, data_id))
+            # Registros substituídos não são mais lidos por ninguém
+            self.conn.execute(
+                'DELETE FROM sensitive_data WHERE user_id = ? AND id < ?',
+                (user_id, data_id)
+            )
+            self._cache.pop(user_id, None)
 
     def get_sensitive(self, user_id):
-        cur = self.conn.cursor()
-        cur.execute('SELECT data FROM sensitive_data WHERE user_id = ? ORDER BY id DESC LIMIT 1', (user_id,))
-        row = cur.fetchone()
-        if row:
-            decrypted = self.fernet.decrypt(row[0]).decode('utf-8')
-            import json
-            return json.loads(decrypted)
-        return None
+        with self._lock:
+            cached = self._cache.get(user_id)
+            hit = cached is not None and cached[0] > time.monotonic()
+            record_cache('sensitive_memory', hit)
+            if hit:
+                self._cache.move_to_end(user_id)
+                return copy.deepcopy(cached[1])
+
+            self._refresh_keys()
+            row = self.conn.execute('''
+                SELECT d.data FROM sensitive_latest l
+                JOIN sensitive_data d ON d.id = l.data_id
+                WHERE l.user_id = ?
+            ''', (user_id,)).fetchone()
+            data = json.loads(self.fernet.decrypt(row[0]).decode('utf-8')) if row else None
+
+            if self.cache_ttl > 0:
+                self._cache[user_id] = (time.monotonic() + self.cache_ttl, data)
+                self._cache.move_to_end(user_id)
+                while len(self._cache) > SENSITIVE_CACHE_MAX_USERS:
+                    self._cache.popitem(last=False)
+            return copy.deepcopy(data)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _pending_key_path(self):
+        return f"{self.key_path}.new"
+
+    def rotate_key(self, new_key=None, batch_size=None, progress=None):
+        """
+        Recriptografa todos os registros com uma chave nova
+
+        Percorre a tabela por id em lotes (memória constante) e grava cada lote
+        na sua própria transação. A chave nova fica em sensitive.key.new até o
+        fim; se a rotação for interrompida, ela é retomada ao rodar de novo
+        (MultiFernet.rotate aceita registros já recriptografados). progress
+        recebe (processados, total) após cada lote.
+        """
+        batch_size = batch_size or SENSITIVE_ROTATION_BATCH_SIZE
+        pending_key_path = self._pending_key_path()
+        if not os.path.exists(pending_key_path):
+            with open(pending_key_path, 'wb') as f:
+                f.write(new_key or Fernet.generate_key())
+
+        # Outros processos veem sensitive.key.new no próximo acesso e passam a
+        # cifrar com a chave nova; os registros antigos são reescritos abaixo
+        with self._lock:
+            self._refresh_keys()
+            rotator = self.fernet
+            total = self.conn.execute('SELECT COUNT(*) FROM sensitive_data').fetchone()[0]
+
+        started = time.perf_counter()
+        done, last_id = 0, 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    'SELECT id, data FROM sensitive_data WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                with self.conn:
+                    self.conn.executemany(
+                        'UPDATE sensitive_data SET data = ? WHERE id = ?',
+                        [(rotator.rotate(data), row_id) for row_id, data in rows]
+                    )
+            last_id = rows[-1][0]
+            done += len(rows)
+            if progress:
+                progress(done, total)
+
+        # Todos os registros já usam a chave nova: ela passa a ser a chave oficial
+        os.replace(pending_key_path, self.key_path)
+        with self._lock:
+            self._refresh_keys()
+            self._cache.clear()
+        return {'rows': done, 'seconds': round(time.perf_counter() - started, 3)}
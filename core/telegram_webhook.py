@@ -0,0 +1,270 @@
+"""
+Webhook do Bot do Telegram
+Servidor HTTP local (asyncio, sem dependências extras) que recebe os updates
+enviados pelo Telegram e os coloca na fila da Application; update_ids já
+recebidos são descartados, então reentregas do Telegram não repetem
+respostas. Também monta a Application: no webhook com os limites de
+concorrência e do pool de conexões da configuração; no polling os updates
+continuam sequenciais (ordem por chat preservada)
+"""
+import asyncio
+import hmac
+import json
+import secrets
+import signal
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder
+
+from core.metrics import metrics
+
+try:
+    from core.config import config
+    TELEGRAM_MODE = config.telegram.get('mode', 'polling')
+    TELEGRAM_WEBHOOK_URL = config.telegram.get('webhook_url', '')
+    TELEGRAM_WEBHOOK_LISTEN = config.telegram.get('webhook_listen', '127.0.0.1')
+    TELEGRAM_WEBHOOK_PORT = config.telegram.get('webhook_port', 8443)
+    TELEGRAM_WEBHOOK_SECRET = config.telegram.get('webhook_secret', '')
+    TELEGRAM_MAX_CONCURRENT = config.telegram.get('max_concurrent_updates', 100)
+    TELEGRAM_TIMEOUT = config.telegram.get('timeout', 30)
+    TELEGRAM_POOL_TIMEOUT = config.telegram.get('pool_timeout', 1)
+    TELEGRAM_POOL_SIZE = config.telegram.get('connection_pool_size', 8)
+    TELEGRAM_UPDATE_DEDUP_SIZE = config.telegram.get('update_dedup_size', 10000)
+except Exception:
+    TELEGRAM_MODE = 'polling'
+    TELEGRAM_WEBHOOK_URL = ''
+    TELEGRAM_WEBHOOK_LISTEN = '127.0.0.1'
+    TELEGRAM_WEBHOOK_PORT = 8443
+    TELEGRAM_WEBHOOK_SECRET = ''
+    TELEGRAM_MAX_CONCURRENT = 100
+    TELEGRAM_TIMEOUT = 30
+    TELEGRAM_POOL_TIMEOUT = 1
+    TELEGRAM_POOL_SIZE = 8
+    TELEGRAM_UPDATE_DEDUP_SIZE = 10000
+
+# Limites do servidor HTTP
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_SECONDS = 60
+
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+
+WEBHOOK_UPDATES = metrics.counter(
+    'eron_telegram_webhook_updates_total', 'Updates recebidos pelo webhook', ['result'])
+
+
+def build_application(token: str, base_url: Optional[str] = None, concurrent: bool = False):
+    """
+    ApplicationBuilder com os limites da configuração
+
+    concurrent=True (modo webhook): max_concurrent_updates updates são
+    processados ao mesmo tempo e o pool de conexões HTTP tem pelo menos uma
+    conexão por update em andamento, para as respostas não esbarrarem no
+    pool_timeout. Sem concorrência (polling), os updates seguem um por vez
+    como antes (os fluxos de configuração em user_data dependem da ordem
+    por chat) e o pool fica no padrão do python-telegram-bot.
+    """
+    builder = (
+        ApplicationBuilder()
+        .token(token)
+        .pool_timeout(TELEGRAM_POOL_TIMEOUT)
+        .read_timeout(TELEGRAM_TIMEOUT)
+        .write_timeout(TELEGRAM_TIMEOUT)
+    )
+    if concurrent:
+        max_concurrent = max(TELEGRAM_MAX_CONCURRENT, 1)
+        builder = (
+            builder
+            .concurrent_updates(max_concurrent)
+            .connection_pool_size(max(TELEGRAM_POOL_SIZE, max_concurrent))
+        )
+    if base_url:
+        builder = builder.base_url(base_url)
+    return builder.build()
+
+
+class RecentUpdateIds:
+    """update_ids recebidos recentemente (LRU limitado)"""
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or TELEGRAM_UPDATE_DEDUP_SIZE
+        self._ids: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def seen(self, update_id: int) -> bool:
+        """True se o update já foi recebido; senão registra e retorna False"""
+        if update_id in self._ids:
+            self._ids.move_to_end(update_id)
+            return True
+        self._ids[update_id] = None
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+        return False
+
+
+class TelegramWebhookRunner:
+    """
+    Recebe updates por webhook e os entrega à Application
+
+    O servidor responde 200 assim que o update entra na fila; o processamento
+    segue em paralelo até max_concurrent_updates. O Telegram envia o
+    secret_token no cabeçalho X-Telegram-Bot-Api-Secret-Token, e requisições
+    sem ele recebem 403. Sem TELEGRAM_WEBHOOK_SECRET, um segredo aleatório é
+    gerado a cada início e registrado no set_webhook, então o servidor nunca
+    aceita updates sem segredo.
+    """
+
+    def __init__(self, application, webhook_url: str = None, listen: str = None,
+                 port: int = None, secret_token: str = None, url_path: str = None,
+                 dedup_size: int = None):
+        self.application = application
+        self.webhook_url = webhook_url if webhook_url is not None else TELEGRAM_WEBHOOK_URL
+        self.listen = listen or TELEGRAM_WEBHOOK_LISTEN
+        self.port = TELEGRAM_WEBHOOK_PORT if port is None else port
+        self.secret_token = TELEGRAM_WEBHOOK_SECRET if secret_token is None else secret_token
+        self.generated_secret = not self.secret_token
+        if self.generated_secret:
+            self.secret_token = secrets.token_urlsafe(32)
+        self.url_path = url_path or urlsplit(self.webhook_url).path or '/'
+        self.recent_updates = RecentUpdateIds(dedup_size)
+        self.stats: Dict[str, int] = {'accepted': 0, 'duplicate': 0, 'rejected': 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ------------------------------------------------------------------
+    # Servidor HTTP
+    # ------------------------------------------------------------------
+
+    async def _handle_update(self, method: str, path: str, headers: Dict[str, str],
+                             body: bytes) -> Tuple[int, str]:
+        if path.split('?', 1)[0] != self.url_path:
+            return 404, 'Not Found'
+        if method != 'POST':
+            return 405, 'Method Not Allowed'
+        if not hmac.compare_digest(
+                headers.get(SECRET_HEADER, '').encode(), self.secret_token.encode()):
+            self._count('rejected')
+            return 403, 'Forbidden'
+
+        try:
+            data = json.loads(body)
+            update_id = data['update_id']
+        except (ValueError, KeyError, TypeError):
+            self._count('rejected')
+            return 400, 'Bad Request'
+
+        if self.recent_updates.seen(update_id):
+            # Reentrega: confirmar sem processar de novo
+            self._count('duplicate')
+            return 200, 'OK'
+
+        await self.application.update_queue.put(Update.de_json(data, self.application.bot))
+        self._count('accepted')
+        return 200, 'OK'
+
+    def _count(self, result: str):
+        self.stats[result] += 1
+        WEBHOOK_UPDATES.labels(result).inc()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_SECONDS)
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    status, text, keep_alive = 413, 'Payload Too Large', False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, text = await self._handle_update(method, path, headers, body)
+                    keep_alive = (version == 'HTTP/1.1'
+                                  and headers.get('connection', '').lower() != 'close')
+
+                payload = text.encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {text}\r\n"
+                    f"Content-Type: text/plain; charset=utf-8\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    async def start(self, set_webhook: bool = True, drop_pending_updates: bool = False):
+        """Inicia a Application, o servidor local e registra o webhook no Telegram"""
+        if not set_webhook and self.generated_secret:
+            # Só o set_webhook informa ao Telegram o segredo gerado aqui
+            raise ValueError("TELEGRAM_WEBHOOK_SECRET é obrigatório quando o webhook já está registrado")
+        await self.application.initialize()
+        await self.application.start()
+        self._server = await asyncio.start_server(self._serve_connection, self.listen, self.port)
+        # Porta 0: usar a porta escolhida pelo sistema
+        self.port = self._server.sockets[0].getsockname()[1]
+        if set_webhook:
+            await self.application.bot.set_webhook(
+                url=self.webhook_url,
+                secret_token=self.secret_token,
+                max_connections=min(max(TELEGRAM_MAX_CONCURRENT, 1), 100),
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=drop_pending_updates
+            )
+
+    async def stop(self, delete_webhook: bool = False):
+        """Para de aceitar updates, processa a fila restante e encerra"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if delete_webhook:
+            await self.application.bot.delete_webhook()
+        if self.application.running:
+            await self.application.stop()
+        await self.application.shutdown()
+
+    async def serve_forever(self, drop_pending_updates: bool = False):
+        """Roda até SIGINT/SIGTERM"""
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: Ctrl+C chega como KeyboardInterrupt
+
+        await self.start(drop_pending_updates=drop_pending_updates)
+        print(f"🌐 Webhook ouvindo em {self.listen}:{self.port}{self.url_path}")
+        try:
+            await stop_event.wait()
+        finally:
+            await self.stop()
+
+    def run(self, drop_pending_updates: bool = False):
+        """Bloqueia rodando o webhook (equivalente ao run_polling)"""
+        try:
+            asyncio.run(self.serve_forever(drop_pending_updates))
+        except KeyboardInterrupt:
+            pass
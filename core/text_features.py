@@ -0,0 +1,236 @@
+"""
+Características de Texto por Mensagem
+Um tokenizador e um autômato de palavras-chave compilado (regex em trie)
+produzem um MessageFeatures por mensagem, compartilhado por todos os
+detectores (conversa humana, emoções, aprendizado, padrões, devassa)
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from core.metrics import record_cache
+
+# Tokenizador único: palavras (letras/dígitos, inclusive acentuadas)
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+FEATURE_CACHE_SIZE = 256
+
+
+def tokenize(text: str) -> List[str]:
+    """Divide o texto (já em minúsculas) em palavras"""
+    return _TOKEN_PATTERN.findall(text)
+
+
+def _trie_regex(keywords: Iterable[str]) -> str:
+    """
+    Regex equivalente a uma trie das palavras-chave
+
+    Os ramos começam com caracteres distintos e os opcionais são gulosos, então
+    em cada posição o regex casa a MAIOR palavra-chave que começa ali.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        ends_here = '' in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if ends_here else body
+
+    return build(trie)
+
+
+class KeywordAutomaton:
+    """
+    Autômato de múltiplas palavras-chave com semântica de substring
+
+    find() devolve exatamente as palavras-chave k para as quais
+    "k in texto" seria verdadeiro, em uma única varredura do texto.
+    """
+
+    def __init__(self, groups: Dict[str, Sequence[str]]):
+        self.groups: Dict[str, Tuple[str, ...]] = {
+            name: tuple(dict.fromkeys(k for k in keywords if k))
+            for name, keywords in groups.items()
+        }
+
+        self._keyword_groups: Dict[str, Tuple[str, ...]] = {}
+        for name, keywords in self.groups.items():
+            for keyword in keywords:
+                self._keyword_groups[keyword] = self._keyword_groups.get(keyword, ()) + (name,)
+
+        keywords = list(self._keyword_groups)
+        # A maior palavra-chave casada numa posição implica as que são prefixo dela
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(k for k in keywords if keyword.startswith(k))
+            for keyword in keywords
+        }
+        self._regex = re.compile('(?=(' + _trie_regex(keywords) + '))') if keywords else None
+
+    def find(self, text_lower: str) -> FrozenSet[str]:
+        """Palavras-chave contidas no texto"""
+        if self._regex is None:
+            return frozenset()
+        prefixes = self._prefixes
+        found = set()
+        for longest in set(self._regex.findall(text_lower)):
+            if longest:
+                found.update(prefixes[longest])
+        return frozenset(found)
+
+    def group_hits(self, keywords: Iterable[str]) -> Dict[str, List[str]]:
+        """Agrupa as palavras-chave encontradas por grupo"""
+        hits: Dict[str, List[str]] = {}
+        for keyword in keywords:
+            for name in self._keyword_groups.get(keyword, ()):
+                hits.setdefault(name, []).append(keyword)
+        return hits
+
+
+class MessageFeatures:
+    """Características de uma mensagem, calculadas uma vez por turno"""
+
+    __slots__ = ('text', 'lower', 'keywords', '_hits', '_words', '_tokens')
+
+    def __init__(self, text: str, automaton: KeywordAutomaton):
+        self.text = text
+        self.lower = text.lower()
+        self.keywords = automaton.find(self.lower)
+        self._hits = automaton.group_hits(self.keywords)
+        self._words = None
+        self._tokens = None
+
+    @property
+    def words(self) -> List[str]:
+        """Palavras separadas por espaço (contagens históricas dos detectores)"""
+        if self._words is None:
+            self._words = self.lower.split()
+        return self._words
+
+    @property
+    def tokens(self) -> List[str]:
+        """Palavras do tokenizador único (sem pontuação)"""
+        if self._tokens is None:
+            self._tokens = tokenize(self.lower)
+        return self._tokens
+
+    def hits(self, group: str) -> List[str]:
+        """Palavras-chave do grupo presentes na mensagem"""
+        return self._hits.get(group, [])
+
+    def has(self, group: str) -> bool:
+        return group in self._hits
+
+    def count(self, group: str) -> int:
+        return len(self._hits.get(group, ()))
+
+    def first(self, groups: Dict[str, str], default: Optional[str] = None) -> Optional[str]:
+        """
+        Nome local do primeiro grupo (na ordem do registro) com alguma
+        palavra-chave presente; groups é o retorno de register_keyword_groups
+        """
+        for name, group in groups.items():
+            if group in self._hits:
+                return name
+        return default
+
+    @property
+    def exclamations(self) -> int:
+        return self.text.count('!')
+
+    @property
+    def questions(self) -> int:
+        return self.text.count('?')
+
+
+class FeatureExtractor:
+    """
+    Registro dos grupos de palavras-chave de todos os detectores
+
+    Cada detector registra seus grupos com um prefixo ("human.greeting",
+    "emotion.feliz"...); o autômato é recompilado apenas quando o registro
+    muda, e as características das mensagens recentes ficam em um LRU.
+    """
+
+    def __init__(self, cache_size: int = FEATURE_CACHE_SIZE):
+        self._groups: Dict[str, Tuple[str, ...]] = {}
+        self._automaton: Optional[KeywordAutomaton] = None
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def register(self, namespace: str, groups: Dict[str, Sequence[str]]) -> Dict[str, str]:
+        """
+        Registra grupos de palavras-chave de um detector
+
+        Retorna o mapeamento nome local -> nome do grupo no extrator, na mesma
+        ordem de groups (a ordem define a prioridade nos detectores).
+        """
+        names = {name: f'{namespace}.{name}' for name in groups}
+        with self._lock:
+            changed = False
+            for name, keywords in groups.items():
+                keywords = tuple(keywords)
+                if self._groups.get(names[name]) != keywords:
+                    self._groups[names[name]] = keywords
+                    changed = True
+            if changed:
+                self._automaton = None
+                self._cache.clear()
+        return names
+
+    @property
+    def automaton(self) -> KeywordAutomaton:
+        automaton = self._automaton
+        if automaton is None:
+            with self._lock:
+                if self._automaton is None:
+                    self._automaton = KeywordAutomaton(self._groups)
+                automaton = self._automaton
+        return automaton
+
+    def extract(self, text: str) -> MessageFeatures:
+        """Características da mensagem (reaproveitadas entre detectores do mesmo turno)"""
+        with self._lock:
+            features = self._cache.get(text)
+            if features is not None:
+                self._cache.move_to_end(text)
+        if features is not None:
+            record_cache('message_features', True)
+            return features
+
+        record_cache('message_features', False)
+        features = MessageFeatures(text, self.automaton)
+        with self._lock:
+            self._cache[text] = features
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return features
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# Instância global
+feature_extractor = FeatureExtractor()
+
+
+def register_keyword_groups(namespace: str, groups: Dict[str, Sequence[str]]) -> Dict[str, str]:
+    """Função de conveniência para registrar grupos no extrator global"""
+    return feature_extractor.register(namespace, groups)
+
+
+def get_message_features(text: str) -> MessageFeatures:
+    """Função de conveniência para obter as características de uma mensagem"""
+    return feature_extractor.extract(text)
@@ -0,0 +1,231 @@
+"""
+Tracing por Turno de Conversa
+Spans leves para cada etapa do pipeline (perfil, check_age, emoções,
+otimizações, super learning, LLM...) com buffer circular dos turnos recentes
+e exportação compatível com o Chrome Trace Viewer (chrome://tracing / Perfetto)
+"""
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Trace ativo no contexto atual (funciona com threads e com asyncio)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('eron_turn_trace', default=None)
+
+
+class TurnTrace:
+    """Um turno de conversa com seus spans"""
+
+    __slots__ = ('trace_id', 'name', 'attributes', 'started_at', 'wall_started_at',
+                 'duration', 'spans', '_depth')
+
+    def __init__(self, trace_id: int, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.started_at = time.perf_counter()
+        self.wall_started_at = time.time()
+        self.duration = 0.0
+        # (nome, início relativo, duração, profundidade)
+        self.spans: List[tuple] = []
+        self._depth = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Resumo do turno com spans em milissegundos"""
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'attributes': self.attributes,
+            'started_at': self.wall_started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'spans': [
+                {
+                    'name': name,
+                    'start_ms': round(start * 1000, 3),
+                    'duration_ms': round(duration * 1000, 3),
+                    'depth': depth
+                }
+                for name, start, duration, depth in self.spans
+            ]
+        }
+
+    def chrome_events(self, pid: int) -> List[Dict[str, Any]]:
+        """Eventos 'X' (complete) do formato Chrome Trace, em microssegundos"""
+        base_us = self.wall_started_at * 1_000_000
+        events = [{
+            'name': self.name,
+            'cat': 'turn',
+            'ph': 'X',
+            'ts': base_us,
+            'dur': self.duration * 1_000_000,
+            'pid': pid,
+            'tid': self.trace_id,
+            'args': self.attributes
+        }]
+        for name, start, duration, depth in self.spans:
+            events.append({
+                'name': name,
+                'cat': 'stage',
+                'ph': 'X',
+                'ts': base_us + start * 1_000_000,
+                'dur': duration * 1_000_000,
+                'pid': pid,
+                'tid': self.trace_id,
+                'args': {'depth': depth}
+            })
+        return events
+
+
+class TurnTracer:
+    """Cria traces por turno e guarda os recentes em um buffer circular"""
+
+    def __init__(self, buffer_size: int = 200, enabled: bool = True):
+        self.enabled = enabled
+        self._recent: deque = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def turn(self, name: str, **attributes):
+        """
+        Inicia um trace de turno; se já houver um ativo, vira um span dele
+
+        Assim get_llm_response chamado dentro de chat() aparece como etapa do
+        turno do Telegram, e chamado pela web abre o próprio turno.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        if _current_trace.get() is not None:
+            with span(name):
+                yield _current_trace.get()
+            return
+
+        trace = TurnTrace(next(self._ids), name, attributes)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            trace.duration = time.perf_counter() - trace.started_at
+            _current_trace.reset(token)
+            with self._lock:
+                self._recent.append(trace)
+
+    def recent(self) -> List[TurnTrace]:
+        with self._lock:
+            return list(self._recent)
+
+    def slowest(self, limit: int = 10) -> List[TurnTrace]:
+        """Os turnos mais lentos entre os recentes do buffer"""
+        return heapq.nlargest(limit, self.recent(), key=lambda t: t.duration)
+
+    def get_slowest_summary(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return [trace.to_dict() for trace in self.slowest(limit)]
+
+    def chrome_trace(self, limit: int = 10) -> Dict[str, Any]:
+        """JSON para o Chrome Trace Viewer com os turnos mais lentos"""
+        pid = os.getpid()
+        events = []
+        for trace in self.slowest(limit):
+            events.extend(trace.chrome_events(pid))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome_trace(self, path: str, limit: int = 10) -> str:
+        """Grava o JSON do Chrome Trace em arquivo"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(limit), f, ensure_ascii=False)
+        return path
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+
+
+@contextmanager
+def span(name: str):
+    """Mede uma etapa do turno atual (sem custo relevante se não houver turno ativo)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    depth = trace._depth
+    trace._depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        trace._depth = depth
+        trace.spans.append((name, start - trace.started_at, end - start, depth))
+
+
+def current_trace() -> Optional[TurnTrace]:
+    """Trace do turno em andamento (ou None)"""
+    return _current_trace.get()
+
+
+def annotate(**attributes):
+    """Adiciona atributos (user_id, plataforma...) ao turno atual sem sobrescrever os existentes"""
+    trace = _current_trace.get()
+    if trace is not None:
+        for key, value in attributes.items():
+            trace.attributes.setdefault(key, value)
+
+
+def _create_tracer() -> TurnTracer:
+    try:
+        from core.config import config
+        return TurnTracer(
+            buffer_size=config.performance.get('turn_trace_buffer_size', 200),
+            enabled=config.performance.get('turn_tracing_enabled', True)
+        )
+    except Exception:
+        return TurnTracer()
+
+
+# Instância global
+turn_tracer = _create_tracer()
+
+
+def traced_turn(name: str):
+    """Decorator: executa a função dentro de um turno (ou span, se já houver turno ativo)"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with turn_tracer.turn(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with turn_tracer.turn(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def format_slowest_turns(limit: int = 5) -> str:
+    """Texto curto com os turnos mais lentos (usado pelo comando admin do Telegram)"""
+    traces = turn_tracer.slowest(limit)
+    if not traces:
+        return "Nenhum turno registrado ainda."
+
+    lines = []
+    for trace in traces:
+        user = trace.attributes.get('user_id', '?')
+        lines.append(f"⏱️ {trace.name} #{trace.trace_id} (user {user}): {trace.duration * 1000:.0f} ms")
+        top_spans = sorted(trace.spans, key=lambda s: s[2], reverse=True)[:5]
+        for name, _start, duration, depth in top_spans:
+            lines.append(f"   {'  ' * depth}• {name}: {duration * 1000:.0f} ms")
+    return '\n'.join(lines)
@@ -0,0 +1,230 @@
+"""
+Exportação dos Dados de um Usuário
+Reúne tudo o que está ligado a um user_id em todos os bancos do projeto
+(perfil, preferências, emoções, mensagens, dados sensíveis, aprendizado,
+perfil adulto e moderação) num ZIP de arquivos JSONL gerado em streaming:
+as linhas são lidas em lotes e o ZIP sai em pedaços, sem montar nenhuma
+tabela inteira na memória
+"""
+import base64
+import json
+import re
+import sqlite3
+import zipfile
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.metrics import TimedConnection
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+USER_COLUMN = 'user_id'
+
+# Tabelas da memória sensível: exportadas já descriptografadas, não em bruto
+SENSITIVE_TABLES = frozenset({'sensitive_data', 'sensitive_latest'})
+
+# Credenciais nunca saem no ZIP: um hash de senha ou token de redefinição
+# vazado por uma sessão sequestrada vale mais que os próprios dados
+CREDENTIAL_COLUMNS = frozenset({
+    'password', 'password_hash', 'reset_token', 'reset_token_expiry', 'reset_token_expires',
+    'confirmation_token', 'verification_token', 'session_token',
+})
+_CREDENTIAL_PATTERN = re.compile(r'(^|_)(password|passwd|secret|token)(_|$)', re.IGNORECASE)
+
+
+def is_credential_column(column: str) -> bool:
+    """Coluna de senha, segredo ou token (omitida da exportação)"""
+    return column.lower() in CREDENTIAL_COLUMNS or bool(_CREDENTIAL_PATTERN.search(column))
+
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    return str(value)
+
+
+def user_table_columns(db_path) -> Dict[str, List[str]]:
+    """Colunas de cada tabela do banco que tem a coluna user_id"""
+    conn = sqlite3.connect(str(db_path), factory=TimedConnection)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        columns = {
+            table: [column[1] for column in conn.execute(f'PRAGMA table_info("{table}")')]
+            for table in tables
+        }
+        return {table: names for table, names in columns.items() if USER_COLUMN in names}
+    finally:
+        conn.close()
+
+
+def user_tables(db_path) -> List[str]:
+    """Tabelas do banco que têm a coluna user_id"""
+    return list(user_table_columns(db_path))
+
+
+def iter_user_rows(db_path, table: str, user_id, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Linhas do usuário em uma tabela, em lotes por rowid
+
+    Cada lote é uma consulta curta: entre os lotes o banco fica livre para
+    os escritores do chat, mesmo que o download demore. Colunas de
+    credenciais (is_credential_column) são removidas de cada linha.
+    """
+    conn = sqlite3.connect(str(db_path), timeout=30, factory=TimedConnection)
+    try:
+        last_rowid = 0
+        while True:
+            cursor = conn.execute(
+                f'SELECT rowid, * FROM "{table}" WHERE {USER_COLUMN} = ? AND rowid > ? ORDER BY rowid LIMIT ?',
+                (str(user_id), last_rowid, batch_size)
+            )
+            columns = [description[0] for description in cursor.description][1:]
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield {
+                    column: value for column, value in zip(columns, row[1:])
+                    if not is_credential_column(column)
+                }
+            last_rowid = rows[-1][0]
+    finally:
+        conn.close()
+
+
+def iter_sensitive_rows(db_path, user_id) -> Iterator[Dict[str, Any]]:
+    """Registro sensível vigente do usuário, descriptografado com a chave do banco"""
+    from core.sensitive_memory import SensitiveMemory
+    store = SensitiveMemory(str(db_path), str(Path(db_path).parent / 'sensitive.key'), cache_ttl=0)
+    try:
+        data = store.get_sensitive(str(user_id))
+    finally:
+        store.conn.close()
+    if data is not None:
+        yield {USER_COLUMN: str(user_id), 'data': data}
+
+
+class _ZipStream:
+    """Destino sem seek para o ZipFile: acumula os bytes até serem drenados"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+class UserDataExporter:
+    """
+    ZIP com os dados de um usuário
+
+    Cada tabela com linhas do usuário vira <pasta>/<banco>/<tabela>.jsonl;
+    manifest.json, gravado por último, lista as contagens, as fontes
+    ignoradas e as colunas de credenciais omitidas. Sem `databases`, percorre todos os bancos do projeto.
+    """
+
+    def __init__(self, user_id, databases: Optional[Iterable] = None,
+                 batch_size: int = EXPORT_BATCH_SIZE):
+        self.user_id = str(user_id)
+        if databases is None:
+            from core.maintenance import project_databases
+            databases = project_databases()
+        self.databases = [Path(db_path) for db_path in databases]
+        self.batch_size = batch_size
+        self.counts: Dict[str, int] = {}
+        self.skipped: Dict[str, str] = {}
+        self.redacted: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def _folder(db_path: Path) -> str:
+        try:
+            relative = db_path.absolute().relative_to(PROJECT_ROOT)
+        except ValueError:
+            relative = Path(db_path.parent.name) / db_path.name
+        return relative.with_suffix('').as_posix()
+
+    def sources(self) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+        """Pares (nome no ZIP, gerador de linhas) de todos os bancos"""
+        for db_path in self.databases:
+            folder = self._folder(db_path)
+            try:
+                tables = user_table_columns(db_path)
+            except sqlite3.Error as e:
+                self.skipped[folder] = str(e)
+                continue
+            for table, columns in tables.items():
+                if table in SENSITIVE_TABLES:
+                    continue
+                redacted = [column for column in columns if is_credential_column(column)]
+                if redacted:
+                    self.redacted[f"{folder}/{table}.jsonl"] = redacted
+                yield f"{folder}/{table}.jsonl", iter_user_rows(db_path, table, self.user_id, self.batch_size)
+            if 'sensitive_data' in tables:
+                if (db_path.parent / 'sensitive.key').exists():
+                    yield f"{folder}/sensitive_data.jsonl", iter_sensitive_rows(db_path, self.user_id)
+                else:
+                    self.skipped[f"{folder}/sensitive_data"] = 'chave de criptografia ausente'
+
+    def iter_zip(self, chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+        """Bytes do ZIP em pedaços de ~chunk_bytes (para Response do Flask)"""
+        self.counts.clear()
+        self.skipped.clear()
+        self.redacted.clear()
+        sink = _ZipStream()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, rows in self.sources():
+                try:
+                    first = next(rows, None)
+                except sqlite3.Error as e:
+                    self.skipped[name] = str(e)
+                    continue
+                if first is None:
+                    continue
+                count = 0
+                with archive.open(name, 'w', force_zip64=True) as entry:
+                    for row in chain([first], rows):
+                        entry.write(json.dumps(row, ensure_ascii=False, default=_json_default).encode('utf-8'))
+                        entry.write(b'\n')
+                        count += 1
+                        if sink.size >= chunk_bytes:
+                            yield sink.drain()
+                self.counts[name] = count
+                yield sink.drain()
+
+            archive.writestr('manifest.json', json.dumps({
+                'user_id': self.user_id,
+                'exported_at': datetime.now().isoformat(),
+                'files': self.counts,
+                'skipped': self.skipped,
+                'redacted': {name: columns for name, columns in self.redacted.items() if name in self.counts}
+            }, ensure_ascii=False, indent=2))
+        yield sink.drain()
+
+    def write_zip(self, output_path) -> Dict[str, int]:
+        """Grava o ZIP em disco; retorna linhas por arquivo"""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'wb') as output:
+            for chunk in self.iter_zip():
+                if chunk:
+                    output.write(chunk)
+        return dict(self.counts)
@@ -1,12 +1,13 @@
 import sqlite3
 import os
+from core.metrics import TimedConnection
 
 class UserProfileDB:
     def __init__(self, db_path=None):
         if db_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(base_dir, 'database', 'user_profiles.db')
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
         self.create_table()
         self._ensure_columns_exist()  # Garante que as colunas mais recentes existam
         self.cleanup_expired_tokens()
@@ -79,6 +79,12 @@ async def moderation_filter(update, context):
 
 # Registrar handler
 app.add_handler(MessageHandler(filters.TEXT, moderation_filter))
+
+# Executar e encerrar o executor da moderação junto com o bot
+try:
+    app.run_polling()
+finally:
+    middleware.shutdown()
 """)
 
 
@@ -397,7 +397,11 @@ Pressione Ctrl+C para parar o bot.
         except KeyboardInterrupt:
             self.logger.info("Parando bot...")
         finally:
+            await self.app.updater.stop()
             await self.app.stop()
+            await self.app.shutdown()
+            # Verificações ainda na fila do executor são descartadas
+            self.moderation_middleware.shutdown()
 
 
 # ============================================================================
@@ -4,13 +4,18 @@ Banco de dados otimizado para conteúdo adulto sem filtros desnecessários
 Foco em personalização máxima e experiência natural
 """
 
+import atexit
 import sqlite3
 import os
 import json
+import threading
+import time
+from bisect import bisect_right
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import random
 from dataclasses import dataclass
+from core.metrics import TimedConnection
 
 @dataclass
 class AdultContent:
@@ -22,9 +27,93 @@ class AdultContent:
     context: str
     user_rating: float = 0.0
 
+class WeightedContentSampler:
+    """
+    Amostragem ponderada por effectiveness_score com árvore de Fenwick
+    
+    Os itens ficam ordenados por intensidade, então "intensidade <= máxima"
+    é um prefixo: o peso total do prefixo e a busca do item sorteado custam
+    O(log n), para qualquer intensidade máxima, sem ordenar a tabela.
+    """
+    
+    # Conteúdo com score 0 ainda pode ser sorteado (raramente)
+    MIN_WEIGHT = 0.01
+    
+    def __init__(self, entries: List[Tuple[int, int, float]] = ()):
+        self.build(entries)
+    
+    def build(self, entries):
+        """entries: (content_id, intensity, weight)"""
+        entries = sorted(entries, key=lambda entry: (entry[1], entry[0]))
+        self.ids = [entry[0] for entry in entries]
+        self.intensities = [entry[1] for entry in entries]
+        self.weights = [max(float(entry[2] or 0.0), self.MIN_WEIGHT) for entry in entries]
+        self.positions = {content_id: index for index, content_id in enumerate(self.ids)}
+        
+        # Construção em O(n)
+        size = len(self.weights)
+        self.tree = [0.0] * (size + 1)
+        for index, weight in enumerate(self.weights, start=1):
+            self.tree[index] += weight
+            parent = index + (index & -index)
+            if parent <= size:
+                self.tree[parent] += self.tree[index]
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def _prefix_sum(self, count: int) -> float:
+        total = 0.0
+        while count > 0:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+    
+    def update(self, content_id: int, weight: float) -> bool:
+        """Atualizar o peso de um item em O(log n)"""
+        position = self.positions.get(content_id)
+        if position is None:
+            return False
+        weight = max(float(weight or 0.0), self.MIN_WEIGHT)
+        delta = weight - self.weights[position]
+        self.weights[position] = weight
+        index = position + 1
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+        return True
+    
+    def sample(self, max_intensity: int, rng=random) -> Optional[int]:
+        """Sortear um content_id entre os de intensidade <= max_intensity"""
+        limit = bisect_right(self.intensities, max_intensity)
+        if limit == 0:
+            return None
+        
+        target = rng.random() * self._prefix_sum(limit)
+        
+        # Descida na árvore: menor posição cuja soma acumulada passa do alvo
+        position = 0
+        step = 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            nxt = position + step
+            if nxt < len(self.tree) and self.tree[nxt] <= target:
+                position = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return self.ids[min(position, limit - 1)]
+
+
 class AdvancedAdultLearning:
     """🔥 Sistema Avançado de Aprendizagem para Conteúdo Adulto"""
     
+    # Incrementos de usage_count acumulados em memória antes de gravar
+    USAGE_FLUSH_BATCH = 50
+    USAGE_FLUSH_INTERVAL_SECONDS = 30
+    
+    # Intervalo entre as verificações de conteúdo gravado por outro processo
+    # (tools/expansion/*.py, outra instância do bot)
+    CONTENT_REFRESH_INTERVAL_SECONDS = 30
+    
     def __init__(self, db_path: str = None):
         if db_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,10 +123,133 @@ class AdvancedAdultLearning:
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
         self.conn.row_factory = sqlite3.Row
+        self._content_lock = threading.RLock()
+        self._pending_usage: Dict[int, int] = {}
+        self._last_usage_flush = time.monotonic()
+        self._content_signature = None
+        self._last_content_check = time.monotonic()
         self.create_advanced_tables()
         self.populate_initial_content()
+        self.reload_content()
+    
+    def reload_content(self):
+        """🔄 Carregar conteúdo ativo e montar os amostradores por categoria"""
+        with self._content_lock:
+            signature = self._content_state()
+            rows = self.conn.execute('''
+                SELECT id, content, category, intensity, tags, context, user_rating, effectiveness_score
+                FROM adult_content WHERE is_active = 1
+            ''').fetchall()
+            self._content = {row['id']: row for row in rows}
+            self._content_signature = signature
+            self._rebuild_samplers()
+    
+    def _content_state(self) -> tuple:
+        """Assinatura barata do conteúdo ativo: inserções, desativações e mudanças de score"""
+        return tuple(self.conn.execute('''
+            SELECT COUNT(*), MAX(id), MAX(updated_at), TOTAL(effectiveness_score)
+            FROM adult_content WHERE is_active = 1
+        ''').fetchone())
+    
+    def refresh_content(self, force: bool = False) -> bool:
+        """
+        🔄 Recarregar os amostradores se o conteúdo mudou no banco
+        
+        Roda no máximo a cada CONTENT_REFRESH_INTERVAL_SECONDS; conteúdo
+        inserido pelos scripts de expansão passa a ser sorteado sem reiniciar.
+        """
+        with self._content_lock:
+            if not force and time.monotonic() - self._last_content_check < self.CONTENT_REFRESH_INTERVAL_SECONDS:
+                return False
+            self._last_content_check = time.monotonic()
+            if self._content_state() == self._content_signature:
+                return False
+            self.reload_content()
+            return True
+    
+    def _rebuild_samplers(self, category: str = None):
+        """Reconstruir o amostrador de uma categoria (e o geral) ou de todas"""
+        if category is None:
+            by_category: Dict[str, list] = {}
+            for row in self._content.values():
+                by_category.setdefault(row['category'], []).append(row)
+            self._samplers = {cat: self._sampler_for(rows) for cat, rows in by_category.items()}
+        else:
+            rows = [row for row in self._content.values() if row['category'] == category]
+            self._samplers[category] = self._sampler_for(rows)
+        # Chave None: todas as categorias
+        self._samplers[None] = self._sampler_for(list(self._content.values()))
+    
+    @staticmethod
+    def _sampler_for(rows) -> WeightedContentSampler:
+        return WeightedContentSampler(
+            [(row['id'], row['intensity'] or 0, row['effectiveness_score']) for row in rows]
+        )
+    
+    def add_content(self, content: str, category: str, intensity: int = 3, tags: List[str] = None,
+                    context: str = 'geral', effectiveness_score: float = 0.5, user_id: str = None) -> int:
+        """➕ Adicionar conteúdo e incluí-lo no amostrador da categoria"""
+        with self._content_lock:
+            with self.conn:
+                cursor = self.conn.execute('''
+                    INSERT INTO adult_content 
+                    (content, category, intensity, tags, context, user_id, effectiveness_score)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (content, category, intensity, json.dumps(tags or []), context, user_id, effectiveness_score))
+            
+            row = self.conn.execute('''
+                SELECT id, content, category, intensity, tags, context, user_rating, effectiveness_score
+                FROM adult_content WHERE id = ?
+            ''', (cursor.lastrowid,)).fetchone()
+            self._content[row['id']] = row
+            self._rebuild_samplers(category)
+            self._content_signature = self._content_state()
+            return row['id']
+    
+    def update_content_score(self, content_id: int, effectiveness_score: float) -> bool:
+        """📈 Atualizar a efetividade de um conteúdo (peso no amostrador em O(log n))"""
+        with self._content_lock:
+            row = self._content.get(content_id)
+            if row is None:
+                return False
+            
+            with self.conn:
+                self.conn.execute('''
+                    UPDATE adult_content 
+                    SET effectiveness_score = ?, updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = ?
+                ''', (effectiveness_score, content_id))
+            
+            self._content[content_id] = self.conn.execute('''
+                SELECT id, content, category, intensity, tags, context, user_rating, effectiveness_score
+                FROM adult_content WHERE id = ?
+            ''', (content_id,)).fetchone()
+            self._samplers[row['category']].update(content_id, effectiveness_score)
+            self._samplers[None].update(content_id, effectiveness_score)
+            self._content_signature = self._content_state()
+            return True
+    
+    def _record_usage(self, content_id: int):
+        """Acumular uso do conteúdo (gravado em lote)"""
+        self._pending_usage[content_id] = self._pending_usage.get(content_id, 0) + 1
+        if (sum(self._pending_usage.values()) >= self.USAGE_FLUSH_BATCH or
+                time.monotonic() - self._last_usage_flush >= self.USAGE_FLUSH_INTERVAL_SECONDS):
+            self.flush_usage_counts()
+    
+    def flush_usage_counts(self) -> int:
+        """💾 Gravar os contadores de uso pendentes em uma única transação"""
+        with self._content_lock:
+            self._last_usage_flush = time.monotonic()
+            if not self._pending_usage:
+                return 0
+            pending, self._pending_usage = self._pending_usage, {}
+            with self.conn:
+                self.conn.executemany('''
+                    UPDATE adult_content SET usage_count = usage_count + ? WHERE id = ?
+                ''', [(count, content_id) for content_id, count in pending.items()])
+            return len(pending)
     
     def create_advanced_tables(self):
         """🗄️ Criar estrutura de banco otimizada"""
@@ -334,41 +546,20 @@ class AdvancedAdultLearning:
                     SELECT * FROM advanced_adult_profiles WHERE user_id = ?
                 ''', (user_id,)).fetchone()
             
-            # Construir query baseada no perfil
+            # Sorteio ponderado pela efetividade entre os conteúdos com intensidade permitida
             intensity = profile['intensity_preference']
-            query_params = []
-            
-            # Query base
-            query = '''
-                SELECT * FROM adult_content 
-                WHERE intensity <= ? AND is_active = 1
-            '''
-            query_params.append(intensity)
-            
-            # Filtrar por categoria se especificada
-            if category:
-                query += ' AND category = ?'
-                query_params.append(category)
-            
-            # Ordenar por efetividade e aleatoriedade
-            query += '''
-                ORDER BY 
-                    effectiveness_score * RANDOM() DESC,
-                    usage_count ASC
-                LIMIT 1
-            '''
-            
-            result = self.conn.execute(query, query_params).fetchone()
             
-            if result:
-                # Incrementar contador de uso
-                self.conn.execute('''
-                    UPDATE adult_content 
-                    SET usage_count = usage_count + 1 
-                    WHERE id = ?
-                ''', (result['id'],))
-                self.conn.commit()
+            self.refresh_content()
+            with self._content_lock:
+                sampler = self._samplers.get(category or None)
+                content_id = sampler.sample(intensity) if sampler else None
+                result = self._content.get(content_id) if content_id is not None else None
                 
+                if result:
+                    # Incrementar contador de uso (em lote)
+                    self._record_usage(content_id)
+            
+            if result:
                 return AdultContent(
                     content=result['content'],
                     category=result['category'],
@@ -532,8 +723,13 @@ class AdvancedAdultLearning:
     def __del__(self):
         """Fechar conexão ao destruir objeto"""
         if hasattr(self, 'conn'):
+            try:
+                self.flush_usage_counts()
+            except Exception:
+                pass
             self.conn.close()
 
 
 # Instância global
-advanced_adult_learning = AdvancedAdultLearning()
\ No newline at end of file
+advanced_adult_learning = AdvancedAdultLearning()
+atexit.register(advanced_adult_learning.flush_usage_counts)
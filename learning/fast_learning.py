@@ -4,8 +4,42 @@ Otimizado para o modelo Qwen2.5-4B
 """
 import sqlite3
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
+from core.metrics import TimedConnection, record_cache
+from core.text_features import get_message_features, register_keyword_groups
+
+try:
+    from core.config import config
+    MAX_CONTEXTS_PER_USER = config.learning.get('smart_context_max_per_user', 200)
+    HINT_CACHE_TTL = config.learning.get('smart_context_hint_ttl', 60)
+except Exception:
+    MAX_CONTEXTS_PER_USER = 200
+    HINT_CACHE_TTL = 60
+
+# Palavras-chave por tipo de pergunta (a ordem define a prioridade)
+QUESTION_TYPE_KEYWORDS = {
+    'informational': ['qual', 'o que', 'what'],
+    'procedural': ['como', 'how'],
+    'explanatory': ['por que', 'why'],
+    'personal': ['você', 'seu', 'sua']
+}
+
+# Palavras-chave por tópico
+TOPIC_KEYWORDS = {
+    'tecnologia': ['tecnologia', 'computador', 'software', 'app', 'internet'],
+    'saude': ['saúde', 'doença', 'remédio', 'médico', 'hospital'],
+    'educacao': ['escola', 'estudo', 'aprender', 'ensino', 'professor'],
+    'entretenimento': ['filme', 'música', 'jogo', 'diversão', 'hobby'],
+    'pessoal': ['nome', 'idade', 'você', 'seu', 'sua'],
+    'geografia': ['país', 'cidade', 'capital', 'lugar', 'localização']
+}
+
+_QUESTION_GROUPS = register_keyword_groups('fast.question', QUESTION_TYPE_KEYWORDS)
+_TOPIC_GROUPS = register_keyword_groups('fast.topic', TOPIC_KEYWORDS)
 
 class FastLearning:
     """Sistema de aprendizado acelerado para Qwen2.5-4B"""
@@ -16,7 +50,8 @@ class FastLearning:
             db_path = os.path.join(base_dir, 'memoria', 'fast_learning.db')
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
+        self.fts_enabled = False
         self.create_tables()
         
         # Configurações de otimização
@@ -24,8 +59,17 @@ class FastLearning:
             'max_context_items': 10,
             'min_pattern_score': 0.7,
             'topic_similarity_threshold': 0.6,
-            'learning_rate': 0.1
+            'learning_rate': 0.1,
+            'max_contexts_per_user': MAX_CONTEXTS_PER_USER,
+            'hint_cache_users': 1000,
+            'hint_cache_ttl': HINT_CACHE_TTL
         }
+        
+        # Cache das dicas do optimize_for_qwen: user_id -> {tópico: (expira_em, dicas)}
+        # (LRU por usuário). A validade curta cobre gravações de outros processos
+        # no mesmo banco, que não passam pelo invalidate_hints daqui
+        self._hint_cache: "OrderedDict[str, Dict[str, Tuple[float, List[str]]]]" = OrderedDict()
+        self._hint_lock = threading.Lock()
     
     def create_tables(self):
         """Criar tabelas otimizadas para aprendizado rápido"""
@@ -78,6 +122,69 @@ class FastLearning:
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            
+            # Índices para as consultas por usuário (antes eram varreduras completas)
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_smart_contexts_user_importance
+                ON smart_contexts (user_id, importance_score, last_accessed)
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_response_patterns_user_type
+                ON response_patterns (user_id, question_type)
+            ''')
+        
+        self._create_fts_index()
+    
+    def _create_fts_index(self):
+        """Índice FTS5 (conteúdo externo) sobre smart_contexts, mantido por triggers"""
+        try:
+            with self.conn:
+                exists = self.conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'smart_contexts_fts'"
+                ).fetchone()
+                
+                self.conn.execute('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS smart_contexts_fts USING fts5(
+                        user_id, topic, context_data,
+                        content='smart_contexts', content_rowid='id'
+                    )
+                ''')
+                self.conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS smart_contexts_ai AFTER INSERT ON smart_contexts BEGIN
+                        INSERT INTO smart_contexts_fts (rowid, user_id, topic, context_data)
+                        VALUES (new.id, new.user_id, new.topic, new.context_data);
+                    END
+                ''')
+                self.conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS smart_contexts_ad AFTER DELETE ON smart_contexts BEGIN
+                        INSERT INTO smart_contexts_fts (smart_contexts_fts, rowid, user_id, topic, context_data)
+                        VALUES ('delete', old.id, old.user_id, old.topic, old.context_data);
+                    END
+                ''')
+                self.conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS smart_contexts_au AFTER UPDATE OF user_id, topic, context_data
+                    ON smart_contexts BEGIN
+                        INSERT INTO smart_contexts_fts (smart_contexts_fts, rowid, user_id, topic, context_data)
+                        VALUES ('delete', old.id, old.user_id, old.topic, old.context_data);
+                        INSERT INTO smart_contexts_fts (rowid, user_id, topic, context_data)
+                        VALUES (new.id, new.user_id, new.topic, new.context_data);
+                    END
+                ''')
+                
+                # Bancos antigos: indexar as linhas que já existiam
+                if not exists:
+                    self.conn.execute("INSERT INTO smart_contexts_fts (smart_contexts_fts) VALUES ('rebuild')")
+            
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            # SQLite compilado sem FTS5: manter a busca por LIKE
+            print(f"⚠️ FTS5 indisponível para smart_contexts: {e}")
+            self.fts_enabled = False
+    
+    @staticmethod
+    def _fts_phrase(value) -> str:
+        """Frase FTS5 entre aspas (escapando aspas internas)"""
+        return '"' + str(value).replace('"', '""') + '"'
     
     def learn_response_pattern(self, user_id, question, response, user_feedback=None):
         """Aprender padrões de resposta baseado no sucesso"""
@@ -109,33 +216,36 @@ class FastLearning:
                     (user_id, question_type, response_pattern, effectiveness_score)
                     VALUES (?, ?, ?, ?)
                 ''', (user_id, question_type, response[:200], 0.8))
+        
+        # Os padrões valem para todos os tópicos do usuário
+        self.invalidate_hints(user_id)
     
     def _classify_question_type(self, question):
         """Classificar tipo de pergunta para padrões"""
-        question_lower = question.lower()
-        
-        if any(word in question_lower for word in ['qual', 'o que', 'what']):
-            return 'informational'
-        elif any(word in question_lower for word in ['como', 'how']):
-            return 'procedural'
-        elif any(word in question_lower for word in ['por que', 'why']):
-            return 'explanatory'
-        elif any(word in question_lower for word in ['você', 'seu', 'sua']):
-            return 'personal'
-        else:
-            return 'general'
+        return get_message_features(question).first(_QUESTION_GROUPS, 'general')
     
     def get_learning_context(self, user_id, current_topic, limit=10):
         """Obter contexto inteligente baseado no aprendizado"""
         with self.conn:
             # Buscar contexto relevante por tópico e importância
-            contexts = self.conn.execute('''
-                SELECT context_data, importance_score 
-                FROM smart_contexts 
-                WHERE user_id = ? AND topic LIKE ? 
-                ORDER BY importance_score DESC, last_accessed DESC 
-                LIMIT ?
-            ''', (user_id, f'%{current_topic}%', limit)).fetchall()
+            if self.fts_enabled:
+                contexts = self.conn.execute('''
+                    SELECT c.context_data, c.importance_score 
+                    FROM smart_contexts_fts 
+                    JOIN smart_contexts c ON c.id = smart_contexts_fts.rowid 
+                    WHERE smart_contexts_fts MATCH ? AND c.user_id = ? 
+                    ORDER BY c.importance_score DESC, c.last_accessed DESC 
+                    LIMIT ?
+                ''', (f'user_id : {self._fts_phrase(user_id)} AND topic : {self._fts_phrase(current_topic)}*',
+                      user_id, limit)).fetchall()
+            else:
+                contexts = self.conn.execute('''
+                    SELECT context_data, importance_score 
+                    FROM smart_contexts 
+                    WHERE user_id = ? AND topic LIKE ? 
+                    ORDER BY importance_score DESC, last_accessed DESC 
+                    LIMIT ?
+                ''', (user_id, f'%{current_topic}%', limit)).fetchall()
             
             # Buscar padrões de resposta eficazes
             patterns = self.conn.execute('''
@@ -156,16 +266,68 @@ class FastLearning:
                 (user_id, topic, context_data, importance_score)
                 VALUES (?, ?, ?, ?)
             ''', (user_id, topic, context_data, importance))
+            self._evict_excess_contexts(user_id)
+        
+        self.invalidate_hints(user_id, topic)
+    
+    def _evict_excess_contexts(self, user_id):
+        """Manter no máximo N contextos por usuário, removendo os menos importantes e mais antigos"""
+        max_contexts = self.optimization_config['max_contexts_per_user']
+        count = self.conn.execute(
+            'SELECT COUNT(*) FROM smart_contexts WHERE user_id = ?', (user_id,)
+        ).fetchone()[0]
+        
+        if count > max_contexts:
+            self.conn.execute('''
+                DELETE FROM smart_contexts WHERE id IN (
+                    SELECT id FROM smart_contexts 
+                    WHERE user_id = ? 
+                    ORDER BY importance_score ASC, last_accessed ASC, id ASC 
+                    LIMIT ?
+                )
+            ''', (user_id, count - max_contexts))
+        return max(0, count - max_contexts)
+    
+    def enforce_context_caps(self) -> int:
+        """Aplicar o limite de contextos a todos os usuários (bancos já existentes)"""
+        removed = 0
+        with self.conn:
+            users = self.conn.execute('''
+                SELECT user_id FROM smart_contexts 
+                GROUP BY user_id HAVING COUNT(*) > ?
+            ''', (self.optimization_config['max_contexts_per_user'],)).fetchall()
+            for (user_id,) in users:
+                removed += self._evict_excess_contexts(user_id)
+        
+        with self._hint_lock:
+            self._hint_cache.clear()
+        return removed
+    
+    def invalidate_hints(self, user_id, topic=None):
+        """Descartar dicas em cache do usuário (todas ou só de um tópico)"""
+        with self._hint_lock:
+            if topic is None:
+                self._hint_cache.pop(user_id, None)
+            elif user_id in self._hint_cache:
+                self._hint_cache[user_id].pop(topic, None)
     
     def optimize_for_qwen(self, user_message, user_profile):
         """Otimizações específicas para Qwen2.5-4B"""
         # Extrair tópico principal da mensagem
         topic = self._extract_main_topic(user_message)
+        user_id = user_profile.get('user_id')
+        
+        # Dicas em cache para (usuário, tópico) até o próximo aprendizado ou o fim da validade
+        with self._hint_lock:
+            cached = self._hint_cache.get(user_id, {}).get(topic)
+            hit = cached is not None and cached[0] > time.monotonic()
+            record_cache('fast_learning_hints', hit)
+            if hit:
+                self._hint_cache.move_to_end(user_id)
+                return list(cached[1])
         
         # Buscar contexto aprendido
-        contexts, patterns = self.get_learning_context(
-            user_profile.get('user_id'), topic
-        )
+        contexts, patterns = self.get_learning_context(user_id, topic)
         
         # Construir prompt otimizado para Qwen
         optimization_hints = []
@@ -178,23 +340,17 @@ class FastLearning:
             relevant_context = contexts[0][0]  # Contexto mais relevante
             optimization_hints.append(f"Contexto relevante: {relevant_context}")
         
-        return optimization_hints
+        ttl = self.optimization_config['hint_cache_ttl']
+        if ttl <= 0:
+            return list(optimization_hints)
+        with self._hint_lock:
+            self._hint_cache.setdefault(user_id, {})[topic] = (time.monotonic() + ttl, optimization_hints)
+            self._hint_cache.move_to_end(user_id)
+            while len(self._hint_cache) > self.optimization_config['hint_cache_users']:
+                self._hint_cache.popitem(last=False)
+        
+        return list(optimization_hints)
     
     def _extract_main_topic(self, message):
         """Extrair tópico principal da mensagem"""
-        # Palavras-chave por tópico
-        topics = {
-            'tecnologia': ['tecnologia', 'computador', 'software', 'app', 'internet'],
-            'saude': ['saúde', 'doença', 'remédio', 'médico', 'hospital'],
-            'educacao': ['escola', 'estudo', 'aprender', 'ensino', 'professor'],
-            'entretenimento': ['filme', 'música', 'jogo', 'diversão', 'hobby'],
-            'pessoal': ['nome', 'idade', 'você', 'seu', 'sua'],
-            'geografia': ['país', 'cidade', 'capital', 'lugar', 'localização']
-        }
-        
-        message_lower = message.lower()
-        for topic, keywords in topics.items():
-            if any(keyword in message_lower for keyword in keywords):
-                return topic
-        
-        return 'geral'
\ No newline at end of file
+        return get_message_features(message).first(_TOPIC_GROUPS, 'geral')
\ No newline at end of file
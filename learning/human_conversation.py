@@ -6,6 +6,92 @@ import json
 import random
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+from core.text_features import get_message_features, register_keyword_groups
+
+# Palavras-chave dos detectores (registradas no extrator de características compartilhado)
+CONVERSATION_TYPE_KEYWORDS = {
+    'emotional_negative': ['sinto', 'triste', 'chateado', 'mal'],
+    'emotional_positive': ['feliz', 'alegre', 'animado', 'bem'],
+    'confusion': ['não sei', 'confuso', 'dúvida']
+}
+
+MOOD_INDICATORS = {
+    # Estados emocionais positivos
+    'positive': [
+        'feliz', 'alegre', 'animado', 'bem', 'ótimo', 'excelente', 
+        'maravilhoso', 'perfeito', 'incrível', 'adorei', 'amei',
+        'satisfeito', 'radiante', 'eufórico', 'empolgado'
+    ],
+    # Estados emocionais negativos
+    'negative': [
+        'triste', 'chateado', 'irritado', 'nervoso', 'preocupado',
+        'ansioso', 'mal', 'péssimo', 'terrível', 'odiei', 'detestei',
+        'frustrado', 'desanimado', 'deprimido', 'estressado'
+    ],
+    # Estados neutros/curiosos
+    'curious': [
+        'interessante', 'curioso', 'pensativo', 'reflexivo', 'intrigado',
+        'questionador', 'investigativo', 'analítico'
+    ],
+    # Estados de necessidade de suporte
+    'needs_support': [
+        'ajuda', 'socorro', 'dificuldade', 'problema', 'confuso',
+        'perdido', 'não entendo', 'não sei', 'preciso', 'auxílio'
+    ],
+    # Estados de energia/entusiasmo
+    'energetic': [
+        'animado', 'empolgado', 'cheio de energia', 'entusiasmado',
+        'motivado', 'inspirado', 'determinado'
+    ]
+}
+
+# Análise de contexto emocional usando palavras conectadas
+EMOTIONAL_PHRASES = {
+    'muito feliz': 3,
+    'super animado': 3,
+    'bem triste': -3,
+    'muito mal': -3,
+    'não aguento': -2,
+    'adorando': 2,
+    'odiando': -2,
+    'apaixonado': 3,
+    'decepcionado': -2
+}
+
+CASUAL_CONTEXT_KEYWORDS = {
+    # Contextos baseados em horário e saudações
+    'morning_greetings': ['bom dia', 'bom-dia', 'morning'],
+    'afternoon_greetings': ['boa tarde', 'boa-tarde', 'afternoon'],
+    'evening_greetings': ['boa noite', 'boa-noite', 'evening'],
+    # Contextos temáticos
+    'weather_chat': ['tempo', 'clima', 'chuva', 'sol', 'frio', 'calor'],
+    'weekend_plans': ['fim de semana', 'sábado', 'domingo', 'weekend', 'final de semana'],
+    'food_talk': ['comida', 'almoço', 'jantar', 'fome', 'comer', 'delicious'],
+    'work_study_life': ['trabalho', 'estudo', 'faculdade', 'escola', 'job', 'study'],
+    'hobbies_interests': ['hobby', 'interesse', 'gosto', 'adoro', 'paixão', 'curtir'],
+    'daily_check_in': ['como está', 'como vai', 'tudo bem', 'que tal']
+}
+
+EMOTIONAL_CONTEXT_KEYWORDS = {
+    # Indicadores de felicidade
+    'happy': ['feliz', 'alegre', 'animado', 'bem', 'ótimo', 'maravilha', 
+              'incrível', 'fantástico', 'perfeito', 'adorei', 'amei'],
+    # Indicadores de tristeza
+    'sad': ['triste', 'chateado', 'mal', 'péssimo', 'horrível', 
+            'difícil', 'problema', 'preocupado', 'angustiado'],
+    # Indicadores de animação
+    'excited': ['animado', 'empolgado', 'ansioso', 'não vejo a hora', 
+                'incrível', 'demais', 'muito bom'],
+    # Indicadores de confusão
+    'confused': ['confuso', 'não entendo', 'não sei', 'dúvida', 
+                 'complicado', 'difícil de entender']
+}
+
+_TYPE_GROUPS = register_keyword_groups('human.type', CONVERSATION_TYPE_KEYWORDS)
+_MOOD_GROUPS = register_keyword_groups('human.mood', MOOD_INDICATORS)
+_PHRASE_GROUPS = register_keyword_groups('human.phrases', {'emotional': list(EMOTIONAL_PHRASES)})
+_CASUAL_GROUPS = register_keyword_groups('human.casual', CASUAL_CONTEXT_KEYWORDS)
+_EMOTIONAL_CONTEXT_GROUPS = register_keyword_groups('human.emotional', EMOTIONAL_CONTEXT_KEYWORDS)
 
 class HumanConversationSystem:
     """Sistema para conversas mais humanas e naturais"""
@@ -88,97 +174,60 @@ class HumanConversationSystem:
             "Como você vê essa situação? 😄",
             "Fiquei curiosa sobre sua perspectiva! 🌸"
         ]
+        
+        self._context_groups = register_keyword_groups('human.context', {
+            context_type: data['patterns']
+            for context_type, data in self.conversation_contexts.items()
+        })
 
     def detect_conversation_type(self, message: str) -> str:
         """Detectar o tipo de conversa baseado na mensagem"""
-        message_lower = message.lower().strip()
+        features = get_message_features(message)
         
-        for context_type, data in self.conversation_contexts.items():
-            if any(pattern in message_lower for pattern in data['patterns']):
-                return context_type
+        context_type = features.first(self._context_groups)
+        if context_type:
+            return context_type
         
         # Análises mais específicas
         if '?' in message and len(message.split()) < 10:
             return 'simple_question'
-        elif any(word in message_lower for word in ['sinto', 'triste', 'chateado', 'mal']):
-            return 'emotional_negative'
-        elif any(word in message_lower for word in ['feliz', 'alegre', 'animado', 'bem']):
-            return 'emotional_positive'
-        elif any(word in message_lower for word in ['não sei', 'confuso', 'dúvida']):
-            return 'confusion'
-        
-        return 'general'
+        
+        return features.first(_TYPE_GROUPS, 'general')
     
     def detect_user_mood(self, message: str, user_profile: dict = None) -> dict:
         """🎭 Detecta o humor/estado emocional do usuário com análise contextual"""
-        message = message.lower().strip()
-        
-        # Estados emocionais positivos
-        positive_indicators = [
-            'feliz', 'alegre', 'animado', 'bem', 'ótimo', 'excelente', 
-            'maravilhoso', 'perfeito', 'incrível', 'adorei', 'amei',
-            'satisfeito', 'radiante', 'eufórico', 'empolgado'
-        ]
-        
-        # Estados emocionais negativos
-        negative_indicators = [
-            'triste', 'chateado', 'irritado', 'nervoso', 'preocupado',
-            'ansioso', 'mal', 'péssimo', 'terrível', 'odiei', 'detestei',
-            'frustrado', 'desanimado', 'deprimido', 'estressado'
-        ]
-        
-        # Estados neutros/curiosos
-        curious_indicators = [
-            'interessante', 'curioso', 'pensativo', 'reflexivo', 'intrigado',
-            'questionador', 'investigativo', 'analítico'
-        ]
-        
-        # Estados de necessidade de suporte
-        support_indicators = [
-            'ajuda', 'socorro', 'dificuldade', 'problema', 'confuso',
-            'perdido', 'não entendo', 'não sei', 'preciso', 'auxílio'
-        ]
-        
-        # Estados de energia/entusiasmo
-        energetic_indicators = [
-            'animado', 'empolgado', 'cheio de energia', 'entusiasmado',
-            'motivado', 'inspirado', 'determinado'
-        ]
+        features = get_message_features(message)
+        message = features.lower.strip()
         
         # Análise das palavras-chave
         mood_score = 0
         detected_emotions = []
         intensity_multiplier = 1
         
-        for word in positive_indicators:
-            if word in message:
-                mood_score += 2
-                detected_emotions.append('positive')
-                if word in ['incrível', 'maravilhoso', 'perfeito']:
-                    intensity_multiplier = 1.5
-        
-        for word in negative_indicators:
-            if word in message:
-                mood_score -= 2
-                detected_emotions.append('negative')
-                if word in ['péssimo', 'terrível', 'deprimido']:
-                    intensity_multiplier = 1.5
-        
-        for word in curious_indicators:
-            if word in message:
-                mood_score += 1
-                detected_emotions.append('curious')
-        
-        for word in support_indicators:
-            if word in message:
-                detected_emotions.append('needs_support')
-                if word in ['socorro', 'ajuda', 'dificuldade']:
-                    intensity_multiplier = 1.3
-        
-        for word in energetic_indicators:
-            if word in message:
-                mood_score += 1
-                detected_emotions.append('energetic')
+        for word in features.hits(_MOOD_GROUPS['positive']):
+            mood_score += 2
+            detected_emotions.append('positive')
+            if word in ['incrível', 'maravilhoso', 'perfeito']:
+                intensity_multiplier = 1.5
+        
+        for word in features.hits(_MOOD_GROUPS['negative']):
+            mood_score -= 2
+            detected_emotions.append('negative')
+            if word in ['péssimo', 'terrível', 'deprimido']:
+                intensity_multiplier = 1.5
+        
+        for word in features.hits(_MOOD_GROUPS['curious']):
+            mood_score += 1
+            detected_emotions.append('curious')
+        
+        for word in features.hits(_MOOD_GROUPS['needs_support']):
+            detected_emotions.append('needs_support')
+            if word in ['socorro', 'ajuda', 'dificuldade']:
+                intensity_multiplier = 1.3
+        
+        for word in features.hits(_MOOD_GROUPS['energetic']):
+            mood_score += 1
+            detected_emotions.append('energetic')
         
         # Análise de pontuação e estrutura para intensidade
         exclamation_count = message.count('!')
@@ -197,22 +246,9 @@ class HumanConversationSystem:
             intensity_multiplier *= 1.4
         
         # Análise de contexto emocional usando palavras conectadas
-        emotional_phrases = {
-            'muito feliz': 3,
-            'super animado': 3,
-            'bem triste': -3,
-            'muito mal': -3,
-            'não aguento': -2,
-            'adorando': 2,
-            'odiando': -2,
-            'apaixonado': 3,
-            'decepcionado': -2
-        }
-        
-        for phrase, score in emotional_phrases.items():
-            if phrase in message:
-                mood_score += score
-                intensity_multiplier *= 1.3
+        for phrase in features.hits(_PHRASE_GROUPS['emotional']):
+            mood_score += EMOTIONAL_PHRASES[phrase]
+            intensity_multiplier *= 1.3
         
         # Determinar humor principal com base em intensidade
         final_score = mood_score * intensity_multiplier
@@ -259,34 +295,7 @@ class HumanConversationSystem:
 
     def detect_emotional_context(self, message: str) -> str:
         """Detectar o contexto emocional da mensagem"""
-        message_lower = message.lower()
-        
-        # Indicadores de felicidade
-        happy_indicators = ['feliz', 'alegre', 'animado', 'bem', 'ótimo', 'maravilha', 
-                          'incrível', 'fantástico', 'perfeito', 'adorei', 'amei']
-        
-        # Indicadores de tristeza
-        sad_indicators = ['triste', 'chateado', 'mal', 'péssimo', 'horrível', 
-                        'difícil', 'problema', 'preocupado', 'angustiado']
-        
-        # Indicadores de animação
-        excited_indicators = ['animado', 'empolgado', 'ansioso', 'não vejo a hora', 
-                            'incrível', 'demais', 'muito bom']
-        
-        # Indicadores de confusão  
-        confused_indicators = ['confuso', 'não entendo', 'não sei', 'dúvida', 
-                             'complicado', 'difícil de entender']
-        
-        if any(indicator in message_lower for indicator in happy_indicators):
-            return 'happy'
-        elif any(indicator in message_lower for indicator in sad_indicators):
-            return 'sad'
-        elif any(indicator in message_lower for indicator in excited_indicators):
-            return 'excited'
-        elif any(indicator in message_lower for indicator in confused_indicators):
-            return 'confused'
-        
-        return 'neutral'
+        return get_message_features(message).first(_EMOTIONAL_CONTEXT_GROUPS, 'neutral')
 
     def generate_human_response(self, message: str, user_profile: Optional[Dict] = None) -> str:
         """Gerar resposta mais humana e natural com análise de humor avançada"""
@@ -539,31 +548,7 @@ class HumanConversationSystem:
     
     def detect_casual_context(self, message: str) -> str:
         """🔍 Detectar contexto casual específico da mensagem"""
-        message_lower = message.lower()
-        
-        # Contextos baseados em horário e saudações
-        if any(greeting in message_lower for greeting in ['bom dia', 'bom-dia', 'morning']):
-            return 'morning_greetings'
-        elif any(greeting in message_lower for greeting in ['boa tarde', 'boa-tarde', 'afternoon']):
-            return 'afternoon_greetings'
-        elif any(greeting in message_lower for greeting in ['boa noite', 'boa-noite', 'evening']):
-            return 'evening_greetings'
-        
-        # Contextos temáticos
-        elif any(weather in message_lower for weather in ['tempo', 'clima', 'chuva', 'sol', 'frio', 'calor']):
-            return 'weather_chat'
-        elif any(weekend in message_lower for weekend in ['fim de semana', 'sábado', 'domingo', 'weekend', 'final de semana']):
-            return 'weekend_plans'
-        elif any(food in message_lower for food in ['comida', 'almoço', 'jantar', 'fome', 'comer', 'delicious']):
-            return 'food_talk'
-        elif any(work in message_lower for work in ['trabalho', 'estudo', 'faculdade', 'escola', 'job', 'study']):
-            return 'work_study_life'
-        elif any(hobby in message_lower for hobby in ['hobby', 'interesse', 'gosto', 'adoro', 'paixão', 'curtir']):
-            return 'hobbies_interests'
-        elif any(check in message_lower for check in ['como está', 'como vai', 'tudo bem', 'que tal']):
-            return 'daily_check_in'
-        
-        return 'general_casual'
+        return get_message_features(message).first(_CASUAL_GROUPS, 'general_casual')
     
     def enhance_conversation_flow(self, message: str, response: str, user_profile: dict = None) -> str:
         """🌊 Melhorar o fluxo da conversa com conectores naturais"""
@@ -2,23 +2,69 @@
 Sistema de Reconhecimento de Padrões
 Especializado em identificar padrões de conversação e preferências do usuário
 """
+import atexit
 import sqlite3
 import os
 import json
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+from core.metrics import TimedConnection
+from core.text_features import get_message_features, register_keyword_groups
+
+# Palavras de sentimento (contagem por grupo)
+SENTIMENT_KEYWORDS = {
+    'positive': ['bom', 'ótimo', 'excelente', 'feliz', 'alegre', 'obrigado', 'gosto', 'legal'],
+    'negative': ['ruim', 'péssimo', 'triste', 'raiva', 'ódio', 'problema', 'erro', 'difícil'],
+    'question': ['?', 'como', 'que', 'quando', 'onde', 'por que', 'qual']
+}
+
+TOPIC_KEYWORDS = {
+    'technology': ['computador', 'software', 'programa', 'app', 'internet', 'site', 'código'],
+    'entertainment': ['filme', 'música', 'jogo', 'série', 'tv', 'youtube', 'netflix'],
+    'education': ['estudo', 'escola', 'faculdade', 'curso', 'aprender', 'ensino', 'prova'],
+    'work': ['trabalho', 'emprego', 'projeto', 'reunião', 'chefe', 'carreira', 'salário'],
+    'personal': ['família', 'amigo', 'relacionamento', 'casa', 'comida', 'saúde', 'vida'],
+    'sports': ['futebol', 'esporte', 'jogo', 'time', 'partida', 'campeonato', 'atleta']
+}
+
+FORMALITY_KEYWORDS = {
+    'formal': ['senhor', 'senhora', 'por favor', 'gostaria', 'poderia'],
+    'informal': ['oi', 'olá', 'opa', 'cara', 'mano', 'galera']
+}
+
+_SENTIMENT_GROUPS = register_keyword_groups('patterns.sentiment', SENTIMENT_KEYWORDS)
+_TOPIC_GROUPS = register_keyword_groups('patterns.topic', TOPIC_KEYWORDS)
+_FORMALITY_GROUPS = register_keyword_groups('patterns.formality', FORMALITY_KEYWORDS)
 
 class PatternRecognitionSystem:
     """Sistema avançado de reconhecimento de padrões para personalização"""
     
+    # Ocorrências agregadas em memória antes de gravar (upsert em lote)
+    PATTERN_FLUSH_BATCH = 100
+    PATTERN_FLUSH_INTERVAL_SECONDS = 30
+    
+    # Resumos de padrões por usuário mantidos em memória (LRU)
+    MAX_SUMMARY_USERS = 1000
+    
     def __init__(self, db_path: Optional[str] = None):
         if db_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             db_path = os.path.join(base_dir, 'memoria', 'pattern_recognition.db')
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, factory=TimedConnection)
+        self._lock = threading.RLock()
+        # (user_id, pattern_type, pattern_data) -> [ocorrências, último last_seen]
+        self._pending: Dict[Tuple[str, str, str], list] = {}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        # user_id -> {(pattern_type, pattern_data): [frequency, confidence_score, last_seen]}
+        self._summaries: OrderedDict = OrderedDict()
         self.create_tables()
+        atexit.register(self.flush_patterns)
     
     def create_tables(self):
         """Criar tabelas para reconhecimento de padrões"""
@@ -62,6 +108,43 @@ class PatternRecognitionSystem:
                     last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            
+            self._create_pattern_key()
+    
+    def _create_pattern_key(self):
+        """Chave única (user_id, pattern_type, pattern_data), fundindo duplicatas antigas"""
+        exists = self.conn.execute('''
+            SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_user_patterns_key'
+        ''').fetchone()
+        if exists:
+            return
+        
+        self.conn.execute('''
+            UPDATE user_patterns
+            SET frequency = (SELECT SUM(d.frequency) FROM user_patterns d
+                             WHERE d.user_id = user_patterns.user_id
+                               AND d.pattern_type = user_patterns.pattern_type
+                               AND d.pattern_data = user_patterns.pattern_data),
+                last_seen = (SELECT MAX(d.last_seen) FROM user_patterns d
+                             WHERE d.user_id = user_patterns.user_id
+                               AND d.pattern_type = user_patterns.pattern_type
+                               AND d.pattern_data = user_patterns.pattern_data),
+                confidence_score = (SELECT MAX(d.confidence_score) FROM user_patterns d
+                                    WHERE d.user_id = user_patterns.user_id
+                                      AND d.pattern_type = user_patterns.pattern_type
+                                      AND d.pattern_data = user_patterns.pattern_data)
+            WHERE id IN (SELECT MIN(id) FROM user_patterns
+                         GROUP BY user_id, pattern_type, pattern_data HAVING COUNT(*) > 1)
+        ''')
+        self.conn.execute('''
+            DELETE FROM user_patterns
+            WHERE id NOT IN (SELECT MIN(id) FROM user_patterns
+                             GROUP BY user_id, pattern_type, pattern_data)
+        ''')
+        self.conn.execute('''
+            CREATE UNIQUE INDEX idx_user_patterns_key
+            ON user_patterns(user_id, pattern_type, pattern_data)
+        ''')
     
     def analyze_conversation_pattern(self, user_id: str, message: str, response: str) -> Dict:
         """Analisar padrões em uma conversa"""
@@ -109,15 +192,11 @@ class PatternRecognitionSystem:
     
     def _analyze_sentiment(self, message: str) -> str:
         """Análise básica de sentimento"""
-        message_lower = message.lower()
-        
-        positive_words = ['bom', 'ótimo', 'excelente', 'feliz', 'alegre', 'obrigado', 'gosto', 'legal']
-        negative_words = ['ruim', 'péssimo', 'triste', 'raiva', 'ódio', 'problema', 'erro', 'difícil']
-        question_words = ['?', 'como', 'que', 'quando', 'onde', 'por que', 'qual']
+        features = get_message_features(message)
         
-        positive_count = sum(1 for word in positive_words if word in message_lower)
-        negative_count = sum(1 for word in negative_words if word in message_lower)
-        question_count = sum(1 for word in question_words if word in message_lower)
+        positive_count = features.count(_SENTIMENT_GROUPS['positive'])
+        negative_count = features.count(_SENTIMENT_GROUPS['negative'])
+        question_count = features.count(_SENTIMENT_GROUPS['question'])
         
         if question_count > 0:
             return 'questioning'
@@ -130,21 +209,8 @@ class PatternRecognitionSystem:
     
     def _extract_topics(self, message: str) -> List[str]:
         """Extrair tópicos da mensagem"""
-        message_lower = message.lower()
-        topics = []
-        
-        topic_keywords = {
-            'technology': ['computador', 'software', 'programa', 'app', 'internet', 'site', 'código'],
-            'entertainment': ['filme', 'música', 'jogo', 'série', 'tv', 'youtube', 'netflix'],
-            'education': ['estudo', 'escola', 'faculdade', 'curso', 'aprender', 'ensino', 'prova'],
-            'work': ['trabalho', 'emprego', 'projeto', 'reunião', 'chefe', 'carreira', 'salário'],
-            'personal': ['família', 'amigo', 'relacionamento', 'casa', 'comida', 'saúde', 'vida'],
-            'sports': ['futebol', 'esporte', 'jogo', 'time', 'partida', 'campeonato', 'atleta']
-        }
-        
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
-                topics.append(topic)
+        features = get_message_features(message)
+        topics = [topic for topic, group in _TOPIC_GROUPS.items() if features.has(group)]
         
         return topics if topics else ['general']
     
@@ -164,11 +230,9 @@ class PatternRecognitionSystem:
         patterns = {}
         
         # Formalidade
-        formal_indicators = ['senhor', 'senhora', 'por favor', 'gostaria', 'poderia']
-        informal_indicators = ['oi', 'olá', 'opa', 'cara', 'mano', 'galera']
-        
-        formal_count = sum(1 for word in formal_indicators if word in message.lower())
-        informal_count = sum(1 for word in informal_indicators if word in message.lower())
+        features = get_message_features(message)
+        formal_count = features.count(_FORMALITY_GROUPS['formal'])
+        informal_count = features.count(_FORMALITY_GROUPS['informal'])
         
         if formal_count > informal_count:
             patterns['formality'] = 'formal'
@@ -186,76 +250,128 @@ class PatternRecognitionSystem:
         return patterns
     
     def _save_patterns(self, user_id: str, patterns: Dict):
-        """Salvar padrões identificados"""
+        """Salvar padrões identificados (agregados em memória, gravados em lote)"""
         try:
-            with self.conn:
+            last_seen = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            with self._lock:
+                summary = self._get_summary(user_id)
                 for pattern_type, pattern_value in patterns.items():
                     if isinstance(pattern_value, list):
                         pattern_value = json.dumps(pattern_value)
                     elif isinstance(pattern_value, dict):
                         pattern_value = json.dumps(pattern_value)
+                    pattern_data = str(pattern_value)
                     
-                    # Verificar se padrão já existe
-                    cursor = self.conn.execute('''
-                        SELECT id, frequency FROM user_patterns
-                        WHERE user_id = ? AND pattern_type = ? AND pattern_data = ?
-                    ''', (user_id, pattern_type, str(pattern_value)))
-                    
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        # Atualizar frequência
-                        self.conn.execute('''
-                            UPDATE user_patterns
-                            SET frequency = frequency + 1,
-                                last_seen = CURRENT_TIMESTAMP,
-                                confidence_score = MIN(1.0, confidence_score + 0.1)
-                            WHERE id = ?
-                        ''', (existing[0],))
+                    # Resumo em memória com as mesmas regras do banco
+                    entry = summary.get((pattern_type, pattern_data))
+                    if entry:
+                        entry[0] += 1
+                        entry[1] = min(1.0, entry[1] + 0.1)
+                        entry[2] = last_seen
                     else:
-                        # Inserir novo padrão
-                        self.conn.execute('''
-                            INSERT INTO user_patterns
-                            (user_id, pattern_type, pattern_data, confidence_score)
-                            VALUES (?, ?, ?, 0.3)
-                        ''', (user_id, pattern_type, str(pattern_value)))
+                        summary[(pattern_type, pattern_data)] = [1, 0.3, last_seen]
+                    
+                    pending = self._pending.setdefault((user_id, pattern_type, pattern_data), [0, last_seen])
+                    pending[0] += 1
+                    pending[1] = last_seen
+                    self._pending_count += 1
+                
+                if (self._pending_count >= self.PATTERN_FLUSH_BATCH or
+                        time.monotonic() - self._last_flush >= self.PATTERN_FLUSH_INTERVAL_SECONDS):
+                    self.flush_patterns()
         except Exception as e:
             print(f"Erro ao salvar padrões: {e}")
     
-    def get_user_patterns(self, user_id: str, pattern_type: Optional[str] = None) -> List[Dict]:
-        """Obter padrões do usuário"""
-        try:
-            query = '''
+    def flush_patterns(self) -> int:
+        """💾 Gravar as ocorrências pendentes com upsert em uma única transação"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return 0
+            
+            rows = [
+                (user_id, pattern_type, pattern_data, count, last_seen, count)
+                for (user_id, pattern_type, pattern_data), (count, last_seen) in self._pending.items()
+            ]
+            try:
+                with self.conn:
+                    # Novo padrão: confiança 0.3 (+0.1 por repetição); existente: +0.1 por ocorrência
+                    self.conn.executemany('''
+                        INSERT INTO user_patterns
+                        (user_id, pattern_type, pattern_data, frequency, last_seen, confidence_score)
+                        VALUES (?, ?, ?, ?, ?, MIN(1.0, 0.3 + 0.1 * (? - 1)))
+                        ON CONFLICT(user_id, pattern_type, pattern_data) DO UPDATE SET
+                            frequency = frequency + excluded.frequency,
+                            last_seen = excluded.last_seen,
+                            confidence_score = MIN(1.0, confidence_score + 0.1 * excluded.frequency)
+                    ''', rows)
+            except Exception as e:
+                print(f"Erro ao gravar padrões: {e}")
+                return 0
+            
+            self._pending.clear()
+            self._pending_count = 0
+            return len(rows)
+    
+    def _get_summary(self, user_id: str) -> Dict[Tuple[str, str], list]:
+        """Resumo em memória dos padrões do usuário (carregado do banco na primeira vez)"""
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            if summary is not None:
+                self._summaries.move_to_end(user_id)
+                return summary
+            
+            summary = {}
+            for pattern_type, pattern_data, frequency, confidence, last_seen in self.conn.execute('''
                 SELECT pattern_type, pattern_data, frequency, confidence_score, last_seen
                 FROM user_patterns
                 WHERE user_id = ?
-            '''
-            params = [user_id]
+            ''', (user_id,)):
+                summary[(pattern_type, pattern_data)] = [frequency, confidence, last_seen]
             
-            if pattern_type:
-                query += ' AND pattern_type = ?'
-                params.append(pattern_type)
+            # Ocorrências ainda não gravadas de um resumo descartado pelo LRU
+            for (pending_user, pattern_type, pattern_data), (count, last_seen) in self._pending.items():
+                if pending_user != user_id:
+                    continue
+                entry = summary.get((pattern_type, pattern_data))
+                if entry:
+                    entry[0] += count
+                    entry[1] = min(1.0, entry[1] + 0.1 * count)
+                    entry[2] = last_seen
+                else:
+                    summary[(pattern_type, pattern_data)] = [count, min(1.0, 0.3 + 0.1 * (count - 1)), last_seen]
             
-            query += ' ORDER BY confidence_score DESC, frequency DESC'
+            self._summaries[user_id] = summary
+            while len(self._summaries) > self.MAX_SUMMARY_USERS:
+                self._summaries.popitem(last=False)
+            return summary
+    
+    def get_user_patterns(self, user_id: str, pattern_type: Optional[str] = None) -> List[Dict]:
+        """Obter padrões do usuário"""
+        try:
+            with self._lock:
+                entries = [
+                    (key, list(values)) for key, values in self._get_summary(user_id).items()
+                    if not pattern_type or key[0] == pattern_type
+                ]
             
-            cursor = self.conn.execute(query, params)
-            results = cursor.fetchall()
+            entries.sort(key=lambda item: (item[1][1], item[1][0]), reverse=True)
             
             patterns = []
-            for row in results:
+            for (entry_type, pattern_data), (frequency, confidence, last_seen) in entries:
                 pattern = {
-                    'type': row[0],
-                    'data': row[1],
-                    'frequency': row[2],
-                    'confidence': row[3],
-                    'last_seen': row[4]
+                    'type': entry_type,
+                    'data': pattern_data,
+                    'frequency': frequency,
+                    'confidence': confidence,
+                    'last_seen': last_seen
                 }
                 
                 # Tentar decodificar JSON se necessário
                 try:
-                    pattern['data'] = json.loads(row[1])
+                    pattern['data'] = json.loads(pattern_data)
                 except:
-                    pattern['data'] = row[1]
+                    pattern['data'] = pattern_data
                 
                 patterns.append(pattern)
             
@@ -321,7 +437,9 @@ class PatternRecognitionSystem:
         try:
             cutoff_date = datetime.now() - timedelta(days=days_old)
             
-            with self.conn:
+            # Gravar pendentes antes e recarregar os resumos depois
+            self.flush_patterns()
+            with self._lock, self.conn:
                 # Remover padrões muito antigos com baixa confiança
                 self.conn.execute('''
                     DELETE FROM user_patterns
@@ -334,6 +452,7 @@ class PatternRecognitionSystem:
                     SET confidence_score = MAX(0.1, confidence_score - 0.1)
                     WHERE last_seen < ?
                 ''', (cutoff_date.isoformat(),))
+                self._summaries.clear()
         
         except Exception as e:
-            print(f"Erro ao limpar padrões antigos: {e}")
\ No newline at end of file
+            print(f"Erro ao limpar padrões antigos: {e}")
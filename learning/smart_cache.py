@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 import threading
 from collections import defaultdict, OrderedDict
+from core.metrics import record_cache
 
 class SmartCache:
     """Cache inteligente para otimizar respostas e aprendizado"""
@@ -58,12 +59,14 @@ class SmartCache:
                     # Mover para final (LRU)
                     self.memory_cache.move_to_end(cache_key)
                     self.stats['hits'] += 1
+                    record_cache('smart_cache_response', True)
                     return cached_item['data']
                 else:
                     # Remover item expirado
                     del self.memory_cache[cache_key]
             
             self.stats['misses'] += 1
+            record_cache('smart_cache_response', False)
             return None
     
     def cache_response(self, user_id: str, message: str, response: str, 
@@ -111,9 +114,11 @@ class SmartCache:
             if user_id in self.user_preferences_cache:
                 cached = self.user_preferences_cache[user_id]
                 if not self._is_expired(cached['timestamp']):
+                    record_cache('smart_cache_preferences', True)
                     return cached['preferences']
                 else:
                     del self.user_preferences_cache[user_id]
+            record_cache('smart_cache_preferences', False)
             return None
     
     def cache_context_patterns(self, topic: str, patterns: List[str]):
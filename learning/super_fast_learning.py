@@ -4,22 +4,243 @@
 Algoritmos avançados para aprendizagem instantânea
 """
 
+import atexit
 import sqlite3
 import json
 import datetime
-from typing import Dict, List, Tuple, Any
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Tuple, Any, Optional
 import re
 import random
+from collections import OrderedDict
+from core.metrics import TimedConnection
+from core.text_features import KeywordAutomaton, get_message_features, register_keyword_groups
+
+try:
+    from core.config import config
+    CONTEXT_ANALYSIS_RETENTION_DAYS = config.learning.get('context_analysis_retention_days', 30)
+except Exception:
+    CONTEXT_ANALYSIS_RETENTION_DAYS = 30
+
+# Padrões do tipo ".*(?:a|b|c).*" ou ".*(a|b).*": alternativas literais viram palavras-chave
+_ALTERNATION_PATTERN = re.compile(r'^\.\*\((?:\?:)?(.*)\)\.\*$', re.DOTALL)
+_REGEX_METACHARS = set('.^$*+?{}[]\\|()')
+
+# Palavras-chave de emoção/intenção, intensidade, estágio e sentimento
+EMOTIONAL_KEYWORDS = {
+    'desire': ['tesão', 'desejo', 'vontade', 'quero', 'preciso'],
+    'love': ['amor', 'paixão', 'coração', 'sentimento'],
+    'arousal': ['excitada', 'molhada', 'quente', 'fogo'],
+    'playful': ['brincadeira', 'jogo', 'diversão'],
+    'intimate': ['íntimo', 'pessoal', 'secreto', 'próximo']
+}
+
+INTENSITY_MARKERS = {
+    'muito': 2, 'extremamente': 3, 'totalmente': 2,
+    'completamente': 3, 'loucamente': 4, 'desesperadamente': 4
+}
+
+_EMOTION_GROUPS = register_keyword_groups('super.emotion', EMOTIONAL_KEYWORDS)
+_CONTEXT_GROUPS = register_keyword_groups('super.context', {
+    'intensity': list(INTENSITY_MARKERS),
+    'opening': ['oi', 'olá', 'hey'],
+    'closing': ['tchau', 'bye', 'até'],
+    'positive': ['amor', 'paixão', 'desejo', 'linda', 'gostosa', 'sexy', 'quero'],
+    'negative': ['triste', 'chateada', 'brava', 'irritada']
+})
+
+# Palavras-chave de padrões novos acumuladas antes de recompilar o autômato do índice
+PATTERN_KEYWORDS_RECOMPILE_AT = 64
+
+
+def _literal_keywords(input_pattern: str) -> Optional[Tuple[str, ...]]:
+    """
+    Palavras-chave literais de um padrão de alternância (ou None se o padrão
+    não for só alternativas literais). Se o texto contém uma delas, o regex casa.
+    """
+    match = _ALTERNATION_PATTERN.match(input_pattern.strip())
+    body = match.group(1) if match else None
+    if body is None:
+        stripped = input_pattern.strip()
+        if stripped.startswith('.*') and stripped.endswith('.*') and len(stripped) > 4:
+            body = stripped[2:-2]
+        else:
+            return None
+    
+    alternatives = body.split('|')
+    if any(not alt or _REGEX_METACHARS & set(alt) for alt in alternatives):
+        return None
+    return tuple(alt.lower() for alt in alternatives)
+
+
+class _IndexedPattern:
+    """Padrão de ultra_patterns carregado em memória"""
+    
+    __slots__ = ('id', 'regex', 'keywords', 'response_pattern', 'context_tags',
+                 'personality_match', 'intensity_level', 'effectiveness_score',
+                 'learning_weight', 'usage_count', 'success_rate')
+    
+    def __init__(self, row):
+        self.id = row['id']
+        self.keywords = _literal_keywords(row['input_pattern'] or '')
+        try:
+            self.regex = re.compile(row['input_pattern'] or '', re.IGNORECASE | re.DOTALL)
+        except re.error:
+            # Padrões aprendidos com caracteres especiais: usar só as palavras-chave
+            self.regex = None
+            if self.keywords is None:
+                body = (row['input_pattern'] or '').strip('.*()')
+                self.keywords = tuple(k.lower() for k in body.split('|') if k)
+        self.response_pattern = row['response_pattern']
+        self.context_tags = (row['context_tags'] or '').lower()
+        self.personality_match = row['personality_match']
+        self.intensity_level = row['intensity_level'] if row['intensity_level'] is not None else 5
+        self.effectiveness_score = row['effectiveness_score'] or 0.0
+        self.learning_weight = row['learning_weight'] if row['learning_weight'] is not None else 1.0
+        self.usage_count = row['usage_count'] or 0
+        self.success_rate = row['success_rate'] or 0.0
+    
+    def matches(self, text_lower: str, keyword_hits) -> bool:
+        """Casa o texto (palavras-chave pré-filtradas; regex só quando necessário)"""
+        if self.keywords is not None:
+            return not keyword_hits.isdisjoint(self.keywords)
+        return self.regex is not None and self.regex.search(text_lower) is not None
+
+
+class PatternIndex:
+    """
+    Índice em memória de ultra_patterns
+    
+    Buckets por personality_match, ordenados por intensity_level (o filtro
+    "intensity_level <= ?" vira um bisect). Padrões de alternância literal
+    são resolvidos por palavras-chave, sem executar o regex.
+    """
+    
+    def __init__(self):
+        self.patterns: Dict[int, _IndexedPattern] = {}
+        self._buckets: Dict[Optional[str], List[_IndexedPattern]] = {}
+        self._bucket_levels: Dict[Optional[str], List[int]] = {}
+        self._keywords: set = set()
+        self._automaton: Optional[KeywordAutomaton] = None
+        self._uncompiled_keywords: set = set()
+    
+    def load(self, rows):
+        self.patterns = {}
+        self._buckets = {}
+        self._bucket_levels = {}
+        self._keywords = set()
+        self._automaton = None
+        self._uncompiled_keywords = set()
+        for row in sorted(rows, key=lambda r: r['intensity_level'] if r['intensity_level'] is not None else 5):
+            self.add(_IndexedPattern(row))
+    
+    def add(self, pattern: _IndexedPattern):
+        """Inserir mantendo o bucket ordenado por intensidade"""
+        if pattern.id in self.patterns:
+            return
+        self.patterns[pattern.id] = pattern
+        bucket = self._buckets.setdefault(pattern.personality_match, [])
+        levels = self._bucket_levels.setdefault(pattern.personality_match, [])
+        position = bisect_right(levels, pattern.intensity_level)
+        bucket.insert(position, pattern)
+        levels.insert(position, pattern.intensity_level)
+        if pattern.keywords:
+            new_keywords = set(pattern.keywords) - self._keywords
+            self._keywords.update(new_keywords)
+            if self._automaton is not None:
+                self._uncompiled_keywords.update(new_keywords)
+    
+    def keyword_hits(self, text_lower: str) -> set:
+        """Palavras-chave (de todos os padrões) presentes no texto"""
+        if self._automaton is None or len(self._uncompiled_keywords) >= PATTERN_KEYWORDS_RECOMPILE_AT:
+            self._automaton = KeywordAutomaton({'patterns': sorted(self._keywords)})
+            self._uncompiled_keywords = set()
+        
+        hits = set(self._automaton.find(text_lower))
+        # Padrões aprendidos depois da compilação: verificação direta até a próxima
+        hits.update(keyword for keyword in tuple(self._uncompiled_keywords) if keyword in text_lower)
+        return hits
+    
+    def candidates(self, text_lower: str, mood: str, personality=..., max_intensity: Optional[int] = None):
+        """Padrões que casam com o texto ou cujo context_tags contém o humor"""
+        if personality is ...:
+            pools = list(self._buckets.values())
+        else:
+            bucket = self._buckets.get(personality, [])
+            if max_intensity is not None:
+                bucket = bucket[:bisect_right(self._bucket_levels.get(personality, []), max_intensity)]
+            pools = [bucket]
+        
+        hits = self.keyword_hits(text_lower)
+        mood = mood.lower()
+        return [
+            pattern
+            for pool in pools
+            for pattern in pool
+            if (mood and mood in pattern.context_tags) or pattern.matches(text_lower, hits)
+        ]
+
+
+class TurnAnalysis:
+    """Análise de contexto de um turno: calculada uma vez, gravada uma vez"""
+    
+    __slots__ = ('user_id', 'user_input', 'context', 'created_at', 'persisted')
+    
+    def __init__(self, user_id: str, user_input: str, context: Dict):
+        self.user_id = user_id
+        self.user_input = user_input
+        self.context = context
+        self.created_at = time.monotonic()
+        self.persisted = False
+    
+    def as_row(self) -> tuple:
+        context = self.context
+        return (
+            self.user_id, self.user_input, context['mood'], context['intensity'],
+            json.dumps(context['emotions']), context['stage'],
+            json.dumps(context['keywords']), context['sentiment_score'],
+            json.dumps(context)
+        )
+
 
 class SuperFastLearning:
     """🚀 Sistema de Aprendizagem Ultra Rápida"""
     
-    def __init__(self):
-        self.db_path = 'database/super_learning.db'
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+    # Incrementos de usage_count acumulados antes de gravar no banco
+    USAGE_FLUSH_BATCH = 50
+    USAGE_FLUSH_INTERVAL_SECONDS = 30
+    
+    # Padrões criados e estatísticas alteradas por outro processo (web/bot)
+    PATTERN_REFRESH_INTERVAL_SECONDS = 30
+    PATTERN_COLUMNS = '''
+        id, input_pattern, response_pattern, context_tags, personality_match,
+        intensity_level, effectiveness_score, learning_weight, usage_count, success_rate
+    '''
+    
+    # Análises de turno reaproveitadas entre generate_smart_response e learn_from_interaction
+    TURN_ANALYSIS_TTL_SECONDS = 120
+    TURN_ANALYSIS_MAX_PENDING = 100
+    CONTEXT_ANALYSIS_CLEANUP_INTERVAL_SECONDS = 24 * 3600
+    
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or 'database/super_learning.db'
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=TimedConnection)
         self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._pending_usage: Dict[int, int] = {}
+        self._last_usage_flush = time.monotonic()
+        self._turn_analyses: "OrderedDict[Tuple[str, str], TurnAnalysis]" = OrderedDict()
+        self._last_retention_cleanup = time.monotonic()
+        self._last_pattern_refresh = time.monotonic()
+        self._patterns_used_until = ''
+        self._patterns_seen_id = 0
+        self.pattern_index = PatternIndex()
         self.create_tables()
         self.initialize_patterns()
+        self.reload_patterns()
+        self.cleanup_context_analysis()
     
     def create_tables(self):
         """📊 Criar tabelas avançadas de aprendizagem"""
@@ -67,6 +288,10 @@ class SuperFastLearning:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_context_analysis_created 
+            ON context_analysis (created_at)
+        ''')
         
         # Feedback em tempo real
         self.conn.execute('''
@@ -163,59 +388,197 @@ class SuperFastLearning:
         
         for pattern in initial_patterns:
             try:
+                # Sem chave única na tabela: inserir só se o padrão inicial ainda não existir
                 self.conn.execute('''
-                    INSERT OR IGNORE INTO ultra_patterns 
+                    INSERT INTO ultra_patterns 
                     (input_pattern, response_pattern, context_tags, mood_score, 
                      effectiveness_score, emotional_impact, personality_match, 
                      scenario_type, intensity_level)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM ultra_patterns 
+                        WHERE input_pattern = ? AND personality_match = ?
+                    )
                 ''', (
                     pattern['input_pattern'], pattern['response_pattern'], 
                     pattern['context_tags'], pattern['mood_score'],
                     pattern['effectiveness_score'], pattern['emotional_impact'],
                     pattern['personality_match'], pattern['scenario_type'],
-                    pattern['intensity_level']
+                    pattern['intensity_level'],
+                    pattern['input_pattern'], pattern['personality_match']
                 ))
             except:
                 pass
         
         self.conn.commit()
     
+    def reload_patterns(self):
+        """🔄 (Re)carregar ultra_patterns no índice em memória"""
+        with self._lock:
+            self.flush_pending()
+            rows = self.conn.execute(f'SELECT {self.PATTERN_COLUMNS} FROM ultra_patterns').fetchall()
+            self.pattern_index.load(rows)
+            self._patterns_seen_id = max((row['id'] for row in rows), default=0)
+            self._patterns_used_until = self.conn.execute(
+                'SELECT MAX(last_used) FROM ultra_patterns').fetchone()[0] or ''
+            self._last_pattern_refresh = time.monotonic()
+    
+    def refresh_patterns(self, force: bool = False) -> int:
+        """
+        🔄 Trazer para o índice o que outro processo gravou
+        
+        Padrões novos (id acima do maior já lido do banco) entram no índice; padrões
+        usados desde a última leitura (last_used) têm as estatísticas
+        atualizadas. Roda a cada PATTERN_REFRESH_INTERVAL_SECONDS.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_pattern_refresh < self.PATTERN_REFRESH_INTERVAL_SECONDS:
+                return 0
+            self._last_pattern_refresh = time.monotonic()
+            
+            new_rows = self.conn.execute(
+                f'SELECT {self.PATTERN_COLUMNS} FROM ultra_patterns WHERE id > ? ORDER BY id',
+                (self._patterns_seen_id,)
+            ).fetchall()
+            for row in new_rows:
+                # Padrões criados por este processo já estão no índice (add ignora)
+                self.pattern_index.add(_IndexedPattern(row))
+                self._patterns_seen_id = row['id']
+            
+            changed = self.conn.execute('''
+                SELECT id, effectiveness_score, learning_weight, usage_count, success_rate, last_used
+                FROM ultra_patterns WHERE last_used >= ?
+            ''', (self._patterns_used_until,)).fetchall()
+            for row in changed:
+                pattern = self.pattern_index.patterns.get(row['id'])
+                if pattern is not None:
+                    self._apply_stats(pattern, row)
+                self._patterns_used_until = max(self._patterns_used_until, row['last_used'] or '')
+            return len(new_rows) + len(changed)
+    
+    @staticmethod
+    def _apply_stats(pattern: _IndexedPattern, row):
+        pattern.effectiveness_score = row['effectiveness_score'] or 0.0
+        pattern.learning_weight = row['learning_weight'] if row['learning_weight'] is not None else 1.0
+        pattern.usage_count = row['usage_count'] or 0
+        pattern.success_rate = row['success_rate'] or 0.0
+    
+    def _record_usage(self, pattern_id: int):
+        """Acumular incremento de usage_count (gravado em lote)"""
+        self._pending_usage[pattern_id] = self._pending_usage.get(pattern_id, 0) + 1
+        if (sum(self._pending_usage.values()) >= self.USAGE_FLUSH_BATCH or
+                time.monotonic() - self._last_usage_flush >= self.USAGE_FLUSH_INTERVAL_SECONDS):
+            self.flush_pending()
+    
+    def flush_pending(self) -> int:
+        """💾 Gravar incrementos de usage_count e análises de turno pendentes em uma única transação"""
+        with self._lock:
+            now_monotonic = time.monotonic()
+            self._last_usage_flush = now_monotonic
+            
+            pending_usage, self._pending_usage = self._pending_usage, {}
+            pending_analyses = [turn for turn in self._turn_analyses.values() if not turn.persisted]
+            
+            # Turnos já gravados e expirados não precisam mais ficar em memória
+            for key in [key for key, turn in self._turn_analyses.items()
+                        if now_monotonic - turn.created_at >= self.TURN_ANALYSIS_TTL_SECONDS]:
+                del self._turn_analyses[key]
+            
+            if pending_usage or pending_analyses:
+                now = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                with self.conn:
+                    if pending_usage:
+                        self.conn.executemany('''
+                            UPDATE ultra_patterns 
+                            SET usage_count = usage_count + ?, last_used = ?
+                            WHERE id = ?
+                        ''', [(count, now, pattern_id) for pattern_id, count in pending_usage.items()])
+                    if pending_analyses:
+                        self._insert_analyses(pending_analyses)
+        
+        if now_monotonic - self._last_retention_cleanup >= self.CONTEXT_ANALYSIS_CLEANUP_INTERVAL_SECONDS:
+            self.cleanup_context_analysis()
+        return len(pending_usage) + len(pending_analyses)
+    
+    def _insert_analyses(self, turns: List[TurnAnalysis]):
+        """Inserir análises de turno (dentro da transação de quem chama)"""
+        self.conn.executemany('''
+            INSERT INTO context_analysis 
+            (user_id, input_text, detected_mood, detected_intensity, 
+             emotional_state, conversation_stage, keywords, sentiment_score, context_vector)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [turn.as_row() for turn in turns])
+        for turn in turns:
+            turn.persisted = True
+    
+    def cleanup_context_analysis(self, retention_days: Optional[int] = None, batch_size: int = 5000) -> int:
+        """🧹 Remover análises de contexto mais antigas que o período de retenção (em lotes)"""
+        retention_days = CONTEXT_ANALYSIS_RETENTION_DAYS if retention_days is None else retention_days
+        self._last_retention_cleanup = time.monotonic()
+        if retention_days <= 0:
+            return 0
+        
+        cutoff = (datetime.datetime.now(datetime.timezone.utc) -
+                  datetime.timedelta(days=retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+        removed = 0
+        while True:
+            with self._lock, self.conn:
+                cursor = self.conn.execute('''
+                    DELETE FROM context_analysis WHERE id IN (
+                        SELECT id FROM context_analysis WHERE created_at < ? LIMIT ?
+                    )
+                ''', (cutoff, batch_size))
+            removed += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return removed
+    
+    def get_turn_analysis(self, user_input: str, user_id: str) -> TurnAnalysis:
+        """
+        🧠 Análise do turno atual (calculada uma única vez)
+        
+        generate_smart_response e learn_from_interaction recebem a mesma
+        mensagem no mesmo turno; a segunda chamada reaproveita a análise.
+        """
+        key = (user_id, user_input)
+        with self._lock:
+            turn = self._turn_analyses.get(key)
+            if turn is not None and time.monotonic() - turn.created_at < self.TURN_ANALYSIS_TTL_SECONDS:
+                return turn
+            
+            turn = TurnAnalysis(user_id, user_input, self._compute_context(user_input))
+            self._turn_analyses[key] = turn
+            self._turn_analyses.move_to_end(key)
+            
+            pending = sum(1 for t in self._turn_analyses.values() if not t.persisted)
+        
+        if pending >= self.TURN_ANALYSIS_MAX_PENDING:
+            self.flush_pending()
+        return turn
+    
     def analyze_context_ultra_deep(self, user_input: str, user_id: str) -> Dict:
-        """🧠 Análise contextual ultra-profunda"""
+        """🧠 Análise contextual ultra-profunda (gravada em lote ou junto com o aprendizado do turno)"""
+        return self.get_turn_analysis(user_input, user_id).context
+    
+    def _compute_context(self, user_input: str) -> Dict:
+        """Calcular a análise de contexto (sem acesso ao banco)"""
         
-        # Detectar emoções e intenções
-        emotional_keywords = {
-            'desire': ['tesão', 'desejo', 'vontade', 'quero', 'preciso'],
-            'love': ['amor', 'paixão', 'coração', 'sentimento'],
-            'arousal': ['excitada', 'molhada', 'quente', 'fogo'],
-            'playful': ['brincadeira', 'jogo', 'diversão'],
-            'intimate': ['íntimo', 'pessoal', 'secreto', 'próximo']
-        }
+        features = get_message_features(user_input)
         
-        detected_emotions = []
-        for emotion, keywords in emotional_keywords.items():
-            if any(word in user_input.lower() for word in keywords):
-                detected_emotions.append(emotion)
+        # Detectar emoções e intenções
+        detected_emotions = [emotion for emotion, group in _EMOTION_GROUPS.items() if features.has(group)]
         
         # Detectar intensidade (1-10)
-        intensity_markers = {
-            'muito': 2, 'extremamente': 3, 'totalmente': 2,
-            'completamente': 3, 'loucamente': 4, 'desesperadamente': 4
-        }
-        
         base_intensity = 5
-        for marker, boost in intensity_markers.items():
-            if marker in user_input.lower():
-                base_intensity += boost
+        for marker in features.hits(_CONTEXT_GROUPS['intensity']):
+            base_intensity += INTENSITY_MARKERS[marker]
         
         intensity = min(base_intensity, 10)
         
         # Detectar estágio da conversa
         conversation_stage = 'middle'
-        if any(greeting in user_input.lower() for greeting in ['oi', 'olá', 'hey']):
+        if features.has(_CONTEXT_GROUPS['opening']):
             conversation_stage = 'opening'
-        elif any(closing in user_input.lower() for closing in ['tchau', 'bye', 'até']):
+        elif features.has(_CONTEXT_GROUPS['closing']):
             conversation_stage = 'closing'
         
         context = {
@@ -223,79 +586,77 @@ class SuperFastLearning:
             'intensity': intensity,
             'stage': conversation_stage,
             'mood': 'seductive' if 'desire' in detected_emotions else 'romantic',
-            'keywords': user_input.lower().split(),
+            'keywords': list(features.words),
             'sentiment_score': self._calculate_sentiment(user_input)
         }
-        
-        # Salvar análise
-        self.conn.execute('''
-            INSERT INTO context_analysis 
-            (user_id, input_text, detected_mood, detected_intensity, 
-             emotional_state, conversation_stage, keywords, sentiment_score, context_vector)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            user_id, user_input, context['mood'], context['intensity'],
-            json.dumps(context['emotions']), context['stage'],
-            json.dumps(context['keywords']), context['sentiment_score'],
-            json.dumps(context)
-        ))
-        
-        self.conn.commit()
         return context
     
     def learn_from_interaction(self, user_input: str, bot_response: str, 
                               user_feedback: float, user_id: str) -> None:
         """📚 Aprender de cada interação em tempo real"""
         
-        # Analisar contexto
-        context = self.analyze_context_ultra_deep(user_input, user_id)
-        
-        # Encontrar padrões similares
-        cursor = self.conn.execute('''
-            SELECT * FROM ultra_patterns 
-            WHERE input_pattern LIKE ? OR context_tags LIKE ?
-            ORDER BY effectiveness_score DESC
-        ''', (f'%{user_input[:20]}%', f'%{context["mood"]}%'))
-        
-        patterns = cursor.fetchall()
-        
-        if patterns:
-            # Atualizar padrão existente
-            pattern = patterns[0]
-            new_effectiveness = (pattern['effectiveness_score'] + user_feedback) / 2
-            new_usage_count = pattern['usage_count'] + 1
-            new_success_rate = (pattern['success_rate'] * pattern['usage_count'] + user_feedback) / new_usage_count
+        # Analisar contexto (reaproveitando a análise do generate_smart_response do mesmo turno)
+        turn = self.get_turn_analysis(user_input, user_id)
+        self.refresh_patterns()
+        context = turn.context
+        
+        # Análise, padrão e feedback do turno gravados em uma única transação
+        with self._lock, self.conn:
+            if not turn.persisted:
+                self._insert_analyses([turn])
+            # Turno concluído
+            self._turn_analyses.pop((user_id, user_input), None)
             
+            # Encontrar padrões similares (índice em memória, todas as personalidades)
+            patterns = self.pattern_index.candidates(user_input.lower(), context['mood'])
+            pattern = max(patterns, key=lambda p: p.effectiveness_score) if patterns else None
+            
+            if pattern:
+                # Atualizar padrão existente a partir dos valores atuais da linha
+                # (outro processo pode ter alterado desde a carga do índice); os
+                # incrementos de uso pendentes entram na mesma atualização
+                pending = self._pending_usage.pop(pattern.id, 0)
+                updated = self.conn.execute('''
+                    UPDATE ultra_patterns 
+                    SET effectiveness_score = (effectiveness_score + ?) / 2,
+                        success_rate = (success_rate * (usage_count + ?) + ?) / (usage_count + ? + 1),
+                        usage_count = usage_count + ? + 1,
+                        user_feedback = ?, last_used = datetime('now'),
+                        learning_weight = learning_weight + ?
+                    WHERE id = ?
+                    RETURNING effectiveness_score, learning_weight, usage_count, success_rate
+                ''', (user_feedback, pending, user_feedback, pending, pending,
+                      user_feedback, 0.1, pattern.id)).fetchall()
+                if updated:
+                    self._apply_stats(pattern, updated[0])
+            else:
+                # Criar novo padrão
+                input_pattern = self._extract_pattern(user_input)
+                cursor = self.conn.execute('''
+                    INSERT INTO ultra_patterns 
+                    (input_pattern, response_pattern, context_tags, mood_score,
+                     effectiveness_score, emotional_impact, intensity_level, learning_weight)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (input_pattern, bot_response, context['mood'], 
+                      context['intensity'], user_feedback, json.dumps(context['emotions']),
+                      context['intensity'], 1.0))
+                
+                self.pattern_index.add(_IndexedPattern({
+                    'id': cursor.lastrowid, 'input_pattern': input_pattern,
+                    'response_pattern': bot_response, 'context_tags': context['mood'],
+                    'personality_match': None, 'intensity_level': context['intensity'],
+                    'effectiveness_score': user_feedback, 'learning_weight': 1.0,
+                    'usage_count': 0, 'success_rate': 0.0
+                }))
+            
+            # Salvar feedback
             self.conn.execute('''
-                UPDATE ultra_patterns 
-                SET effectiveness_score = ?, usage_count = ?, success_rate = ?,
-                    user_feedback = ?, last_used = datetime('now'),
-                    learning_weight = learning_weight + ?
-                WHERE id = ?
-            ''', (new_effectiveness, new_usage_count, new_success_rate, 
-                  user_feedback, 0.1, pattern['id']))
-        else:
-            # Criar novo padrão
-            input_pattern = self._extract_pattern(user_input)
-            self.conn.execute('''
-                INSERT INTO ultra_patterns 
-                (input_pattern, response_pattern, context_tags, mood_score,
-                 effectiveness_score, emotional_impact, intensity_level, learning_weight)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (input_pattern, bot_response, context['mood'], 
-                  context['intensity'], user_feedback, json.dumps(context['emotions']),
-                  context['intensity'], 1.0))
-        
-        # Salvar feedback
-        self.conn.execute('''
-            INSERT INTO real_time_feedback
-            (user_id, input_text, bot_response, satisfaction_score, 
-             emotional_response, pattern_effectiveness, learning_trigger)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, user_input, bot_response, user_feedback,
-              json.dumps(context['emotions']), user_feedback, True))
-        
-        self.conn.commit()
+                INSERT INTO real_time_feedback
+                (user_id, input_text, bot_response, satisfaction_score, 
+                 emotional_response, pattern_effectiveness, learning_trigger)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, user_input, bot_response, user_feedback,
+                  json.dumps(context['emotions']), user_feedback, True))
     
     def generate_smart_response(self, user_input: str, user_id: str, 
                                personality: str = 'sedutora') -> str:
@@ -304,50 +665,41 @@ class SuperFastLearning:
         # Analisar contexto atual
         context = self.analyze_context_ultra_deep(user_input, user_id)
         
-        # Buscar padrões mais eficazes
-        cursor = self.conn.execute('''
-            SELECT * FROM ultra_patterns 
-            WHERE (input_pattern LIKE ? OR context_tags LIKE ?)
-            AND personality_match = ?
-            AND intensity_level <= ?
-            ORDER BY effectiveness_score DESC, learning_weight DESC
-            LIMIT 5
-        ''', (f'%{user_input.lower()}%', f'%{context["mood"]}%', 
-              personality, context['intensity']))
-        
-        patterns = cursor.fetchall()
+        # Buscar padrões mais eficazes (bucket da personalidade, intensidade <= atual)
+        self.refresh_patterns()
+        with self._lock:
+            patterns = self.pattern_index.candidates(
+                user_input.lower(), context['mood'], personality, context['intensity']
+            )
+            patterns.sort(key=lambda p: (p.effectiveness_score, p.learning_weight), reverse=True)
+            patterns = patterns[:5]
+            
+            if patterns:
+                # Selecionar padrão com base na eficácia
+                weights = [p.effectiveness_score * p.learning_weight for p in patterns]
+                if sum(weights) > 0:
+                    selected_pattern = random.choices(patterns, weights=weights)[0]
+                else:
+                    selected_pattern = random.choice(patterns)
+                
+                # Atualizar estatísticas (gravadas em lote)
+                self._record_usage(selected_pattern.id)
         
         if patterns:
-            # Selecionar padrão com base na eficácia
-            weights = [p['effectiveness_score'] * p['learning_weight'] for p in patterns]
-            selected_pattern = random.choices(patterns, weights=weights)[0]
-            
             # Personalizar resposta
-            response = self._personalize_response(selected_pattern['response_pattern'], 
-                                                context, user_id)
-            
-            # Atualizar estatísticas
-            self.conn.execute('''
-                UPDATE ultra_patterns 
-                SET usage_count = usage_count + 1, last_used = datetime('now')
-                WHERE id = ?
-            ''', (selected_pattern['id'],))
-            
-            self.conn.commit()
-            return response
+            return self._personalize_response(selected_pattern.response_pattern, 
+                                              context, user_id)
         
         # Fallback para sistema anterior se não houver padrões
         return self._generate_fallback_response(context, personality)
     
     def _calculate_sentiment(self, text: str) -> float:
         """💭 Calcular sentimento do texto"""
-        positive_words = ['amor', 'paixão', 'desejo', 'linda', 'gostosa', 'sexy', 'quero']
-        negative_words = ['triste', 'chateada', 'brava', 'irritada']
+        features = get_message_features(text)
+        positive_count = features.count(_CONTEXT_GROUPS['positive'])
+        negative_count = features.count(_CONTEXT_GROUPS['negative'])
         
-        positive_count = sum(1 for word in positive_words if word in text.lower())
-        negative_count = sum(1 for word in negative_words if word in text.lower())
-        
-        total_words = len(text.split())
+        total_words = len(features.words)
         if total_words == 0:
             return 0.5
         
@@ -406,6 +758,7 @@ class SuperFastLearning:
         """📊 Estatísticas de aprendizagem"""
         
         stats = {}
+        self.flush_pending()
         
         # Padrões aprendidos
         total_patterns = self.conn.execute('SELECT COUNT(*) FROM ultra_patterns').fetchone()[0]
@@ -437,11 +790,16 @@ class SuperFastLearning:
     def __del__(self):
         """🔚 Fechar conexão"""
         if hasattr(self, 'conn'):
+            try:
+                self.flush_pending()
+            except Exception:
+                pass
             self.conn.close()
 
 
 # Instância global
 super_learning = SuperFastLearning()
+atexit.register(super_learning.flush_pending)
 
 if __name__ == '__main__':
     print('🧠 SISTEMA DE APRENDIZAGEM SUPER RÁPIDA INICIALIZADO!')
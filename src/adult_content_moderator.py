@@ -27,11 +27,13 @@ import sqlite3
 
 try:
     from core.config import config
+    from core.metrics import MODERATION_SECONDS, record_cache
     from src.logging_system import get_logger, LogCategory, log_security_event
 except ImportError:
     import sys
     sys.path.append(str(Path(__file__).parent.parent))
     from core.config import config
+    from core.metrics import MODERATION_SECONDS, record_cache
     from src.logging_system import get_logger, LogCategory, log_security_event
 
 
@@ -57,6 +59,16 @@ class ModerationAction(Enum):
 class AdultContentModerator:
     """Sistema principal de moderação de conteúdo adulto"""
     
+    # Tabelas de agregação e formato do bucket (hora local)
+    ROLLUP_TABLES = {
+        'hourly': 'moderation_rollup_hourly',
+        'daily': 'moderation_rollup_daily',
+    }
+    ROLLUP_FORMATS = {
+        'hourly': '%Y-%m-%d %H:00',
+        'daily': '%Y-%m-%d',
+    }
+    
     def __init__(self):
         self.logger = get_logger(LogCategory.SECURITY, "adult_content")
         self.db_path = Path(config.database['sensitive_memory_path']).parent / 'adult_moderation.db'
@@ -117,6 +129,23 @@ class AdultContentModerator:
                     last_checked DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            
+            # Rollups por hora e por dia (severidade x ação x usuário)
+            # Atualizados no caminho de escrita do log, evitando GROUP BY
+            # sobre moderation_logs a cada consulta de estatísticas
+            for table in self.ROLLUP_TABLES.values():
+                conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        bucket TEXT NOT NULL,
+                        severity TEXT NOT NULL,
+                        action_taken TEXT NOT NULL,
+                        user_id TEXT NOT NULL DEFAULT '',
+                        event_count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (bucket, severity, action_taken, user_id)
+                    )
+                ''')
+            
+            self._backfill_rollups(conn)
         
         # Banco de padrões
         with sqlite3.connect(self.patterns_db_path) as conn:
@@ -138,6 +167,68 @@ class AdultContentModerator:
             if cursor.fetchone()[0] == 0:
                 self._insert_default_patterns(conn)
     
+    def _backfill_rollups(self, conn):
+        """Popula os rollups a partir de moderation_logs (apenas se estiverem vazios)"""
+        table = self.ROLLUP_TABLES['daily']
+        if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone():
+            return
+        if not conn.execute('SELECT 1 FROM moderation_logs LIMIT 1').fetchone():
+            return
+        
+        bucket_exprs = {
+            'hourly': "strftime('%Y-%m-%d %H:00', timestamp, 'localtime')",
+            'daily': "strftime('%Y-%m-%d', timestamp, 'localtime')",
+        }
+        for granularity, expr in bucket_exprs.items():
+            conn.execute(f'''
+                INSERT OR IGNORE INTO {self.ROLLUP_TABLES[granularity]}
+                (bucket, severity, action_taken, user_id, event_count)
+                SELECT {expr}, severity, action_taken, COALESCE(user_id, ''), COUNT(*)
+                FROM moderation_logs
+                GROUP BY 1, 2, 3, 4
+            ''')
+    
+    def _update_rollups(self, conn, severity: str, action: str, user_id: Optional[str],
+                        when: Optional[datetime] = None):
+        """Incrementa os contadores de rollup na mesma transação do log"""
+        when = when or datetime.now()
+        for granularity, table in self.ROLLUP_TABLES.items():
+            conn.execute(f'''
+                INSERT INTO {table} (bucket, severity, action_taken, user_id, event_count)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT(bucket, severity, action_taken, user_id)
+                DO UPDATE SET event_count = event_count + 1
+            ''', (when.strftime(self.ROLLUP_FORMATS[granularity]), severity, action, user_id or ''))
+    
+    def iter_rollups(self, days: int = 7, granularity: str = 'daily'):
+        """
+        Itera sobre as linhas de rollup do período sem carregar tudo em memória
+        
+        Yields:
+            Dict com bucket, severity, action, user_id e count
+        """
+        table = self.ROLLUP_TABLES[granularity]
+        since = (datetime.now() - timedelta(days=days)).strftime(self.ROLLUP_FORMATS[granularity])
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(f'''
+                SELECT bucket, severity, action_taken, user_id, event_count
+                FROM {table}
+                WHERE bucket >= ?
+                ORDER BY bucket
+            ''', (since,))
+            for bucket, severity, action, user_id, count in cursor:
+                yield {
+                    'bucket': bucket,
+                    'severity': severity,
+                    'action': action,
+                    'user_id': user_id or None,
+                    'count': count
+                }
+        finally:
+            conn.close()
+    
     def _insert_default_patterns(self, conn):
         """Insere padrões padrão no banco"""
         default_patterns = [
@@ -202,6 +293,7 @@ class AdultContentModerator:
         Returns:
             Dict com resultado da análise
         """
+        started_at = time.perf_counter()
         self.stats['total_checks'] += 1
         self._reset_daily_stats()
         
@@ -210,7 +302,9 @@ class AdultContentModerator:
         
         # Verificar cache
         cached_result = self._get_cached_result(content_hash)
+        record_cache('moderation_content', cached_result is not None)
         if cached_result:
+            MODERATION_SECONDS.labels('cached').observe(time.perf_counter() - started_at)
             return cached_result
         
         # Análise do conteúdo
@@ -241,6 +335,7 @@ class AdultContentModerator:
         # Log de segurança
         self._log_moderation_event(result)
         
+        MODERATION_SECONDS.labels(action.value).observe(time.perf_counter() - started_at)
         return result
     
     def _analyze_text(self, content: str) -> Dict[str, Any]:
@@ -486,6 +581,9 @@ class AdultContentModerator:
     
     def _log_moderation_event(self, result: Dict[str, Any]):
         """Log do evento de moderação"""
+        severity = result['severity'].value if hasattr(result['severity'], 'value') else str(result['severity'])
+        action = result['action'].value if hasattr(result['action'], 'value') else str(result['action'])
+        
         with sqlite3.connect(self.db_path) as conn:
             conn.execute('''
                 INSERT INTO moderation_logs 
@@ -495,11 +593,14 @@ class AdultContentModerator:
                 result.get('user_id'),
                 result['content_hash'],
                 str(result['flagged_words'])[:100],  # Snippet das palavras
-                result['severity'].value if hasattr(result['severity'], 'value') else str(result['severity']),
-                result['action'].value if hasattr(result['action'], 'value') else str(result['action']),
+                severity,
+                action,
                 result['reason'],
                 json.dumps({'confidence': result['confidence']})
             ))
+            
+            # Rollups atualizados na mesma transação
+            self._update_rollups(conn, severity, action, result.get('user_id'))
         
         # Log de segurança estruturado
         log_security_event(
@@ -560,17 +661,17 @@ class AdultContentModerator:
         return messages.get(action, {}).get(severity, "🤖 Ação de moderação aplicada.")
     
     def get_moderation_stats(self, days: int = 7) -> Dict[str, Any]:
-        """Obtém estatísticas de moderação"""
-        since_date = datetime.now() - timedelta(days=days)
+        """Obtém estatísticas de moderação (lidas do rollup diário)"""
+        since_bucket = (datetime.now() - timedelta(days=days)).strftime(self.ROLLUP_FORMATS['daily'])
         
         with sqlite3.connect(self.db_path) as conn:
             # Estatísticas gerais
-            cursor = conn.execute('''
-                SELECT severity, action_taken, COUNT(*) 
-                FROM moderation_logs 
-                WHERE timestamp >= ?
+            cursor = conn.execute(f'''
+                SELECT severity, action_taken, SUM(event_count)
+                FROM {self.ROLLUP_TABLES['daily']}
+                WHERE bucket >= ?
                 GROUP BY severity, action_taken
-            ''', (since_date.isoformat(),))
+            ''', (since_bucket,))
             
             action_stats = {}
             for severity, action, count in cursor.fetchall():
@@ -629,9 +730,21 @@ class AdultContentModerator:
             ''', (cutoff_date.isoformat(),))
             
             cache_deleted = cursor.rowcount
+            
+            # Rollups horários seguem a mesma retenção; os diários são mantidos
+            cursor = conn.execute(f'''
+                DELETE FROM {self.ROLLUP_TABLES['hourly']}
+                WHERE bucket < ?
+            ''', (cutoff_date.strftime(self.ROLLUP_FORMATS['hourly']),))
+            
+            rollups_deleted = cursor.rowcount
         
         self.logger.info(f"Limpeza: {deleted_count} logs e {cache_deleted} entradas de cache removidos")
-        return {'logs_deleted': deleted_count, 'cache_deleted': cache_deleted}
+        return {
+            'logs_deleted': deleted_count,
+            'cache_deleted': cache_deleted,
+            'rollups_deleted': rollups_deleted
+        }
 
 
 # Instância global do moderador
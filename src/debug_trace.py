@@ -0,0 +1,290 @@
+"""
+Sistema de Tracing de Depuração do Eron.IA
+==========================================
+
+Substitui os `print` de depuração dos caminhos quentes (get_llm_response,
+send_message, chat do Telegram) por um tracer com:
+- Níveis por componente (llm, web, telegram, ...)
+- Formatação preguiçosa (só formata se o nível estiver habilitado)
+- Amostragem para dumps verbosos (payloads, perfis, prompts)
+- Troca de nível/amostragem em tempo de execução (POST /admin/trace no
+  Flask, /trace no bot para administradores)
+- Saída pela fila do sistema de logging (com redação de dados sensíveis)
+
+Configuração (.env):
+TRACE_LEVEL=INFO
+TRACE_COMPONENTS=llm=DEBUG,telegram=INFO
+TRACE_PAYLOAD_SAMPLE_RATE=0.0
+TRACE_PAYLOAD_MAX_CHARS=2000
+
+Uso:
+from src.debug_trace import tracer
+tracer.debug('llm', "Status da resposta: %s", status)
+tracer.dump('llm', 'payload', lambda: payload)
+
+Autor: Eron.IA System
+Data: 2024
+"""
+
+import logging
+import random
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    from core.config import config
+    from src.logging_system import get_logger, LogCategory
+except ImportError:
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent))
+    from core.config import config
+    from src.logging_system import get_logger, LogCategory
+
+
+# Nível extra abaixo de DEBUG para dumps de payload
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+LEVEL_NAMES = {
+    'TRACE': TRACE,
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'OFF': logging.CRITICAL + 10,
+}
+
+# Componente -> categoria do sistema de logging
+COMPONENT_CATEGORIES = {
+    'llm': LogCategory.LLM,
+    'web': LogCategory.WEB,
+    'telegram': LogCategory.TELEGRAM,
+    'adult': LogCategory.SECURITY,
+    'learning': LogCategory.MEMORY,
+    'memory': LogCategory.MEMORY,
+    'database': LogCategory.DATABASE,
+}
+
+
+def _parse_level(level: Union[str, int]) -> int:
+    """Converte nome de nível ('DEBUG', 'trace'...) para inteiro"""
+    if isinstance(level, int):
+        return level
+    return LEVEL_NAMES.get(str(level).strip().upper(), logging.INFO)
+
+
+def _parse_components(spec: str) -> Dict[str, int]:
+    """Interpreta 'llm=DEBUG,telegram=INFO'"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        component, level = item.split('=', 1)
+        if component.strip():
+            levels[component.strip().lower()] = _parse_level(level)
+    return levels
+
+
+class DebugTracer:
+    """Tracer de depuração com níveis por componente e amostragem de dumps"""
+
+    def __init__(self, default_level: Union[str, int] = 'INFO',
+                 component_levels: Optional[Dict[str, Union[str, int]]] = None,
+                 payload_sample_rate: float = 0.0,
+                 payload_max_chars: int = 2000):
+        self._lock = threading.Lock()
+        self._loggers: Dict[str, logging.Logger] = {}
+        self.default_level = _parse_level(default_level)
+        self.component_levels = {k: _parse_level(v) for k, v in (component_levels or {}).items()}
+        self.payload_sample_rate = payload_sample_rate
+        self.payload_max_chars = payload_max_chars
+        self.stats = {'emitted': 0, 'dumps_emitted': 0, 'dumps_sampled_out': 0}
+
+    @classmethod
+    def from_config(cls) -> 'DebugTracer':
+        """Cria o tracer a partir de config.logging"""
+        return cls(
+            default_level=config.logging.get('trace_level', 'INFO'),
+            component_levels=_parse_components(config.logging.get('trace_components', '')),
+            payload_sample_rate=config.logging.get('trace_payload_sample_rate', 0.0),
+            payload_max_chars=config.logging.get('trace_payload_max_chars', 2000)
+        )
+
+    # ------------------------------------------------------------------
+    # Configuração em tempo de execução
+    # ------------------------------------------------------------------
+
+    def set_level(self, level: Union[str, int], component: Optional[str] = None):
+        """Altera o nível global ou de um componente"""
+        with self._lock:
+            if component:
+                self.component_levels[component.lower()] = _parse_level(level)
+            else:
+                self.default_level = _parse_level(level)
+
+    def reset_level(self, component: str):
+        """Remove o nível específico do componente (volta ao padrão)"""
+        with self._lock:
+            self.component_levels.pop(component.lower(), None)
+
+    def set_sample_rate(self, rate: float):
+        """Define a fração (0.0-1.0) de dumps de payload que serão emitidos"""
+        with self._lock:
+            self.payload_sample_rate = max(0.0, min(1.0, float(rate)))
+
+    def get_config(self) -> Dict[str, Any]:
+        """Configuração atual do tracer"""
+        names = {v: k for k, v in LEVEL_NAMES.items()}
+        return {
+            'default_level': names.get(self.default_level, self.default_level),
+            'component_levels': {c: names.get(l, l) for c, l in self.component_levels.items()},
+            'payload_sample_rate': self.payload_sample_rate,
+            'payload_max_chars': self.payload_max_chars,
+            'stats': dict(self.stats)
+        }
+
+    # ------------------------------------------------------------------
+    # Emissão
+    # ------------------------------------------------------------------
+
+    def is_enabled(self, component: str, level: Union[str, int] = logging.DEBUG) -> bool:
+        """Verifica (barato) se o nível está habilitado para o componente"""
+        threshold = self.component_levels.get(component, self.default_level)
+        return _parse_level(level) >= threshold
+
+    def _logger(self, component: str) -> logging.Logger:
+        logger = self._loggers.get(component)
+        if logger is None:
+            category = COMPONENT_CATEGORIES.get(component, LogCategory.GENERAL)
+            logger = get_logger(category, f"trace.{component}")
+            # O filtro de nível é feito pelo tracer; o logger deixa tudo passar
+            logger.setLevel(TRACE)
+            self._loggers[component] = logger
+        return logger
+
+    def log(self, component: str, level: int, msg: str, *args):
+        """Emite mensagem com formatação preguiçosa (%-style) se o nível permitir"""
+        if not self.is_enabled(component, level):
+            return
+        self.stats['emitted'] += 1
+        self._logger(component).log(level, msg, *args, stacklevel=3,
+                                    extra={'category': f"{component}_trace"})
+
+    def trace(self, component: str, msg: str, *args):
+        self.log(component, TRACE, msg, *args)
+
+    def debug(self, component: str, msg: str, *args):
+        self.log(component, logging.DEBUG, msg, *args)
+
+    def info(self, component: str, msg: str, *args):
+        self.log(component, logging.INFO, msg, *args)
+
+    def warning(self, component: str, msg: str, *args):
+        self.log(component, logging.WARNING, msg, *args)
+
+    def error(self, component: str, msg: str, *args):
+        self.log(component, logging.ERROR, msg, *args)
+
+    def dump(self, component: str, label: str, value: Union[Any, Callable[[], Any]]):
+        """
+        Dump verboso (payload, perfil, prompt) no nível TRACE, sujeito à amostragem
+
+        `value` pode ser um callable: só é avaliado se o dump for emitido.
+        """
+        if not self.is_enabled(component, TRACE):
+            return
+        if self.payload_sample_rate <= 0 or random.random() >= self.payload_sample_rate:
+            self.stats['dumps_sampled_out'] += 1
+            return
+
+        if callable(value):
+            value = value()
+        text = str(value)
+        if len(text) > self.payload_max_chars:
+            text = f"{text[:self.payload_max_chars]}... [+{len(text) - self.payload_max_chars} chars]"
+
+        self.stats['dumps_emitted'] += 1
+        self._logger(component).log(TRACE, "%s: %s", label, text, stacklevel=2,
+                                    extra={'category': f"{component}_trace"})
+
+
+# Instância global do tracer
+tracer = DebugTracer.from_config()
+
+
+def set_trace_level(level: Union[str, int], component: Optional[str] = None):
+    """Função conveniente para alterar o nível de tracing em tempo de execução"""
+    tracer.set_level(level, component)
+
+
+def set_trace_sample_rate(rate: float):
+    """Função conveniente para alterar a amostragem de dumps"""
+    tracer.set_sample_rate(rate)
+
+
+def get_trace_config() -> Dict[str, Any]:
+    """Função conveniente para consultar a configuração do tracer"""
+    return tracer.get_config()
+
+
+def configure_trace(level: Optional[str] = None, component: Optional[str] = None,
+                    sample_rate: Optional[float] = None, reset: bool = False,
+                    target: Optional[DebugTracer] = None) -> Dict[str, Any]:
+    """
+    Altera o tracer em execução (rota /admin/trace e comando /trace)
+
+    Valida tudo antes de aplicar: nível desconhecido ou amostragem fora de
+    0.0-1.0 levantam ValueError sem alterar nada. Retorna a nova configuração.
+    """
+    target = target or tracer
+    if level is not None and str(level).strip().upper() not in LEVEL_NAMES:
+        raise ValueError(f"Nível inválido: {level} (use {', '.join(LEVEL_NAMES)})")
+    if reset and not component:
+        raise ValueError("reset exige um componente")
+    if sample_rate is not None:
+        sample_rate = float(sample_rate)
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("A amostragem deve estar entre 0.0 e 1.0")
+
+    if reset:
+        target.reset_level(component)
+    elif level is not None:
+        target.set_level(level, component)
+    if sample_rate is not None:
+        target.set_sample_rate(sample_rate)
+    return target.get_config()
+
+
+def apply_trace_args(args, target: Optional[DebugTracer] = None) -> Dict[str, Any]:
+    """
+    Aplica argumentos no formato do comando /trace do bot
+
+    'DEBUG' muda o nível padrão, 'llm=TRACE' o de um componente,
+    'llm=reset' volta o componente ao padrão e 'sample=0.1' a amostragem.
+    Argumentos inválidos levantam ValueError antes de qualquer alteração.
+    """
+    changes = []
+    for arg in args:
+        key, _, value = arg.partition('=')
+        if not value:
+            changes.append({'level': key})
+        elif key.lower() == 'sample':
+            try:
+                changes.append({'sample_rate': float(value)})
+            except ValueError:
+                raise ValueError(f"Amostragem inválida: {value}")
+        elif value.lower() == 'reset':
+            changes.append({'component': key, 'reset': True})
+        else:
+            changes.append({'component': key, 'level': value})
+
+    # Validação completa em um tracer descartável antes de mexer no real
+    scratch = DebugTracer()
+    for change in changes:
+        configure_trace(target=scratch, **change)
+
+    config_now = (target or tracer).get_config()
+    for change in changes:
+        config_now = configure_trace(target=target, **change)
+    return config_now
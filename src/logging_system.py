@@ -9,6 +9,7 @@ Sistema centralizado de logging com:
 - Logs separados por categoria
 - Integração com sistema de configuração
 - Filtragem de informações sensíveis
+- Escrita assíncrona via fila (QueueHandler/QueueListener) com limite e contadores de descarte
 
 Autor: Eron.IA System
 Data: 2024
@@ -18,6 +19,9 @@ import logging
 import logging.handlers
 import sys
 import os
+import queue
+import atexit
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -135,12 +139,66 @@ class StructuredFormatter(logging.Formatter):
             )
 
 
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler com fila limitada
+    
+    O produtor apenas enfileira o registro. Se a fila estiver cheia o registro
+    é descartado e contabilizado (ERROR+ ainda espera um pouco antes de descartar).
+    """
+    
+    ERROR_PUT_TIMEOUT = 0.1
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._lock_counts = threading.Lock()
+        self.dropped: Dict[str, int] = {}
+        self.enqueued = 0
+    
+    def enqueue(self, record):
+        try:
+            if record.levelno >= logging.ERROR:
+                self.queue.put(record, timeout=self.ERROR_PUT_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_counts:
+                self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+        else:
+            with self._lock_counts:
+                self.enqueued += 1
+    
+    def counts(self):
+        """(enfileirados, descartados por nível) lidos de forma consistente"""
+        with self._lock_counts:
+            return self.enqueued, dict(self.dropped)
+
+
+class RedactingQueueListener(logging.handlers.QueueListener):
+    """QueueListener que aplica a redação de dados sensíveis uma única vez por registro"""
+    
+    def __init__(self, log_queue: queue.Queue, *handlers, redact: bool = True):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.sensitive_filter = SensitiveDataFilter() if redact else None
+    
+    def prepare(self, record):
+        if self.sensitive_filter:
+            self.sensitive_filter.filter(record)
+        return record
+    
+    def enqueue_sentinel(self):
+        # A fila é limitada: esperar espaço para o sentinela em vez de falhar
+        self.queue.put(self._sentinel)
+
+
 class EronLogger:
     """Sistema de logging centralizado do Eron.IA"""
     
     def __init__(self):
         self.loggers: Dict[str, logging.Logger] = {}
         self.handlers_created = False
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        self.listener: Optional[RedactingQueueListener] = None
         self._setup_logging()
     
     def _setup_logging(self):
@@ -158,7 +216,13 @@ class EronLogger:
         self.handlers_created = True
     
     def _create_handlers(self):
-        """Cria handlers para diferentes categorias de log"""
+        """
+        Cria handlers para diferentes categorias de log
+        
+        Os handlers de arquivo/console ficam atrás de uma fila: os loggers só
+        enfileiram registros e uma thread (QueueListener) formata, aplica a
+        redação uma vez e distribui para os arquivos.
+        """
         
         log_dir = Path(config.logging['dir'])
         
@@ -170,7 +234,6 @@ class EronLogger:
             encoding='utf-8'
         )
         general_handler.setFormatter(StructuredFormatter('text'))
-        general_handler.addFilter(SensitiveDataFilter())
         
         # Handler para erros específicos
         error_handler = logging.handlers.RotatingFileHandler(
@@ -181,21 +244,49 @@ class EronLogger:
         )
         error_handler.setFormatter(StructuredFormatter('json'))
         error_handler.setLevel(logging.ERROR)
-        error_handler.addFilter(SensitiveDataFilter())
+        
+        # Handler para banco de dados (apenas loggers eron.database.*)
+        db_handler = logging.handlers.RotatingFileHandler(
+            log_dir / "eron_database.log",
+            maxBytes=config.logging['max_size_bytes'] // 2,
+            backupCount=5,
+            encoding='utf-8'
+        )
+        db_handler.setFormatter(StructuredFormatter('text'))
+        db_handler.addFilter(logging.Filter(f"eron.{LogCategory.DATABASE.value}"))
+        
+        # Handler para Telegram (apenas loggers eron.telegram.*)
+        tg_handler = logging.handlers.RotatingFileHandler(
+            log_dir / "eron_telegram.log",
+            maxBytes=config.logging['max_size_bytes'],
+            backupCount=3,
+            encoding='utf-8'
+        )
+        tg_handler.setFormatter(StructuredFormatter('text'))
+        tg_handler.addFilter(logging.Filter(f"eron.{LogCategory.TELEGRAM.value}"))
+        
+        handlers = [general_handler, error_handler, db_handler, tg_handler]
         
         # Handler para console
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(StructuredFormatter('text'))
-        console_handler.addFilter(SensitiveDataFilter())
+        if config.logging['console_enabled']:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(StructuredFormatter('text'))
+            handlers.append(console_handler)
+        
+        # Fila limitada entre produtores e a thread de escrita
+        log_queue = queue.Queue(maxsize=config.logging.get('queue_size', 10000))
+        self.queue_handler = BoundedQueueHandler(log_queue)
+        self.listener = RedactingQueueListener(
+            log_queue, *handlers,
+            redact=config.logging.get('filter_sensitive_data', True)
+        )
+        self.listener.start()
+        atexit.register(self.shutdown)
         
         # Configurar logger root
         root_logger = logging.getLogger()
         root_logger.handlers.clear()
-        root_logger.addHandler(general_handler)
-        root_logger.addHandler(error_handler)
-        
-        if config.logging['console_enabled']:
-            root_logger.addHandler(console_handler)
+        root_logger.addHandler(self.queue_handler)
     
     def get_logger(self, category: LogCategory, name: str = None) -> logging.Logger:
         """Obtém um logger para uma categoria específica"""
@@ -205,35 +296,31 @@ class EronLogger:
             logger_name += f".{name}"
         
         if logger_name not in self.loggers:
-            logger = logging.getLogger(logger_name)
-            
-            # Configurar logger específico da categoria se necessário
-            if category == LogCategory.DATABASE:
-                db_handler = logging.handlers.RotatingFileHandler(
-                    Path(config.logging['dir']) / "eron_database.log",
-                    maxBytes=config.logging['max_size_bytes'] // 2,
-                    backupCount=5,
-                    encoding='utf-8'
-                )
-                db_handler.setFormatter(StructuredFormatter('text'))
-                db_handler.addFilter(SensitiveDataFilter())
-                logger.addHandler(db_handler)
-            
-            elif category == LogCategory.TELEGRAM:
-                tg_handler = logging.handlers.RotatingFileHandler(
-                    Path(config.logging['dir']) / "eron_telegram.log",
-                    maxBytes=config.logging['max_size_bytes'],
-                    backupCount=3,
-                    encoding='utf-8'
-                )
-                tg_handler.setFormatter(StructuredFormatter('text'))
-                tg_handler.addFilter(SensitiveDataFilter())
-                logger.addHandler(tg_handler)
-            
-            self.loggers[logger_name] = logger
+            # Roteamento por categoria é feito pelos filtros dos handlers do listener
+            self.loggers[logger_name] = logging.getLogger(logger_name)
         
         return self.loggers[logger_name]
     
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Estatísticas da fila de logging (tamanho, enfileirados e descartados)"""
+        if not self.queue_handler:
+            return {'queue_size': 0, 'queue_capacity': 0, 'enqueued': 0, 'dropped': {}, 'dropped_total': 0}
+        
+        enqueued, dropped = self.queue_handler.counts()
+        return {
+            'queue_size': self.queue_handler.queue.qsize(),
+            'queue_capacity': self.queue_handler.queue.maxsize,
+            'enqueued': enqueued,
+            'dropped': dropped,
+            'dropped_total': sum(dropped.values())
+        }
+    
+    def shutdown(self):
+        """Esvazia a fila e encerra a thread de escrita (chamadas repetidas são ignoradas)"""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+    
     def log_performance(self, category: LogCategory, operation: str, 
                        execution_time: float, details: Dict[str, Any] = None):
         """Log específico para métricas de performance"""
@@ -371,6 +458,11 @@ def log_security_event(event_type: str, severity: str,
     logger_system.log_security_event(event_type, severity, details, user_id)
 
 
+def get_logging_queue_stats() -> Dict[str, Any]:
+    """Função conveniente para estatísticas da fila de logging"""
+    return logger_system.get_queue_stats()
+
+
 # Exemplo de uso
 if __name__ == "__main__":
     print("🔧 TESTANDO SISTEMA DE LOGGING")
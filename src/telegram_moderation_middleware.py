@@ -16,6 +16,8 @@ Funcionalidades:
 Uso:
 from src.telegram_moderation_middleware import ModerationMiddleware
 middleware = ModerationMiddleware()
+...
+middleware.shutdown()  # ao encerrar o bot
 
 Autor: Eron.IA System
 Data: 2024
@@ -25,6 +27,8 @@ from typing import Dict, Any, Optional
 from telegram import Update, Message
 from telegram.ext import ContextTypes, BaseHandler
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 try:
@@ -58,12 +62,24 @@ class ModerationMiddleware:
         self.bypass_admin_ids = set(bypass_admin_ids or [])
         self.enabled = config.moderation['enabled']
         
+        # Executor dedicado e limitado: regex + SQLite rodam fora do event loop
+        self.check_timeout = config.moderation.get('check_timeout_ms', 1500) / 1000
+        self.max_pending_checks = config.moderation.get('max_pending_checks', 64)
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.moderation.get('executor_workers', 4),
+            thread_name_prefix="moderation"
+        )
+        self._pending_checks = 0
+        self._pending_lock = threading.Lock()
+        
         # Estatísticas em memória
         self.stats = {
             'messages_checked': 0,
             'messages_blocked': 0,
             'messages_warned': 0,
-            'messages_filtered': 0
+            'messages_filtered': 0,
+            'checks_timed_out': 0,
+            'checks_skipped_overload': 0
         }
         
         self.logger.info("Middleware de moderação inicializado")
@@ -99,36 +115,77 @@ class ModerationMiddleware:
         if update.effective_user.id in self.bypass_admin_ids:
             return True
         
-        # Verificar se usuário já está bloqueado
-        if is_user_blocked(user_id):
-            await self._send_blocked_user_message(update, context)
-            return False
+        # Executor saturado: não enfileirar mais trabalho (fail-open)
+        if self._pending_checks >= self.max_pending_checks:
+            self.stats['checks_skipped_overload'] += 1
+            self.logger.warning(f"Moderação sobrecarregada, mensagem de {user_id} liberada sem verificação")
+            return True
         
-        # Analisar conteúdo
         self.stats['messages_checked'] += 1
         
         try:
-            result = analyze_content(message.text, user_id)
-            
-            # Log da verificação
-            log_user_interaction(
-                user_id=int(user_id),
-                chat_id=update.effective_chat.id,
-                action="content_moderation_check",
-                details={
-                    'severity': result['severity'],
-                    'action': str(result['action']),
-                    'confidence': result['confidence']
-                }
-            )
-            
-            # Aplicar ação baseada no resultado
-            return await self._apply_moderation_action(update, context, result)
-            
+            blocked, result = await self._run_check(message.text, user_id, update.effective_chat.id)
+        except asyncio.TimeoutError:
+            self.stats['checks_timed_out'] += 1
+            self.logger.warning(f"Moderação excedeu {self.check_timeout:.2f}s para {user_id}, mensagem liberada")
+            # Prazo estourado: permitir mensagem (fail-open)
+            return True
         except Exception as e:
             self.logger.error(f"Erro na moderação: {e}")
             # Em caso de erro, permitir mensagem (fail-safe)
             return True
+        
+        # Verificar se usuário já está bloqueado
+        if blocked:
+            await self._send_blocked_user_message(update, context)
+            return False
+        
+        # Aplicar ação baseada no resultado
+        return await self._apply_moderation_action(update, context, result)
+    
+    async def _run_check(self, text: str, user_id: str, chat_id: int):
+        """Executa a verificação no executor com prazo por mensagem"""
+        with self._pending_lock:
+            self._pending_checks += 1
+        
+        # O contador só é liberado quando a thread termina de fato, mesmo se o
+        # prazo já tiver estourado (mantém o limite de trabalho enfileirado)
+        try:
+            work = self._executor.submit(self._check_sync, text, user_id, chat_id)
+        except RuntimeError:
+            # Executor já encerrado: nada foi enfileirado
+            self._release_pending(None)
+            raise
+        work.add_done_callback(self._release_pending)
+        return await asyncio.wait_for(asyncio.wrap_future(work), timeout=self.check_timeout)
+    
+    def _release_pending(self, _future):
+        with self._pending_lock:
+            self._pending_checks -= 1
+    
+    def _check_sync(self, text: str, user_id: str, chat_id: int):
+        """Parte síncrona (regex + SQLite) da moderação; roda no executor"""
+        if is_user_blocked(user_id):
+            return True, None
+        
+        result = analyze_content(text, user_id)
+        
+        # Log da verificação
+        log_user_interaction(
+            user_id=int(user_id),
+            chat_id=chat_id,
+            action="content_moderation_check",
+            details={
+                'severity': getattr(result['severity'], 'value', str(result['severity'])),
+                'action': str(result['action']),
+                'confidence': result['confidence']
+            }
+        )
+        return False, result
+    
+    def shutdown(self, wait: bool = False):
+        """Encerra o executor de moderação"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
     
     async def _apply_moderation_action(self, update: Update, context: ContextTypes.DEFAULT_TYPE, 
                                      result: Dict[str, Any]) -> bool:
@@ -328,7 +385,9 @@ class ModerationMiddleware:
             'messages_checked': 0,
             'messages_blocked': 0,
             'messages_warned': 0,
-            'messages_filtered': 0
+            'messages_filtered': 0,
+            'checks_timed_out': 0,
+            'checks_skipped_overload': 0
         }
         
         self.logger.info("Estatísticas do middleware resetadas")
@@ -1,22 +1,30 @@
 import os
 import sys
+import time
 import logging
+from functools import wraps
 from datetime import datetime, date
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, ConversationHandler, CallbackQueryHandler, filters
+from telegram.ext import CommandHandler, MessageHandler, ContextTypes, ConversationHandler, CallbackQueryHandler, filters
 
 # Adiciona o diretório raiz ao path para importações
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.memory import EronMemory
 from core.preferences import PreferencesManager
 from core.emotion_system import EmotionSystem
 from core.user_profile_db import UserProfileDB
-from web.app import get_llm_response
+from web.app import get_llm_response, memory as web_memory
 from learning.fast_learning import FastLearning
 from learning.human_conversation import HumanConversationSystem
 from learning.advanced_adult_learning import advanced_adult_learning
-import re
+from src.debug_trace import tracer, apply_trace_args
+from core.config import config
+from core.metrics import TELEGRAM_HANDLER_SECONDS, start_metrics_server
+from core.turn_tracing import turn_tracer, traced_turn, span, annotate, format_slowest_turns
+from core.personalization_detector import (
+    telegram_personalization_detector, changed_fields, has_personalization_intent
+)
+import io
 import json
 import sys
 from dotenv import load_dotenv
@@ -82,8 +90,9 @@ logging.basicConfig(
 # Estado de usuários agora gerenciado via context.user_data para thread-safety
 # Removidas variáveis globais problemáticas: sequential_setup_data, sequential_step, adult_access
 
-# Instância da memória de conversa (mantém-se local)
-memory = EronMemory()
+# Instância da memória de conversa compartilhada com get_llm_response (o
+# buffer de turnos recentes precisa ver as mensagens salvas pelo bot)
+memory = web_memory
 
 # Instâncias dos gerenciadores
 preferences_manager = PreferencesManager()
@@ -102,7 +111,7 @@ try:
     sys.path.append(scripts18_path)
     from adult_personality_db import AdultPersonalityDB  # type: ignore
     from adult_commands import AdultCommandSystem  # type: ignore
-    from devassa_personality import DevassaPersonality  # type: ignore
+    from devassa_personality import DevassaPersonality, get_devassa_personality  # type: ignore
     
     # Inicializar sistema adulto
     adult_db = AdultPersonalityDB()
@@ -158,101 +167,23 @@ def detect_and_save_telegram_personalization(user_message, user_id, user_profile
     - Exemplo de personalização: "Joana" (quando usuário personaliza nome)
     - Opções disponíveis: nome do bot, gênero, personalidade, estilo linguagem, tópicos
     """
-    message_lower = user_message.lower().strip()
-    updates = {}
-    
-    # Detectar nome do usuário - versões mais específicas
-    name_patterns = [
-        r"meu nome é (\w+)",
-        r"me chamo (\w+)", 
-        r"sou (\w+)",
-        r"pode me chamar de (\w+)",
-        r"meu nome não (\w+)\?",  # "meu nome não Romario?"
-        r"meu nome não é (\w+)\?", # "meu nome não é Romario?"
-        r"^sou o (\w+)$",  # "sou o João"
-        r"^me chamo (\w+)$"  # "me chamo Maria"
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            name = match.group(1).capitalize()
-            if len(name) > 1 and name not in ['não', 'sim', 'ok', 'obrigado', 'obrigada']:
-                updates['user_name'] = name
-                break
-    
-    # Detectar nome do assistente 
-    bot_name_patterns = [
-        r"se chame (\w+)",
-        r"seu nome seja (\w+)",
-        r"te chamar de (\w+)",
-        r"quero que se chame (\w+)"
-    ]
-    
-    for pattern in bot_name_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            bot_name = match.group(1).capitalize()
-            if len(bot_name) > 1:
-                updates['bot_name'] = bot_name
-                break
-    
-    # Detectar personalidade do bot
-    personality_patterns = {
-        'amigável': ['amigável', 'amigo', 'amiga', 'legal', 'bacana', 'gentil'],
-        'formal': ['formal', 'profissional', 'sério', 'séria', 'educado'],
-        'casual': ['casual', 'descontraído', 'descontraída', 'relaxado', 'relaxada', 'informal'],
-        'divertido': ['divertido', 'divertida', 'engraçado', 'engraçada', 'brincalhão', 'alegre'],
-        'intelectual': ['intelectual', 'sábio', 'sábia', 'inteligente', 'culto', 'erudito']
-    }
-    
-    for personality, keywords in personality_patterns.items():
-        if any(keyword in message_lower for keyword in keywords):
-            updates['bot_personality'] = personality
-            break
-    
-    # Detectar estilo de linguagem
-    language_patterns = {
-        'simples': ['simples', 'fácil', 'direto', 'básico'],
-        'técnico': ['técnico', 'detalhado', 'específico', 'científico'],
-        'coloquial': ['coloquial', 'gírias', 'informal', 'descontraído'],
-        'eloquente': ['eloquente', 'sofisticado', 'elegante', 'refinado']
-    }
-    
-    for language, keywords in language_patterns.items():
-        if any(keyword in message_lower for keyword in keywords):
-            updates['bot_language'] = language
-            break
-    
-    # Detectar tópicos de interesse (separados por vírgula)
-    topics_patterns = [
-        r"gosto de (.*)",
-        r"me interesso por (.*)",
-        r"quero falar sobre (.*)",
-        r"meus interesses são (.*)",
-        r"tópicos favoritos são (.*)"
-    ]
-    
-    for pattern in topics_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            topics = match.group(1).strip()
-            if len(topics) > 2:
-                updates['preferred_topics'] = topics
-                break
+    updates = telegram_personalization_detector.detect(user_message)
     
     # Se encontrou informações para salvar
     if updates:
         try:
+            # Obter perfil atual para verificar idade e o que realmente mudou
+            current_profile = user_profile_db.get_profile(user_id)
+            updates = changed_fields(updates, current_profile)
+            if not updates:
+                return False
+            
             # APLICAR FILTRO DE PERSONALIZAÇÃO ESPECÍFICO
             from src.personalization_filter import apply_personalization_filter
             
             # Combinar conteúdo para análise
             content_to_check = f"{user_message} {' '.join(str(v) for v in updates.values())}"
             
-            # Obter perfil atual para verificar idade
-            current_profile = user_profile_db.get_profile(user_id)
-            
             filter_result = apply_personalization_filter(
                 content=content_to_check,
                 user_profile=current_profile or {}
@@ -276,16 +207,7 @@ def detect_and_save_telegram_personalization(user_message, user_id, user_profile
 
 def detect_personalization_intent(user_message):
     """Detecta se a mensagem parece ser uma resposta à pergunta de personalização"""
-    message_lower = user_message.lower().strip()
-    
-    # Palavras que indicam que é uma resposta de personalização
-    personalization_indicators = [
-        'meu nome', 'me chamo', 'sou', 'pode me chamar',
-        'se chame', 'seu nome seja', 'te chamar de', 'quero que se chame',
-        'formal', 'informal', 'amigável', 'divertido', 'casual'
-    ]
-    
-    return any(indicator in message_lower for indicator in personalization_indicators)
+    return has_personalization_intent(user_message)
 
 async def clear_personalization(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Comando /clear - Apaga todas as personalizações"""
@@ -695,9 +617,8 @@ async def handle_bot_name_selection(update: Update, context: ContextTypes.DEFAUL
         user_profile_db.save_profile(user_id=user_id, bot_name=bot_name)
         print(f"[DEBUG BOT_NAME] Nome {bot_name} salvo no banco com sucesso")
         
-        # Verificar se salvou corretamente
-        profile_check = user_profile_db.get_profile(user_id)
-        print(f"[DEBUG BOT_NAME] Verificação - perfil após salvar: {profile_check}")
+        # Verificar se salvou corretamente (perfil só em dump amostrado, com redação)
+        tracer.dump('telegram', "Perfil após salvar bot_name", lambda: user_profile_db.get_profile(user_id))
         
         await query.edit_message_text(
             f"✅ **Perfeito! Agora me chamo {bot_name}!**\n\n"
@@ -2082,16 +2003,62 @@ async def help_command_old(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text=help_text
     )
 
+async def traces_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """⏱️ (Admin) Turnos mais lentos recentes + arquivo para o Chrome Trace Viewer"""
+    if update.effective_user.id not in config.telegram.get('admin_ids', []):
+        await update.message.reply_text("❌ Comando disponível apenas para administradores.")
+        return
+    
+    limit = 5
+    if context.args and context.args[0].isdigit():
+        limit = min(int(context.args[0]), 50)
+    
+    await update.message.reply_text(f"⏱️ Turnos mais lentos:\n\n{format_slowest_turns(limit)}")
+    
+    if turn_tracer.recent():
+        trace_json = json.dumps(turn_tracer.chrome_trace(limit), ensure_ascii=False).encode('utf-8')
+        await context.bot.send_document(
+            chat_id=update.effective_chat.id,
+            document=io.BytesIO(trace_json),
+            filename='eron_traces.json',
+            caption='Abra em chrome://tracing ou ui.perfetto.dev'
+        )
+
+async def trace_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """🔎 (Admin) Níveis e amostragem do tracer de depuração sem reiniciar o bot"""
+    if update.effective_user.id not in config.telegram.get('admin_ids', []):
+        await update.message.reply_text("❌ Comando disponível apenas para administradores.")
+        return
+    
+    try:
+        trace_config = apply_trace_args(context.args or [])
+    except ValueError as e:
+        await update.message.reply_text(
+            f"❌ {e}\n\nUso: /trace [NÍVEL] [componente=NÍVEL] [componente=reset] [sample=0.1]"
+        )
+        return
+    
+    components = ', '.join(f"{c}={l}" for c, l in trace_config['component_levels'].items()) or 'nenhum'
+    await update.message.reply_text(
+        f"🔎 Tracer\n"
+        f"Nível padrão: {trace_config['default_level']}\n"
+        f"Componentes: {components}\n"
+        f"Amostragem de dumps: {trace_config['payload_sample_rate']}"
+    )
+
 # Função de chat - MELHORADA
+@traced_turn('telegram_chat')
 async def chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_message = update.message.text
     user_id = str(update.effective_user.id)
     user_profile_db = context.application.user_profile_db
+    annotate(user_id=user_id, platform='telegram')
     
     # PRIMEIRA COISA: SEMPRE VERIFICAR CONFIGURAÇÕES ATUAIS DO BANCO DE DADOS
     # Pegar o perfil mais atualizado do banco ANTES de qualquer processamento
-    current_profile = user_profile_db.get_profile(user_id)
-    print(f"[DEBUG PERFIL] Verificando perfil atualizado no início: {current_profile}")
+    with span('profile_load'):
+        current_profile = user_profile_db.get_profile(user_id)
+    tracer.dump('telegram', "Perfil atualizado no início", current_profile)
     
     # SISTEMA DE PERSONALIZAÇÃO PASSO A PASSO
     
@@ -2177,8 +2144,9 @@ async def chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # 4. Chat normal - usar sistema existente
     # SEMPRE pegar o perfil mais atualizado do banco de dados
-    profile = user_profile_db.get_profile(user_id)
-    print(f"[DEBUG PERFIL] Perfil atual do banco: {profile}")
+    with span('profile_reload'):
+        profile = user_profile_db.get_profile(user_id)
+    tracer.dump('telegram', "Perfil atual do banco", profile)
     
     if not profile:
         # Criar perfil básico para Telegram usando nome real quando possível
@@ -2205,14 +2173,15 @@ async def chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             user_profile_db.save_profile(user_id=user_id, **profile)
         except Exception as e:
-            print(f"Erro ao criar perfil Telegram: {e}")
+            tracer.error('telegram', "Erro ao criar perfil Telegram: %s", e)
     
     # GARANTIR que sempre temos as configurações mais recentes do banco
     # Recarregar perfil para ter certeza das configurações atualizadas
-    updated_profile = user_profile_db.get_profile(user_id)
+    with span('profile_reload'):
+        updated_profile = user_profile_db.get_profile(user_id)
     if updated_profile:
         profile = updated_profile
-        print(f"[DEBUG PERFIL] Perfil recarregado com configurações atuais: bot_name='{profile.get('bot_name')}'")
+        tracer.debug('telegram', "Perfil recarregado com configurações atuais: bot_name='%s'", profile.get('bot_name'))
     
     # EXTRAIR INFORMAÇÕES MAIS RECENTES DO BANCO
     current_bot_name = profile.get('bot_name', 'ERON')
@@ -2220,23 +2189,21 @@ async def chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     current_personality = profile.get('bot_personality', 'amigável')
     current_language = profile.get('bot_language', 'informal')
     
-    print(f"[DEBUG NOME BOT] Nome atual do bot no banco: '{current_bot_name}'")
-    print(f"[DEBUG NOME BOT] Nome do usuário atual: '{current_user_name}'")
-    print(f"[DEBUG NOME BOT] Personalidade atual: '{current_personality}'")
-    print(f"[DEBUG NOME BOT] Linguagem atual: '{current_language}'")
+    tracer.debug('telegram', "Bot: '%s' | Usuário: '%s' | Personalidade: '%s' | Linguagem: '%s'",
+                 current_bot_name, current_user_name, current_personality, current_language)
     
     # SEMPRE tentar detectar e salvar personalização (mesmo se completa)
-    saved = detect_and_save_telegram_personalization(user_message, user_id, user_profile_db)
+    with span('personalization_detect'):
+        saved = detect_and_save_telegram_personalization(user_message, user_id, user_profile_db)
     if saved:
-        print(f"[TELEGRAM DEBUG] Personalização detectada! Recarregando perfil...")
+        tracer.debug('telegram', "Personalização detectada! Recarregando perfil...")
         # Recarregar perfil após mudança
         profile = user_profile_db.get_profile(user_id)
-        print(f"[TELEGRAM DEBUG] Perfil recarregado após personalização: bot_name='{profile.get('bot_name')}'")
         
         # Atualizar variáveis com informações mais recentes
         current_bot_name = profile.get('bot_name', 'ERON')
         current_user_name = profile.get('user_name', update.effective_user.first_name or 'Usuário')
-        print(f"[DEBUG] Nome do bot atualizado após personalização: '{current_bot_name}'")
+        tracer.debug('telegram', "Nome do bot atualizado após personalização: '%s'", current_bot_name)
         
         # Atualizar variável de completude
         personalization_complete = (
@@ -2247,88 +2214,93 @@ async def chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
     
     # USAR O PERFIL MAIS ATUALIZADO - SEM BUSCAR NOVAMENTE
-    print(f"[TELEGRAM DEBUG] Usando perfil final com nome do bot: '{profile.get('bot_name')}'")
+    tracer.debug('telegram', "Usando perfil final com nome do bot: '%s'", profile.get('bot_name'))
     
     # Usar informações personalizadas ATUALIZADAS
     user_name = profile.get('user_name', update.effective_user.first_name)
     bot_name = profile.get('bot_name', 'ERON')
 
     # Obter preferências e estado emocional
-    user_preferences = preferences_manager.get_preferences(user_id)
-    emotion_prefs = emotion_system.get_emotion_preferences(user_id)
+    with span('preferences'):
+        user_preferences = preferences_manager.get_preferences(user_id)
+        emotion_prefs = emotion_system.get_emotion_preferences(user_id)
 
     # ===== INTEGRAÇÃO COM SISTEMA ADULTO - MODO OPCIONAL =====
     adult_response = None
     
     # Verificar se o usuário tem modo adulto ATIVO usando core.check
     from core.check import check_age
-    adult_status = check_age(user_id)
+    with span('check_age'):
+        adult_status = check_age(user_id)
     user_wants_adult_mode = adult_status.get('adult_mode_active', False)
     
-    print(f"[ADULT DEBUG] Status adulto para {user_id}: adult_mode_active={user_wants_adult_mode}")
+    tracer.debug('adult', "Status adulto para %s: adult_mode_active=%s", user_id, user_wants_adult_mode)
     
     # Só usar resposta devassa se o usuário EXPLICITAMENTE ativou o modo adulto
     if ADULT_SYSTEM_AVAILABLE and user_wants_adult_mode:
         try:
             # Usar personalidade devassa apenas quando explicitamente ativada
-            devassa = DevassaPersonality(adult_db, profile)
-            adult_response = devassa.get_adaptive_response(
-                user_message,
-                context='geral',
-                relationship_stage=profile.get('relationship_stage', 'inicial')
-            )
-            print(f"[ADULT DEBUG] Modo devassa ATIVO - Resposta gerada: {adult_response[:50]}...")
+            with span('devassa'):
+                devassa = get_devassa_personality(adult_db, profile)
+                adult_response = devassa.get_adaptive_response(
+                    user_message,
+                    context='geral',
+                    relationship_stage=profile.get('relationship_stage', 'inicial')
+                )
+            tracer.debug('adult', "Modo devassa ATIVO - resposta gerada")
         except Exception as e:
-            print(f"[ADULT DEBUG] Erro ao gerar resposta devassa: {e}")
+            tracer.error('adult', "Erro ao gerar resposta devassa: %s", e)
             adult_response = None
     else:
-        print(f"[ADULT DEBUG] Modo devassa INATIVO - Usando resposta normal")
+        tracer.debug('adult', "Modo devassa INATIVO - Usando resposta normal")
 
     # Detectar emoção do usuário se habilitado
     if emotion_prefs['emotion_detection_enabled']:
-        user_emotion, confidence = emotion_system.detect_user_emotion(user_id, user_message)
-        
-        # Ajustar emoção do bot se a confiança for alta
-        if confidence > 0.5:
-            emotion_system.set_bot_emotion(
-                user_id=user_id,
-                emotion=user_emotion,
-                intensity=emotion_prefs['emotional_range'],
-                trigger=f"Resposta à mensagem: {user_message[:50]}..."
-            )
+        with span('emotion_detect'):
+            user_emotion, confidence = emotion_system.detect_user_emotion(user_id, user_message)
+            
+            # Ajustar emoção do bot se a confiança for alta
+            if confidence > 0.5:
+                emotion_system.set_bot_emotion(
+                    user_id=user_id,
+                    emotion=user_emotion,
+                    intensity=emotion_prefs['emotional_range'],
+                    trigger=f"Resposta à mensagem: {user_message[:50]}..."
+                )
 
     # Escolher resposta: adulta (se explicitamente ativada) ou normal
     if adult_response and user_wants_adult_mode:
         response = adult_response
-        print(f"[ADULT DEBUG] Usando resposta DEVASSA (modo explicitamente ativo)")
+        tracer.debug('adult', "Usando resposta DEVASSA (modo explicitamente ativo)")
     else:
         # VERIFICAÇÃO FINAL: Garantir que estamos usando o nome correto do bot
         final_bot_name = profile.get('bot_name', 'ERON')
         final_user_name = profile.get('user_name', update.effective_user.first_name or 'Usuário')
-        print(f"[DEBUG FINAL] Chamando API com: bot_name='{final_bot_name}', user_name='{final_user_name}'")
-        print(f"[DEBUG FINAL] Perfil completo sendo enviado para API: {profile}")
+        tracer.debug('telegram', "Chamando API com: bot_name='%s', user_name='%s'", final_bot_name, final_user_name)
+        tracer.dump('telegram', "Perfil completo sendo enviado para API", profile)
         
         # Usar função get_llm_response atualizada com user_id
         response = get_llm_response(user_message, user_profile=profile, user_id=user_id)
         if not response:
             response = "Desculpe, não consegui me conectar com a IA no momento. Por favor, verifique se o servidor do LM Studio está rodando."
-        print(f"[TELEGRAM DEBUG] Usando resposta NORMAL (modo devassa inativo ou não disponível)")
-        print(f"[DEBUG FINAL] Resposta recebida da API: {response[:100]}...")
+        tracer.dump('telegram', "Resposta recebida da API", response)
     
     # Salvar na memória com user_id para separar por usuário
-    memory.save_message(user_message, response, user_id)
+    with span('memory_save'):
+        memory.save_message(user_message, response, user_id)
     
     # 🧠 APRENDIZADO ACELERADO NO TELEGRAM: Salvar padrões de resposta
     try:
-        fast_learning.learn_response_pattern(user_id, user_message, response)
-        
-        # Salvar contexto inteligente para futuras conversas
-        topic = fast_learning._extract_main_topic(user_message)
-        context_data = f"[TG] {user_message[:100]}... → {response[:100]}..."
-        fast_learning.save_smart_context(user_id, topic, context_data, importance=1.5)
-        print(f"[TELEGRAM LEARNING] Padrão salvo para user_id: {user_id}")
+        with span('learning'):
+            fast_learning.learn_response_pattern(user_id, user_message, response)
+            
+            # Salvar contexto inteligente para futuras conversas
+            topic = fast_learning._extract_main_topic(user_message)
+            context_data = f"[TG] {user_message[:100]}... → {response[:100]}..."
+            fast_learning.save_smart_context(user_id, topic, context_data, importance=1.5)
+        tracer.debug('learning', "Padrão salvo para user_id: %s", user_id)
     except Exception as e:
-        print(f"[TELEGRAM LEARNING ERROR] {e}")
+        tracer.error('learning', "Erro no aprendizado do Telegram: %s", e)
 
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
@@ -4610,6 +4582,47 @@ def get_adult_system_status_summary(user_id: str) -> str:
 # FUNÇÃO PRINCIPAL DO BOT
 # ============================================================================
 
+def _timed_handler_callback(callback, label):
+    """Envolve o callback de um handler medindo sua duração"""
+    histogram = TELEGRAM_HANDLER_SECONDS.labels(label)
+    
+    @wraps(callback)
+    async def timed_callback(update, context):
+        started_at = time.perf_counter()
+        try:
+            return await callback(update, context)
+        finally:
+            histogram.observe(time.perf_counter() - started_at)
+    
+    return timed_callback
+
+def instrument_telegram_handlers(application):
+    """Adiciona medição de tempo (eron_telegram_handler_seconds) a todos os handlers registrados"""
+    def instrument(handler):
+        if isinstance(handler, ConversationHandler):
+            for inner in handler.entry_points + handler.fallbacks:
+                instrument(inner)
+            for state_handlers in handler.states.values():
+                for inner in state_handlers:
+                    instrument(inner)
+            return
+        
+        callback = getattr(handler, 'callback', None)
+        if callback is None or getattr(callback, '_eron_timed', False):
+            return
+        
+        if isinstance(handler, CommandHandler):
+            label = '/' + sorted(handler.commands)[0]
+        else:
+            label = getattr(callback, '__name__', type(handler).__name__)
+        
+        handler.callback = _timed_handler_callback(callback, label)
+        handler.callback._eron_timed = True
+    
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            instrument(handler)
+
 def main(application, user_profile_db):
     logging.info("Adicionando handlers...")
     
@@ -4784,9 +4797,14 @@ def main(application, user_profile_db):
     application.add_handler(CommandHandler("preferencias", preferences_menu))
     application.add_handler(CommandHandler("emocoes", emotions_menu))
     application.add_handler(CommandHandler("aprendizagem", learning_status))
+    application.add_handler(CommandHandler("traces", traces_command))
+    application.add_handler(CommandHandler("trace", trace_command))
     application.add_handler(CallbackQueryHandler(handle_preference_button, pattern='^(pref_|chat_)'))
     application.add_handler(CallbackQueryHandler(handle_emotion_button, pattern='^emotion_'))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, chat))
+    
+    # Métricas de tempo por comando/handler
+    instrument_telegram_handlers(application)
 
     logging.info("✅ Todos os handlers foram adicionados com sucesso!")
 
@@ -4812,11 +4830,37 @@ if __name__ == '__main__':
         exit(1)
     
     # Criar a aplicação do bot
-    application = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+    # (concorrência e pool de conexões de config.telegram só no webhook;
+    # no polling os updates seguem um por vez)
+    from core.telegram_webhook import TelegramWebhookRunner, build_application
+    webhook_mode = config.telegram.get('mode') == 'webhook' and bool(config.telegram.get('webhook_url'))
+    application = build_application(TELEGRAM_BOT_TOKEN, concurrent=webhook_mode)
     
     # Configurar handlers
     main(application, user_profile_db)
     
+    # Exportador de métricas do processo do bot (equivalente ao /metrics do Flask)
+    metrics_port = config.performance.get('bot_metrics_port', 0)
+    if config.performance.get('metrics_enabled', True) and metrics_port:
+        try:
+            start_metrics_server(metrics_port, config.performance.get('bot_metrics_host', '127.0.0.1'))
+            print(f"📈 Métricas disponíveis em http://{config.performance.get('bot_metrics_host', '127.0.0.1')}:{metrics_port}/metrics")
+        except OSError as e:
+            print(f"⚠️ Exportador de métricas não iniciado: {e}")
+    
+    # Jobs de manutenção (sessões adultas, tokens, ANALYZE, checkpoint, retenção, backup)
+    if config.database.get('maintenance_enabled', True):
+        from core.maintenance import build_default_scheduler
+        maintenance_scheduler = build_default_scheduler(
+            user_profile_db=user_profile_db,
+            adult_db=adult_db if ADULT_SYSTEM_AVAILABLE else None
+        )
+        if maintenance_scheduler.attach_to_job_queue(application.job_queue):
+            print("🧰 Manutenção agendada no JobQueue do bot")
+        else:
+            maintenance_scheduler.start()
+            print("🧰 Manutenção agendada em thread própria (JobQueue indisponível)")
+    
     print("🤖 Bot do Telegram iniciado com sucesso!")
     print("📱 Digite /start no chat com o bot para começar")
     print("⚙️ Use /menu para acessar todas as opções")
@@ -4824,7 +4868,14 @@ if __name__ == '__main__':
     
     # Executar o bot
     try:
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if webhook_mode:
+            print(f"🌐 Modo webhook: {config.telegram['webhook_url']}")
+            runner = TelegramWebhookRunner(application)
+            if runner.generated_secret:
+                print("🔐 TELEGRAM_WEBHOOK_SECRET não definido: usando um segredo aleatório")
+            runner.run()
+        else:
+            application.run_polling(allowed_updates=Update.ALL_TYPES)
     except KeyboardInterrupt:
         print("\n🛑 Bot interrompido pelo usuário")
     except Exception as e:
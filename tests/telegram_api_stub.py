@@ -0,0 +1,112 @@
+"""
+API do Telegram Local para Testes
+=================================
+
+Servidor HTTP em thread que responde aos métodos da Bot API usados pelo
+bot (getMe, setWebhook, deleteWebhook, sendMessage...), guarda as chamadas
+recebidas e entrega updates no webhook registrado, como o Telegram faz.
+A Application aponta para ele com base_url=api.base_url.
+
+Uso:
+from tests.telegram_api_stub import LocalTelegramAPI
+"""
+
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+BOT_INFO = {'id': 123456, 'is_bot': True, 'first_name': 'Eron', 'username': 'eron_teste_bot'}
+
+
+class LocalTelegramAPI:
+    """Stand-in da Bot API em 127.0.0.1 (porta livre escolhida pelo sistema)"""
+
+    def __init__(self):
+        self.calls = []
+        self.webhook = {}
+        self._message_id = 0
+        self._lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                method = self.path.rsplit('/', 1)[-1]
+                params = {}
+                for key, value in parse_qsl(body.decode('utf-8')):
+                    try:
+                        params[key] = json.loads(value)
+                    except ValueError:
+                        params[key] = value
+                payload = json.dumps({'ok': True, 'result': api._result(method, params)}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/bot"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _result(self, method, params):
+        with self._lock:
+            self.calls.append((method, params))
+            if method == 'getMe':
+                return BOT_INFO
+            if method == 'setWebhook':
+                self.webhook = params
+                return True
+            if method == 'deleteWebhook':
+                self.webhook = {}
+                return True
+            if method == 'sendMessage':
+                self._message_id += 1
+                return {'message_id': self._message_id, 'date': int(time.time()),
+                        'chat': {'id': int(params['chat_id']), 'type': 'private'},
+                        'from': BOT_INFO, 'text': params.get('text', '')}
+            return True
+
+    def sent_messages(self):
+        """Textos enviados pelo bot, na ordem"""
+        with self._lock:
+            return [params.get('text') for method, params in self.calls if method == 'sendMessage']
+
+    def deliver(self, update, url=None, secret_token=None):
+        """Envia um update ao webhook registrado; retorna o status HTTP"""
+        request = urllib.request.Request(
+            url or self.webhook['url'], data=json.dumps(update).encode(), method='POST',
+            headers={'Content-Type': 'application/json'}
+        )
+        secret = self.webhook.get('secret_token') if secret_token is None else secret_token
+        if secret:
+            request.add_header('X-Telegram-Bot-Api-Secret-Token', str(secret))
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def text_update(update_id, text, user_id=42):
+    """Update de mensagem de texto em chat privado"""
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Teste'}
+    return {
+        'update_id': update_id,
+        'message': {'message_id': update_id, 'date': int(time.time()),
+                    'chat': {'id': user_id, 'type': 'private'}, 'from': user, 'text': text}
+    }
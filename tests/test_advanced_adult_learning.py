@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Teste do Aprendizado Adulto Avançado
+====================================
+
+Verifica o amostrador ponderado (árvore de Fenwick): distribuição
+proporcional ao effectiveness_score, filtro de intensidade, e os efeitos de
+update_content_score e add_content no sorteio e a recarga periódica do
+conteúdo gravado por outro processo.
+
+Uso:
+python tests/test_advanced_adult_learning.py
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from learning.advanced_adult_learning import AdvancedAdultLearning, WeightedContentSampler
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+# (content_id, intensidade, peso)
+ENTRIES = [(1, 3, 1.0), (2, 1, 2.0), (3, 5, 4.0), (4, 3, 0.0), (5, 2, 3.0), (6, 8, 5.0), (7, 5, 1.5)]
+
+
+class FixedRandom:
+    """rng com valores definidos (random() devolve a próxima fração)"""
+
+    def __init__(self, values):
+        self.values = iter(values)
+
+    def random(self):
+        return next(self.values)
+
+
+def linear_sample(entries, max_intensity, fraction):
+    """Sorteio de referência: varredura linear da soma acumulada"""
+    allowed = sorted((e for e in entries if e[1] <= max_intensity), key=lambda e: (e[1], e[0]))
+    weights = [max(e[2], WeightedContentSampler.MIN_WEIGHT) for e in allowed]
+    target, total = fraction * sum(weights), 0.0
+    for entry, weight in zip(allowed, weights):
+        total += weight
+        if target < total:
+            return entry[0]
+    return allowed[-1][0]
+
+
+def test_sampler_matches_linear_scan():
+    """Mesmo item que a varredura linear, para qualquer sorteio e intensidade"""
+    sampler = WeightedContentSampler(ENTRIES)
+    fractions = [i / 97 for i in range(97)] + [0.999999]
+    for max_intensity in range(0, 10):
+        for fraction in fractions:
+            got = sampler.sample(max_intensity, FixedRandom([fraction]))
+            expected = linear_sample(ENTRIES, max_intensity, fraction) if max_intensity >= 1 else None
+            assert got == expected, (max_intensity, fraction, got, expected)
+
+    # Depois de alterar pesos, a árvore continua igual à varredura
+    entries = list(ENTRIES)
+    for content_id, weight in ((3, 0.0), (2, 7.5), (6, 0.2)):
+        assert sampler.update(content_id, weight)
+        entries = [(i, n, weight if i == content_id else w) for i, n, w in entries]
+    assert not sampler.update(99, 1.0)
+    for fraction in fractions:
+        assert sampler.sample(5, FixedRandom([fraction])) == linear_sample(entries, 5, fraction)
+    print_result(True, "Amostrador equivale à varredura linear")
+
+
+def test_sampler_distribution():
+    """Frequências proporcionais aos pesos; nada acima da intensidade máxima"""
+    sampler = WeightedContentSampler(ENTRIES)
+    rng = random.Random(36)
+    draws = 20000
+    counts = Counter(sampler.sample(3, rng) for _ in range(draws))
+
+    allowed = {i: max(w, WeightedContentSampler.MIN_WEIGHT) for i, n, w in ENTRIES if n <= 3}
+    total = sum(allowed.values())
+    assert set(counts) <= set(allowed)
+    for content_id, weight in allowed.items():
+        assert abs(counts[content_id] / draws - weight / total) < 0.02, (content_id, counts)
+    assert WeightedContentSampler([]).sample(10) is None
+    print_result(True, "Distribuição ponderada com filtro de intensidade")
+
+
+def test_score_and_new_content_reach_sampler():
+    """update_content_score e add_content mudam o sorteio sem recarregar o banco"""
+    with tempfile.TemporaryDirectory() as tmp:
+        learning = AdvancedAdultLearning(str(Path(tmp) / 'advanced_adult.db'))
+        learning.create_advanced_profile('u1', {'intensity_preference': 4})
+
+        assert learning.get_personalized_content('u1', category='teste') is None
+        low = learning.add_content('suave', 'teste', intensity=2, effectiveness_score=1.0)
+        high = learning.add_content('intenso', 'teste', intensity=9, effectiveness_score=1.0)
+        other = learning.add_content('outro', 'teste', intensity=3, effectiveness_score=0.0)
+        assert high in learning._samplers[None].positions
+
+        def draw():
+            return Counter(learning.get_personalized_content('u1', category='teste').content
+                           for _ in range(400))
+
+        # Intensidade 9 está acima da preferência do perfil
+        counts = draw()
+        assert set(counts) <= {'suave', 'outro'} and counts['suave'] > counts['outro']
+
+        assert learning.update_content_score(other, 50.0)
+        assert learning.update_content_score(low, 0.0)
+        counts = draw()
+        assert counts['outro'] > 390, counts
+        assert learning.conn.execute(
+            'SELECT effectiveness_score FROM adult_content WHERE id = ?', (other,)).fetchone()[0] == 50.0
+        assert not learning.update_content_score(123456, 1.0)
+
+        # Usos sorteados gravados em lote
+        learning.flush_usage_counts()
+        used = learning.conn.execute(
+            "SELECT SUM(usage_count) FROM adult_content WHERE category = 'teste'").fetchone()[0]
+        assert used == 800
+        learning.conn.close()
+    print_result(True, "Pontuação e conteúdo novo refletidos no sorteio")
+
+
+def test_external_content_reloaded():
+    """Conteúdo inserido/alterado por outro processo entra no sorteio após a verificação"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'advanced_adult.db')
+        learning = AdvancedAdultLearning(db_path)
+        learning.create_advanced_profile('u1', {'intensity_preference': 5})
+        assert learning.get_personalized_content('u1', category='expansao') is None
+
+        # Como tools/expansion/*.py: INSERT direto, sem passar pela instância
+        other = sqlite3.connect(db_path)
+        with other:
+            other.execute("INSERT INTO adult_content (content, category, intensity, effectiveness_score) "
+                          "VALUES ('novo', 'expansao', 3, 1.0)")
+
+        # Antes do intervalo a instância não consulta o banco
+        assert learning.get_personalized_content('u1', category='expansao') is None
+        learning._last_content_check -= learning.CONTENT_REFRESH_INTERVAL_SECONDS
+        assert learning.get_personalized_content('u1', category='expansao').content == 'novo'
+        assert not learning.refresh_content(force=True)
+
+        # Mudança de score e desativação externas
+        with other:
+            other.execute("INSERT INTO adult_content (content, category, intensity, effectiveness_score) "
+                          "VALUES ('segundo', 'expansao', 3, 0.0)")
+        assert learning.refresh_content(force=True)
+        with other:
+            other.execute("UPDATE adult_content SET effectiveness_score = 0.0 WHERE content = 'novo'")
+            other.execute("UPDATE adult_content SET effectiveness_score = 2.0 WHERE content = 'segundo'")
+        assert learning.refresh_content(force=True)
+        assert {learning.get_personalized_content('u1', category='expansao').content
+                for _ in range(50)} == {'segundo'}
+        with other:
+            other.execute("UPDATE adult_content SET is_active = 0 WHERE category = 'expansao'")
+        assert learning.refresh_content(force=True)
+        assert learning.get_personalized_content('u1', category='expansao') is None
+
+        # Gravações da própria instância não disparam recarga
+        learning.add_content('local', 'expansao', intensity=3)
+        assert not learning.refresh_content(force=True)
+        other.close()
+        learning.conn.close()
+    print_result(True, "Conteúdo externo recarregado periodicamente")
+
+
+if __name__ == "__main__":
+    test_sampler_matches_linear_scan()
+    test_sampler_distribution()
+    test_score_and_new_content_reach_sampler()
+    test_external_content_reloaded()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Teste dos Backups Online
+========================
+
+Verifica a cópia em passos com um escritor ativo, o recurso ao VACUUM INTO
+quando o banco muda a cada tentativa, a compressão verificada e a rotação.
+
+Uso:
+python tests/test_backup.py
+"""
+
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.backup import OnlineBackup, verify_backup
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def _create_db(db_path, rows=2000, wal=True):
+    conn = sqlite3.connect(db_path)
+    if wal:
+        conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE messages (id INTEGER PRIMARY KEY, text TEXT)')
+    conn.executemany('INSERT INTO messages (text) VALUES (?)', [('mensagem ' * 50,)] * rows)
+    conn.commit()
+    conn.close()
+
+
+def test_stepped_backup_with_live_writer():
+    """Escritor continua gravando durante a cópia; backup íntegro e compactado"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'eron_memory.db'
+        _create_db(db_path)
+        backup = OnlineBackup(Path(tmp) / 'backups', pages_per_step=16, step_sleep=0.002, max_restarts=2)
+
+        stop = threading.Event()
+        writes = []
+
+        def writer():
+            conn = sqlite3.connect(db_path, timeout=5)
+            while not stop.is_set():
+                with conn:
+                    conn.execute('INSERT INTO messages (text) VALUES (?)', ('nova',))
+                writes.append(1)
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            report = backup.backup(db_path)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert writes, "o escritor não deveria ficar bloqueado"
+        assert report['method'] in ('backup', 'vacuum_into')
+        assert report['compressed_bytes'] < report['bytes']
+        assert verify_backup(report['backup_path'])
+    print_result(True, "Backup online com escritor ativo")
+
+
+def test_vacuum_into_fallback():
+    """Banco alterado a cada passo: desiste da cópia incremental e usa VACUUM INTO"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'user_profile.db'
+        _create_db(db_path)
+        backup = OnlineBackup(Path(tmp) / 'backups', pages_per_step=1, step_sleep=0.001, max_restarts=0)
+
+        stop = threading.Event()
+
+        def writer():
+            conn = sqlite3.connect(db_path, timeout=5)
+            while not stop.is_set():
+                with conn:
+                    conn.execute('INSERT INTO messages (text) VALUES (?)', ('nova',))
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            report = backup.backup(db_path)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert report['method'] == 'vacuum_into' and report['restarts'] == 1
+        assert verify_backup(report['backup_path'])
+        assert not list((Path(tmp) / 'backups' / 'user_profile').glob('*.partial'))
+    print_result(True, "Recurso ao VACUUM INTO")
+
+
+def test_rollback_journal_deferred_without_blocking():
+    """Banco em rollback journal sempre alterado: adia o backup sem travar o escritor"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'eron_memory.db'
+        _create_db(db_path, wal=False)
+        backup = OnlineBackup(Path(tmp) / 'backups', pages_per_step=1, step_sleep=0.001, max_restarts=1)
+
+        stop = threading.Event()
+        locked = []
+
+        def writer():
+            conn = sqlite3.connect(db_path, timeout=0.1)
+            while not stop.is_set():
+                try:
+                    with conn:
+                        conn.execute('INSERT INTO messages (text) VALUES (?)', ('nova',))
+                except sqlite3.OperationalError:
+                    locked.append(1)
+                time.sleep(0.002)
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            summary = backup.backup_all([db_path])
+        finally:
+            stop.set()
+            thread.join()
+
+        assert summary['deferred'] == ['eron_memory.db'] and not summary['backups']
+        assert not locked, "o escritor não deveria receber 'database is locked'"
+        assert not list((Path(tmp) / 'backups' / 'eron_memory').glob('*'))
+    print_result(True, "Backup adiado em rollback journal")
+
+
+def test_rotation():
+    """Rotação mantém max_backups; um banco com erro não interrompe os demais"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'emotions.db'
+        _create_db(db_path, rows=200)
+        backup = OnlineBackup(Path(tmp) / 'backups', max_backups=2, step_sleep=0)
+
+        rotated = []
+        for i in range(3):
+            report = backup.backup(db_path)
+            rotated.extend(report['rotated'])
+            # Backups no mesmo segundo: renomear para simular dias distintos
+            Path(report['backup_path']).rename(
+                Path(report['backup_path']).with_name(f"emotions_2025010{i}_030000.db.gz"))
+        assert rotated == ['emotions_20250100_030000.db.gz']
+        assert [p.name for p in backup.list_backups('emotions')] == [
+            'emotions_20250102_030000.db.gz', 'emotions_20250101_030000.db.gz']
+
+        summary = backup.backup_all([db_path, Path(tmp) / 'ausente' / 'x.db'])
+        assert len(summary['backups']) == 1 and 'x.db' in summary['errors']
+        assert len(backup.list_backups('emotions')) == 2
+    print_result(True, "Rotação por max_backups")
+
+
+if __name__ == "__main__":
+    test_stepped_backup_with_live_writer()
+    test_vacuum_into_fallback()
+    test_rollback_journal_deferred_without_blocking()
+    test_rotation()
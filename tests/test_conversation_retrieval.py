@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Teste da Recuperação de Conversas por Relevância
+================================================
+
+Verifica a ordenação BM25, a exclusão da janela recente, a atualização
+incremental pelo save_message e o orçamento de tokens do contexto.
+
+Uso:
+python tests/test_conversation_retrieval.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.memory import EronMemory
+from core.conversation_retrieval import ConversationIndex, ConversationRetriever
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_bm25_ranking():
+    """Termos raros pesam mais e a janela recente fica de fora"""
+    index = ConversationIndex()
+    index.add(1, "minha cachorra Luna adora passear no parque")
+    index.add(2, "hoje o dia foi corrido no trabalho")
+    index.add(3, "o trabalho no parque foi cansativo")
+    index.add(4, "a Luna comeu minha meia de novo")
+
+    assert [message_id for _, message_id in index.search("como está a Luna?", k=5)] == [4, 1]
+    assert [message_id for _, message_id in index.search("como está a Luna?", k=5, skip_last=1)] == [1]
+    assert index.search("oi, tudo bem?", k=3) == []
+    print_result(True, "Ordenação BM25 e janela recente")
+
+
+def test_incremental_retrieval():
+    """Mensagens novas entram no índice e o contexto respeita o orçamento"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = EronMemory(str(Path(tmp) / 'memory.db'))
+        memory.save_message("Meu aniversário é dia 12 de março", "Anotado, 12 de março!", 'u1')
+        retriever = ConversationRetriever(memory)
+
+        # Índice carregado do banco no primeiro uso
+        assert retriever.retrieve('u1', "quando é meu aniversário?", skip_recent=0)[0]['message_id'] == 1
+
+        for i in range(6):
+            memory.save_message(f"falando de futebol {i}", "legal!", 'u1')
+        memory.save_message("vou viajar para Recife no aniversário", "Que ótimo!", 'u1')
+
+        hits = retriever.retrieve('u1', "quando é meu aniversário?", skip_recent=0)
+        assert [hit['message_id'] for hit in hits][:2] in ([1, 8], [8, 1])
+        assert [hit['message_id'] for hit in retriever.retrieve('u1', "aniversário", skip_recent=5)] == [1]
+
+        context = retriever.get_relevant_context('u1', "aniversário", skip_recent=0)
+        assert context.split('\n')[0] == "Usuário: Meu aniversário é dia 12 de março"
+        assert "Recife" in context
+        assert retriever.get_relevant_context('u1', "aniversário", skip_recent=0, token_budget=19).count('Usuário:') == 1
+        assert retriever.retrieve('outro', "aniversário") == []
+        retriever.conn.close()
+        memory.conn.close()
+    print_result(True, "Índice incremental e orçamento de tokens")
+
+
+if __name__ == "__main__":
+    test_bm25_ranking()
+    test_incremental_retrieval()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Teste do Resumo Contínuo das Conversas
+======================================
+
+Verifica o agendamento a cada K turnos, o resumo incremental que deixa de
+fora a janela recente e a espera pelo LLM ocioso.
+
+Uso:
+python tests/test_conversation_summary.py
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.memory import EronMemory
+from core.conversation_summary import ConversationSummarizer, LLMActivity
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_rolling_summary():
+    """Resumo a cada K turnos, incremental e sem a janela recente"""
+    prompts = []
+
+    def fake_generate(prompt):
+        prompts.append(prompt)
+        return f"resumo {len(prompts)}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = EronMemory(str(Path(tmp) / 'memory.db'))
+        summarizer = ConversationSummarizer(memory, every_turns=4, keep_recent=2,
+                                            generate=fake_generate,
+                                            activity=LLMActivity(idle_seconds=0))
+        for i in range(4):
+            memory.save_message(f"pergunta {i}", f"resposta {i}", 'u1')
+        summarizer.wait_pending()
+
+        assert summarizer.get_summary('u1') == "resumo 1"
+        assert "pergunta 1" in prompts[0] and "pergunta 2" not in prompts[0]
+
+        for i in range(4, 8):
+            memory.save_message(f"pergunta {i}", f"resposta {i}", 'u1')
+        summarizer.wait_pending()
+
+        # Segunda rodada: resumo anterior + somente as mensagens novas
+        assert prompts[1].startswith("RESUMO ATUAL:\nresumo 1")
+        assert "pergunta 1" not in prompts[1] and "pergunta 5" in prompts[1]
+        assert "pergunta 6" not in prompts[1]
+        assert summarizer.get_summary('u1') == "resumo 2"
+        assert summarizer.get_summary('outro') == ''
+        summarizer.conn.close()
+        memory.conn.close()
+    print_result(True, "Resumo contínuo incremental")
+
+
+def test_long_history_catches_up():
+    """Histórico maior que MAX_SOURCE_CHARS é resumido em rodadas seguidas"""
+    import core.conversation_summary as conversation_summary
+    prompts = []
+
+    def fake_generate(prompt):
+        prompts.append(prompt)
+        return f"resumo {len(prompts)}"
+
+    original_limit = conversation_summary.MAX_SOURCE_CHARS
+    conversation_summary.MAX_SOURCE_CHARS = 100
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory = EronMemory(str(Path(tmp) / 'memory.db'))
+            for i in range(20):
+                memory.save_message(f"pergunta {i}", f"resposta {i}", 'u1')
+            summarizer = ConversationSummarizer(memory, every_turns=100, keep_recent=2,
+                                                generate=fake_generate,
+                                                activity=LLMActivity(idle_seconds=0))
+            summarizer.schedule('u1')
+            summarizer.wait_pending()
+
+            last_message_id = summarizer.conn.execute(
+                "SELECT last_message_id FROM conversation_summaries WHERE user_id = 'u1'"
+            ).fetchone()[0]
+            assert len(prompts) > 1
+            assert last_message_id == 18
+            assert summarizer.get_summary('u1') == f"resumo {len(prompts)}"
+            summarizer.conn.close()
+            memory.conn.close()
+    finally:
+        conversation_summary.MAX_SOURCE_CHARS = original_limit
+    print_result(True, "Histórico longo resumido por completo")
+
+
+def test_waits_for_idle_llm():
+    """O worker não chama o modelo enquanto há requisição de chat"""
+    activity = LLMActivity(idle_seconds=0.05)
+    assert activity.is_idle()
+
+    release = threading.Event()
+    finished = []
+
+    def chat_request():
+        with activity.busy():
+            release.wait()
+
+    thread = threading.Thread(target=chat_request)
+    thread.start()
+    time.sleep(0.01)
+    assert not activity.wait_idle(timeout=0.05)
+
+    release.set()
+    thread.join()
+    started = time.monotonic()
+    assert activity.wait_idle(timeout=1)
+    finished.append(time.monotonic() - started)
+    assert finished[0] >= 0.04
+    print_result(True, "Resumidor espera o LLM ocioso")
+
+
+if __name__ == "__main__":
+    test_rolling_summary()
+    test_long_history_catches_up()
+    test_waits_for_idle_llm()
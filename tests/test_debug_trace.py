@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Teste do Tracer de Depuração
+============================
+
+Verifica os níveis por componente (inclusive TRACE), a formatação
+preguiçosa, a amostragem/truncamento dos dumps de payload e a troca de
+configuração em execução usada pela rota /admin/trace e pelo comando /trace.
+
+Uso:
+python tests/test_debug_trace.py
+"""
+
+import logging
+import random
+import sys
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.debug_trace import TRACE, DebugTracer, _parse_components, apply_trace_args, configure_trace
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+class CollectingHandler(logging.Handler):
+    """Guarda (nível, mensagem) dos registros emitidos"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, record.getMessage()))
+
+
+class CountingStr:
+    """Conta quantas vezes foi formatado"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'valor'
+
+
+def collecting_tracer(*components, **kwargs):
+    """Tracer cujos loggers entregam a um handler local (sem a fila global)"""
+    tracer = DebugTracer(**kwargs)
+    handler = CollectingHandler()
+    for component in components:
+        logger = logging.getLogger(f"eron.teste.trace.{component}")
+        logger.handlers[:] = [handler]
+        logger.propagate = False
+        logger.setLevel(TRACE)
+        tracer._loggers[component] = logger
+    return tracer, handler
+
+
+def test_component_levels():
+    """Nível padrão, nível por componente, TRACE e troca em tempo de execução"""
+    assert _parse_components('llm=DEBUG, telegram = trace ,inválido,=INFO') == {
+        'llm': logging.DEBUG, 'telegram': TRACE}
+
+    tracer, handler = collecting_tracer('llm', 'web', default_level='INFO',
+                                        component_levels={'llm': 'DEBUG'})
+    lazy = CountingStr()
+    tracer.debug('llm', "llm %s", 1)
+    tracer.debug('web', "web %s", lazy)
+    tracer.trace('llm', "llm trace")
+    tracer.info('web', "web info")
+    assert handler.records == [(logging.DEBUG, 'llm 1'), (logging.INFO, 'web info')]
+    assert lazy.calls == 0
+
+    tracer.set_level('TRACE', 'llm')
+    tracer.set_level('OFF')
+    tracer.trace('llm', "agora sim")
+    tracer.error('web', "silenciado")
+    tracer.reset_level('llm')
+    tracer.error('llm', "também silenciado")
+    assert handler.records[2:] == [(TRACE, 'agora sim')]
+    assert tracer.get_config()['default_level'] == 'OFF'
+    assert tracer.stats['emitted'] == 3
+    print_result(True, "Níveis por componente")
+
+
+def test_dump_sampling():
+    """Dumps só no nível TRACE, amostrados, avaliados sob demanda e truncados"""
+    tracer, handler = collecting_tracer('llm', component_levels={'llm': 'TRACE'},
+                                        payload_sample_rate=0.0, payload_max_chars=10)
+    evaluated = []
+    tracer.dump('llm', 'payload', lambda: evaluated.append(1) or 'x')
+    assert handler.records == [] and evaluated == []
+    assert tracer.stats['dumps_sampled_out'] == 1
+
+    tracer.set_sample_rate(5)
+    assert tracer.payload_sample_rate == 1.0
+    tracer.dump('llm', 'prompt', lambda: 'a' * 25)
+    assert handler.records == [(TRACE, 'prompt: aaaaaaaaaa... [+15 chars]')]
+
+    # Componente acima de TRACE: nem conta como amostra descartada
+    tracer.set_level('DEBUG', 'llm')
+    tracer.dump('llm', 'perfil', 'x')
+    assert tracer.stats == {'emitted': 0, 'dumps_emitted': 1, 'dumps_sampled_out': 1}
+
+    tracer.set_level('TRACE', 'llm')
+    tracer.set_sample_rate(0.25)
+    random.seed(29)
+    for _ in range(4000):
+        tracer.dump('llm', 'payload', 'x')
+    emitted = tracer.stats['dumps_emitted'] - 1
+    assert 0.22 < emitted / 4000 < 0.28, emitted
+    assert len(handler.records) == emitted + 1
+    print_result(True, "Amostragem dos dumps")
+
+
+def test_runtime_configuration():
+    """configure_trace e os argumentos do /trace validam antes de aplicar"""
+    tracer, handler = collecting_tracer('llm', default_level='INFO')
+
+    config_now = configure_trace(level='debug', component='llm', sample_rate='0.5', target=tracer)
+    assert config_now['component_levels'] == {'llm': 'DEBUG'}
+    assert config_now['payload_sample_rate'] == 0.5
+    tracer.debug('llm', "visível")
+    assert handler.records == [(logging.DEBUG, 'visível')]
+
+    for bad in ({'level': 'VERBOSO'}, {'sample_rate': 2}, {'reset': True}):
+        try:
+            configure_trace(target=tracer, **bad)
+            raise AssertionError(f"aceitou {bad}")
+        except ValueError:
+            pass
+
+    config_now = apply_trace_args(['WARNING', 'telegram=TRACE', 'llm=reset', 'sample=0.1'], target=tracer)
+    assert config_now['default_level'] == 'WARNING'
+    assert config_now['component_levels'] == {'telegram': 'TRACE'}
+    assert config_now['payload_sample_rate'] == 0.1
+
+    # Um argumento inválido não aplica nem os válidos anteriores
+    for args in (['ERROR', 'llm=VERBOSO'], ['OFF', 'sample=muito']):
+        try:
+            apply_trace_args(args, target=tracer)
+            raise AssertionError(f"aceitou {args}")
+        except ValueError:
+            pass
+    assert tracer.get_config()['default_level'] == 'WARNING'
+    assert apply_trace_args([], target=tracer) == tracer.get_config()
+    print_result(True, "Configuração do tracer em execução")
+
+
+if __name__ == "__main__":
+    test_component_levels()
+    test_dump_sampling()
+    test_runtime_configuration()
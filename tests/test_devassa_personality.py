@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Teste da Personalidade Devassa
+==============================
+
+Verifica o cache por usuário de get_devassa_personality: o estado
+(intensidade, gênero, estágio) é lido uma vez e relido depois de
+invalidate_devassa_state, inclusive pelos comandos /intensidade e /genero.
+
+Uso:
+python tests/test_devassa_personality.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai e Scripts18 para imports
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / 'Eron-18' / 'Scripts18'))
+
+from adult_commands import AdultCommandSystem
+from adult_personality_db import AdultPersonalityDB
+from devassa_personality import CONTENT_BASE, get_devassa_personality, invalidate_devassa_state
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def greeting_level(devassa):
+    """Nível de intensidade da saudação devolvida (pelas frases da base)"""
+    response = devassa.get_adaptive_response('oi')
+    for level, genders in CONTENT_BASE['saudacoes'].items():
+        for phrases in genders.values():
+            if any(response.startswith(phrase) for phrase in phrases):
+                return level
+    return None
+
+
+def test_invalidate_changes_next_state():
+    """Alteração externa só aparece após a invalidação; comandos já invalidam"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AdultPersonalityDB(str(Path(tmp) / 'adult_personality.db'))
+        profile = {'user_id': 'u1', 'user_name': 'amor', 'bot_gender': 'feminino'}
+
+        devassa = get_devassa_personality(db, profile)
+        assert devassa._get_state() == (2, 'feminino', 'inicial')
+        assert greeting_level(devassa) == 2
+        assert get_devassa_personality(db, profile) is devassa
+
+        # Gravação direta no banco: a instância em cache ainda usa o estado antigo
+        db.save_devassa_profile('u1', intensity_level=3)
+        assert get_devassa_personality(db, profile)._get_state()[0] == 2
+        invalidate_devassa_state('u1')
+        assert get_devassa_personality(db, profile)._get_state()[0] == 3
+        assert greeting_level(devassa) == 3
+
+        # Comandos do bot invalidam por conta própria
+        commands = AdultCommandSystem(db)
+        commands.has_active_adult_access = lambda user_id: True
+        assert commands.update_intensity('u1', 1)['status'] == 'updated'
+        assert commands.update_gender_preference('u1', 'masculino')['status'] == 'updated'
+        assert get_devassa_personality(db, profile)._get_state() == (1, 'masculino', 'inicial')
+
+        assert devassa.update_relationship_stage('u1', 30) == 'desenvolvendo'
+        assert get_devassa_personality(db, profile)._get_state()[2] == 'desenvolvendo'
+
+        # Outro usuário não é afetado
+        other = get_devassa_personality(db, {'user_id': 'u2', 'bot_gender': 'neutro'})
+        assert other is not devassa and other._get_state() == (2, 'neutro', 'inicial')
+        db.conn.close()
+    print_result(True, "Estado devassa relido após invalidação")
+
+
+if __name__ == "__main__":
+    test_invalidate_changes_next_state()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Teste do FastLearning
+=====================
+
+Verifica a busca de contextos pelo FTS5 (mesmos resultados que o LIKE), o
+limite de contextos por usuário e o cache de dicas do optimize_for_qwen
+(invalidação e validade).
+
+Uso:
+python tests/test_fast_learning.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from learning.fast_learning import FastLearning
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+CONTEXTS = [
+    ('123', 'tecnologia', 'gosta de computador', 0.9),
+    ('123', 'tecnologia', 'usa linux', 0.5),
+    ('123', 'saude', 'vai ao médico', 0.7),
+    ('123', 'educacao', 'estuda à noite', 0.6),
+    ('1234', 'tecnologia', 'outro usuário', 0.8),
+    ('user "x"', 'tecnologia', 'aspas no id', 0.4),
+    ('user "x"', 'geografia', 'mora na capital', 0.3),
+]
+
+
+def test_fts_matches_like():
+    """FTS5 e o caminho LIKE devolvem os mesmos contextos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        learning = FastLearning(str(Path(tmp) / 'fast_learning.db'))
+        assert learning.fts_enabled
+        for user_id, topic, data, importance in CONTEXTS:
+            learning.save_smart_context(user_id, topic, data, importance)
+
+        for user_id in ('123', '1234', 'user "x"', '999'):
+            for topic in ('tecnologia', 'saude', 'educacao', 'geografia', 'tec'):
+                learning.fts_enabled = True
+                fts = learning.get_learning_context(user_id, topic)
+                learning.fts_enabled = False
+                like = learning.get_learning_context(user_id, topic)
+                assert fts == like, (user_id, topic, fts, like)
+        learning.conn.close()
+    print_result(True, "Busca FTS5 equivale ao LIKE")
+
+
+def test_context_cap():
+    """Só os contextos mais importantes ficam; outros usuários não são afetados"""
+    with tempfile.TemporaryDirectory() as tmp:
+        learning = FastLearning(str(Path(tmp) / 'fast_learning.db'))
+        learning.optimization_config['max_contexts_per_user'] = 3
+        for i, importance in enumerate([0.5, 0.9, 0.1, 0.7, 0.3]):
+            learning.save_smart_context('u1', 'tecnologia', f'c{i}', importance)
+        learning.save_smart_context('u2', 'tecnologia', 'sozinho', 0.1)
+
+        rows = learning.conn.execute(
+            "SELECT context_data FROM smart_contexts WHERE user_id = 'u1' ORDER BY context_data"
+        ).fetchall()
+        assert [row[0] for row in rows] == ['c0', 'c1', 'c3']
+        assert learning.conn.execute(
+            "SELECT COUNT(*) FROM smart_contexts WHERE user_id = 'u2'").fetchone()[0] == 1
+        # Removidos também saem do índice FTS
+        contexts, _ = learning.get_learning_context('u1', 'tecnologia')
+        assert [c[0] for c in contexts] == ['c1', 'c3', 'c0']
+
+        # Limite menor aplicado a um banco já existente
+        learning.optimization_config['max_contexts_per_user'] = 1
+        assert learning.enforce_context_caps() == 2
+        contexts, _ = learning.get_learning_context('u1', 'tecnologia')
+        assert [c[0] for c in contexts] == ['c1']
+        learning.conn.close()
+    print_result(True, "Limite de contextos por usuário")
+
+
+def test_hint_cache():
+    """Dicas em cache descartadas ao aprender e expiradas após a validade"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'fast_learning.db')
+        learning = FastLearning(db_path)
+        learning.optimization_config['hint_cache_ttl'] = 60
+        profile = {'user_id': 'u1'}
+
+        assert learning.optimize_for_qwen('meu computador travou', profile) == []
+        learning.save_smart_context('u1', 'tecnologia', 'usa linux', 0.9)
+        assert learning.optimize_for_qwen('meu computador travou', profile) == [
+            'Contexto relevante: usa linux']
+
+        # Outro tópico não descarta as dicas de tecnologia
+        learning.optimize_for_qwen('fui ao médico', profile)
+        learning.conn.execute("UPDATE smart_contexts SET context_data = 'mudou por fora'")
+        learning.save_smart_context('u1', 'saude', 'vai ao médico', 0.5)
+        assert learning.optimize_for_qwen('meu computador travou', profile) == [
+            'Contexto relevante: usa linux']
+
+        # Padrões valem para todos os tópicos do usuário
+        learning.learn_response_pattern('u1', 'o que é linux?', 'um sistema')
+        hints = learning.optimize_for_qwen('meu computador travou', profile)
+        assert hints == ['Padrão eficaz anterior: um sistema', 'Contexto relevante: mudou por fora']
+
+        # Gravação de outro processo: vista só depois que a validade expira
+        learning.optimization_config['hint_cache_ttl'] = 0.2
+        learning.invalidate_hints('u1')
+        learning.optimize_for_qwen('meu computador travou', profile)
+        other = FastLearning(db_path)
+        other.save_smart_context('u1', 'tecnologia', 'trocou de notebook', 1.0)
+        assert learning.optimize_for_qwen('meu computador travou', profile)[1] == \
+            'Contexto relevante: mudou por fora'
+        time.sleep(0.25)
+        assert learning.optimize_for_qwen('meu computador travou', profile)[1] == \
+            'Contexto relevante: trocou de notebook'
+        for system in (learning, other):
+            system.conn.close()
+    print_result(True, "Cache de dicas com invalidação e validade")
+
+
+if __name__ == "__main__":
+    test_fts_matches_like()
+    test_context_cap()
+    test_hint_cache()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Teste do Sistema de Logging
+===========================
+
+Verifica a fila limitada do logging: contadores de enfileirados e
+descartados (inclusive com várias threads), a redação de dados sensíveis
+feita pelo listener e o encerramento repetido.
+
+Uso:
+python tests/test_logging_system.py
+"""
+
+import logging
+import queue
+import sys
+import threading
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.logging_system import BoundedQueueHandler, EronLogger, RedactingQueueListener
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+class CollectingHandler(logging.Handler):
+    """Guarda as mensagens recebidas pelo listener"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def isolated_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_drop_counters_when_full():
+    """Fila cheia: registros descartados e contados por nível, sem bloquear"""
+    handler = BoundedQueueHandler(queue.Queue(maxsize=3))
+    handler.ERROR_PUT_TIMEOUT = 0.01
+    logger = isolated_logger('eron.teste.fila', handler)
+
+    for i in range(5):
+        logger.info("mensagem %d", i)
+    logger.warning("aviso")
+    logger.error("erro")
+    assert handler.counts() == (3, {'INFO': 2, 'WARNING': 1, 'ERROR': 1})
+    assert [handler.queue.get_nowait().getMessage() for _ in range(3)] == [
+        'mensagem 0', 'mensagem 1', 'mensagem 2']
+
+    # Várias threads: nenhum incremento perdido
+    handler = BoundedQueueHandler(queue.Queue(maxsize=1000))
+    logger = isolated_logger('eron.teste.threads', handler)
+    threads = [threading.Thread(target=lambda: [logger.info("x") for _ in range(250)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    enqueued, dropped = handler.counts()
+    assert enqueued == 1000 and dropped == {'INFO': 1000}
+    print_result(True, "Contadores da fila limitada")
+
+
+def test_listener_redacts_once():
+    """Listener aplica a redação antes de entregar aos handlers"""
+    log_queue = queue.Queue(maxsize=100)
+    collected, plain = CollectingHandler(), CollectingHandler()
+    logger = isolated_logger('eron.teste.redacao', BoundedQueueHandler(log_queue))
+
+    listener = RedactingQueueListener(log_queue, collected)
+    listener.start()
+    logger.info("login com token=abc123 do usuário %s", 123456789)
+    listener.stop()
+
+    raw = RedactingQueueListener(log_queue, plain, redact=False)
+    raw.start()
+    logger.info("token=abc123")
+    raw.stop()
+
+    assert len(collected.messages) == 1
+    assert 'abc123' not in collected.messages[0] and '123456789' not in collected.messages[0]
+    assert collected.messages[0].count('[REDACTED]') == 2
+    assert plain.messages == ['token=abc123']
+    print_result(True, "Redação no listener")
+
+
+def test_shutdown_is_idempotent():
+    """shutdown esvazia a fila uma vez; chamadas seguintes não falham"""
+    log_queue = queue.Queue(maxsize=10)
+    collected = CollectingHandler()
+    eron_logger = EronLogger.__new__(EronLogger)
+    eron_logger.listener = RedactingQueueListener(log_queue, collected)
+    eron_logger.listener.start()
+
+    isolated_logger('eron.teste.shutdown', BoundedQueueHandler(log_queue)).info("última")
+    eron_logger.shutdown()
+    eron_logger.shutdown()
+    assert collected.messages == ['última'] and eron_logger.listener is None
+    print_result(True, "Encerramento do listener")
+
+
+if __name__ == "__main__":
+    test_drop_counters_when_full()
+    test_listener_redacts_once()
+    test_shutdown_is_idempotent()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Teste do Agendador de Manutenção
+================================
+
+Verifica as expressões cron, a execução única por horário entre dois
+agendadores (web e bot) no mesmo banco de estado e o registro de falhas.
+
+Uso:
+python tests/test_maintenance.py
+"""
+
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.maintenance import CronSchedule, MaintenanceScheduler, backup_schedule
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_cron_schedule():
+    """Próximos horários de expressões cron comuns"""
+    base = datetime(2025, 1, 31, 10, 7)  # sexta-feira
+    assert CronSchedule('*/15 * * * *').next_after(base) == datetime(2025, 1, 31, 10, 15)
+    assert CronSchedule('30 4 * * *').next_after(base) == datetime(2025, 2, 1, 4, 30)
+    assert CronSchedule('0 9 * * 1-5').next_after(base) == datetime(2025, 2, 3, 9, 0)
+    assert CronSchedule('0 0 1 * *').next_after(base) == datetime(2025, 2, 1, 0, 0)
+    assert CronSchedule('0 12 * 12 7').next_after(base) == datetime(2025, 12, 7, 12, 0)
+    assert CronSchedule('@hourly').next_after(base) == datetime(2025, 1, 31, 11, 0)
+    assert backup_schedule(6) == '0 */6 * * *' and backup_schedule(24) == '0 3 * * *'
+    for invalid in ('* * *', '61 * * * *', '0 0 30 2 *'):
+        try:
+            CronSchedule(invalid).next_after(base)
+            assert False, invalid
+        except ValueError:
+            pass
+    print_result(True, "Expressões cron")
+
+
+def test_single_run_across_processes():
+    """Dois agendadores no mesmo banco executam cada horário uma vez"""
+    calls = []
+    with tempfile.TemporaryDirectory() as tmp:
+        state_db = str(Path(tmp) / 'maintenance.db')
+        web = MaintenanceScheduler(state_db, jitter_seconds=0)
+        bot = MaintenanceScheduler(state_db, jitter_seconds=0)
+        for scheduler in (web, bot):
+            scheduler.add_job('checkpoint', lambda: calls.append('checkpoint'), '*/5 * * * *')
+            scheduler.add_job('falha', lambda: 1 / 0, '*/5 * * * *')
+
+        # Nada vence antes do primeiro horário
+        assert web.run_pending() == [] and bot.run_pending() == []
+
+        later = time.time() + 600
+        assert web.run_pending(now=later) == ['checkpoint', 'falha']
+        assert bot.run_pending(now=later) == []
+        assert calls == ['checkpoint']
+
+        status = {job['name']: job for job in bot.get_status()}
+        assert status['checkpoint']['last_status'] == 'ok' and status['checkpoint']['runs'] == 1
+        assert status['falha']['last_status'] == 'error' and 'ZeroDivisionError' in status['falha']['last_error']
+        assert status['checkpoint']['next_run_at'] > time.time()
+
+        # Trava vencida de um processo que caiu é retomada
+        with bot.conn:
+            bot.conn.execute("UPDATE maintenance_jobs SET lease_owner = 'morto', lease_expires_at = 0, next_run_at = 0")
+        assert bot.run_job('checkpoint') == 'ok'
+        assert calls == ['checkpoint', 'checkpoint']
+        web.conn.close()
+        bot.conn.close()
+    print_result(True, "Execução única entre processos")
+
+
+if __name__ == "__main__":
+    test_cron_schedule()
+    test_single_run_across_processes()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Teste do Histórico Paginado do EronMemory
+=========================================
+
+Verifica a iteração em lotes por keyset, as páginas do chat (mais recentes
+primeiro, em ordem cronológica) e a exportação JSONL.
+
+Uso:
+python tests/test_memory_history.py
+"""
+
+import sys
+import json
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.memory import EronMemory
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def _memory_with_history(tmp):
+    memory = EronMemory(str(Path(tmp) / 'memory.db'))
+    for i in range(7):
+        memory.save_message(f"pergunta {i}", f"resposta {i}", 'u1')
+        memory.save_message(f"outra {i}", "ok", 'u2')
+    memory.save_message("sem dono", "legado", None)
+    return memory
+
+
+def test_keyset_iteration_and_pages():
+    """Lotes por keyset e páginas do chat sem mensagens de outros usuários"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = _memory_with_history(tmp)
+
+        statements = []
+        memory.conn.set_trace_callback(statements.append)
+        rows = list(memory.iter_messages('u1', batch_size=3))
+        memory.conn.set_trace_callback(None)
+        assert [row[1] for row in rows] == [f"pergunta {i}" for i in range(7)]
+        assert sum('SELECT' in sql for sql in statements) == 3
+
+        page = memory.get_messages_page('u1', limit=3)
+        assert [m['user_message'] for m in page['messages']] == ["pergunta 4", "pergunta 5", "pergunta 6"]
+        page = memory.get_messages_page('u1', page['next_before_id'], limit=3)
+        assert [m['user_message'] for m in page['messages']] == ["pergunta 1", "pergunta 2", "pergunta 3"]
+        page = memory.get_messages_page('u1', page['next_before_id'], limit=3)
+        assert [m['user_message'] for m in page['messages']] == ["pergunta 0"]
+        assert page['next_before_id'] is None
+        memory.conn.close()
+    print_result(True, "Iteração por keyset e páginas do chat")
+
+
+def test_export_jsonl():
+    """Exportação JSONL com uma mensagem por linha"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = _memory_with_history(tmp)
+        output_path = Path(tmp) / 'u2.jsonl'
+        assert memory.export_jsonl('u2', output_path, batch_size=2) == 7
+
+        records = [json.loads(line) for line in output_path.read_text(encoding='utf-8').splitlines()]
+        assert [r['user_message'] for r in records] == [f"outra {i}" for i in range(7)]
+        assert set(records[0]) == {'id', 'user_message', 'eron_response', 'timestamp'}
+        memory.conn.close()
+    print_result(True, "Exportação JSONL em streaming")
+
+
+if __name__ == "__main__":
+    test_keyset_iteration_and_pages()
+    test_export_jsonl()
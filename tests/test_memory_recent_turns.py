@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Teste do Buffer de Turnos Recentes do EronMemory
+================================================
+
+Verifica a limpeza feita na gravação, o contexto servido do buffer sem
+consultar o banco e o descarte LRU de usuários inativos.
+
+Uso:
+python tests/test_memory_recent_turns.py
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.memory import EronMemory, clean_context_line
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_clean_context_line():
+    """Perguntas de personalização e apresentações do bot são removidas"""
+    assert clean_context_line("Assistente: Como você gostaria que eu me chamasse?") is None
+    assert clean_context_line("Assistente: Eu me chamo ERON 💖 Tudo ótimo por aqui!") == "Assistente:  Tudo ótimo por aqui!"
+    assert clean_context_line("Eu me chamo ERON 💖 oi") is None
+    assert clean_context_line("Usuário: oi") == "Usuário: oi"
+    print_result(True, "Linhas de contexto limpas")
+
+
+def test_context_served_from_buffer():
+    """Depois do primeiro acesso, o contexto não consulta o banco"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = EronMemory(str(Path(tmp) / 'memory.db'), recent_turns=3, max_users=2)
+        for i in range(4):
+            memory.save_message(f"pergunta {i}", f"Eu me chamo ERON 💖 resposta número {i}", 'u1')
+
+        statements = []
+        memory.conn.set_trace_callback(statements.append)
+        clean = memory.get_clean_context('u1', limit=2)
+        raw = memory.get_recent_context('u1', limit=2)
+        memory.save_message("pergunta 4", "resposta número 4", 'u1')
+        memory.conn.set_trace_callback(None)
+
+        assert clean.split('\n') == [
+            "Usuário: pergunta 2", "Assistente:  resposta número 2",
+            "Usuário: pergunta 3", "Assistente:  resposta número 3",
+        ]
+        assert raw.startswith("Usuário: pergunta 2\nAssistente: Eu me chamo ERON 💖")
+        assert not any(sql.lstrip().upper().startswith('SELECT') for sql in statements)
+        assert memory.get_recent_context('u1', limit=3).count('Usuário:') == 3
+
+        # Limite maior que o buffer continua vindo do banco
+        assert memory.get_recent_context('u1', limit=10).count('Usuário:') == 5
+        memory.conn.close()
+    print_result(True, "Contexto servido do buffer em memória")
+
+
+def test_lru_eviction():
+    """Usuários inativos saem do buffer e são recarregados do banco"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = EronMemory(str(Path(tmp) / 'memory.db'), recent_turns=2, max_users=2)
+        for user_id in ('a', 'b', 'c'):
+            memory.save_message(f"oi de {user_id}", "olá!", user_id)
+
+        assert list(memory._recent) == ['b', 'c']
+        assert memory.get_recent_context('a', limit=2) == "Usuário: oi de a\nAssistente: olá!"
+        assert list(memory._recent) == ['c', 'a']
+        memory.conn.close()
+    print_result(True, "Usuários inativos descartados por LRU")
+
+
+if __name__ == "__main__":
+    test_clean_context_line()
+    test_context_served_from_buffer()
+    test_lru_eviction()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Teste do Registro de Métricas
+=============================
+
+Verifica contadores, histogramas (buckets cumulativos), o formato de texto
+do Prometheus, a coleta concorrente com a criação de labels e a medição de
+tempo das conexões SQLite.
+
+Uso:
+python tests/test_metrics.py
+"""
+
+import sys
+import sqlite3
+import threading
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.metrics import MetricsRegistry, TimedConnection, SQLITE_QUERY_SECONDS
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_histogram_buckets():
+    """Buckets cumulativos, soma e contagem"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_latency_seconds', 'Latência de teste', ['route'],
+                                   buckets=(0.1, 0.5, 1.0))
+
+    for value in (0.05, 0.3, 0.3, 2.0):
+        histogram.labels('chat').observe(value)
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{route="chat",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="chat",le="0.5"} 3' in text
+    assert 'test_latency_seconds_bucket{route="chat",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{route="chat",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{route="chat"} 4' in text
+    print_result(True, "Histograma exportado corretamente")
+
+
+def test_counter_and_labels():
+    """Contador com labels e escape de valores"""
+    registry = MetricsRegistry()
+    counter = registry.counter('test_cache_total', 'Cache de teste', ['cache', 'result'])
+    counter.labels('perfil', 'hit').inc()
+    counter.labels(cache='perfil', result='hit').inc(2)
+    counter.labels('perfil "x"', 'miss').inc()
+
+    text = registry.render()
+    assert '# TYPE test_cache_total counter' in text
+    assert 'test_cache_total{cache="perfil",result="hit"} 3' in text
+    assert 'test_cache_total{cache="perfil \\"x\\"",result="miss"} 1' in text
+    assert registry.counter('test_cache_total', 'outra ajuda') is counter
+    print_result(True, "Contador com labels funcionando")
+
+
+def test_render_while_creating_labels():
+    """Coleta enquanto outras threads criam labels e métricas novas"""
+    registry = MetricsRegistry()
+    counter = registry.counter('test_users_total', 'Usuários de teste', ['user'])
+    done = threading.Event()
+
+    def create_labels():
+        for i in range(20000):
+            counter.labels(f'u{i}').inc()
+            if i % 1000 == 0:
+                registry.gauge(f'test_gauge_{i}', 'Gauge de teste').set(i)
+        done.set()
+
+    thread = threading.Thread(target=create_labels)
+    thread.start()
+    while not done.is_set():
+        registry.render()
+    thread.join()
+
+    text = registry.render()
+    assert text.count('test_users_total{user=') == 20000
+    assert 'test_gauge_19000 19000' in text
+    print_result(True, "Coleta concorrente com criação de labels")
+
+
+def test_timed_connection():
+    """Conexão SQLite instrumentada registra tempo por banco"""
+    conn = sqlite3.connect(':memory:', factory=TimedConnection)
+    child = SQLITE_QUERY_SECONDS.labels(conn.db_label)
+    before = child.count
+
+    with conn:
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)')
+        conn.executemany('INSERT INTO t (v) VALUES (?)', [('a',), ('b',)])
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM t')
+    assert cursor.fetchone()[0] == 2
+    conn.close()
+
+    assert child.count - before == 3
+    print_result(True, "Tempo de SQLite registrado por banco")
+
+
+if __name__ == "__main__":
+    test_histogram_buckets()
+    test_counter_and_labels()
+    test_render_while_creating_labels()
+    test_timed_connection()
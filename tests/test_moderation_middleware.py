@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Teste do Middleware de Moderação
+================================
+
+Verifica o executor limitado do middleware: verificação que passa do prazo
+libera a mensagem (fail-open) e, com o executor saturado, novas mensagens
+passam sem enfileirar trabalho.
+
+Uso:
+python tests/test_moderation_middleware.py
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.telegram_moderation_middleware import ModerationMiddleware
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def text_update(user_id, text):
+    """Update mínimo com o que o middleware lê"""
+    return SimpleNamespace(
+        message=SimpleNamespace(text=text, message_id=1),
+        effective_user=SimpleNamespace(id=user_id, first_name='Teste'),
+        effective_chat=SimpleNamespace(id=user_id),
+    )
+
+
+def test_deadline_and_overload_fail_open():
+    """Prazo estourado e executor saturado liberam a mensagem"""
+    middleware = ModerationMiddleware()
+    middleware.enabled = True
+    middleware.check_timeout = 0.05
+    middleware.max_pending_checks = 1
+
+    release = threading.Event()
+    calls = []
+
+    def slow_check(text, user_id, chat_id):
+        calls.append(text)
+        if text == 'lenta':
+            release.wait(5)
+        return False, {'action': 'allow'}
+
+    middleware._check_sync = slow_check
+
+    async def scenario():
+        started = time.monotonic()
+        assert await middleware.check_message(text_update(1, 'lenta'), None)
+        assert time.monotonic() - started < 1
+        assert middleware.stats['checks_timed_out'] == 1
+
+        # A thread da verificação lenta ainda ocupa a única vaga
+        assert middleware._pending_checks == 1
+        assert await middleware.check_message(text_update(2, 'outra'), None)
+        assert middleware.stats['checks_skipped_overload'] == 1
+        assert calls == ['lenta']
+
+        # Vaga liberada quando a thread termina de fato
+        release.set()
+        deadline = time.monotonic() + 5
+        while middleware._pending_checks and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert middleware._pending_checks == 0
+        assert await middleware.check_message(text_update(2, 'outra'), None)
+        assert calls == ['lenta', 'outra']
+
+        # Executor encerrado: erro na submissão também libera a mensagem
+        middleware.shutdown(wait=True)
+        assert await middleware.check_message(text_update(3, 'depois'), None)
+        assert middleware._pending_checks == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        middleware.shutdown(wait=True)
+    assert middleware.stats['messages_checked'] == 3
+    print_result(True, "Moderação com prazo e limite de fila (fail-open)")
+
+
+if __name__ == "__main__":
+    test_deadline_and_overload_fail_open()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Teste dos Rollups de Moderação
+==============================
+
+Verifica que os rollups por hora e por dia batem com moderation_logs, tanto
+gravados junto com cada evento quanto reconstruídos por _backfill_rollups, e
+o relatório exportado em streaming (JSON e CSV).
+
+Uso:
+python tests/test_moderation_rollups.py
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.adult_content_moderator import ContentSeverity, ModerationAction, moderator
+from tools.moderation_manager import ModerationManager
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+EVENTS = [
+    ('u1', ContentSeverity.MILD, ModerationAction.WARN),
+    ('u1', ContentSeverity.MILD, ModerationAction.WARN),
+    ('u1', ContentSeverity.SEVERE, ModerationAction.BLOCK),
+    ('u2', ContentSeverity.MODERATE, ModerationAction.FILTER),
+    ('u3', ContentSeverity.MILD, ModerationAction.WARN),
+]
+
+BUCKET_EXPRS = {
+    'hourly': "strftime('%Y-%m-%d %H:00', timestamp, 'localtime')",
+    'daily': "strftime('%Y-%m-%d', timestamp, 'localtime')",
+}
+
+
+class TemporaryModerationDB:
+    """Aponta o moderador global para um banco temporário durante o teste"""
+
+    def __enter__(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = moderator.db_path
+        moderator.db_path = Path(self.tmp.name) / 'adult_moderation.db'
+        moderator._init_databases()
+        return moderator
+
+    def __exit__(self, *exc):
+        moderator.db_path = self.saved
+        self.tmp.cleanup()
+
+
+def log_events(mod):
+    for i, (user_id, severity, action) in enumerate(EVENTS):
+        mod._log_moderation_event({
+            'user_id': user_id, 'content_hash': f'hash{i}', 'flagged_words': ['palavra'],
+            'severity': severity, 'action': action, 'reason': 'teste', 'confidence': 0.9
+        })
+
+
+def rollup_rows(conn, granularity):
+    return sorted(conn.execute(f'''
+        SELECT bucket, severity, action_taken, user_id, event_count
+        FROM {moderator.ROLLUP_TABLES[granularity]}
+    ''').fetchall())
+
+
+def grouped_logs(conn, granularity):
+    return sorted(conn.execute(f'''
+        SELECT {BUCKET_EXPRS[granularity]}, severity, action_taken, user_id, COUNT(*)
+        FROM moderation_logs GROUP BY 1, 2, 3, 4
+    ''').fetchall())
+
+
+def test_rollups_match_logs():
+    """Rollups gravados com o log e reconstruídos pelo backfill batem com o GROUP BY"""
+    with TemporaryModerationDB() as mod:
+        log_events(mod)
+        with sqlite3.connect(mod.db_path) as conn:
+            for granularity in mod.ROLLUP_TABLES:
+                assert rollup_rows(conn, granularity) == grouped_logs(conn, granularity)
+            written = {g: rollup_rows(conn, g) for g in mod.ROLLUP_TABLES}
+
+            # Banco antigo sem rollups: o backfill reconstrói os mesmos contadores
+            for table in mod.ROLLUP_TABLES.values():
+                conn.execute(f'DELETE FROM {table}')
+            mod._backfill_rollups(conn)
+            for granularity in mod.ROLLUP_TABLES:
+                assert rollup_rows(conn, granularity) == written[granularity]
+
+            # Rollups já presentes não são recontados
+            mod._backfill_rollups(conn)
+            assert rollup_rows(conn, 'daily') == written['daily']
+
+        stats = mod.get_moderation_stats(days=1)['action_stats']
+        assert stats == {'mild_warn': 3, 'severe_block': 1, 'moderate_filter': 1}
+    print_result(True, "Rollups batem com moderation_logs")
+
+
+def test_streaming_report():
+    """Relatório JSON e CSV com todos os eventos e os rollups diários"""
+    cwd = os.getcwd()
+    with TemporaryModerationDB() as mod, tempfile.TemporaryDirectory() as out:
+        log_events(mod)
+        manager = ModerationManager()
+        manager.db_path = mod.db_path
+        os.chdir(out)
+        try:
+            report = json.loads(Path(manager.export_report(days=1, format='json')).read_text('utf-8'))
+            with open(manager.export_report(days=1, format='csv'), encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f))
+            assert manager.export_report(days=1, format='xml') is None
+        finally:
+            os.chdir(cwd)
+
+        rollups = list(mod.iter_rollups(1, 'daily'))
+        assert report['total_events'] == len(report['events']) == len(EVENTS)
+        assert report['daily_rollups'] == rollups
+        assert sum(row['count'] for row in rollups) == len(EVENTS)
+        assert {e['user_id'] for e in report['events']} == {'u1', 'u2', 'u3'}
+
+        assert [r['record_type'] for r in rows].count('event') == len(EVENTS)
+        assert [(r['bucket_or_timestamp'], r['user_id'], r['severity'], r['action'], int(r['count']))
+                for r in rows if r['record_type'] == 'rollup'] == \
+            [(r['bucket'], r['user_id'], r['severity'], r['action'], r['count']) for r in rollups]
+    print_result(True, "Relatório em streaming (JSON e CSV)")
+
+
+if __name__ == "__main__":
+    test_rollups_match_logs()
+    test_streaming_report()
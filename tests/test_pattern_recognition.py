@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Teste da Persistência do Reconhecimento de Padrões
+==================================================
+
+Verifica a fusão de duplicatas antigas na chave única, a agregação em
+memória gravada com upsert e o resumo por usuário servido sem consultar o
+banco.
+
+Uso:
+python tests/test_pattern_recognition.py
+"""
+
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from learning.pattern_recognition import PatternRecognitionSystem
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('''
+        SELECT user_id, pattern_type, pattern_data, frequency, ROUND(confidence_score, 2)
+        FROM user_patterns ORDER BY pattern_type, pattern_data
+    ''').fetchall()
+    conn.close()
+    return rows
+
+
+def test_duplicates_merged_into_unique_key():
+    """Bancos antigos com linhas repetidas ganham a chave única"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'patterns.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE user_patterns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                pattern_type TEXT NOT NULL,
+                pattern_data TEXT NOT NULL,
+                frequency INTEGER DEFAULT 1,
+                last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+                confidence_score REAL DEFAULT 0.5,
+                context TEXT
+            )
+        ''')
+        conn.executemany('''
+            INSERT INTO user_patterns (user_id, pattern_type, pattern_data, frequency, confidence_score)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [('u1', 'sentiment', 'positive', 2, 0.4), ('u1', 'sentiment', 'positive', 3, 0.6)])
+        conn.commit()
+        conn.close()
+
+        system = PatternRecognitionSystem(db_path)
+        system.conn.close()
+        assert _rows(db_path) == [('u1', 'sentiment', 'positive', 5, 0.6)]
+    print_result(True, "Duplicatas fundidas na chave única")
+
+
+def test_aggregated_upsert_and_summary():
+    """Ocorrências agregadas em memória e gravadas com as mesmas regras"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'patterns.db')
+        system = PatternRecognitionSystem(db_path)
+
+        for _ in range(3):
+            system._save_patterns('u1', {'sentiment': 'positive', 'topics': ['work']})
+        system._save_patterns('u1', {'sentiment': 'negative'})
+
+        # Ainda nada gravado, mas o resumo já responde
+        assert _rows(db_path) == []
+        patterns = system.get_user_patterns('u1')
+        assert patterns[0]['type'] in ('sentiment', 'topics') and patterns[0]['frequency'] == 3
+        assert system.get_user_patterns('u1', 'topics')[0]['data'] == ['work']
+        assert system.predict_user_preference('u1', '')['topics_of_interest'] == ['work']
+
+        assert system.flush_patterns() == 3
+        system._save_patterns('u1', {'sentiment': 'positive'})
+        system.flush_patterns()
+        assert _rows(db_path) == [
+            ('u1', 'sentiment', 'negative', 1, 0.3),
+            ('u1', 'sentiment', 'positive', 4, 0.6),
+            ('u1', 'topics', '["work"]', 3, 0.5),
+        ]
+
+        # Resumo recarregado do banco confere com o que estava em memória
+        summary = {(p['type'], str(p['data'])): p['frequency'] for p in system.get_user_patterns('u1')}
+        system._summaries.clear()
+        reloaded = {(p['type'], str(p['data'])): p['frequency'] for p in system.get_user_patterns('u1')}
+        assert summary == reloaded
+        system.conn.close()
+    print_result(True, "Upsert em lote e resumo por usuário consistentes")
+
+
+if __name__ == "__main__":
+    test_duplicates_merged_into_unique_key()
+    test_aggregated_upsert_and_summary()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Teste do Detector de Personalização
+===================================
+
+Verifica as intenções detectadas (nome, nome do bot, personalidade,
+linguagem e tópicos), a saída antecipada sem palavras-gatilho e a supressão
+de gravações quando nada mudou.
+
+Uso:
+python tests/test_personalization_detector.py
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.personalization_detector import (
+    telegram_personalization_detector, web_personalization_detector,
+    changed_fields, has_personalization_intent
+)
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_detected_intents():
+    """Campos detectados nas frases de personalização"""
+    detect = telegram_personalization_detector.detect
+    assert detect("Meu nome é romario") == {'user_name': 'Romario'}
+    assert detect("meu nome não é Ana?") == {'user_name': 'Ana'}
+    assert detect("Quero que se chame Joana e seja divertida") == {
+        'bot_name': 'Joana', 'bot_personality': 'divertido'
+    }
+    assert detect("prefiro algo formal e técnico") == {
+        'bot_personality': 'formal', 'bot_language': 'técnico'
+    }
+    assert detect("Gosto de futebol, música") == {'preferred_topics': 'futebol, música'}
+    print_result(True, "Intenções de personalização detectadas")
+
+
+def test_early_exit_and_single_word():
+    """Mensagens comuns não geram atualizações; o web aceita nome de uma palavra"""
+    assert telegram_personalization_detector.detect("Qual a previsão do tempo amanhã?") == {}
+    assert telegram_personalization_detector.detect("Carlos") == {}
+    assert web_personalization_detector.detect("Carlos") == {'user_name': 'Carlos'}
+    assert has_personalization_intent("pode me chamar de Zé")
+    assert not has_personalization_intent("bom dia")
+    print_result(True, "Saída antecipada sem palavras-gatilho")
+
+
+def test_changed_fields():
+    """Somente campos diferentes do perfil salvo são gravados"""
+    profile = {'user_name': 'Romario', 'bot_name': 'ERON'}
+    assert changed_fields({'user_name': 'Romario'}, profile) == {}
+    assert changed_fields({'user_name': 'Romario', 'bot_name': 'Joana'}, profile) == {'bot_name': 'Joana'}
+    assert changed_fields({'user_name': 'Ana'}, None) == {'user_name': 'Ana'}
+    print_result(True, "Gravações sem mudança suprimidas")
+
+
+if __name__ == "__main__":
+    test_detected_intents()
+    test_early_exit_and_single_word()
+    test_changed_fields()
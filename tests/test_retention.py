@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Teste do Motor de Retenção
+==========================
+
+Verifica a remoção em lotes das linhas vencidas, o arquivamento mensal
+compactado, as políticas sem arquivo, o incremental_vacuum e a invalidação
+dos caches do histórico (turnos recentes, índices BM25 e resumos).
+
+Uso:
+python tests/test_retention.py
+"""
+
+import sys
+import gzip
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.conversation_retrieval import ConversationRetriever
+from core.conversation_summary import ConversationSummarizer, LLMActivity
+from core.memory import EronMemory
+from core.retention import RetentionEngine, RetentionPolicy, record_purged_messages
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def _create_db(db_path, incremental=False):
+    conn = sqlite3.connect(db_path)
+    if incremental:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    conn.execute('CREATE TABLE messages (id INTEGER PRIMARY KEY, user_id TEXT, user_message TEXT, timestamp DATETIME)')
+    conn.execute('CREATE TABLE content_cache (content_hash TEXT PRIMARY KEY, last_checked DATETIME)')
+    old = [(f'u{i % 2}', 'x' * 500, f'2020-0{1 + i % 2}-15 10:00:00') for i in range(10)]
+    new = [('u0', 'recente', '2999-01-01 00:00:00')] * 3
+    conn.executemany('INSERT INTO messages (user_id, user_message, timestamp) VALUES (?, ?, ?)', old + new)
+    conn.executemany('INSERT INTO content_cache VALUES (?, ?)',
+                     [('a', '2020-01-01 00:00:00'), ('b', '2999-01-01 00:00:00')])
+    conn.commit()
+    conn.close()
+
+
+def test_batched_delete_and_archive():
+    """Linhas vencidas arquivadas por mês e removidas em lotes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'memory.db'
+        _create_db(db_path, incremental=True)
+        engine = RetentionEngine([
+            RetentionPolicy(db_path, 'messages', 'timestamp', 30),
+            RetentionPolicy(db_path, 'content_cache', 'last_checked', 1, archive=False),
+            RetentionPolicy(Path(tmp) / 'ausente.db', 'messages', 'timestamp', 30),
+        ], archive_dir=Path(tmp) / 'archive', batch_size=4, pause_seconds=0, cleanup_helpers=[])
+
+        assert engine.run(dry_run=True)['deleted_total'] == 11
+
+        report = engine.run()
+        messages, cache, missing = report['tables']
+        assert (messages['deleted'], messages['archived'], messages['batches']) == (10, 10, 3)
+        assert (cache['deleted'], cache['archived']) == (1, 0)
+        assert missing['skipped'] == 'banco inexistente'
+        assert report['vacuumed_pages']['memory.db'] > 0
+
+        january = Path(tmp) / 'archive' / 'memory' / 'messages' / '2020-01.jsonl.gz'
+        with gzip.open(january, 'rt', encoding='utf-8') as archive:
+            records = [json.loads(line) for line in archive]
+        assert len(records) == 5 and '_rowid' not in records[0] and records[0]['user_id'] == 'u0'
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0] == 3
+        assert conn.execute('SELECT content_hash FROM content_cache').fetchall() == [('b',)]
+        assert conn.execute('PRAGMA freelist_count').fetchone()[0] == 0
+        conn.close()
+
+        # Segunda execução não encontra nada novo
+        assert engine.run()['deleted_total'] == 0
+    print_result(True, "Remoção em lotes com arquivo mensal")
+
+
+def test_enable_incremental_vacuum():
+    """Conversão para auto_vacuum=INCREMENTAL feita uma única vez"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'memory.db'
+        _create_db(db_path)
+        assert RetentionEngine.enable_incremental_vacuum(db_path)
+        assert not RetentionEngine.enable_incremental_vacuum(db_path)
+    print_result(True, "incremental_vacuum habilitado")
+
+
+def test_purge_invalidates_history_caches():
+    """Mensagens removidas somem do buffer, do índice BM25 e do resumo (inclusive em outro processo)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'memory.db')
+        memory = EronMemory(db_path)
+        retriever = ConversationRetriever(memory)
+        summarizer = ConversationSummarizer(memory, every_turns=100, keep_recent=1,
+                                            generate=lambda prompt: "resumo antigo",
+                                            activity=LLMActivity(idle_seconds=0))
+        for i in range(3):
+            memory.save_message(f"meu aniversário é dia {i}", f"anotado {i}", 'u1')
+            memory.save_message(f"gosto de café {i}", f"legal {i}", 'u2')
+        memory.conn.execute("UPDATE messages SET timestamp = '2020-01-01 00:00:00' WHERE user_id = 'u1'")
+        memory.conn.commit()
+
+        # Outro processo com os caches já aquecidos
+        other = EronMemory(db_path)
+        assert 'dia 2' in other.get_recent_context('u1') and 'dia 2' in memory.get_recent_context('u1')
+        assert len(retriever.retrieve('u1', "aniversário", skip_recent=0)) == 3
+        assert summarizer.summarize_user('u1') and summarizer.get_summary('u1') == "resumo antigo"
+
+        engine = RetentionEngine([
+            RetentionPolicy(Path(db_path), 'messages', 'timestamp', 30, archive=False,
+                            on_delete=record_purged_messages),
+        ], batch_size=2, pause_seconds=0, cleanup_helpers=[])
+        assert engine.run()['deleted_total'] == 3
+
+        # Antes da próxima consulta periódica, o outro processo ainda vê o buffer antigo
+        assert 'dia 2' in other.get_recent_context('u1')
+        assert other.check_purges(force=True) == 1
+        assert other.get_recent_context('u1') == '' and 'café 2' in other.get_recent_context('u2')
+
+        assert memory.check_purges(force=True) == 1
+        assert memory.get_recent_context('u1') == ''
+        assert retriever.retrieve('u1', "aniversário", skip_recent=0) == []
+        assert summarizer.get_summary('u1') == ''
+        assert memory.conn.execute('SELECT COUNT(*) FROM conversation_summaries').fetchone()[0] == 0
+        assert memory.check_purges(force=True) == 0
+
+        for conn in (retriever.conn, summarizer.conn, other.conn, memory.conn):
+            conn.close()
+    print_result(True, "Caches do histórico invalidados pela retenção")
+
+
+if __name__ == "__main__":
+    test_batched_delete_and_archive()
+    test_enable_incremental_vacuum()
+    test_purge_invalidates_history_caches()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Teste da Memória Sensível
+=========================
+
+Verifica o ponteiro para o registro vigente com remoção dos substituídos,
+o cache de dados descriptografados e a rotação da chave em lotes.
+
+Uso:
+python tests/test_sensitive_memory.py
+"""
+
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from core.sensitive_memory import SensitiveMemory
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_latest_pointer_and_cache():
+    """Um registro por usuário; cache invalidado ao gravar"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'sensitive_memory.db')
+        memory = SensitiveMemory(db_path, cache_ttl=60)
+        memory.save_sensitive('u1', {'cpf': '111'})
+        memory.save_sensitive('u1', {'cpf': '222'})
+        memory.save_sensitive('u2', {'cpf': '333'})
+
+        rows = memory.conn.execute('SELECT user_id FROM sensitive_data ORDER BY id').fetchall()
+        assert rows == [('u1',), ('u2',)]
+        assert memory.get_sensitive('u1') == {'cpf': '222'}
+
+        # Leitura em cache não toca a criptografia; alterar o retorno não afeta o cache
+        memory.fernet = None
+        cached = memory.get_sensitive('u1')
+        cached['cpf'] = 'alterado'
+        assert memory.get_sensitive('u1') == {'cpf': '222'}
+        memory.fernet = memory._key_fernet
+
+        memory.save_sensitive('u1', {'cpf': '444'})
+        assert memory.get_sensitive('u1') == {'cpf': '444'}
+        assert memory.get_sensitive('ninguem') is None
+        memory.conn.close()
+    print_result(True, "Registro vigente e cache")
+
+
+def test_legacy_rows_get_pointer():
+    """Banco antigo com vários registros por usuário lê o mais novo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'sensitive_memory.db')
+        key = Fernet.generate_key()
+        (Path(tmp) / 'sensitive.key').write_bytes(key)
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE sensitive_data (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT, data BLOB)')
+        for value in (b'{"v": 1}', b'{"v": 2}'):
+            conn.execute('INSERT INTO sensitive_data (user_id, data) VALUES (?, ?)', ('u1', Fernet(key).encrypt(value)))
+        conn.commit()
+        conn.close()
+
+        memory = SensitiveMemory(db_path)
+        assert memory.get_sensitive('u1') == {'v': 2}
+        memory.conn.close()
+    print_result(True, "Migração de bancos antigos")
+
+
+def test_key_rotation_resumes():
+    """Rotação em lotes, retomada após interrupção, chave antiga descartada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'sensitive_memory.db')
+        key_path = Path(tmp) / 'sensitive.key'
+        memory = SensitiveMemory(db_path, cache_ttl=0)
+        for i in range(25):
+            memory.save_sensitive(f"u{i}", {'i': i})
+        old_key = key_path.read_bytes()
+
+        progress = []
+
+        def interrupt(done, total):
+            progress.append((done, total))
+            if done == 10:
+                raise KeyboardInterrupt
+
+        try:
+            memory.rotate_key(batch_size=10, progress=interrupt)
+        except KeyboardInterrupt:
+            pass
+        assert progress == [(10, 25)]
+        assert Path(f"{key_path}.new").exists() and key_path.read_bytes() == old_key
+
+        # Novo processo: lê registros das duas chaves e termina a rotação
+        resumed = SensitiveMemory(db_path, cache_ttl=0)
+        assert resumed.get_sensitive('u3') == {'i': 3} and resumed.get_sensitive('u20') == {'i': 20}
+        result = resumed.rotate_key(batch_size=10, progress=lambda done, total: progress.append((done, total)))
+        assert result['rows'] == 25 and progress[-1] == (25, 25)
+        assert not Path(f"{key_path}.new").exists() and key_path.read_bytes() != old_key
+
+        fresh = SensitiveMemory(db_path, cache_ttl=0)
+        assert [fresh.get_sensitive(f"u{i}") for i in (0, 24)] == [{'i': 0}, {'i': 24}]
+        data = fresh.conn.execute("SELECT data FROM sensitive_data LIMIT 1").fetchone()[0]
+        try:
+            Fernet(old_key).decrypt(data)
+            old_key_works = True
+        except InvalidToken:
+            old_key_works = False
+        assert not old_key_works
+        for store in (memory, resumed, fresh):
+            store.conn.close()
+    print_result(True, "Rotação de chave retomável")
+
+
+def test_rotation_seen_by_running_instance():
+    """Outro processo rotaciona a chave; a instância em uso continua lendo e gravando"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'sensitive_memory.db')
+        key_path = Path(tmp) / 'sensitive.key'
+        running = SensitiveMemory(db_path, cache_ttl=0)
+        for i in range(5):
+            running.save_sensitive(f"u{i}", {'i': i})
+        old_key = key_path.read_bytes()
+
+        # Rotação interrompida no meio: a instância em uso passa a cifrar com a chave nova
+        tool = SensitiveMemory(db_path, cache_ttl=0)
+
+        def interrupt(done, total):
+            raise KeyboardInterrupt
+
+        try:
+            tool.rotate_key(batch_size=2, progress=interrupt)
+        except KeyboardInterrupt:
+            pass
+        new_key = Path(f"{key_path}.new").read_bytes()
+        running.save_sensitive('durante', {'fase': 'rotação'})
+        data = running.conn.execute(
+            "SELECT d.data FROM sensitive_latest l JOIN sensitive_data d ON d.id = l.data_id WHERE l.user_id = 'durante'"
+        ).fetchone()[0]
+        assert Fernet(new_key).decrypt(data)
+        assert running.get_sensitive('u4') == {'i': 4}
+
+        tool.rotate_key(batch_size=2)
+        assert key_path.read_bytes() == new_key != old_key
+        assert running.get_sensitive('u0') == {'i': 0}
+        running.save_sensitive('depois', {'fase': 'final'})
+
+        # Após reiniciar, só com a chave nova, tudo continua legível
+        restarted = SensitiveMemory(db_path, cache_ttl=0)
+        assert restarted.get_sensitive('durante') == {'fase': 'rotação'}
+        assert restarted.get_sensitive('depois') == {'fase': 'final'}
+        assert [restarted.get_sensitive(f"u{i}") for i in range(5)] == [{'i': i} for i in range(5)]
+        for store in (running, tool, restarted):
+            store.conn.close()
+    print_result(True, "Rotação vista pela instância em execução")
+
+
+if __name__ == "__main__":
+    test_latest_pointer_and_cache()
+    test_legacy_rows_get_pointer()
+    test_key_rotation_resumes()
+    test_rotation_seen_by_running_instance()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Teste do Log de Comandos SQL Lentos
+===================================
+
+Verifica a normalização de comandos, a agregação por banco (contagem, tempo
+total e pior tempo) e a coleta pelas conexões TimedConnection.
+
+Uso:
+python tests/test_slow_query_log.py
+"""
+
+import sys
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.database import SlowQueryLog, DatabaseManager, normalize_statement
+from core.metrics import TimedConnection
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_normalize_statement():
+    """Literais, listas IN e espaços são normalizados"""
+    sql = """SELECT * FROM t
+             WHERE name = 'ana' AND id IN (?, ?, ?) LIMIT 10"""
+    assert normalize_statement(sql) == "SELECT * FROM t WHERE name = ? AND id IN (?) LIMIT ?"
+    print_result(True, "Comandos normalizados")
+
+
+def test_aggregation_and_eviction():
+    """Agregação por comando e limite de comandos por banco"""
+    slow_log = SlowQueryLog(top_n=2, max_statements_per_db=2)
+    slow_log.record('a.db', 'SELECT 1', 0.010)
+    slow_log.record('a.db', 'SELECT 2', 0.030)
+    slow_log.record('a.db', "SELECT * FROM x WHERE v = 'z'", 0.002)
+    slow_log.record('a.db', "SELECT * FROM x WHERE v = 'y'", 0.001)
+
+    report = slow_log.get_slowest('a.db')['a.db']
+    # 'SELECT ?' agrupa os dois primeiros; o menor total é descartado ao lotar
+    assert report[0]['statement'] == 'SELECT ?'
+    assert report[0]['count'] == 2
+    assert report[0]['max_ms'] == 30.0
+    assert report[1]['count'] == 2
+    assert len(report) == 2
+    print_result(True, "Estatísticas agregadas por comando normalizado")
+
+
+def test_timed_connection_observer():
+    """Com o log ativo, as conexões instrumentadas alimentam o relatório"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(base_dir=tmp)
+        manager.enable_query_profiling()
+        try:
+            conn = manager.get_connection('memory')
+            conn.execute('CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, v TEXT)')
+            for i in range(5):
+                conn.execute('INSERT INTO t (v) VALUES (?)', (str(i),))
+
+            other = sqlite3.connect(str(Path(tmp) / 'outro.db'), factory=TimedConnection)
+            other.execute('SELECT 1')
+            other.close()
+
+            report = manager.get_slow_queries('memory', order_by='count')
+            statements = {item['statement']: item['count'] for item in report['eron_memory.db']}
+            assert statements['INSERT INTO t (v) VALUES (?)'] == 5
+            assert 'outro.db' in manager.dump_slow_queries()['databases']
+        finally:
+            manager.disable_query_profiling()
+            manager.close_all_connections()
+    print_result(True, "Conexões instrumentadas registradas por banco")
+
+
+if __name__ == "__main__":
+    test_normalize_statement()
+    test_aggregation_and_eviction()
+    test_timed_connection_observer()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Teste do SuperFastLearning
+==========================
+
+Verifica o índice de padrões em memória (mesmos candidatos que o regex),
+as atualizações relativas entre processos e a análise de contexto gravada
+uma vez por turno com retenção.
+
+Uso:
+python tests/test_super_fast_learning.py
+"""
+
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from learning.super_fast_learning import PatternIndex, SuperFastLearning
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+PATTERNS = [
+    '.*(?:linda|gostosa|bonita|sexy).*',
+    '.*(?:tesão|desejo|vontade|quero você).*',
+    '.*(amor|paixão|coração).*',
+    '.*saudade.*',
+    r'^oi\b.*',
+    r'.*\d{2,}.*',
+    '.*(bom dia|boa noite|olá).*',
+    '.*(c++|a+b).*',
+]
+
+MESSAGES = [
+    'Você é linda demais', 'LINDAMENTE dito', 'quero você agora', 'que vontade de te ver',
+    'meu amor', 'sinto saudades', 'oi tudo bem', 'boi pastando', 'tenho 25 anos',
+    'bom dia!', 'olá', 'nada a ver', 'Paixão', 'c++ é difícil', '',
+]
+
+
+def test_index_matches_regex_scan():
+    """Pré-filtro por palavras-chave devolve os mesmos padrões que o regex"""
+    rows = [
+        {'id': i + 1, 'input_pattern': pattern, 'response_pattern': 'r', 'context_tags': 'x',
+         'personality_match': 'sedutora' if i % 2 else 'romantica', 'intensity_level': i + 1,
+         'effectiveness_score': 0.5, 'learning_weight': 1.0, 'usage_count': 0, 'success_rate': 0.0}
+        for i, pattern in enumerate(PATTERNS)
+    ]
+    index = PatternIndex()
+    index.load(rows)
+
+    for message in MESSAGES:
+        text = message.lower()
+        expected = set()
+        for row in rows:
+            try:
+                if re.search(row['input_pattern'], text, re.IGNORECASE | re.DOTALL):
+                    expected.add(row['id'])
+            except re.error:
+                pass
+        got = {pattern.id for pattern in index.candidates(text, '')}
+        assert got == expected, (message, got, expected)
+
+        # Bucket + filtro de intensidade equivalem ao WHERE do SQL antigo
+        bucket = {p.id for p in index.candidates(text, '', 'sedutora', 4)}
+        assert bucket == {i for i in expected if rows[i - 1]['personality_match'] == 'sedutora'
+                          and rows[i - 1]['intensity_level'] <= 4}
+    print_result(True, "Índice de padrões equivale ao regex")
+
+
+def test_updates_from_two_processes():
+    """Duas instâncias no mesmo banco: incrementos somados e padrões novos vistos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'super_learning.db')
+        web = SuperFastLearning(db_path)
+        bot = SuperFastLearning(db_path)
+
+        web.learn_from_interaction('você é linda', 'obrigada', 1.0, 'u1')
+        bot.learn_from_interaction('você é linda', 'obrigada', 0.0, 'u2')
+        row = web.conn.execute(
+            "SELECT usage_count, success_rate, effectiveness_score FROM ultra_patterns "
+            "WHERE input_pattern LIKE '%linda%'").fetchone()
+        assert row['usage_count'] == 2
+        assert abs(row['success_rate'] - 0.5) < 1e-9
+        assert abs(row['effectiveness_score'] - ((0.85 + 1.0) / 2 + 0.0) / 2) < 1e-9
+
+        # Padrão aprendido no bot aparece no índice do web após o refresh
+        bot.learn_from_interaction('preciso estudar astronomia', 'legal', 0.7, 'u2')
+        new_id = bot.conn.execute('SELECT MAX(id) FROM ultra_patterns').fetchone()[0]
+        assert new_id not in web.pattern_index.patterns
+        assert web.refresh_patterns(force=True) >= 1
+        assert new_id in web.pattern_index.patterns
+        assert web.pattern_index.patterns[row_id(web, 'linda')].usage_count == 2
+        for system in (web, bot):
+            system.conn.close()
+    print_result(True, "Aprendizado consistente entre processos")
+
+
+def test_turn_analysis_once_and_retention():
+    """Uma linha de context_analysis por turno; linhas antigas removidas em lotes"""
+    with tempfile.TemporaryDirectory() as tmp:
+        system = SuperFastLearning(str(Path(tmp) / 'super_learning.db'))
+
+        def analyses():
+            return system.conn.execute('SELECT user_id, input_text FROM context_analysis').fetchall()
+
+        # Resposta e aprendizado do mesmo turno compartilham a análise
+        system.generate_smart_response('você é linda', 'u1')
+        system.learn_from_interaction('você é linda', 'obrigada', 1.0, 'u1')
+        assert [tuple(row) for row in analyses()] == [('u1', 'você é linda')]
+
+        # Turno sem aprendizado: gravado no próximo flush, uma vez só
+        system.generate_smart_response('bom dia', 'u2')
+        assert len(analyses()) == 1
+        system.flush_pending()
+        system.flush_pending()
+        assert [tuple(row) for row in analyses()][1:] == [('u2', 'bom dia')]
+
+        with system.conn:
+            system.conn.executemany(
+                "INSERT INTO context_analysis (user_id, input_text, created_at) VALUES (?, ?, ?)",
+                [('velho', str(i), '2000-01-01 00:00:00') for i in range(5)])
+        assert system.cleanup_context_analysis(retention_days=0) == 0
+        assert system.cleanup_context_analysis(retention_days=30, batch_size=2) == 5
+        assert len(analyses()) == 2
+        system.conn.close()
+    print_result(True, "Análise de contexto por turno com retenção")
+
+
+def row_id(system, word):
+    return system.conn.execute(
+        "SELECT id FROM ultra_patterns WHERE input_pattern LIKE ?", (f'%{word}%',)).fetchone()[0]
+
+
+if __name__ == "__main__":
+    test_index_matches_regex_scan()
+    test_updates_from_two_processes()
+    test_turn_analysis_once_and_retention()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Teste do Webhook do Telegram
+============================
+
+Sobe o webhook local contra a API do Telegram de teste
+(tests/telegram_api_stub.py): registro do webhook, processamento dos
+updates, descarte de reentregas e rejeição sem o secret token (inclusive
+quando nenhum segredo foi configurado).
+
+Uso:
+python tests/test_telegram_webhook.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from telegram.ext import MessageHandler, filters
+
+from core.telegram_webhook import RecentUpdateIds, TelegramWebhookRunner, build_application
+from tests.telegram_api_stub import LocalTelegramAPI, text_update
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_recent_update_ids():
+    """Reentregas detectadas; memória limitada aos mais recentes"""
+    recent = RecentUpdateIds(max_size=3)
+    assert [recent.seen(i) for i in (1, 2, 1, 3, 4)] == [False, False, True, False, False]
+    assert len(recent) == 3
+    # 2 foi o menos recente e saiu; 1 foi renovado pela reentrega
+    assert recent.seen(1) and not recent.seen(2)
+    print_result(True, "Registro de update_ids recentes")
+
+
+def test_application_limits():
+    """Concorrência só no webhook, com pool de conexões à altura; polling sequencial"""
+    from core.telegram_webhook import TELEGRAM_MAX_CONCURRENT
+
+    def pool_size(application):
+        return application.bot._request[1]._client_kwargs['limits'].max_connections
+
+    webhook = build_application('123:TESTE', concurrent=True)
+    polling = build_application('123:TESTE')
+    assert webhook.concurrent_updates == TELEGRAM_MAX_CONCURRENT
+    assert pool_size(webhook) >= webhook.concurrent_updates
+    assert polling.concurrent_updates == 1
+    assert pool_size(polling) >= 1
+    print_result(True, "Limites de concorrência e pool de conexões")
+
+
+def test_webhook_round_trip():
+    """Webhook registrado, updates respondidos uma vez só, secret exigido"""
+    async def echo(update, context):
+        await update.message.reply_text(f"eco: {update.message.text}")
+
+    async def scenario(api):
+        application = build_application('123:TESTE', base_url=api.base_url, concurrent=True)
+        application.add_handler(MessageHandler(filters.TEXT, echo))
+        runner = TelegramWebhookRunner(application, webhook_url='http://127.0.0.1/hook',
+                                       listen='127.0.0.1', port=0, secret_token='segredo')
+        await runner.start()
+        try:
+            assert api.webhook['url'] == 'http://127.0.0.1/hook'
+            assert api.webhook['secret_token'] == 'segredo'
+
+            local_url = f"http://127.0.0.1:{runner.port}/hook"
+            statuses = await asyncio.to_thread(lambda: [
+                api.deliver(text_update(1, 'oi'), local_url),
+                api.deliver(text_update(2, 'tudo bem?'), local_url),
+                api.deliver(text_update(1, 'oi'), local_url),
+                api.deliver(text_update(3, 'invasor'), local_url, secret_token='errado'),
+                api.deliver(text_update(4, 'caminho'), local_url.replace('/hook', '/outro')),
+            ])
+            assert statuses == [200, 200, 200, 403, 404]
+
+            deadline = time.monotonic() + 5
+            while len(api.sent_messages()) < 2 and time.monotonic() < deadline:
+                await asyncio.sleep(0.02)
+            await asyncio.sleep(0.1)
+        finally:
+            await runner.stop(delete_webhook=True)
+        return runner
+
+    with LocalTelegramAPI() as api:
+        runner = asyncio.run(scenario(api))
+        assert sorted(api.sent_messages()) == ['eco: oi', 'eco: tudo bem?']
+        assert runner.stats == {'accepted': 2, 'duplicate': 1, 'rejected': 1}
+        assert api.webhook == {}
+    print_result(True, "Webhook com updates idempotentes")
+
+
+def test_webhook_without_configured_secret():
+    """Sem segredo configurado: um aleatório é registrado e exigido"""
+    async def scenario(api):
+        application = build_application('123:TESTE', base_url=api.base_url, concurrent=True)
+        runner = TelegramWebhookRunner(application, webhook_url='http://127.0.0.1/hook',
+                                       listen='127.0.0.1', port=0, secret_token='')
+        assert runner.generated_secret and len(runner.secret_token) >= 32
+
+        # Sem set_webhook o Telegram não teria como saber o segredo gerado
+        try:
+            await runner.start(set_webhook=False)
+            raise AssertionError("webhook iniciado sem segredo conhecido pelo Telegram")
+        except ValueError:
+            pass
+
+        await runner.start()
+        try:
+            assert api.webhook['secret_token'] == runner.secret_token
+            local_url = f"http://127.0.0.1:{runner.port}/hook"
+            statuses = await asyncio.to_thread(lambda: [
+                api.deliver(text_update(1, 'sem segredo'), local_url, secret_token=''),
+                api.deliver(text_update(2, 'com segredo'), local_url),
+            ])
+            assert statuses == [403, 200]
+        finally:
+            await runner.stop(delete_webhook=True)
+        return runner
+
+    with LocalTelegramAPI() as api:
+        runner = asyncio.run(scenario(api))
+        assert runner.stats == {'accepted': 1, 'duplicate': 0, 'rejected': 1}
+    print_result(True, "Webhook com segredo gerado")
+
+
+if __name__ == "__main__":
+    test_recent_update_ids()
+    test_application_limits()
+    test_webhook_round_trip()
+    test_webhook_without_configured_secret()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Teste das Características de Texto por Mensagem
+===============================================
+
+Verifica que o autômato de palavras-chave equivale a "palavra in texto",
+a prioridade dos grupos e o reaproveitamento do MessageFeatures no turno.
+
+Uso:
+python tests/test_text_features.py
+"""
+
+import sys
+import random
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.text_features import FeatureExtractor, KeywordAutomaton, tokenize
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_automaton_matches_substring_semantics():
+    """Mesmo resultado dos laços 'any(k in texto)', inclusive prefixos e sobreposições"""
+    keywords = ['bom', 'bom dia', 'dia', 'mal', 'animal', 'não sei', '?', 'sei']
+    automaton = KeywordAutomaton({'g': keywords})
+    assert automaton.find('bom dia, animal?') == {'bom', 'bom dia', 'dia', 'mal', 'animal', '?'}
+
+    rng = random.Random(7)
+    alphabet = 'abã ?'
+    for _ in range(200):
+        group = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(8)]
+        automaton = KeywordAutomaton({'g': group})
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 25)))
+        assert automaton.find(text) == {k for k in group if k in text}
+    print_result(True, "Autômato equivale à busca por substring")
+
+
+def test_group_priority_and_cache():
+    """first() respeita a ordem do registro e o turno reaproveita as características"""
+    extractor = FeatureExtractor(cache_size=2)
+    groups = extractor.register('teste', {
+        'saudacao': ['oi', 'olá'],
+        'pergunta': ['como', '?'],
+    })
+
+    features = extractor.extract('Olá, como vai?')
+    assert features.first(groups) == 'saudacao'
+    assert sorted(features.hits(groups['pergunta'])) == ['?', 'como']
+    assert extractor.extract('Olá, como vai?') is features
+    assert features.tokens == tokenize('olá, como vai?') == ['olá', 'como', 'vai']
+    assert extractor.extract('nada aqui').first(groups, 'geral') == 'geral'
+
+    # Mudar o registro recompila o autômato e descarta o cache
+    extractor.register('teste', {'saudacao': ['e aí']})
+    assert extractor.extract('Olá, como vai?') is not features
+    print_result(True, "Prioridade dos grupos e cache por mensagem")
+
+
+if __name__ == "__main__":
+    test_automaton_matches_substring_semantics()
+    test_group_priority_and_cache()
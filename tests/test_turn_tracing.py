@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Teste do Tracing por Turno
+==========================
+
+Verifica spans aninhados, turno dentro de turno virando span, o buffer de
+turnos mais lentos e o formato do Chrome Trace.
+
+Uso:
+python tests/test_turn_tracing.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.turn_tracing import TurnTracer, span, annotate, current_trace
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def test_nested_spans():
+    """Spans registram profundidade e turno interno vira span"""
+    tracer = TurnTracer(buffer_size=10)
+
+    with tracer.turn('telegram_chat', user_id='42'):
+        with span('profile_load'):
+            pass
+        with tracer.turn('get_llm_response'):
+            annotate(user_id='outro', platform='telegram')
+            with span('llm_request'):
+                time.sleep(0.001)
+
+    assert current_trace() is None
+    traces = tracer.recent()
+    assert len(traces) == 1
+    summary = traces[0].to_dict()
+    names = [(s['name'], s['depth']) for s in summary['spans']]
+    assert ('profile_load', 0) in names
+    assert ('llm_request', 1) in names
+    assert ('get_llm_response', 0) in names
+    assert summary['attributes'] == {'user_id': '42', 'platform': 'telegram'}
+    print_result(True, "Spans aninhados registrados no mesmo turno")
+
+
+def test_slowest_and_chrome_trace():
+    """Buffer circular mantém os recentes e exporta os mais lentos"""
+    tracer = TurnTracer(buffer_size=3)
+    for delay in (0.0, 0.004, 0.0, 0.002):
+        with tracer.turn('send_message'):
+            with span('stage'):
+                time.sleep(delay)
+
+    assert len(tracer.recent()) == 3
+    slowest = tracer.slowest(1)[0]
+    assert slowest.duration >= 0.004
+
+    chrome = tracer.chrome_trace(2)
+    assert chrome['displayTimeUnit'] == 'ms'
+    assert len(chrome['traceEvents']) == 4
+    assert all(event['ph'] == 'X' for event in chrome['traceEvents'])
+    print_result(True, "Turnos mais lentos exportados no formato Chrome Trace")
+
+
+def test_span_without_turn():
+    """Span fora de um turno não faz nada"""
+    with span('solto'):
+        pass
+    assert current_trace() is None
+    print_result(True, "Span sem turno ativo é ignorado")
+
+
+if __name__ == "__main__":
+    test_nested_spans()
+    test_slowest_and_chrome_trace()
+    test_span_without_turn()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Teste da Exportação dos Dados de um Usuário
+===========================================
+
+Verifica o ZIP de JSONL com as linhas do usuário em vários bancos, os
+dados sensíveis descriptografados, a omissão de senhas e tokens e a geração
+em pedaços.
+
+Uso:
+python tests/test_user_export.py
+"""
+
+import io
+import json
+import sys
+import sqlite3
+import tempfile
+import uuid
+import zipfile
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.memory import EronMemory
+from core.sensitive_memory import SensitiveMemory
+from core.user_export import UserDataExporter
+
+
+def print_result(success, message):
+    """Imprimir resultado do teste"""
+    icon = "✅" if success else "❌"
+    print(f"{icon} {message}")
+
+
+def _create_stores(tmp):
+    memory = EronMemory(str(Path(tmp) / 'eron_memory.db'))
+    for i in range(1200):
+        # Texto pouco compressível para o ZIP ter tamanho real
+        memory.save_message(f"pergunta {i}", f"resposta {i} {uuid.uuid4().hex * 4}", 'u1' if i % 2 else 'u2')
+    memory.conn.close()
+
+    sensitive = SensitiveMemory(str(Path(tmp) / 'sensitive_memory.db'))
+    sensitive.save_sensitive('u1', {'telefone': '8199999'})
+    sensitive.save_sensitive('u2', {'telefone': '1100000'})
+    sensitive.conn.close()
+
+    conn = sqlite3.connect(Path(tmp) / 'adult_preferences.db')
+    conn.execute('CREATE TABLE adult_profiles (user_id TEXT PRIMARY KEY, avatar BLOB)')
+    conn.execute('CREATE TABLE global_settings (key TEXT, value TEXT)')
+    conn.execute("INSERT INTO adult_profiles VALUES ('u1', x'00ff')")
+    conn.commit()
+    conn.close()
+    return [Path(tmp) / name for name in ('eron_memory.db', 'sensitive_memory.db', 'adult_preferences.db')]
+
+
+def test_export_zip():
+    """Somente as linhas do usuário, sensíveis descriptografadas, manifesto"""
+    with tempfile.TemporaryDirectory() as tmp:
+        databases = _create_stores(tmp)
+        output = Path(tmp) / 'u1.zip'
+        counts = UserDataExporter('u1', databases, batch_size=100).write_zip(output)
+
+        folder = Path(tmp).name
+        assert counts == {
+            f"{folder}/eron_memory/messages.jsonl": 600,
+            f"{folder}/sensitive_memory/sensitive_data.jsonl": 1,
+            f"{folder}/adult_preferences/adult_profiles.jsonl": 1,
+        }
+        with zipfile.ZipFile(output) as archive:
+            messages = [json.loads(line) for line in
+                        archive.read(f"{folder}/eron_memory/messages.jsonl").decode('utf-8').splitlines()]
+            assert {row['user_id'] for row in messages} == {'u1'}
+            assert messages[0]['user_message'] == 'pergunta 1'
+            assert [row['id'] for row in messages] == sorted(row['id'] for row in messages)
+
+            sensitive = json.loads(archive.read(f"{folder}/sensitive_memory/sensitive_data.jsonl"))
+            assert sensitive['data'] == {'telefone': '8199999'}
+            profile = json.loads(archive.read(f"{folder}/adult_preferences/adult_profiles.jsonl"))
+            assert profile['avatar'] == 'AP8='
+
+            manifest = json.loads(archive.read('manifest.json'))
+            assert manifest['user_id'] == 'u1' and manifest['files'] == counts
+    print_result(True, "ZIP com os dados do usuário")
+
+
+def test_credentials_redacted():
+    """Hash de senha e tokens ficam fora do ZIP e aparecem no manifesto"""
+    secrets_seeded = ('hash-da-senha', 'token-reset', 'token-confirmacao', 'token-api', '2999-01-01')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'user_profiles.db'
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE profiles (user_id TEXT PRIMARY KEY, email TEXT, password_hash TEXT,
+                        reset_token TEXT, reset_token_expiry TIMESTAMP, confirmation_token TEXT,
+                        api_secret TEXT, total_tokens INTEGER)''')
+        conn.execute("INSERT INTO profiles VALUES ('u1', 'u1@exemplo.com', ?, ?, ?, ?, ?, 42)",
+                     ('hash-da-senha', 'token-reset', '2999-01-01', 'token-confirmacao', 'token-api'))
+        conn.commit()
+        conn.close()
+
+        exporter = UserDataExporter('u1', [db_path])
+        data = b''.join(exporter.iter_zip())
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            name = f"{Path(tmp).name}/user_profiles/profiles.jsonl"
+            profile = json.loads(archive.read(name))
+            manifest = json.loads(archive.read('manifest.json'))
+            contents = b''.join(archive.read(entry) for entry in archive.namelist()).decode('utf-8')
+
+        assert profile == {'user_id': 'u1', 'email': 'u1@exemplo.com', 'total_tokens': 42}
+        assert manifest['redacted'] == {name: ['password_hash', 'reset_token', 'reset_token_expiry',
+                                               'confirmation_token', 'api_secret']}
+        assert not any(secret in contents for secret in secrets_seeded)
+    print_result(True, "Credenciais omitidas da exportação")
+
+
+def test_streamed_in_chunks():
+    """O ZIP sai em vários pedaços pequenos e é válido ao ser remontado"""
+    with tempfile.TemporaryDirectory() as tmp:
+        databases = _create_stores(tmp)
+        exporter = UserDataExporter('u2', databases, batch_size=50)
+        chunks = [chunk for chunk in exporter.iter_zip(chunk_bytes=1024) if chunk]
+
+        assert len(chunks) > 3
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            assert archive.testzip() is None
+            names = archive.namelist()
+        assert names[-1] == 'manifest.json'
+        assert not any('adult_preferences' in name for name in names)
+    print_result(True, "ZIP gerado em streaming")
+
+
+if __name__ == "__main__":
+    test_export_zip()
+    test_credentials_redacted()
+    test_streamed_in_chunks()
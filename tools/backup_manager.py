@@ -0,0 +1,78 @@
+"""
+Gerenciador de Backups - Eron.IA
+================================
+
+Ferramenta de linha de comando para os backups online dos bancos:
+cópia incremental sem bloquear o chat, verificação de integridade,
+compressão e rotação.
+
+Uso:
+python tools/backup_manager.py --help
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.backup import OnlineBackup, verify_backup
+from core.maintenance import project_databases
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description="Gerenciador de Backups do Eron.IA",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  %(prog)s --run                                   # Backup de todos os bancos
+  %(prog)s --run --database database/eron_memory.db
+  %(prog)s --list                                  # Backups existentes
+  %(prog)s --verify database/backups/eron_memory/eron_memory_20250101_030000.db.gz
+        """
+    )
+    parser.add_argument('--run', action='store_true', help='Faz o backup dos bancos')
+    parser.add_argument('--database', action='append', metavar='DB',
+                        help='Banco específico (pode repetir)')
+    parser.add_argument('--list', action='store_true', help='Lista os backups existentes')
+    parser.add_argument('--verify', metavar='BACKUP', help='Verifica a integridade de um backup .db.gz')
+    parser.add_argument('--backup-dir', metavar='DIR', help='Pasta dos backups')
+    parser.add_argument('--json', action='store_true', help='Saída em JSON')
+    args = parser.parse_args()
+
+    backup = OnlineBackup(backup_dir=args.backup_dir)
+
+    if args.verify:
+        ok = verify_backup(args.verify)
+        print("✅ Backup íntegro" if ok else "❌ Backup corrompido")
+        sys.exit(0 if ok else 1)
+
+    if args.list:
+        for db_path in project_databases():
+            backups = backup.list_backups(db_path.stem)
+            print(f"📁 {db_path.name}: {len(backups)} backup(s)")
+            for path in backups:
+                print(f"   {path.name} ({path.stat().st_size / 1024 / 1024:.2f} MB)")
+        return
+
+    if not args.run:
+        parser.print_help()
+        return
+
+    report = backup.backup_all(args.database)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"\nTotal: {report['total_bytes'] / 1024 / 1024:.1f} MB "
+              f"→ {report['total_compressed_bytes'] / 1024 / 1024:.1f} MB compactados "
+              f"em {report['seconds']}s ({report['mb_per_second']} MB/s)")
+        if report['errors']:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
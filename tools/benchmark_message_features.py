@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark da análise de cada mensagem pelos detectores
+
+Mede o custo total de CPU por mensagem dos detectores reais que rodam em um
+turno: HumanConversationSystem (tipo de conversa, humor, contexto
+emocional e casual), EmotionSystem, FastLearning, PatternRecognitionSystem,
+SuperFastLearning (contexto, sentimento e pré-filtro do índice de padrões)
+e a personalidade devassa. Cada mensagem é única (o cache de
+características só é reaproveitado dentro do próprio turno, como no bot).
+
+Para comparar com outra versão, rode o mesmo script apontando para uma
+cópia da árvore (os métodos medidos têm a mesma assinatura nas duas):
+
+git worktree add /tmp/eron-antes <commit>
+python tools/benchmark_message_features.py --tree /tmp/eron-antes
+python tools/benchmark_message_features.py
+
+Uso:
+python tools/benchmark_message_features.py [--tree CAMINHO] [--messages N]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+MESSAGES = [
+    "Oi! Tudo bem com você?",
+    "Bom dia, hoje estou muito feliz porque passei na prova da faculdade!",
+    "Estou triste e preocupado com o trabalho, não sei o que fazer...",
+    "Como funciona um computador? Qual é a diferença entre software e hardware?",
+    "Que tesão, quero muito você hoje, estou loucamente apaixonado",
+    "Meu time perdeu o campeonato de futebol, que raiva, odeio isso",
+    "Poderia me ajudar por favor? Gostaria de aprender mais sobre música e filmes",
+    "kkkk que legal, adorei essa série da netflix, recomenda outra?",
+]
+
+
+def build_detectors(tmp):
+    """(nome, função(texto)) de cada detector, com bancos temporários"""
+    from core.emotion_system import EmotionSystem
+    from learning.fast_learning import FastLearning
+    from learning.human_conversation import HumanConversationSystem
+    from learning.pattern_recognition import PatternRecognitionSystem
+    from learning.super_fast_learning import super_learning
+    from adult_personality_db import AdultPersonalityDB
+    from devassa_personality import DevassaPersonality
+
+    human = HumanConversationSystem()
+    emotions = EmotionSystem(str(Path(tmp) / 'emotions.db'))
+    # detect_user_emotion grava a emoção detectada; sem fsync para medir CPU
+    emotions.conn.execute('PRAGMA synchronous = OFF')
+    fast = FastLearning(str(Path(tmp) / 'fast_learning.db'))
+    patterns = PatternRecognitionSystem(str(Path(tmp) / 'patterns.db'))
+    devassa = DevassaPersonality(AdultPersonalityDB(str(Path(tmp) / 'adult_personality.db')),
+                                 {'user_id': 'bench', 'user_name': 'amor', 'bot_gender': 'feminino'})
+
+    return [
+        ('human.detect_conversation_type', human.detect_conversation_type),
+        ('human.detect_user_mood', human.detect_user_mood),
+        ('human.detect_emotional_context', human.detect_emotional_context),
+        ('human.detect_casual_context', human.detect_casual_context),
+        ('emotion.detect_user_emotion', lambda text: emotions.detect_user_emotion('bench', text)),
+        ('fast._classify_question_type', fast._classify_question_type),
+        ('fast._extract_main_topic', fast._extract_main_topic),
+        ('patterns._analyze_sentiment', patterns._analyze_sentiment),
+        ('patterns._extract_topics', patterns._extract_topics),
+        ('patterns._analyze_language_patterns', patterns._analyze_language_patterns),
+        ('super._compute_context', super_learning._compute_context),
+        ('super.pattern_index.keyword_hits', lambda text: super_learning.pattern_index.keyword_hits(text.lower())),
+        ('devassa.get_adaptive_response', devassa.get_adaptive_response),
+    ]
+
+
+def run(detectors, messages):
+    """CPU total e por detector (segundos) para analisar todas as mensagens"""
+    per_detector = {name: 0.0 for name, _ in detectors}
+    start = time.process_time()
+    for text in messages:
+        for name, detect in detectors:
+            started = time.process_time()
+            detect(text)
+            per_detector[name] += time.process_time() - started
+    return time.process_time() - start, per_detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CPU por mensagem dos detectores')
+    parser.add_argument('--tree', default=str(Path(__file__).parent.parent),
+                        help='raiz da árvore a medir (padrão: esta)')
+    parser.add_argument('--messages', type=int, default=4000, help='mensagens únicas analisadas')
+    args = parser.parse_args()
+
+    root = Path(args.tree).absolute()
+    sys.path.insert(0, str(root / 'Eron-18' / 'Scripts18'))
+    sys.path.insert(0, str(root))
+
+    # Mensagens únicas: nenhum cache entre turnos diferentes
+    messages = [f"{MESSAGES[i % len(MESSAGES)]} ({i})" for i in range(args.messages)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        detectors = build_detectors(tmp)
+        run(detectors, messages[:200])  # aquecimento (compilação de regex, perfis)
+        total, per_detector = run(detectors, messages)
+
+    print("⏱️ BENCHMARK - DETECTORES POR MENSAGEM")
+    print("=" * 50)
+    print(f"   • Árvore: {root}")
+    print(f"   • Mensagens: {len(messages)} | detectores: {len(detectors)}")
+    for name, seconds in per_detector.items():
+        print(f"   • {name:<38} {seconds / len(messages) * 1e6:8.1f} µs")
+    print(f"   • Total: {total / len(messages) * 1e6:.1f} µs/mensagem")
+
+
+if __name__ == "__main__":
+    main()
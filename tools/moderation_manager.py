@@ -25,6 +25,7 @@ import os
 from pathlib import Path
 from datetime import datetime, timedelta
 import json
+import csv
 import sqlite3
 
 # Adicionar diretório pai para imports
@@ -74,6 +75,17 @@ class ModerationManager:
         
         print()
         
+        # Evolução diária (rollup diário)
+        daily_totals = {}
+        for row in self.moderator.iter_rollups(days, 'daily'):
+            daily_totals[row['bucket']] = daily_totals.get(row['bucket'], 0) + row['count']
+        
+        if daily_totals:
+            print("📅 **POR DIA:**")
+            for day, count in sorted(daily_totals.items()):
+                print(f"   {day}: {count:,}")
+            print()
+        
         # Top violadores
         top_violators = stats['top_violators']
         if top_violators:
@@ -323,14 +335,28 @@ class ModerationManager:
             self.moderator.load_patterns()
     
     def export_report(self, days=30, format='json'):
-        """Exporta relatório de moderação"""
+        """
+        Exporta relatório de moderação
+        
+        Os eventos e rollups são gravados em streaming (linha a linha), então o
+        uso de memória não depende do tamanho do período exportado.
+        """
         print(f"📄 EXPORTANDO RELATÓRIO ({days} dias)")
         print("=" * 60)
         
+        if format not in ('json', 'csv'):
+            print(f"❌ Formato inválido: {format} (use json ou csv)")
+            return
+        
         since_date = datetime.now() - timedelta(days=days)
         
-        with sqlite3.connect(self.db_path) as conn:
-            # Dados do relatório
+        # Salvar relatório
+        filename = f"moderation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+        filepath = Path("reports") / filename
+        filepath.parent.mkdir(exist_ok=True)
+        
+        with sqlite3.connect(self.db_path) as conn, \
+                open(filepath, 'w', encoding='utf-8', newline='') as f:
             cursor = conn.execute('''
                 SELECT timestamp, user_id, severity, action_taken, reason, content_snippet
                 FROM moderation_logs
@@ -338,40 +364,69 @@ class ModerationManager:
                 ORDER BY timestamp DESC
             ''', (since_date.isoformat(),))
             
-            logs = []
-            for row in cursor.fetchall():
-                logs.append({
-                    'timestamp': row[0],
-                    'user_id': row[1],
-                    'severity': row[2],
-                    'action': row[3],
-                    'reason': row[4],
-                    'content_snippet': row[5]
-                })
-            
-            # Estatísticas
-            stats = get_moderation_stats(days)
-            
-            report = {
-                'generated_at': datetime.now().isoformat(),
-                'period_days': days,
-                'total_events': len(logs),
-                'statistics': stats,
-                'events': logs
+            if format == 'json':
+                total_events = self._stream_json_report(f, cursor, days)
+            else:
+                total_events = self._stream_csv_report(f, cursor, days)
+        
+        print(f"✅ Relatório exportado: {filepath}")
+        print(f"   Eventos incluídos: {total_events:,}")
+        print(f"   Período: {days} dias")
+        return filepath
+    
+    def _stream_json_report(self, f, cursor, days):
+        """Escreve o relatório JSON incrementalmente; retorna o total de eventos"""
+        stats = get_moderation_stats(days)
+        
+        f.write('{\n')
+        f.write(f'  "generated_at": {json.dumps(datetime.now().isoformat())},\n')
+        f.write(f'  "period_days": {days},\n')
+        f.write(f'  "statistics": {json.dumps(stats, ensure_ascii=False)},\n')
+        
+        f.write('  "daily_rollups": [')
+        for i, row in enumerate(self.moderator.iter_rollups(days, 'daily')):
+            f.write(',' if i else '')
+            f.write('\n    ' + json.dumps(row, ensure_ascii=False))
+        f.write('\n  ],\n')
+        
+        f.write('  "events": [')
+        total_events = 0
+        for row in cursor:
+            event = {
+                'timestamp': row[0],
+                'user_id': row[1],
+                'severity': row[2],
+                'action': row[3],
+                'reason': row[4],
+                'content_snippet': row[5]
             }
+            f.write(',' if total_events else '')
+            f.write('\n    ' + json.dumps(event, ensure_ascii=False))
+            total_events += 1
+        f.write('\n  ],\n')
         
-        # Salvar relatório
-        filename = f"moderation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
-        filepath = Path("reports") / filename
-        filepath.parent.mkdir(exist_ok=True)
+        f.write(f'  "total_events": {total_events}\n')
+        f.write('}\n')
+        return total_events
+    
+    def _stream_csv_report(self, f, cursor, days):
+        """Escreve o relatório CSV (rollups + eventos); retorna o total de eventos"""
+        writer = csv.writer(f)
         
-        if format == 'json':
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2, ensure_ascii=False)
+        writer.writerow(['record_type', 'bucket_or_timestamp', 'user_id', 'severity',
+                         'action', 'count', 'reason', 'content_snippet'])
         
-        print(f"✅ Relatório exportado: {filepath}")
-        print(f"   Eventos incluídos: {len(logs):,}")
-        print(f"   Período: {days} dias")
+        for row in self.moderator.iter_rollups(days, 'daily'):
+            writer.writerow(['rollup', row['bucket'], row['user_id'] or '', row['severity'],
+                             row['action'], row['count'], '', ''])
+        
+        total_events = 0
+        for timestamp, user_id, severity, action, reason, snippet in cursor:
+            writer.writerow(['event', timestamp, user_id or '', severity,
+                             action, 1, reason, snippet])
+            total_events += 1
+        
+        return total_events
     
     def cleanup_old_data(self, days=90):
         """Limpa dados antigos"""
@@ -401,6 +456,7 @@ Exemplos de uso:
   %(prog)s --reset-violations 12345        # Reseta violações
   %(prog)s --add-pattern "palavra" spam severe  # Adiciona padrão
   %(prog)s --export-report                 # Exporta relatório
+  %(prog)s --export-report --format csv    # Exporta relatório em CSV
   %(prog)s --cleanup                       # Limpa dados antigos
         """
     )
@@ -436,6 +492,9 @@ Exemplos de uso:
     parser.add_argument('--export-report', action='store_true',
                        help='Exporta relatório de moderação')
     
+    parser.add_argument('--format', choices=['json', 'csv'], default='json',
+                       help='Formato do relatório exportado (padrão: json)')
+    
     parser.add_argument('--cleanup', action='store_true',
                        help='Limpa dados antigos')
     
@@ -476,7 +535,7 @@ Exemplos de uso:
         manager.toggle_pattern(args.toggle_pattern)
     
     elif args.export_report:
-        manager.export_report(args.days)
+        manager.export_report(args.days, args.format)
     
     elif args.cleanup:
         manager.cleanup_old_data()
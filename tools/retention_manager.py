@@ -0,0 +1,93 @@
+"""
+Gerenciador de Retenção de Dados - Eron.IA
+==========================================
+
+Ferramenta de linha de comando para aplicar as políticas de retenção:
+arquiva as linhas antigas em arquivos mensais compactados, remove-as em
+lotes pequenos e devolve o espaço com incremental_vacuum.
+
+Uso:
+python tools/retention_manager.py --help
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.retention import RetentionEngine, default_policies
+
+
+def print_report(report):
+    """Mostra o resultado da retenção por tabela"""
+    title = "🔎 SIMULAÇÃO DE RETENÇÃO" if report['dry_run'] else "🧹 RETENÇÃO DE DADOS"
+    print(title)
+    print("=" * 60)
+    for table in report['tables']:
+        if table['skipped']:
+            print(f"⏭️  {table['policy']}: {table['skipped']}")
+            continue
+        verb = "vencidas" if report['dry_run'] else "removidas"
+        print(f"✅ {table['policy']}: {table['deleted']:,} linhas {verb}, "
+              f"{table['archived']:,} arquivadas ({table['seconds']}s)")
+    for name, status in report['cleanup_helpers'].items():
+        print(f"🔧 {name}: {status}")
+    for db_name, pages in report['vacuumed_pages'].items():
+        print(f"💾 {db_name}: {pages:,} páginas liberadas")
+    print(f"\nTotal: {report['deleted_total']:,} linhas em {report['seconds']}s")
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description="Gerenciador de Retenção de Dados do Eron.IA",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  %(prog)s --policies                       # Lista as políticas
+  %(prog)s --dry-run                        # Conta as linhas vencidas
+  %(prog)s --run                            # Arquiva, remove e compacta
+  %(prog)s --run --json                     # Resultado em JSON
+  %(prog)s --enable-incremental-vacuum database/eron_memory.db
+        """
+    )
+    parser.add_argument('--policies', action='store_true', help='Lista as políticas de retenção')
+    parser.add_argument('--dry-run', action='store_true', help='Apenas conta as linhas vencidas')
+    parser.add_argument('--run', action='store_true', help='Aplica as políticas de retenção')
+    parser.add_argument('--skip-helpers', action='store_true',
+                        help='Não roda as limpezas dos módulos (padrões, feedback, moderação)')
+    parser.add_argument('--archive-dir', metavar='DIR', help='Pasta dos arquivos mensais')
+    parser.add_argument('--enable-incremental-vacuum', metavar='DB',
+                        help='Converte um banco para auto_vacuum=INCREMENTAL (VACUUM completo)')
+    parser.add_argument('--json', action='store_true', help='Saída em JSON')
+    args = parser.parse_args()
+
+    if args.policies:
+        for policy in default_policies():
+            archive = "arquiva" if policy.archive else "só remove"
+            print(f"📋 {policy.label}: {policy.timestamp_column} > {policy.retention_days:g} dias ({archive})")
+        return
+
+    if args.enable_incremental_vacuum:
+        converted = RetentionEngine.enable_incremental_vacuum(args.enable_incremental_vacuum)
+        print("✅ Banco convertido para auto_vacuum=INCREMENTAL" if converted
+              else "ℹ️ Banco já usa auto_vacuum=INCREMENTAL")
+        return
+
+    if not (args.run or args.dry_run):
+        parser.print_help()
+        return
+
+    engine = RetentionEngine(archive_dir=args.archive_dir)
+    report = engine.run(dry_run=args.dry_run, run_helpers=not args.skip_helpers)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
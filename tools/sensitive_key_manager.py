@@ -0,0 +1,72 @@
+"""
+Gerenciador da Chave da Memória Sensível - Eron.IA
+==================================================
+
+Ferramenta de linha de comando para recriptografar a memória sensível com
+uma chave nova. Os registros são lidos e regravados em lotes, então a
+memória usada não cresce com o tamanho do banco; uma rotação interrompida
+é retomada ao rodar o comando de novo. O web e o bot podem continuar no ar:
+cada SensitiveMemory percebe sensitive.key.new e a troca de sensitive.key
+no próximo acesso e passa a usar a chave nova.
+
+Uso:
+python tools/sensitive_key_manager.py --help
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.sensitive_memory import SensitiveMemory
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description="Gerenciador da Chave da Memória Sensível do Eron.IA",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  %(prog)s --stats                          # Registros e usuários
+  %(prog)s --rotate                         # Gera chave nova e recriptografa
+  %(prog)s --rotate --batch-size 5000
+  %(prog)s --rotate --db database/sensitive_memory.db --key database/sensitive.key
+        """
+    )
+    parser.add_argument('--stats', action='store_true', help='Mostra registros e usuários')
+    parser.add_argument('--rotate', action='store_true', help='Recriptografa tudo com uma chave nova')
+    parser.add_argument('--batch-size', type=int, help='Registros por lote')
+    parser.add_argument('--db', help='Banco da memória sensível')
+    parser.add_argument('--key', help='Arquivo da chave')
+    args = parser.parse_args()
+
+    if not (args.stats or args.rotate):
+        parser.print_help()
+        return
+
+    memory = SensitiveMemory(args.db, args.key)
+
+    if args.stats:
+        rows = memory.conn.execute('SELECT COUNT(*) FROM sensitive_data').fetchone()[0]
+        users = memory.conn.execute('SELECT COUNT(*) FROM sensitive_latest').fetchone()[0]
+        print(f"🔐 {rows:,} registros de {users:,} usuários em {memory.db_path}")
+
+    if args.rotate:
+        started = time.perf_counter()
+
+        def progress(done, total):
+            elapsed = time.perf_counter() - started
+            rate = done / elapsed if elapsed else 0
+            print(f"\r🔄 {done:,}/{total:,} registros ({rate:,.0f}/s)", end='', flush=True)
+
+        result = memory.rotate_key(batch_size=args.batch_size, progress=progress)
+        print(f"\n✅ {result['rows']:,} registros recriptografados em {result['seconds']}s; "
+              f"chave nova em {memory.key_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Exportação dos Dados de um Usuário - Eron.IA
+============================================
+
+Ferramenta de linha de comando para atendimento e pedidos de privacidade:
+gera um ZIP com um arquivo JSONL por tabela que tem linhas do usuário, em
+todos os bancos do projeto, sem carregar tabelas inteiras na memória.
+
+Uso:
+python tools/user_data_export.py --help
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Adicionar diretório pai para imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.user_export import UserDataExporter
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description="Exportação dos Dados de um Usuário do Eron.IA",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  %(prog)s --user 123456789                          # Gera eron_user_123456789.zip
+  %(prog)s --user 123456789 --output exports/u.zip
+  %(prog)s --user 123456789 --database database/eron_memory.db
+        """
+    )
+    parser.add_argument('--user', required=True, help='user_id (web ou Telegram)')
+    parser.add_argument('--output', help='Arquivo ZIP de saída')
+    parser.add_argument('--database', action='append', metavar='DB',
+                        help='Banco específico (pode repetir; padrão: todos)')
+    args = parser.parse_args()
+
+    output = args.output or f"eron_user_{args.user}.zip"
+    exporter = UserDataExporter(args.user, args.database)
+    counts = exporter.write_zip(output)
+
+    print(f"📦 Dados do usuário {args.user}")
+    print("=" * 60)
+    for name, count in counts.items():
+        print(f"✅ {name}: {count:,} linhas")
+    for name, reason in exporter.skipped.items():
+        print(f"⏭️  {name}: {reason}")
+    if not counts:
+        print("ℹ️ Nenhuma linha encontrada para este usuário")
+    print(f"\nArquivo: {output}")
+
+
+if __name__ == "__main__":
+    main()
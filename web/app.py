@@ -4,11 +4,13 @@ import requests
 import json
 import uuid
 import hashlib
+import hmac
 import re
 import sqlite3
+import time
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, session, redirect, url_for, send_from_directory, flash, jsonify
+from flask import Flask, render_template, request, session, redirect, url_for, send_from_directory, flash, jsonify, g, Response
 from werkzeug.utils import secure_filename
 from functools import wraps
 
@@ -17,16 +19,26 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
 from core.knowledge_base import KnowledgeBase
 from core.memory import EronMemory
+from core.conversation_summary import ConversationSummarizer, SUMMARY_ENABLED, llm_activity
+from core.conversation_retrieval import ConversationRetriever, RETRIEVAL_ENABLED
 from learning.fast_learning import FastLearning
 from learning.human_conversation import HumanConversationSystem
 from learning.advanced_adult_learning import advanced_adult_learning
 from learning.super_fast_learning import super_learning
 from core.sensitive_memory import SensitiveMemory
+from core.user_export import UserDataExporter
 from core.check import AdultAccessSystem
 from core.adult_personality_system import adult_personality_system
 from core.email_service import EmailService
 from core.emotion_system import EmotionSystem, Emotion
 from core.preferences import PreferencesManager
+from src.debug_trace import tracer, configure_trace, get_trace_config
+from core.turn_tracing import turn_tracer, traced_turn, span, annotate
+from core.database import slow_query_log
+from core.personalization_detector import web_personalization_detector, changed_fields
+from src.logging_system import log_llm_interaction
+from core.config import config
+from core.metrics import metrics, HTTP_REQUEST_SECONDS, LLM_REQUEST_SECONDS, LLM_TOKENS, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -34,6 +46,10 @@ load_dotenv()
 # Inicializar componentes
 knowledge_base = KnowledgeBase(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database'))
 memory = EronMemory()
+# Resumos contínuos das conversas antigas (worker em segundo plano)
+conversation_summarizer = ConversationSummarizer(memory) if SUMMARY_ENABLED else None
+# Índice BM25 do histórico para trazer trocas antigas relevantes ao prompt
+conversation_retriever = ConversationRetriever(memory) if RETRIEVAL_ENABLED else None
 fast_learning = FastLearning()
 human_conversation = HumanConversationSystem()
 sensitive_memory = SensitiveMemory()
@@ -71,6 +87,9 @@ except ImportError as e:
 app.config['APPLICATION_ROOT'] = '/'
 app.config['PREFERRED_URL_SCHEME'] = 'http'
 
+# Mensagens por página no histórico do chat
+CHAT_HISTORY_PAGE_SIZE = 50
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -79,6 +98,122 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# ===== MÉTRICAS =====
+@app.before_request
+def _metrics_start_timer():
+    g.request_started_at = time.perf_counter()
+
+@app.after_request
+def _metrics_record_request(response):
+    started_at = g.pop('request_started_at', None)
+    if started_at is not None:
+        HTTP_REQUEST_SECONDS.labels(
+            request.endpoint or 'unknown', request.method, response.status_code
+        ).observe(time.perf_counter() - started_at)
+    return response
+
+def _token_matches(expected):
+    """Compara o token da requisição (?token= ou Authorization: Bearer) em tempo constante"""
+    provided = request.args.get('token') or request.headers.get('Authorization', '').replace('Bearer ', '', 1)
+    return hmac.compare_digest(provided.encode(), expected.encode())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Métricas do processo web no formato de texto do Prometheus
+
+    Protegidas pelo METRICS_TOKEN ou, se vazio, pelo ADMIN_TOKEN; sem
+    nenhum dos dois a rota fica desativada, como as rotas /admin/*.
+    """
+    if not config.performance.get('metrics_enabled', True):
+        return 'Métricas desativadas', 404
+    
+    token = config.performance.get('metrics_token') or config.security.get('admin_token')
+    if not token:
+        return 'Métricas desativadas (defina METRICS_TOKEN ou ADMIN_TOKEN)', 404
+    if not _token_matches(token):
+        return 'Não autorizado', 401
+    
+    return Response(metrics.render(), mimetype=None, content_type=METRICS_CONTENT_TYPE)
+
+def admin_token_required(f):
+    """Protege rotas /admin/* com o ADMIN_TOKEN (?token= ou Authorization: Bearer)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = config.security.get('admin_token')
+        if not token:
+            return 'Rotas de administração desativadas', 404
+        if not _token_matches(token):
+            return 'Não autorizado', 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+@app.route('/admin/traces')
+@admin_token_required
+def admin_traces():
+    """Turnos mais lentos recentes (JSON resumido ou ?format=chrome para o Chrome Trace Viewer)"""
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    if request.args.get('format') == 'chrome':
+        response = jsonify(turn_tracer.chrome_trace(limit))
+        response.headers['Content-Disposition'] = 'attachment; filename=eron_traces.json'
+        return response
+    return jsonify({'traces': turn_tracer.get_slowest_summary(limit)})
+
+@app.route('/admin/users/<user_id>/export')
+@admin_token_required
+def admin_user_export(user_id):
+    """ZIP com todos os dados do usuário (atendimento e pedidos de privacidade)"""
+    response = Response(UserDataExporter(user_id).iter_zip(), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename=eron_user_{secure_filename(user_id)}.zip'
+    return response
+
+@app.route('/admin/slow-queries', methods=['GET', 'POST'])
+@admin_token_required
+def admin_slow_queries():
+    """
+    Comandos SQL mais caros por banco (requer DB_QUERY_PROFILING=True ou POST enable=1)
+
+    A coleta só é ligada/desligada por POST com enable=1 ou enable=0
+    (formulário ou JSON), nunca por um GET que um link possa disparar.
+    """
+    if request.method == 'POST':
+        enable = str((request.get_json(silent=True) or {}).get('enable', request.form.get('enable', '')))
+        if enable in ('1', 'true', 'True'):
+            slow_query_log.enable()
+        elif enable in ('0', 'false', 'False'):
+            slow_query_log.disable()
+        else:
+            return jsonify({'error': 'enable deve ser 1 ou 0'}), 400
+    
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    return jsonify({
+        'enabled': slow_query_log.enabled,
+        'databases': slow_query_log.get_slowest(request.args.get('database'), limit,
+                                                request.args.get('order_by', 'total'))
+    })
+
+@app.route('/admin/trace', methods=['GET', 'POST'])
+@admin_token_required
+def admin_trace():
+    """
+    Configuração do tracer de depuração em execução
+
+    POST (formulário ou JSON) com level, component, sample_rate e reset
+    altera níveis/amostragem sem reiniciar; GET apenas consulta.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        try:
+            return jsonify(configure_trace(
+                level=data.get('level') or None,
+                component=data.get('component') or None,
+                sample_rate=data.get('sample_rate') if data.get('sample_rate') not in (None, '') else None,
+                reset=str(data.get('reset', '')).lower() in ('1', 'true')
+            ))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    return jsonify(get_trace_config())
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
@@ -95,90 +230,15 @@ def detect_and_save_personalization(user_message, user_id):
     if not user_profile_db:
         return False
     
-    message_lower = user_message.lower().strip()
-    updates = {}
-    
-    # Detectar nome do usuário
-    name_patterns = [
-        r"meu nome é (\w+)",
-        r"me chamo (\w+)", 
-        r"sou (\w+)",
-        r"pode me chamar de (\w+)",
-        r"^(\w+)$"  # Resposta de uma palavra apenas
-    ]
-    
-    for pattern in name_patterns:
-        import re
-        match = re.search(pattern, message_lower)
-        if match:
-            name = match.group(1).capitalize()
-            if len(name) > 1 and name not in ['não', 'sim', 'ok', 'obrigado', 'obrigada']:
-                updates['user_name'] = name
-                break
-    
-    # Detectar nome do assistente 
-    bot_name_patterns = [
-        r"se chame (\w+)",
-        r"seu nome seja (\w+)",
-        r"te chamar de (\w+)",
-        r"quero que se chame (\w+)"
-    ]
-    
-    for pattern in bot_name_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            bot_name = match.group(1).capitalize()
-            if len(bot_name) > 1:
-                updates['bot_name'] = bot_name
-                break
-    
-    # Detectar personalidade do bot
-    personality_patterns = {
-        'amigável': ['amigável', 'amigo', 'amiga', 'legal', 'bacana', 'gentil'],
-        'formal': ['formal', 'profissional', 'sério', 'séria', 'educado'],
-        'casual': ['casual', 'descontraído', 'descontraída', 'relaxado', 'relaxada', 'informal'],
-        'divertido': ['divertido', 'divertida', 'engraçado', 'engraçada', 'brincalhão', 'alegre'],
-        'intelectual': ['intelectual', 'sábio', 'sábia', 'inteligente', 'culto', 'erudito']
-    }
-    
-    for personality, keywords in personality_patterns.items():
-        if any(keyword in message_lower for keyword in keywords):
-            updates['bot_personality'] = personality
-            break
-    
-    # Detectar estilo de linguagem
-    language_patterns = {
-        'simples': ['simples', 'fácil', 'direto', 'básico'],
-        'técnico': ['técnico', 'detalhado', 'específico', 'científico'],
-        'coloquial': ['coloquial', 'gírias', 'informal', 'descontraído'],
-        'eloquente': ['eloquente', 'sofisticado', 'elegante', 'refinado']
-    }
-    
-    for language, keywords in language_patterns.items():
-        if any(keyword in message_lower for keyword in keywords):
-            updates['bot_language'] = language
-            break
-    
-    # Detectar tópicos de interesse (separados por vírgula)
-    topics_patterns = [
-        r"gosto de (.*)",
-        r"me interesso por (.*)",
-        r"quero falar sobre (.*)",
-        r"meus interesses são (.*)",
-        r"tópicos favoritos são (.*)"
-    ]
-    
-    for pattern in topics_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            topics = match.group(1).strip()
-            if len(topics) > 2:
-                updates['preferred_topics'] = topics
-                break
+    updates = web_personalization_detector.detect(user_message)
     
     # Se encontrou informações para salvar
     if updates:
         try:
+            # Gravar apenas se algum campo realmente mudou
+            updates = changed_fields(updates, user_profile_db.get_profile(user_id))
+            if not updates:
+                return False
             print(f"[DEBUG] Salvando automaticamente: {updates}")
             user_profile_db.save_profile(user_id=user_id, **updates)
             return True
@@ -188,21 +248,24 @@ def detect_and_save_personalization(user_message, user_id):
     
     return False
 
+@traced_turn('get_llm_response')
 def get_llm_response(user_message, user_profile=None, user_id=None):
+    annotate(user_id=user_id)
     try:
-        print("[DEBUG LLM] === INÍCIO GET_LLM_RESPONSE ===")
+        tracer.debug('llm', "=== INÍCIO GET_LLM_RESPONSE ===")
         api_url = os.getenv("LM_STUDIO_API_URL")
-        print(f"[DEBUG LLM] API URL: {api_url}")
+        tracer.debug('llm', "API URL: %s", api_url)
         
         if not api_url:
-            print("[DEBUG LLM] Erro: A URL da API do LM Studio não foi encontrada.")
+            tracer.error('llm', "A URL da API do LM Studio não foi encontrada.")
             return None
         
         # SEMPRE consultar o banco de dados antes de responder
         if not user_profile and user_id:
-            user_profile = get_or_create_user_profile(user_id)
+            with span('profile_load'):
+                user_profile = get_or_create_user_profile(user_id)
         elif not user_profile:
-            print("[DEBUG] Nenhum perfil fornecido e nenhum user_id para consulta")
+            tracer.debug('llm', "Nenhum perfil fornecido e nenhum user_id para consulta")
             user_profile = {}
         
         # NOVO: Verificar confusão de papéis antes de processar
@@ -234,15 +297,16 @@ def get_llm_response(user_message, user_profile=None, user_id=None):
         
         # NOVO: Detecção de conversa casual/humana
         # Para conversas simples, usar sistema mais humano e natural
-        conversation_type = human_conversation.detect_conversation_type(user_message)
-        casual_context = human_conversation.detect_casual_context(user_message)
+        with span('human_conversation_detect'):
+            conversation_type = human_conversation.detect_conversation_type(user_message)
+            casual_context = human_conversation.detect_casual_context(user_message)
         is_simple_conversation = conversation_type in [
             'greeting', 'wellbeing', 'gratitude', 'casual_question'
         ]
         
         # Se for conversa simples E não for uma pergunta complexa, usar resposta humana
         if is_simple_conversation and len(user_message.split()) < 15:
-            print(f"[DEBUG] Conversa simples detectada: {conversation_type} | Contexto: {casual_context}")
+            tracer.debug('llm', "Conversa simples detectada: %s | Contexto: %s", conversation_type, casual_context)
             
             # Usar sistema de conversação humana com templates casuais
             if casual_context != 'general_casual':
@@ -266,15 +330,14 @@ def get_llm_response(user_message, user_profile=None, user_id=None):
             if user_id:
                 memory.save_message(user_message, human_response, user_id)
             
-            print(f"[DEBUG] Resposta humana gerada: {human_response[:100]}...")
+            tracer.dump('llm', "Resposta humana gerada", human_response)
             return human_response
         
         # Verificar se a personalização está completa
-        personalization_complete, missing_info = check_personalization_complete(user_profile)
+        with span('personalization_check'):
+            personalization_complete, missing_info = check_personalization_complete(user_profile)
         
-        print(f"[DEBUG] Personalização completa: {personalization_complete}")
-        if not personalization_complete:
-            print(f"[DEBUG] Informações faltando: {missing_info}")
+        tracer.debug('llm', "Personalização completa: %s | Faltando: %s", personalization_complete, missing_info)
         
         # Se personalização incompleta, pedir informações automaticamente
         if not personalization_complete and isinstance(missing_info, list):
@@ -300,13 +363,14 @@ def get_llm_response(user_message, user_profile=None, user_id=None):
                 if fresh_profile and fresh_profile.get('bot_name') and fresh_profile.get('bot_name') != 'ERON':
                     bot_name = fresh_profile.get('bot_name')
                     user_profile = fresh_profile  # Atualizar o perfil com dados frescos
-                    print(f"[DEBUG] Nome do bot encontrado no banco: '{bot_name}'")
+                    tracer.debug('llm', "Nome do bot encontrado no banco: '%s'", bot_name)
         
-        print(f"[DEBUG] Nome FINAL do bot que será usado: '{bot_name}'")
+        tracer.debug('llm', "Nome FINAL do bot que será usado: '%s'", bot_name)
         
         # Personalização completa - usar informações do banco
         user_id = user_profile.get('user_id') if user_profile else user_id
-        user_preferences = preferences_manager.get_preferences(user_id) if user_id else None
+        with span('preferences'):
+            user_preferences = preferences_manager.get_preferences(user_id) if user_id else None
 
         # Aplicar preferências ao prompt
         style_instructions = ""
@@ -335,56 +399,36 @@ def get_llm_response(user_message, user_profile=None, user_id=None):
                 style_instructions += " Sinta-se à vontade para usar emojis apropriados."
             
         # Obter estado emocional atual do bot
-        bot_emotion_state = emotion_system.get_bot_emotion(user_id) if user_id else None
+        with span('emotion_get'):
+            bot_emotion_state = emotion_system.get_bot_emotion(user_id) if user_id else None
         
         # Detectar emoção do usuário
         user_emotion = None
         if user_id:
-            user_emotion, confidence = emotion_system.detect_user_emotion(user_id, user_message)
+            with span('emotion_detect'):
+                user_emotion, confidence = emotion_system.detect_user_emotion(user_id, user_message)
         
         # Obter contexto recente das conversas para continuidade
         recent_context = ""
         if user_id:
-            full_context = memory.get_recent_context(user_id, limit=5)
-            
-            # Filtrar conversas de personalização antigas e respostas problemáticas para evitar confusão
-            filtered_lines = []
-            context_lines = full_context.split('\n') if full_context else []
-            
-            for line in context_lines:
-                # Pular linhas que são perguntas de personalização antigas
-                if any(phrase in line.lower() for phrase in [
-                    'como você gostaria que eu me chamasse',
-                    'para te atender melhor, preciso saber',
-                    'nome do assistente',
-                    'estilo de linguagem'
-                ]):
-                    continue
-                
-                # Pular respostas problemáticas que começam com o nome do bot
-                if any(phrase in line for phrase in [
-                    'Eu me chamo Maya',
-                    'Eu me chamo Aina', 
-                    'Eu me chamo ERON',
-                    'Eu me chamo '
-                ]):
-                    # Remover apenas a parte problemática, manter o resto da resposta
-                    if 'A capital do Brasil' in line or 'capital do Brasil' in line:
-                        # Manter apenas a parte da resposta que responde à pergunta
-                        line = line.split('A capital do Brasil')[0] + 'A capital do Brasil' + line.split('A capital do Brasil')[1] if 'A capital do Brasil' in line else line
-                        line = line.replace('Eu me chamo Maya 💖', '').replace('Eu me chamo Aina 💖', '').replace('Eu me chamo ERON 💖', '').strip()
-                        if line.startswith('A capital') or line.startswith('É ') or len(line.strip()) > 10:
-                            filtered_lines.append(line)
-                    elif len(line.replace('Eu me chamo Maya 💖', '').replace('Eu me chamo Aina 💖', '').replace('Eu me chamo ERON 💖', '').strip()) > 10:
-                        # Se sobrar conteúdo útil após remover a apresentação, manter
-                        cleaned_line = line.replace('Eu me chamo Maya 💖', '').replace('Eu me chamo Aina 💖', '').replace('Eu me chamo ERON 💖', '').strip()
-                        filtered_lines.append(cleaned_line)
-                    continue
-                
-                filtered_lines.append(line)
-            
-            recent_context = '\n'.join(filtered_lines)
-            print(f"[DEBUG] Contexto filtrado: {recent_context[:100]}...")
+            # Conversas de personalização antigas e apresentações do bot já
+            # filtradas na gravação (buffer de turnos recentes do EronMemory)
+            with span('recent_context'):
+                recent_context = memory.get_clean_context(user_id, limit=5)
+            tracer.dump('llm', "Contexto filtrado", recent_context)
+        
+        # Resumo das conversas mais antigas que a janela recente
+        conversation_summary = ""
+        if user_id and conversation_summarizer:
+            with span('conversation_summary'):
+                conversation_summary = conversation_summarizer.get_summary(user_id)
+        
+        # Trocas antigas relacionadas à pergunta atual (fora da janela recente)
+        relevant_context = ""
+        if user_id and conversation_retriever:
+            with span('relevant_context'):
+                relevant_context = conversation_retriever.get_relevant_context(user_id, user_message, skip_recent=5)
+            tracer.dump('llm', "Trocas antigas relevantes", relevant_context)
         
         
         # Obter informações de personalização do perfil do usuário
@@ -398,15 +442,15 @@ def get_llm_response(user_message, user_profile=None, user_id=None):
         # Tratar caso especial de finish_personalization
         if bot_personality == 'finish_personalization':
             bot_personality = 'amigável'  # Usar personalidade padrão
-            print(f"[DEBUG] Convertendo finish_personalization para personalidade padrão: amigável")
+            tracer.debug('llm', "Convertendo finish_personalization para personalidade padrão: amigável")
         
-        # Debug: Imprimir informações do perfil
-        print(f"[DEBUG] Perfil do usuário: {user_profile}")
-        print(f"[DEBUG] Nome do bot extraído: '{bot_name}'")
-        print(f"[DEBUG] Nome do usuário extraído: '{user_name}'")
+        # Debug: perfil completo só em dump amostrado (contém dados pessoais)
+        tracer.dump('llm', "Perfil do usuário", user_profile)
+        tracer.debug('llm', "Nome do bot: '%s' | Nome do usuário: '%s'", bot_name, user_name)
         
         # 🚀 OTIMIZAÇÕES PARA QWEN2.5-4B
-        optimization_hints = fast_learning.optimize_for_qwen(user_message, user_profile)
+        with span('optimize_for_qwen'):
+            optimization_hints = fast_learning.optimize_for_qwen(user_message, user_profile)
         
         # Construir instruções de personalização OTIMIZADAS PARA QWEN
         personality_instructions = f"""<|im_start|>system
@@ -443,11 +487,16 @@ IMPORTANTE SOBRE PERSONALIZAÇÃO:
         if preferred_topics:
             personality_instructions += f"\n- Tópicos preferidos: {preferred_topics}"
             
+        if conversation_summary:
+            personality_instructions += f"\n\nRESUMO DO QUE JÁ CONVERSAMOS:\n{conversation_summary}"
+            
+        if relevant_context:
+            personality_instructions += f"\n\nTROCAS ANTIGAS RELACIONADAS:\n{relevant_context}"
+            
         if recent_context:
             personality_instructions += f"\n\nCONVERSAS ANTERIORES:\n{recent_context}"
             
-        print(f"[DEBUG] Instruções FORÇADAS para IA:")
-        print(personality_instructions)
+        tracer.dump('llm', "Instruções FORÇADAS para IA", personality_instructions)
 
         # Verificar acesso a conteúdo sensível - DUPLA VERIFICAÇÃO
         has_mature_access = user_profile.get('has_mature_access', False) if user_profile else False
@@ -455,53 +504,55 @@ IMPORTANTE SOBRE PERSONALIZAÇÃO:
         # 🔧 CORREÇÃO CRÍTICA: Verificação dupla com sistema de sessões adultas
         # Para garantir que desativações sejam respeitadas imediatamente
         if has_mature_access and user_id:
-            try:
-                # Verificar diretamente o banco de dados da sessão adulta
-                import sqlite3
-                adult_db_path = os.path.join(os.path.dirname(__file__), '..', 'Eron-18', 'Scripts18', 'adult.db')
-                if os.path.exists(adult_db_path):
-                    conn = sqlite3.connect(adult_db_path)
-                    cursor = conn.cursor()
+            with span('adult_session_check'):
+                try:
+                    # Verificar diretamente o banco de dados da sessão adulta
+                    import sqlite3
+                    adult_db_path = os.path.join(os.path.dirname(__file__), '..', 'Eron-18', 'Scripts18', 'adult.db')
+                    if os.path.exists(adult_db_path):
+                        conn = sqlite3.connect(adult_db_path)
+                        cursor = conn.cursor()
                     
-                    # Verificar se existe sessão ativa
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM adult_sessions 
-                        WHERE user_id = ? AND is_active = 1 
-                        AND datetime(expires_at) > datetime('now')
-                    """, (str(user_id),))
+                        # Verificar se existe sessão ativa
+                        cursor.execute("""
+                            SELECT COUNT(*) FROM adult_sessions 
+                            WHERE user_id = ? AND is_active = 1 
+                            AND datetime(expires_at) > datetime('now')
+                        """, (str(user_id),))
                     
-                    active_sessions = cursor.fetchone()[0]
-                    conn.close()
+                        active_sessions = cursor.fetchone()[0]
+                        conn.close()
                     
-                    if active_sessions == 0:
-                        print(f"[DEBUG] has_mature_access={has_mature_access} mas sem sessão ativa - corrigindo")
+                        if active_sessions == 0:
+                            tracer.debug('adult', "has_mature_access=%s mas sem sessão ativa - corrigindo", has_mature_access)
+                            has_mature_access = False
+                    else:
+                        tracer.debug('adult', "Banco adult.db não encontrado - desativando modo adulto")
                         has_mature_access = False
-                else:
-                    print("[DEBUG] Banco adult.db não encontrado - desativando modo adulto")
-                    has_mature_access = False
                     
-            except Exception as e:
-                print(f"[DEBUG] Erro na verificação dupla de sessão adulta: {e}")
-                # Em caso de erro, ser conservador e desativar
-                has_mature_access = False
+                except Exception as e:
+                    tracer.error('adult', "Erro na verificação dupla de sessão adulta: %s", e)
+                    # Em caso de erro, ser conservador e desativar
+                    has_mature_access = False
         
         if has_mature_access:
-            print("[DEBUG] Usuário tem acesso adulto - usando sistema avançado")
+            tracer.debug('adult', "Usuário tem acesso adulto - usando sistema avançado")
             
             # 🧠 SISTEMA SUPER LEARNING (MÁXIMA PRIORIDADE - APRENDE MAIS RÁPIDO)
             try:
-                super_response = super_learning.generate_smart_response(
-                    user_message, user_id, user_profile.get('bot_personality', 'sedutora')
-                )
+                with span('super_learning'):
+                    super_response = super_learning.generate_smart_response(
+                        user_message, user_id, user_profile.get('bot_personality', 'sedutora')
+                    )
                 
                 if super_response and len(super_response) > 15:
                     # Sistema super learning aprendendo automaticamente
                     super_learning.learn_from_interaction(user_message, super_response, 0.85, user_id)
-                    print(f"[DEBUG] 🧠 Sistema Super Learning ativado: {super_response[:60]}...")
+                    tracer.debug('adult', "🧠 Sistema Super Learning ativado")
                     return super_response  # Retorna diretamente sem precisar de system_message
                     
             except Exception as e:
-                print(f"[ERRO] Sistema Super Learning: {e}")
+                tracer.error('adult', "Sistema Super Learning: %s", e)
             
             # Se Super Learning não gerou resposta, usar sistema avançado
             if not response:
@@ -518,13 +569,13 @@ IMPORTANTE SOBRE PERSONALIZAÇÃO:
                             user_id, user_message, advanced_response
                         )
                         
-                        print("[DEBUG] Sistema avançado adulto gerou resposta personalizada")
+                        tracer.debug('adult', "Sistema avançado adulto gerou resposta personalizada")
                         response = advanced_response
                     else:
                         # Fallback para sistema adulto original
                         adult_instructions = adult_personality_system.generate_personality_instructions(user_id)
                         if adult_instructions:
-                            print("[DEBUG] Instruções adultas avançadas geradas com sucesso")
+                            tracer.debug('adult', "Instruções adultas avançadas geradas com sucesso")
                             system_message = f"""{personality_instructions}
 
 {adult_instructions}
@@ -543,7 +594,8 @@ Emoção Detectada do Usuário: {user_emotion if user_emotion else 'desconhecida
                                 "stream": False
                             }
                             
-                            api_response = requests.post(api_url, headers=headers, json=data, timeout=30)
+                            with llm_activity.busy():
+                                api_response = requests.post(api_url, headers=headers, json=data, timeout=30)
                             if api_response.status_code == 200:
                                 response = api_response.json()['choices'][0]['message']['content'].strip()
                             else:
@@ -559,16 +611,17 @@ Emoção Detectada do Usuário: {user_emotion if user_emotion else 'desconhecida
                                 "stream": False
                             }
                         
-                        api_response = requests.post(api_url, headers=headers, json=data, timeout=30)
+                        with llm_activity.busy():
+                            api_response = requests.post(api_url, headers=headers, json=data, timeout=30)
                         if api_response.status_code == 200:
                             response = api_response.json()['choices'][0]['message']['content'].strip()
                         else:
                             response = "Sistema avançado temporariamente indisponível..."
                 
                 except Exception as e:
-                    print(f"[DEBUG] Erro no sistema adulto avançado: {e}")
+                    tracer.error('adult', "Erro no sistema adulto avançado: %s", e)
                     # Fallback para sistema padrão adulto básico
-                    print("[DEBUG] Usando sistema adulto básico como fallback")
+                    tracer.debug('adult', "Usando sistema adulto básico como fallback")
                 
                 # 📋 SISTEMA BÁSICO COMO FALLBACK
                 adult_intensity = user_profile.get('adult_intensity_level', 1)
@@ -671,20 +724,40 @@ Você é um assistente amigável. Mantenha todas as interações apropriadas par
             "max_tokens": 500
         }
 
-        print(f"[DEBUG LLM] Fazendo requisição para: {api_url}")
-        print(f"[DEBUG LLM] Payload: {payload}")
+        tracer.debug('llm', "Fazendo requisição para: %s", api_url)
+        tracer.dump('llm', "Payload", payload)
         
-        response = requests.post(api_url, headers=headers, json=payload, timeout=60)
-        print(f"[DEBUG LLM] Status da resposta: {response.status_code}")
+        llm_started_at = time.perf_counter()
+        try:
+            with span('llm_request'), llm_activity.busy():
+                response = requests.post(api_url, headers=headers, json=payload, timeout=60)
+        except requests.exceptions.RequestException:
+            LLM_REQUEST_SECONDS.labels('error').observe(time.perf_counter() - llm_started_at)
+            raise
+        llm_elapsed = time.perf_counter() - llm_started_at
+        LLM_REQUEST_SECONDS.labels('ok' if response.status_code == 200 else 'http_error').observe(llm_elapsed)
+        tracer.debug('llm', "Status da resposta: %s", response.status_code)
         
         response.raise_for_status()
         
         response_json = response.json()
-        print(f"[DEBUG LLM] Resposta JSON: {response_json}")
+        tracer.dump('llm', "Resposta JSON", response_json)
+        
+        # Tokens reportados pelo servidor (formato OpenAI/LM Studio)
+        usage = response_json.get('usage') or {}
+        for kind in ('prompt_tokens', 'completion_tokens'):
+            if usage.get(kind) is not None:
+                LLM_TOKENS.labels(kind.replace('_tokens', '')).observe(usage[kind])
+        log_llm_interaction(
+            model=response_json.get('model', 'desconhecido'),
+            tokens_used=usage.get('total_tokens', 0),
+            response_time=llm_elapsed * 1000,
+            prompt_type='adult' if has_mature_access else 'default'
+        )
         
         if 'choices' in response_json and len(response_json['choices']) > 0:
             raw_response = response_json['choices'][0]['message']['content'].strip()
-            print(f"[DEBUG LLM] Resposta bruta: {raw_response}")
+            tracer.dump('llm', "Resposta bruta", raw_response)
             
             # NOVO: Processar resposta para evitar confusão de papéis
             # Temporariamente desabilitado para debug
@@ -692,21 +765,19 @@ Você é um assistente amigável. Mantenha todas as interações apropriadas par
             # processed_response = conversation_manager.process_bot_response(raw_response, user_profile)
             
             processed_response = raw_response  # Usar resposta direta temporariamente
-            print(f"[DEBUG LLM] Resposta processada: {processed_response}")
             
-            print("[DEBUG LLM] === FIM GET_LLM_RESPONSE - SUCESSO ===")
+            tracer.debug('llm', "=== FIM GET_LLM_RESPONSE - SUCESSO ===")
             return processed_response
         
-        print("[DEBUG LLM] Erro: Nenhuma choice encontrada na resposta")
+        tracer.error('llm', "Nenhuma choice encontrada na resposta")
         return None
 
     except requests.exceptions.RequestException as e:
-        print(f"[DEBUG LLM] Erro ao conectar com o servidor LM Studio: {e}")
+        tracer.error('llm', "Erro ao conectar com o servidor LM Studio: %s", e)
         return None
     except Exception as e:
-        print(f"[DEBUG LLM] Erro geral em get_llm_response: {e}")
         import traceback
-        print(f"[DEBUG LLM] Traceback: {traceback.format_exc()}")
+        tracer.error('llm', "Erro geral em get_llm_response: %s\n%s", e, traceback.format_exc())
         return None
 
     except requests.exceptions.RequestException as e:
@@ -992,9 +1063,8 @@ def dashboard():
 @login_required
 def chat():
     user_id = session.get('user_id')
-    print(f"[DEBUG CHAT] User ID da sessão: {user_id}")  # Debug
     profile = get_user_profile(user_id)
-    print(f"[DEBUG CHAT] Perfil carregado: {profile}")  # Debug
+    tracer.debug('web', "Chat aberto por %s (perfil completo: %s)", user_id, bool(profile.get('user_age')))
 
     # Se o perfil não estiver completo, redireciona para a personalização
     if not profile.get('user_age'):
@@ -1004,48 +1074,78 @@ def chat():
     user_name = profile.get('user_name', 'Usuário')
     bot_name = profile.get('bot_name', 'Eron')
     
-    # Carregar mensagens específicas do usuário
-    messages = memory.get_all_messages(user_id)
+    # Carregar só a página mais recente; as anteriores vêm de /chat/history
+    page = memory.get_messages_page(user_id, limit=CHAT_HISTORY_PAGE_SIZE)
     bot_emotion = emotion_system.get_bot_emotion(user_id)
     return render_template('chat.html', 
-        messages=messages, 
+        messages=page['messages'], 
+        next_before_id=page['next_before_id'],
         user_name=user_name, 
         bot_name=bot_name,
         bot_emotion=bot_emotion
     )
 
+@app.route('/chat/history', methods=['GET'])
+@login_required
+def chat_history():
+    """Histórico do chat paginado por keyset (?before=<id>&limit=50)"""
+    user_id = session.get('user_id')
+    limit = min(max(request.args.get('limit', CHAT_HISTORY_PAGE_SIZE, type=int), 1), 200)
+    before_id = request.args.get('before', type=int)
+    return jsonify(memory.get_messages_page(user_id, before_id, limit))
+
+@app.route('/chat/history/export', methods=['GET'])
+@login_required
+def chat_history_export():
+    """Histórico completo do usuário em JSONL, gerado em streaming"""
+    user_id = session.get('user_id')
+    response = Response(memory.iter_jsonl(user_id), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = 'attachment; filename=eron_chat_history.jsonl'
+    return response
+
+@app.route('/account/export', methods=['GET'])
+@login_required
+def account_export():
+    """Todos os dados do usuário logado em um ZIP de JSONL, gerado em streaming"""
+    user_id = session.get('user_id')
+    response = Response(UserDataExporter(user_id).iter_zip(), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=eron_meus_dados.zip'
+    return response
+
 @app.route('/send_message', methods=['POST'])
 @login_required  
+@traced_turn('send_message')
 def send_message():
     try:
-        print("[DEBUG] === INÍCIO SEND_MESSAGE ===")
+        tracer.debug('web', "=== INÍCIO SEND_MESSAGE === user_id=%s", session.get('user_id'))
         user_id = session.get('user_id')
-        print(f"[DEBUG] User ID: {user_id}")
+        annotate(user_id=user_id, platform='web')
         
-        profile = get_user_profile(user_id)
-        print(f"[DEBUG] Profile: {profile}")
+        with span('profile_load'):
+            profile = get_user_profile(user_id)
+        tracer.dump('web', "Profile", profile)
         
         if not profile:
-            print("[DEBUG] Erro: Perfil não encontrado")
+            tracer.debug('web', "Perfil não encontrado")
             return jsonify({'error': 'Perfil não encontrado'}), 400
             
         user_message = request.json.get('message', '').strip()
-        print(f"[DEBUG] Mensagem recebida: '{user_message}'")
+        tracer.dump('web', "Mensagem recebida", user_message)
         
         if not user_message:
-            print("[DEBUG] Erro: Mensagem vazia")
+            tracer.debug('web', "Mensagem vazia")
             return jsonify({'error': 'Mensagem vazia'}), 400
         
         user_name = profile.get('user_name', 'Usuário')
         bot_name = profile.get('bot_name', 'Eron')
-        print(f"[DEBUG] Nomes extraídos - User: {user_name}, Bot: {bot_name}")
+        tracer.debug('web', "Nomes extraídos - User: %s, Bot: %s", user_name, bot_name)
         
         # VERIFICAÇÃO ESPECÍFICA: Perguntas sobre nomes usando dados da personalização
         message_lower = user_message.lower().strip()
         
         # Se pergunta sobre SEU nome (do bot)
         if any(phrase in message_lower for phrase in ['qual é seu nome', 'qual seu nome', 'como você se chama']):
-            print("[DEBUG] Pergunta sobre nome do bot detectada")
+            tracer.debug('web', "Pergunta sobre nome do bot detectada")
             return jsonify({
                 'success': True,
                 'response': f"Meu nome é {bot_name}! 😊",
@@ -1055,7 +1155,7 @@ def send_message():
         
         # Se pergunta sobre MEU nome (do usuário) 
         elif any(phrase in message_lower for phrase in ['qual é meu nome', 'qual meu nome', 'como me chamo']):
-            print("[DEBUG] Pergunta sobre nome do usuário detectada")
+            tracer.debug('web', "Pergunta sobre nome do usuário detectada")
             return jsonify({
                 'success': True,
                 'response': f"Seu nome é {user_name}! 😊",
@@ -1063,26 +1163,24 @@ def send_message():
                 'user_name': user_name
             })
         
-        print("[DEBUG] Não é pergunta sobre nome, processando com IA...")
-        
         # Obter preferências emocionais
-        emotion_preferences = emotion_system.get_emotion_preferences(user_id)
-        print(f"[DEBUG] Preferências emocionais: {emotion_preferences}")
+        with span('emotion_preferences'):
+            emotion_preferences = emotion_system.get_emotion_preferences(user_id)
+        tracer.debug('web', "Preferências emocionais: %s", emotion_preferences)
         
         # Usar o perfil atualizado para gerar resposta
-        print("[DEBUG] Chamando get_llm_response...")
         response = get_llm_response(user_message, user_profile=profile, user_id=user_id)
-        print(f"[DEBUG] Resposta da IA: {response}")
+        tracer.dump('web', "Resposta da IA", response)
         
         if not response:
-            print("[DEBUG] Resposta vazia da IA")
+            tracer.debug('web', "Resposta vazia da IA")
             response = "Desculpe, não consegui me conectar com a IA no momento. Por favor, verifique se o servidor do LM Studio está rodando."
         
-        print("[DEBUG] Salvando na memória...")
         # Salvar na memória com user_id
-        memory.save_message(user_message, response, user_id)
+        with span('memory_save'):
+            memory.save_message(user_message, response, user_id)
         
-        print("[DEBUG] === FIM SEND_MESSAGE - SUCESSO ===")
+        tracer.debug('web', "=== FIM SEND_MESSAGE - SUCESSO ===")
         # Retornar resposta via JSON
         return jsonify({
             'success': True,
@@ -1092,9 +1190,8 @@ def send_message():
         })
         
     except Exception as e:
-        print(f"[DEBUG] ERRO GERAL em send_message: {e}")
         import traceback
-        print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+        tracer.error('web', "ERRO GERAL em send_message: %s\n%s", e, traceback.format_exc())
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
     # Detectar emoção do usuário se habilitado
     if emotion_preferences['emotion_detection_enabled']:
@@ -1596,4 +1693,9 @@ if __name__ == '__main__':
     from core.user_profile_db import UserProfileDB
     user_profile_db = UserProfileDB()
     app.user_profile_db = user_profile_db
+    
+    # Jobs de manutenção compartilhados com o bot (cada horário roda em um só processo)
+    if config.database.get('maintenance_enabled', True):
+        from core.maintenance import build_default_scheduler
+        build_default_scheduler(user_profile_db=user_profile_db).start()
     app.run(debug=True, use_reloader=False)
\ No newline at end of file